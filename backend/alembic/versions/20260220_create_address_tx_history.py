@@ -0,0 +1,73 @@
+"""create address transaction history tables
+
+Revision ID: 20260220_address_tx_history
+Revises: 20260122_create_gateway_tables
+Create Date: 2026-02-20
+
+Histórico local de transações por endereço (address_tx_history) e cursores
+de sincronização incremental (address_sync_cursors).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260220_address_tx_history'
+down_revision = '20260122_create_gateway_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Cria tabelas de histórico e cursores."""
+    op.create_table(
+        'address_tx_history',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True, autoincrement=True),
+        sa.Column('address', sa.String(255), nullable=False),
+        sa.Column('network', sa.String(20), nullable=False),
+        sa.Column('tx_hash', sa.String(255), nullable=False),
+        sa.Column('log_index', sa.Integer, nullable=False, server_default='-1'),
+        sa.Column('direction', sa.String(10), nullable=False),
+        sa.Column('from_address', sa.String(255), nullable=True),
+        sa.Column('to_address', sa.String(255), nullable=True),
+        sa.Column('amount', sa.String(50), nullable=False, server_default='0'),
+        sa.Column('fee', sa.String(50), nullable=True),
+        sa.Column('token_symbol', sa.String(20), nullable=True),
+        sa.Column('token_address', sa.String(255), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='confirmed'),
+        sa.Column('block_number', sa.BigInteger, nullable=True),
+        sa.Column('timestamp', sa.DateTime, nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime, nullable=True),
+        sa.UniqueConstraint('network', 'address', 'tx_hash', 'log_index', name='uq_address_tx_history_entry'),
+    )
+    op.create_index(
+        'ix_address_tx_history_page',
+        'address_tx_history',
+        ['address', 'network', 'timestamp', 'tx_hash', 'log_index']
+    )
+    op.create_index(
+        'ix_address_tx_history_token',
+        'address_tx_history',
+        ['address', 'network', 'token_symbol', 'timestamp']
+    )
+
+    op.create_table(
+        'address_sync_cursors',
+        sa.Column('id', sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column('address', sa.String(255), nullable=False),
+        sa.Column('network', sa.String(20), nullable=False),
+        sa.Column('last_block', sa.BigInteger, nullable=True),
+        sa.Column('backfill_cursor', sa.Text, nullable=True),
+        sa.Column('last_synced_at', sa.DateTime, nullable=True),
+        sa.Column('last_error', sa.Text, nullable=True),
+        sa.UniqueConstraint('address', 'network', name='uq_address_sync_cursor'),
+    )
+
+
+def downgrade() -> None:
+    """Remove tabelas de histórico e cursores."""
+    op.drop_table('address_sync_cursors')
+    op.drop_index('ix_address_tx_history_token', table_name='address_tx_history')
+    op.drop_index('ix_address_tx_history_page', table_name='address_tx_history')
+    op.drop_table('address_tx_history')
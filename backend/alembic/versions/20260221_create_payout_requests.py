@@ -0,0 +1,58 @@
+"""create payout requests table
+
+Revision ID: 20260221_payout_requests
+Revises: 20260220_address_tx_history
+Create Date: 2026-02-21
+
+Fila de payouts on-chain (payout_requests) com status por payout para o
+envio em lote (multi-output BTC / Disperse EVM).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260221_payout_requests'
+down_revision = '20260220_address_tx_history'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Cria tabela de payouts."""
+    op.create_table(
+        'payout_requests',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('reference_type', sa.String(30), nullable=False),
+        sa.Column('reference_id', sa.String(64), nullable=False),
+        sa.Column('network', sa.String(20), nullable=False),
+        sa.Column('asset', sa.String(20), nullable=False),
+        sa.Column('to_address', sa.String(255), nullable=False),
+        sa.Column('amount', sa.Numeric(28, 18), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('batch_id', sa.String(36), nullable=True),
+        sa.Column('batch_size', sa.Integer, nullable=True),
+        sa.Column('tx_hash', sa.String(255), nullable=True),
+        sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('error', sa.Text, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column('submitted_at', sa.DateTime, nullable=True),
+        sa.Column('updated_at', sa.DateTime, nullable=True),
+    )
+    op.create_index(
+        'ix_payout_requests_status',
+        'payout_requests',
+        ['status', 'network', 'asset', 'created_at']
+    )
+    op.create_index(
+        'ix_payout_requests_reference',
+        'payout_requests',
+        ['reference_type', 'reference_id']
+    )
+
+
+def downgrade() -> None:
+    """Remove tabela de payouts."""
+    op.drop_index('ix_payout_requests_reference', table_name='payout_requests')
+    op.drop_index('ix_payout_requests_status', table_name='payout_requests')
+    op.drop_table('payout_requests')
@@ -0,0 +1,31 @@
+"""add p2p orders listing index
+
+Revision ID: 20260222_p2p_orders_index
+Revises: 20260221_payout_requests
+Create Date: 2026-02-22
+
+Índice composto para a listagem pública de ordens P2P (filtros por status,
+moeda e tipo com paginação keyset por created_at).
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20260222_p2p_orders_index'
+down_revision = '20260221_payout_requests'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Cria índice da listagem de ordens."""
+    op.create_index(
+        'ix_p2p_orders_status_coin_type_created',
+        'p2p_orders',
+        ['status', 'cryptocurrency', 'order_type', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    """Remove índice da listagem de ordens."""
+    op.drop_index('ix_p2p_orders_status_coin_type_created', table_name='p2p_orders')
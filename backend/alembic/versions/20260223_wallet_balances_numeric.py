@@ -0,0 +1,47 @@
+"""wallet balances numeric
+
+Revision ID: 20260223_balances_numeric
+Revises: 20260222_p2p_orders_index
+Create Date: 2026-02-23
+
+Saldos de wallet_balances passam de double precision para NUMERIC(36, 18):
+as operações do ledger (UPDATE condicional) fazem a aritmética no banco
+sem erro de arredondamento.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260223_balances_numeric'
+down_revision = '20260222_p2p_orders_index'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('available_balance', 'locked_balance', 'total_balance')
+
+
+def upgrade() -> None:
+    """Converte os saldos para NUMERIC(36, 18)."""
+    for column in COLUMNS:
+        op.alter_column(
+            'wallet_balances',
+            column,
+            type_=sa.Numeric(36, 18),
+            existing_type=sa.Float(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::numeric(36, 18)'
+        )
+
+
+def downgrade() -> None:
+    """Volta os saldos para double precision."""
+    for column in COLUMNS:
+        op.alter_column(
+            'wallet_balances',
+            column,
+            type_=sa.Float(),
+            existing_type=sa.Numeric(36, 18),
+            existing_nullable=False,
+            postgresql_using=f'{column}::double precision'
+        )
@@ -0,0 +1,80 @@
+"""balance history journal
+
+Revision ID: 20260224_balance_journal
+Revises: 20260223_balances_numeric
+Create Date: 2026-02-24
+
+balance_history vira journal append-only: índices (user_id, created_at) e
+(user_id, cryptocurrency, created_at) para páginas e "saldo em T", trigger
+que rejeita UPDATE (PostgreSQL) e tabela balance_snapshots com os
+snapshots periódicos por usuário/ativo.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20260224_balance_journal'
+down_revision = '20260223_balances_numeric'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Cria índices do journal, trigger append-only e balance_snapshots."""
+    op.create_index(
+        'ix_balance_history_user_created',
+        'balance_history',
+        ['user_id', 'created_at']
+    )
+    op.create_index(
+        'ix_balance_history_user_crypto_created',
+        'balance_history',
+        ['user_id', 'cryptocurrency', 'created_at']
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Linhas do histórico nunca são reescritas (DELETE continua
+        # permitido para a remoção de contas pelo admin)
+        op.execute("""
+            CREATE OR REPLACE FUNCTION balance_history_append_only() RETURNS trigger AS $$
+            BEGIN
+                RAISE EXCEPTION 'balance_history is append-only';
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute("""
+            CREATE TRIGGER balance_history_no_update
+            BEFORE UPDATE ON balance_history
+            FOR EACH ROW EXECUTE FUNCTION balance_history_append_only()
+        """)
+
+    op.create_table(
+        'balance_snapshots',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('cryptocurrency', sa.String(10), nullable=False),
+        sa.Column('available_balance', sa.Numeric(36, 18), nullable=False),
+        sa.Column('locked_balance', sa.Numeric(36, 18), nullable=False),
+        sa.Column('total_balance', sa.Numeric(36, 18), nullable=False),
+        sa.Column('snapshot_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        'ix_balance_snapshots_user_crypto_at',
+        'balance_snapshots',
+        ['user_id', 'cryptocurrency', 'snapshot_at']
+    )
+
+
+def downgrade() -> None:
+    """Remove balance_snapshots, trigger e índices do journal."""
+    op.drop_index('ix_balance_snapshots_user_crypto_at', table_name='balance_snapshots')
+    op.drop_table('balance_snapshots')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS balance_history_no_update ON balance_history")
+        op.execute("DROP FUNCTION IF EXISTS balance_history_append_only()")
+
+    op.drop_index('ix_balance_history_user_crypto_created', table_name='balance_history')
+    op.drop_index('ix_balance_history_user_created', table_name='balance_history')
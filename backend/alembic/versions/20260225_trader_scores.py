@@ -0,0 +1,50 @@
+"""trader scores
+
+Revision ID: 20260225_trader_scores
+Revises: 20260224_balance_journal
+Create Date: 2026-02-25
+
+Tabela trader_scores: reputação, nível, badges e features de risco de
+fraude por trader, recalculados em lote pelo pipeline de reputação e
+lidos por chave primária.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20260225_trader_scores'
+down_revision = '20260224_balance_journal'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Cria trader_scores."""
+    op.create_table(
+        'trader_scores',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('reputation_score', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('trader_level', sa.String(20), nullable=False, server_default='newcomer'),
+        sa.Column('badges', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_trades', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed_trades', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('disputed_trades', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completion_rate', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('dispute_rate', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('total_volume_brl', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('avg_completion_minutes', sa.Float(), nullable=True),
+        sa.Column('trades_today', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('recent_disputes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('account_age_days', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_trade_at', sa.DateTime(), nullable=True),
+        sa.Column('user_risk_score', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('risk_flags', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Remove trader_scores."""
+    op.drop_table('trader_scores')
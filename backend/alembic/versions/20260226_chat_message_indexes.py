@@ -0,0 +1,43 @@
+"""chat message indexes
+
+Revision ID: 20260226_chat_indexes
+Revises: 20260225_trader_scores
+Create Date: 2026-02-26
+
+Índice (chat_room_id, created_at, id) em p2p_chat_messages para o
+histórico por keyset e índice GIN sobre o tsvector do conteúdo para a
+busca textual (PostgreSQL).
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20260226_chat_indexes'
+down_revision = '20260225_trader_scores'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Cria os índices de histórico e de busca do chat."""
+    op.create_index(
+        'ix_p2p_chat_messages_room_created',
+        'p2p_chat_messages',
+        ['chat_room_id', 'created_at', 'id']
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Mesma expressão usada em services/chat_history.py
+        op.execute("""
+            CREATE INDEX IF NOT EXISTS ix_p2p_chat_messages_content_fts
+            ON p2p_chat_messages
+            USING GIN (to_tsvector('portuguese'::regconfig, COALESCE(content, '')))
+        """)
+
+
+def downgrade() -> None:
+    """Remove os índices de histórico e de busca do chat."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_p2p_chat_messages_content_fts")
+
+    op.drop_index('ix_p2p_chat_messages_room_created', table_name='p2p_chat_messages')
@@ -0,0 +1,30 @@
+"""chat upload sha256
+
+Revision ID: 20260227_chat_upload_sha256
+Revises: 20260226_chat_indexes
+Create Date: 2026-02-27
+
+Hash SHA-256 do conteúdo em p2p_file_uploads: os arquivos do chat passam
+a ser gravados endereçados pelo hash (deduplicação de uploads idênticos).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260227_chat_upload_sha256'
+down_revision = '20260226_chat_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Adiciona content_sha256 e seu índice."""
+    op.add_column('p2p_file_uploads', sa.Column('content_sha256', sa.String(64), nullable=True))
+    op.create_index('ix_p2p_file_uploads_content_sha256', 'p2p_file_uploads', ['content_sha256'])
+
+
+def downgrade() -> None:
+    """Remove content_sha256."""
+    op.drop_index('ix_p2p_file_uploads_content_sha256', table_name='p2p_file_uploads')
+    op.drop_column('p2p_file_uploads', 'content_sha256')
@@ -0,0 +1,51 @@
+"""create notification outbox table
+
+Revision ID: 20260228_notification_outbox
+Revises: 20260227_chat_upload_sha256
+Create Date: 2026-02-28
+
+Outbox de emails transacionais (notification_outbox): os produtores só
+inserem a mensagem; o worker reivindica lotes pendentes pelo índice
+(status, next_attempt_at) e envia pela API em lote do provedor.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260228_notification_outbox'
+down_revision = '20260227_chat_upload_sha256'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Cria tabela da outbox de notificações."""
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('user_id', sa.String(64), nullable=True),
+        sa.Column('to_email', sa.String(255), nullable=False),
+        sa.Column('from_email', sa.String(255), nullable=False),
+        sa.Column('subject', sa.String(500), nullable=False),
+        sa.Column('html', sa.Text, nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column('locked_at', sa.DateTime, nullable=True),
+        sa.Column('provider_message_id', sa.String(100), nullable=True),
+        sa.Column('last_error', sa.Text, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column('sent_at', sa.DateTime, nullable=True),
+    )
+    op.create_index(
+        'ix_notification_outbox_due',
+        'notification_outbox',
+        ['status', 'next_attempt_at']
+    )
+
+
+def downgrade() -> None:
+    """Remove tabela da outbox de notificações."""
+    op.drop_index('ix_notification_outbox_due', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
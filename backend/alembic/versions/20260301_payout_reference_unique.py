@@ -0,0 +1,38 @@
+"""unique payout per reference
+
+Revision ID: 20260301_payout_reference_unique
+Revises: 20260228_notification_outbox
+Create Date: 2026-03-01
+
+Um payout por origem (reference_type, reference_id): um retry do chamador
+reaproveita o payout existente em vez de pagar duas vezes. O índice simples
+ix_payout_requests_reference é substituído pela constraint única.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20260301_payout_reference_unique'
+down_revision = '20260228_notification_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Troca o índice de referência por constraint única."""
+    op.drop_index('ix_payout_requests_reference', table_name='payout_requests')
+    op.create_unique_constraint(
+        'uq_payout_requests_reference',
+        'payout_requests',
+        ['reference_type', 'reference_id']
+    )
+
+
+def downgrade() -> None:
+    """Volta ao índice não único."""
+    op.drop_constraint('uq_payout_requests_reference', 'payout_requests', type_='unique')
+    op.create_index(
+        'ix_payout_requests_reference',
+        'payout_requests',
+        ['reference_type', 'reference_id']
+    )
@@ -0,0 +1,31 @@
+"""payout claim lease
+
+Revision ID: 20260302_payout_claim_lease
+Revises: 20260301_payout_reference_unique
+Create Date: 2026-03-02
+
+Lease do envio de payouts (claimed_by, claimed_at): o lote é reivindicado
+com UPDATE condicional e a retomada só marca para revisão os PROCESSING
+cujo lease expirou, nunca um lote que outro worker ainda está enviando.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20260302_payout_claim_lease'
+down_revision = '20260301_payout_reference_unique'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Adiciona as colunas do lease."""
+    op.add_column('payout_requests', sa.Column('claimed_by', sa.String(64), nullable=True))
+    op.add_column('payout_requests', sa.Column('claimed_at', sa.DateTime, nullable=True))
+
+
+def downgrade() -> None:
+    """Remove as colunas do lease."""
+    op.drop_column('payout_requests', 'claimed_at')
+    op.drop_column('payout_requests', 'claimed_by')
@@ -1,3 +1,4 @@
+import asyncio
 import httpx
 from web3 import Web3
 from typing import Dict, List, Optional, Any, Union
@@ -5,6 +6,9 @@ from decimal import Decimal
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.core.exceptions import BlockchainError
+from app.services.rpc_pool import rpc_pools
+from app.services.gas_oracle_service import gas_oracle_service
+from app.services.confirmation_tracker import ConfirmationTimeout, TxConfirmation, confirmation_tracker
 
 logger = get_logger("evm_client")
 
@@ -46,11 +50,7 @@ class EVMClient:
         self.web3_instances = {}
         for network, config in self.networks.items():
             try:
-                provider = Web3.HTTPProvider(
-                    config["rpc_url"],
-                    request_kwargs={"timeout": 30}
-                )
-                self.web3_instances[network] = Web3(provider)
+                self.web3_instances[network] = rpc_pools.web3(network, config["rpc_url"])
                 logger.info(f"Initialized Web3 for {network}")
             except Exception as e:
                 logger.error(f"Failed to initialize Web3 for {network}: {e}")
@@ -333,16 +333,14 @@ class EVMClient:
             if not web3:
                 return None
             
-            # Get current gas price from RPC
-            current_gas_price = web3.eth.gas_price
-            
-            # Simple estimation strategy
-            # In production, you might want to use EIP-1559 or gas station APIs
+            # Shared EIP-1559 oracle (fee history served from memory);
+            # values are maxFeePerGas per speed
+            estimate = await asyncio.to_thread(gas_oracle_service.get_estimate, network, web3)
             gas_prices = {
-                "slow": int(current_gas_price * 0.8),
-                "standard": int(current_gas_price),
-                "fast": int(current_gas_price * 1.2),
-                "instant": int(current_gas_price * 1.5)
+                "slow": estimate.max_fee("slow"),
+                "standard": estimate.max_fee("standard"),
+                "fast": estimate.max_fee("fast"),
+                "instant": int(estimate.max_fee("fast") * 1.25)
             }
             
             logger.debug(f"Gas prices for {network}: {gas_prices}")
@@ -394,6 +392,28 @@ class EVMClient:
         except Exception as e:
             logger.error(f"Error getting transaction receipt: {e}")
             return None
+    
+    async def wait_for_confirmation(
+        self,
+        tx_hash: str,
+        network: str,
+        confirmations: int = 1,
+        timeout: float = 120
+    ) -> Optional[TxConfirmation]:
+        """
+        Wait until a transaction is mined with the given confirmations.
+        
+        Receipts are polled by the shared confirmation tracker (one batched
+        RPC per block for every pending hash) instead of a loop per caller.
+        
+        Returns:
+            TxConfirmation or None on timeout
+        """
+        try:
+            return await confirmation_tracker.wait(network, tx_hash, timeout=timeout, confirmations=confirmations)
+        except (asyncio.TimeoutError, ConfirmationTimeout):
+            logger.warning(f"Timeout waiting for confirmation: {tx_hash}")
+            return None
 
 # Global instance
 evm_client = EVMClient()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -30,6 +30,18 @@ class Settings(BaseSettings):
     BSC_RPC_URL: str = "https://bsc-dataseed.binance.org"
     BASE_RPC_URL: str = "https://mainnet.base.org"
     
+    # Pool de RPCs (failover / hedge): RPCs extras por rede, JSON no .env
+    # ex: RPC_POOL_URLS='{"polygon": ["https://...", "https://..."]}'
+    RPC_POOL_URLS: Dict[str, List[str]] = {}
+    RPC_POOL_PUBLIC_FALLBACKS: bool = False  # RPCs públicos como reserva (opt-in: terceiros veem leituras)
+    RPC_POOL_PROBE_SECONDS: int = 30  # Sonda endpoints removidos do rodízio
+    RPC_HEDGE_ENABLED: bool = False  # Hedge em leituras críticas (saldo)
+    
+    # Gas oracle (EIP-1559, eth_feeHistory em memória)
+    GAS_ORACLE_ENABLED: bool = True
+    GAS_ORACLE_NETWORKS: List[str] = ["ethereum", "polygon", "bsc", "base"]
+    GAS_ORACLE_POLL_SECONDS: int = 12
+    
     # Platform Wallet (para enviar crypto aos usuários)
     PLATFORM_WALLET_PRIVATE_KEY: Optional[str] = None
     PLATFORM_WALLET_ADDRESS: Optional[str] = None  # Endereço da carteira da plataforma (destino de vendas)
@@ -37,10 +49,39 @@ class Settings(BaseSettings):
     # Platform BTC Wallet (para enviar Bitcoin)
     PLATFORM_BTC_ADDRESS: Optional[str] = None
     PLATFORM_BTC_PRIVATE_KEY_WIF: Optional[str] = None  # Private key em formato WIF
+
+    # Payouts em lote (várias saídas em uma transação)
+    PAYOUT_BATCH_ENABLED: bool = False
+    PAYOUT_BATCH_WINDOW_SECONDS: int = 10  # Janela de agrupamento por (rede, ativo)
+    PAYOUT_BATCH_MAX_SIZE: int = 100
+    PAYOUT_BATCH_WAIT_SECONDS: int = 60  # Quanto o chamador espera pela liquidação do lote
+    PAYOUT_CONFIRMATION_TIMEOUT_SECONDS: int = 1800  # Espera pelo receipt antes de deixar para a retomada
+    PAYOUT_LEASE_SECONDS: int = 900  # PROCESSING reivindicado há mais tempo que isso é considerado abandonado
+    PAYOUT_RECOVERY_SECONDS: int = 60  # Intervalo da retomada (uma passada por intervalo no cluster)
+    DISPERSE_CONTRACT_ADDRESS: str = "0xD152f549545093347A162Dce210e7293f1452150"  # disperse.app
     
     # Gateway HD Wallet (para derivação de endereços únicos por pagamento)
     # Use a mesma mnemonic da plataforma ou gere uma exclusiva para o gateway
     GATEWAY_MASTER_MNEMONIC: Optional[str] = None  # 12 ou 24 palavras BIP39
+    GATEWAY_ADDRESS_POOL_SIZE: int = 50  # Endereços pré-derivados por merchant/moeda/rede
+    GATEWAY_PAYMENT_WATCHER_ENABLED: bool = True  # Detecta pagamentos crypto bloco a bloco (redes EVM)
+    
+    # P2P Order Book em memória (listagens top-N + feed WebSocket)
+    P2P_ORDER_BOOK_ENABLED: bool = True
+    P2P_ORDER_BOOK_RECONCILE_SECONDS: int = 60  # Verificação de consistência com o banco
+    P2P_STATS_RECONCILE_SECONDS: int = 900  # Recontagem dos contadores de trader a partir de p2p_trades
+    REPUTATION_SCORING_INTERVAL_SECONDS: int = 3600  # Recalculo completo de trader_scores (eventos de trade: lote a cada 5s)
+    
+    # Snapshots de saldo (consultas "saldo em T" sem replay do histórico)
+    BALANCE_SNAPSHOT_INTERVAL_SECONDS: int = 3600
+    
+    # Chat P2P: fan-out dos WebSockets entre workers via Redis pub/sub (REDIS_URL)
+    CHAT_REDIS_FANOUT_ENABLED: bool = True
+    
+    # Outbox de emails transacionais (envio em lote pelo worker)
+    NOTIFICATION_OUTBOX_ENABLED: bool = True
+    NOTIFICATION_OUTBOX_POLL_SECONDS: int = 2  # Espera quando a fila está vazia (enqueue acorda o worker)
+    NOTIFICATION_OUTBOX_CONCURRENCY: int = 4  # Requisições de lote simultâneas ao provedor
     
     # System Blockchain Wallet (para receber taxas e comissões)
     SYSTEM_BLOCKCHAIN_WALLET_ID: str = "545473df-0dd4-4bfa-a43f-06721a43af63"
@@ -89,6 +130,7 @@ class Settings(BaseSettings):
     # Cache settings
     CACHE_TTL_PRICES: int = 60  # 1 minute
     CACHE_TTL_BALANCE: int = 30  # 30 seconds
+    CACHE_TTL_BALANCE_QUIET: int = 300  # 5 minutes (endereços sem movimentação recente)
     
     # WebAuthn/Biometria Configuration
     WEBAUTHN_RP_ID: str = "localhost"
@@ -7,6 +7,7 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request as StarletteRequest
@@ -19,6 +20,22 @@ from app.core.exceptions import BaseCustomException
 from app.services.cache_service import cache_service
 from app.services.cache_service import cache_service
 from app.services.platform_settings_service import platform_settings_service
+from app.services.address_index_service import load_watched_addresses
+from app.services.chain_adapters import http_pool
+from app.services.gas_oracle_service import gas_oracle_service
+from app.services.rpc_pool import rpc_pools
+from app.services.confirmation_tracker import confirmation_tracker
+from app.services.gateway.address_pool import gateway_address_pool
+from app.services.gateway.payment_watcher import gateway_payment_watcher
+from app.services.p2p_order_book_service import p2p_order_book
+from app.services.p2p_matching_engine import p2p_matching_engine
+from app.services.balance_journal import balance_journal
+from app.services.p2p_stats_service import p2p_stats_service
+from app.services.reputation_scoring import reputation_scoring
+from app.services.chat_fanout import chat_fanout
+from app.services.chat_presence import chat_presence
+from app.services.notifications.outbox import notification_outbox
+from app.services.payout_batch_service import payout_batch_service
 
 # Security middleware
 from app.middleware.security import SecurityMiddleware, RateLimitMiddleware
@@ -80,6 +97,58 @@ async def lifespan(app: FastAPI):
         except Exception as cache_error:
             logger.warning(f"⚠️ Cache service failed to connect: {cache_error}")
         
+        # Carregar índice de endereços monitorados (em background)
+        if db_connected:
+            asyncio.create_task(load_watched_addresses())
+        
+        # Pool de endereços pré-derivados do gateway (em background)
+        if db_connected and settings.GATEWAY_MASTER_MNEMONIC:
+            asyncio.create_task(gateway_address_pool.warm())
+        
+        # Payment watcher do gateway (pagamentos crypto detectados por bloco)
+        if db_connected and settings.GATEWAY_PAYMENT_WATCHER_ENABLED:
+            asyncio.create_task(gateway_payment_watcher.load())
+            gateway_payment_watcher.start()
+        
+        # Order book P2P em memória (rebuild do banco + reconciliação periódica)
+        if db_connected and settings.P2P_ORDER_BOOK_ENABLED:
+            asyncio.create_task(p2p_order_book.load())
+            p2p_order_book.start(settings.P2P_ORDER_BOOK_RECONCILE_SECONDS)
+            p2p_matching_engine.start()
+        
+        # Snapshots periódicos de saldo (journal append-only)
+        if db_connected:
+            balance_journal.start(settings.BALANCE_SNAPSHOT_INTERVAL_SECONDS)
+        
+        # Reconciliação dos contadores P2P (trader_profiles / user_reputations)
+        # e pipeline de scores de reputação/fraude (trader_scores)
+        if db_connected:
+            p2p_stats_service.start(settings.P2P_STATS_RECONCILE_SECONDS)
+            reputation_scoring.start(settings.REPUTATION_SCORING_INTERVAL_SECONDS)
+        
+        # Fan-out do chat entre workers (Redis pub/sub) e heartbeat de presença
+        if settings.CHAT_REDIS_FANOUT_ENABLED:
+            await chat_fanout.start(settings.REDIS_URL)
+        chat_presence.start()
+        
+        # Outbox de notificações (emails em lote, fora das requisições)
+        if db_connected and settings.NOTIFICATION_OUTBOX_ENABLED:
+            notification_outbox.start(
+                settings.NOTIFICATION_OUTBOX_POLL_SECONDS,
+                settings.NOTIFICATION_OUTBOX_CONCURRENCY
+            )
+        
+        # Retomada de payouts abandonados (fila, envios com lease expirado, receipts)
+        if db_connected and settings.PAYOUT_BATCH_ENABLED:
+            payout_batch_service.start(settings.PAYOUT_RECOVERY_SECONDS)
+        
+        # Probe dos RPCs removidos do rodízio (voltam sem esperar tráfego)
+        rpc_pools.start()
+        
+        # Gas oracle EIP-1559 (fee history em memória)
+        if settings.GAS_ORACLE_ENABLED:
+            gas_oracle_service.start()
+        
         logger.info("🎉 Wolknow Backend started successfully")
         yield
         
@@ -90,6 +159,20 @@ async def lifespan(app: FastAPI):
         # Shutdown
         logger.info("👋 Shutting down Wolknow Backend...")
         await cache_service.disconnect()
+        await gas_oracle_service.stop()
+        await rpc_pools.stop()
+        await gateway_payment_watcher.stop()
+        await p2p_order_book.stop()
+        await p2p_matching_engine.stop()
+        await p2p_stats_service.stop()
+        await reputation_scoring.stop()
+        await balance_journal.stop()
+        await chat_fanout.stop()
+        await chat_presence.stop()
+        await notification_outbox.stop()
+        await payout_batch_service.stop()
+        await confirmation_tracker.stop()
+        await http_pool.aclose()
 
 # Create FastAPI app
 # Use root_path to handle reverse proxy prefix /v1
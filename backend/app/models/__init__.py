@@ -14,6 +14,9 @@ from .wallet import Wallet
 from .address import Address
 from .address_book import AddressBook, WalletType as AddressBookWalletType
 from .transaction import Transaction
+from .transaction_history import AddressTransaction, AddressSyncCursor
+from .payout import PayoutRequest, PayoutStatus, PayoutReferenceType
+from .notification_outbox import NotificationOutbox, OutboxStatus
 from .two_factor import TwoFactorAuth
 from .webauthn import WebAuthnCredential
 from .system_wallet import SystemWallet, FeeHistory, FeeType, FeeStatus
@@ -94,7 +97,18 @@ __all__ = [
     
     # Transaction
     "Transaction",
+    "AddressTransaction",
+    "AddressSyncCursor",
     
+    # Payouts (fila de saídas on-chain)
+    "PayoutRequest",
+    "PayoutStatus",
+    "PayoutReferenceType",
+
+    # Notification Outbox (fila de emails)
+    "NotificationOutbox",
+    "OutboxStatus",
+
     # Two Factor Auth
     "TwoFactorAuth",
     
@@ -8,7 +8,7 @@ for P2P trading, escrow, and other operations.
 Author: HOLD Wallet Team
 """
 
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Float, Numeric, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -33,10 +33,10 @@ class WalletBalance(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     cryptocurrency = Column(String(10), nullable=False)  # BTC, ETH, USDT, etc
     
-    # Balance tracking
-    available_balance = Column(Float, default=0.0, nullable=False)  # Can be used
-    locked_balance = Column(Float, default=0.0, nullable=False)     # Frozen in escrow/trades
-    total_balance = Column(Float, default=0.0, nullable=False)      # available + locked
+    # Balance tracking - NUMERIC exato no banco (aritmética do ledger), float no Python
+    available_balance = Column(Numeric(36, 18, asdecimal=False), default=0.0, nullable=False)  # Can be used
+    locked_balance = Column(Numeric(36, 18, asdecimal=False), default=0.0, nullable=False)     # Frozen in escrow/trades
+    total_balance = Column(Numeric(36, 18, asdecimal=False), default=0.0, nullable=False)      # available + locked
     
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -91,6 +91,12 @@ class BalanceHistory(Base):
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Journal append-only: páginas e "saldo em T" por range scan
+    __table_args__ = (
+        Index('ix_balance_history_user_created', 'user_id', 'created_at'),
+        Index('ix_balance_history_user_crypto_created', 'user_id', 'cryptocurrency', 'created_at'),
+    )
+    
     def to_dict(self):
         """Convert model to dictionary"""
         return {
@@ -105,3 +111,38 @@ class BalanceHistory(Base):
             'reason': self.reason,
             'created_at': self.created_at.isoformat(),
         }
+
+
+class BalanceSnapshot(Base):
+    """
+    Snapshot periódico do saldo de um usuário/ativo.
+    
+    "Saldo em T" = último snapshot <= T + última linha do histórico entre
+    o snapshot e T, sem replay do histórico inteiro.
+    """
+    __tablename__ = "balance_snapshots"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    cryptocurrency = Column(String(10), nullable=False)
+    
+    available_balance = Column(Numeric(36, 18, asdecimal=False), nullable=False)
+    locked_balance = Column(Numeric(36, 18, asdecimal=False), nullable=False)
+    total_balance = Column(Numeric(36, 18, asdecimal=False), nullable=False)
+    
+    snapshot_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_balance_snapshots_user_crypto_at', 'user_id', 'cryptocurrency', 'snapshot_at'),
+    )
+    
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            'user_id': str(self.user_id),
+            'cryptocurrency': self.cryptocurrency,
+            'available_balance': self.available_balance,
+            'locked_balance': self.locked_balance,
+            'total_balance': self.total_balance,
+            'snapshot_at': self.snapshot_at.isoformat(),
+        }
@@ -8,7 +8,7 @@ incluindo envio de comprovantes e histórico de conversas.
 Author: HOLD Wallet Team
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum as SQLEnum, JSON, Index, DDL, event
 from sqlalchemy.orm import relationship
 from enum import Enum
 import uuid
@@ -79,9 +79,39 @@ class ChatMessage(Base):
     chat_room = relationship("ChatRoom", back_populates="messages")
     sender = relationship("User")
     
+    __table_args__ = (
+        # Histórico por sala em ordem (keyset "carregar anteriores")
+        Index("ix_p2p_chat_messages_room_created", "chat_room_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<ChatMessage(sender_id={self.sender_id}, type={self.message_type})>"
 
+
+# Busca textual nas mensagens (ver services/chat_history.py)
+# PostgreSQL: índice GIN sobre o tsvector do conteúdo (mesma expressão da query)
+CHAT_SEARCH_CONFIG = "'portuguese'::regconfig"
+CHAT_SEARCH_VECTOR = f"to_tsvector({CHAT_SEARCH_CONFIG}, COALESCE(content, ''))"
+
+event.listen(ChatMessage.__table__, "after_create", DDL(
+    f"CREATE INDEX IF NOT EXISTS ix_p2p_chat_messages_content_fts "
+    f"ON p2p_chat_messages USING GIN ({CHAT_SEARCH_VECTOR})"
+).execute_if(dialect="postgresql"))
+
+# SQLite (desenvolvimento local): tabela FTS5 sobre o rowid, mantida por triggers
+for _statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS p2p_chat_messages_fts "
+    "USING fts5(content, content='p2p_chat_messages', content_rowid='rowid')",
+    "CREATE TRIGGER IF NOT EXISTS p2p_chat_messages_fts_ai AFTER INSERT ON p2p_chat_messages BEGIN "
+    "INSERT INTO p2p_chat_messages_fts(rowid, content) VALUES (new.rowid, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS p2p_chat_messages_fts_ad AFTER DELETE ON p2p_chat_messages BEGIN "
+    "INSERT INTO p2p_chat_messages_fts(p2p_chat_messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS p2p_chat_messages_fts_au AFTER UPDATE OF content ON p2p_chat_messages BEGIN "
+    "INSERT INTO p2p_chat_messages_fts(p2p_chat_messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content); "
+    "INSERT INTO p2p_chat_messages_fts(rowid, content) VALUES (new.rowid, new.content); END",
+):
+    event.listen(ChatMessage.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
 class FileUpload(Base):
     """Arquivos enviados no chat (comprovantes, documentos)"""
     __tablename__ = "p2p_file_uploads"
@@ -96,6 +126,7 @@ class FileUpload(Base):
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer, nullable=False)
     mime_type = Column(String(100), nullable=False)
+    content_sha256 = Column(String(64), nullable=True, index=True)  # arquivo em disco é endereçado pelo hash
     
     # Verificação de segurança
     is_verified = Column(Boolean, default=False)
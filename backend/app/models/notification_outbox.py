@@ -0,0 +1,73 @@
+"""
+📨 Notification Outbox - Fila de emails transacionais
+=====================================================
+
+Os produtores (NotificationService) só inserem uma linha aqui, pela sessão
+própria da outbox; o NotificationOutboxWorker reivindica lotes com
+FOR UPDATE SKIP LOCKED e envia pela API em lote do provedor, com
+tentativas e backoff por mensagem.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index
+from datetime import datetime
+import enum
+import uuid
+
+from app.core.db import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    """Status de uma mensagem da outbox"""
+    PENDING = "pending"    # Aguardando envio (ou nova tentativa em next_attempt_at)
+    SENDING = "sending"    # Reivindicada por um worker (locked_at)
+    SENT = "sent"          # Aceita pelo provedor (provider_message_id)
+    FAILED = "failed"      # Esgotou as tentativas
+
+
+class NotificationOutbox(Base):
+    """Email aguardando entrega pelo worker da outbox"""
+    __tablename__ = "notification_outbox"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    # Destinatário / origem
+    user_id = Column(String(64), nullable=True)
+    to_email = Column(String(255), nullable=False)
+    from_email = Column(String(255), nullable=False)
+
+    # Conteúdo já renderizado no idioma do usuário
+    subject = Column(String(500), nullable=False)
+    html = Column(Text, nullable=False)
+
+    # Entrega
+    status = Column(String(20), nullable=False, default=OutboxStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    provider_message_id = Column(String(100), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_notification_outbox_due', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "to_email": self.to_email,
+            "subject": self.subject,
+            "status": self.status,
+            "attempts": self.attempts,
+            "next_attempt_at": self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            "provider_message_id": self.provider_message_id,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None,
+        }
@@ -8,7 +8,7 @@ escrow, disputes, and reputation management.
 Author: HOLD Wallet Team
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, Float, JSON, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, Float, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -48,6 +48,11 @@ class P2POrder(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Listagem pública: filtros de status/moeda/tipo + ordenação por data (keyset)
+        Index('ix_p2p_orders_status_coin_type_created', 'status', 'cryptocurrency', 'order_type', 'created_at'),
+    )
+
 class P2PMatch(Base):
     """Matched P2P orders"""
     __tablename__ = "p2p_matches"
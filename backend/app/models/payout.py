@@ -0,0 +1,96 @@
+"""
+📤 Payout Requests - Fila de saídas on-chain da plataforma
+==========================================================
+
+Cada transferência de saída (depósito do Instant Trade, pagamento do
+EarnPool, comissão de indicação) vira uma linha aqui. O PayoutBatchService
+agrupa as linhas por (rede, ativo) e envia várias em uma única transação;
+o status é acompanhado por payout até o receipt on-chain.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, Text, Numeric, Index, UniqueConstraint
+from datetime import datetime
+import enum
+import uuid
+
+from app.core.db import Base
+
+
+class PayoutStatus(str, enum.Enum):
+    """Status de um payout"""
+    QUEUED = "queued"            # Aguardando a janela de agrupamento
+    PROCESSING = "processing"    # Lote sendo montado/enviado
+    SUBMITTED = "submitted"      # Transação transmitida (tx_hash definido)
+    CONFIRMED = "confirmed"      # Receipt com sucesso on-chain
+    FAILED = "failed"            # Comprovadamente não enviado, ou revertido on-chain
+    NEEDS_REVIEW = "needs_review"  # Envio com resultado incerto: verificar on-chain, nunca reenviar sozinho
+
+
+class PayoutReferenceType(str, enum.Enum):
+    """Origem do payout"""
+    INSTANT_TRADE = "instant_trade"
+    EARNPOOL = "earnpool"
+    REFERRAL = "referral"
+
+
+class PayoutRequest(Base):
+    """Transferência de saída da carteira da plataforma"""
+    __tablename__ = "payout_requests"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    # Origem (ex: instant_trade + trade.id)
+    reference_type = Column(String(30), nullable=False)
+    reference_id = Column(String(64), nullable=False)
+
+    # Destino
+    network = Column(String(20), nullable=False)
+    asset = Column(String(20), nullable=False)  # BTC, MATIC, USDT...
+    to_address = Column(String(255), nullable=False)
+    amount = Column(Numeric(28, 18), nullable=False)
+
+    # Acompanhamento
+    status = Column(String(20), nullable=False, default=PayoutStatus.QUEUED.value)
+    batch_id = Column(String(36), nullable=True)  # Payouts do mesmo lote compartilham tx_hash
+    batch_size = Column(Integer, nullable=True)
+    tx_hash = Column(String(255), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    # Lease do envio: worker que reivindicou o lote (PROCESSING) e quando
+    claimed_by = Column(String(64), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    submitted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_payout_requests_status', 'status', 'network', 'asset', 'created_at'),
+        # Um payout por origem: retry do chamador nunca paga duas vezes
+        UniqueConstraint('reference_type', 'reference_id', name='uq_payout_requests_reference'),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "reference_type": self.reference_type,
+            "reference_id": self.reference_id,
+            "network": self.network,
+            "asset": self.asset,
+            "to_address": self.to_address,
+            "amount": str(self.amount),
+            "status": self.status,
+            "batch_id": self.batch_id,
+            "batch_size": self.batch_size,
+            "tx_hash": self.tx_hash,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "submitted_at": self.submitted_at.isoformat() if self.submitted_at else None,
+        }
+
+    def __repr__(self):
+        return f"<PayoutRequest(id='{self.id}', {self.amount} {self.asset} -> {self.to_address}, status='{self.status}')>"
@@ -341,3 +341,38 @@ class TradeFeedback(Base):
         CheckConstraint('buyer_satisfaction >= 1 AND buyer_satisfaction <= 5', name='check_buyer_satisfaction_range'),
         CheckConstraint('seller_satisfaction >= 1 AND seller_satisfaction <= 5', name='check_seller_satisfaction_range'),
     )
+
+class TraderScore(Base):
+    """
+    Scores pré-calculados por trader (pipeline em lote).
+    
+    Uma linha por usuário, lida por chave primária: reputação, nível,
+    badges (bitmask) e features de risco de fraude do usuário.
+    """
+    __tablename__ = "trader_scores"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    
+    # Reputação
+    reputation_score = Column(Float, nullable=False, default=0.0)  # 0-100
+    trader_level = Column(String(20), nullable=False, default=TraderLevel.NEWCOMER.value)
+    badges = Column(Integer, nullable=False, default=0)  # bitmask (ordem de REPUTATION_BADGES)
+    
+    # Features
+    total_trades = Column(Integer, nullable=False, default=0)
+    completed_trades = Column(Integer, nullable=False, default=0)
+    disputed_trades = Column(Integer, nullable=False, default=0)
+    completion_rate = Column(Float, nullable=False, default=0.0)
+    dispute_rate = Column(Float, nullable=False, default=0.0)
+    total_volume_brl = Column(Float, nullable=False, default=0.0)
+    avg_completion_minutes = Column(Float, nullable=True)
+    trades_today = Column(Integer, nullable=False, default=0)
+    recent_disputes = Column(Integer, nullable=False, default=0)
+    account_age_days = Column(Integer, nullable=False, default=0)
+    last_trade_at = Column(DateTime, nullable=True)
+    
+    # Risco de fraude do usuário (parte independente da transação)
+    user_risk_score = Column(Float, nullable=False, default=0.0)
+    risk_flags = Column(Integer, nullable=False, default=0)  # bitmask (ordem de RISK_FLAGS)
+    
+    computed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
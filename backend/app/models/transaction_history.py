@@ -0,0 +1,101 @@
+"""
+📜 Transaction History - Histórico local de transações por endereço
+===================================================================
+
+Histórico persistente, preenchido incrementalmente a partir dos explorers,
+para que `GET /wallets/{wallet_id}/transactions` seja servido por uma única
+query indexada com paginação keyset (timestamp, tx_hash).
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Text, Index, UniqueConstraint
+from datetime import datetime
+
+from app.core.db import Base
+
+
+class AddressTransaction(Base):
+    """Uma movimentação (nativa ou token) de um endereço monitorado"""
+    __tablename__ = "address_tx_history"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+
+    # Endereço dono do histórico (EVM sempre em minúsculas)
+    address = Column(String(255), nullable=False)
+    network = Column(String(20), nullable=False)
+
+    # Dados da transação
+    tx_hash = Column(String(255), nullable=False)
+    log_index = Column(Integer, nullable=False, default=-1)  # -1 = transferência nativa
+    direction = Column(String(10), nullable=False)  # in, out, self
+    from_address = Column(String(255), nullable=True)
+    to_address = Column(String(255), nullable=True)
+    amount = Column(String(50), nullable=False, default="0")  # String para evitar perda de precisão
+    fee = Column(String(50), nullable=True)
+
+    # Token (NULL = moeda nativa da rede)
+    token_symbol = Column(String(20), nullable=True)
+    token_address = Column(String(255), nullable=True)
+
+    # Status na blockchain
+    status = Column(String(20), nullable=False, default="confirmed")  # pending, confirmed, failed
+    block_number = Column(BigInteger, nullable=True)
+    timestamp = Column(DateTime, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('network', 'address', 'tx_hash', 'log_index', name='uq_address_tx_history_entry'),
+        # Página de histórico: WHERE address/network ORDER BY timestamp DESC, tx_hash DESC
+        Index('ix_address_tx_history_page', 'address', 'network', 'timestamp', 'tx_hash', 'log_index'),
+        Index('ix_address_tx_history_token', 'address', 'network', 'token_symbol', 'timestamp'),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.tx_hash,
+            "hash": self.tx_hash,
+            "network": self.network,
+            "type": "receive" if self.direction == "in" else "send",
+            "direction": self.direction,
+            "from_address": self.from_address,
+            "to_address": self.to_address,
+            "amount": self.amount,
+            "fee": self.fee,
+            "token_symbol": self.token_symbol,
+            "token_address": self.token_address,
+            "status": self.status,
+            "block_number": self.block_number,
+            "timestamp": self.timestamp,
+            "created_at": self.timestamp,
+        }
+
+    def __repr__(self):
+        return f"<AddressTransaction(network='{self.network}', hash='{self.tx_hash}', direction='{self.direction}')>"
+
+
+class AddressSyncCursor(Base):
+    """Cursor de sincronização incremental por (endereço, rede)"""
+    __tablename__ = "address_sync_cursors"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    address = Column(String(255), nullable=False)
+    network = Column(String(20), nullable=False)
+
+    # Maior bloco já sincronizado (próxima sync começa daqui)
+    last_block = Column(BigInteger, nullable=True)
+    # Backfill de histórico antigo ainda não concluído (ex: último txid visto no Blockstream)
+    backfill_cursor = Column(Text, nullable=True)
+
+    last_synced_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('address', 'network', name='uq_address_sync_cursor'),
+    )
+
+    def __repr__(self):
+        return f"<AddressSyncCursor(network='{self.network}', address='{self.address}', last_block={self.last_block})>"
@@ -26,6 +26,7 @@ from app.core.security import get_current_user
 from app.models.user import User
 from app.services.system_blockchain_wallet_service import system_wallet_service
 from app.services.system_wallet_send_service import system_wallet_send_service
+from app.services.confirmation_tracker import confirmation_tracker
 from app.models.system_blockchain_wallet import (
     SystemBlockchainWallet,
     SystemBlockchainAddress,
@@ -2299,8 +2300,8 @@ async def emergency_transfer_all_funds(
                             "tx_hash": tx_hash.hex()
                         })
                         
-                        # Aguardar confirmação
-                        w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+                        # Aguardar confirmação (sem bloquear o event loop)
+                        await confirmation_tracker.wait(network, tx_hash.hex(), timeout=120)
                         
                 except Exception as e:
                     errors.append(f"{token_name}: {str(e)}")
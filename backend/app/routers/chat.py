@@ -18,6 +18,10 @@ import asyncio
 
 from app.db.database import get_db
 from app.services.chat_service import chat_service
+from app.services.chat_history import chat_history
+from app.services.chat_presence import chat_presence
+from app.services.chat_unread import chat_unread
+from app.utils.keyset import decode_cursor
 from app.models.chat import MessageType
 from app.core.security import get_current_user, verify_token
 
@@ -168,8 +172,7 @@ async def get_user_chat_rooms(
     """
     try:
         from app.models.chat import ChatRoom, ChatMessage
-        from app.models.user import User
-        from sqlalchemy import or_, func, desc
+        from sqlalchemy import or_, desc
         
         user_id = str(current_user.id)
         
@@ -192,27 +195,27 @@ async def get_user_chat_rooms(
         total_count = query.count()
         rooms = query.offset(offset).limit(limit).all()
         
+        # Não lidas (contadores no Redis), nomes e presença: uma chamada cada
+        other_user_ids = [
+            str(room.seller_id) if str(room.buyer_id) == user_id else str(room.buyer_id)
+            for room in rooms
+        ]
+        unread_counts = chat_unread.counts(db, user_id)
+        user_names = chat_history.sender_names(db, other_user_ids)
+        online = chat_presence.online_users(other_user_ids)
+        
         # Montar resposta com informações adicionais
         rooms_data = []
-        for room in rooms:
-            # Determinar o outro participante
-            other_user_id = room.seller_id if room.buyer_id == user_id else room.buyer_id
-            
-            # Buscar dados do outro usuário
-            other_user = db.query(User).filter(User.id == other_user_id).first()
-            other_user_name = other_user.name if other_user and other_user.name else f"Usuário {str(other_user_id)[:8]}"
+        for room, other_user_id in zip(rooms, other_user_ids):
+            other_user_name = user_names.get(other_user_id) or f"Usuário {other_user_id[:8]}"
             
             # Buscar última mensagem
             last_message = db.query(ChatMessage).filter(
                 ChatMessage.chat_room_id == str(room.id)
             ).order_by(desc(ChatMessage.created_at)).first()
             
-            # Contar mensagens não lidas (mensagens do outro usuário que não foram lidas)
-            unread_count = db.query(func.count(ChatMessage.id)).filter(
-                ChatMessage.chat_room_id == str(room.id),
-                ChatMessage.sender_id == other_user_id,
-                ChatMessage.is_read == False
-            ).scalar() or 0
+            # Mensagens do outro usuário ainda não lidas
+            unread_count = unread_counts.get(str(room.id), 0)
             
             rooms_data.append({
                 "room_id": str(room.id),
@@ -221,9 +224,10 @@ async def get_user_chat_rooms(
                 "created_at": room.created_at.isoformat() if room.created_at else None,
                 "closed_at": room.closed_at.isoformat() if room.closed_at else None,
                 "other_user": {
-                    "id": str(other_user_id),
+                    "id": other_user_id,
                     "name": other_user_name,
-                    "avatar": getattr(other_user, 'avatar', None),
+                    "avatar": None,
+                    "is_online": online.get(other_user_id, False),
                 },
                 "last_message": {
                     "content": last_message.content[:100] if last_message else None,
@@ -255,53 +259,17 @@ async def get_total_unread_messages(
     """
     Obter total de mensagens não lidas em todas as salas do usuário.
     Útil para exibir badge no ícone de chat.
+    
+    Served from per-(user, room) counters in Redis (one HGETALL per request).
     """
     try:
-        from app.models.chat import ChatRoom, ChatMessage
-        from app.models.user import User
-        from sqlalchemy import func, or_
+        unread_counts = chat_unread.counts(db, str(current_user.id))
         
-        user_id = str(current_user.id)
-        
-        # Subquery para encontrar todas as salas do usuário
-        user_rooms = db.query(ChatRoom.id).filter(
-            or_(
-                ChatRoom.buyer_id == user_id,
-                ChatRoom.seller_id == user_id
-            ),
-            ChatRoom.is_active == True
-        ).subquery()
-        
-        # Para cada sala, contar mensagens não lidas do outro usuário
-        # Precisamos fazer um join mais complexo para saber quem é o "outro" em cada sala
-        
-        # Alternativa mais simples: buscar todas as salas e calcular
-        rooms = db.query(ChatRoom).filter(
-            or_(
-                ChatRoom.buyer_id == user_id,
-                ChatRoom.seller_id == user_id
-            ),
-            ChatRoom.is_active == True
-        ).all()
-        
-        total_unread = 0
-        rooms_with_unread = []
-        
-        for room in rooms:
-            other_user_id = str(room.seller_id) if str(room.buyer_id) == user_id else str(room.buyer_id)
-            
-            unread = db.query(func.count(ChatMessage.id)).filter(
-                ChatMessage.chat_room_id == str(room.id),
-                ChatMessage.sender_id == other_user_id,
-                ChatMessage.is_read == False
-            ).scalar() or 0
-            
-            if unread > 0:
-                total_unread += unread
-                rooms_with_unread.append({
-                    "room_id": str(room.id),
-                    "unread_count": unread
-                })
+        rooms_with_unread = [
+            {"room_id": room_id, "unread_count": count}
+            for room_id, count in unread_counts.items()
+        ]
+        total_unread = sum(unread_counts.values())
         
         return {
             "success": True,
@@ -482,16 +450,28 @@ async def upload_file(
 async def get_chat_history(
     chat_room_id: str,
     limit: int = 50,
+    before: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)  # Retorna objeto User
 ):
-    """Obter histórico do chat"""
+    """
+    Obter histórico do chat.
+    
+    Pass `before` = `next_cursor` from the previous page to load older messages.
+    """
     try:
+        if before:
+            try:
+                decode_cursor(before)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        
         result = await chat_service.get_chat_history(
             db,
             chat_room_id,
             str(current_user.id),  # Usar .id ao invés de ["user_id"]
-            limit
+            limit,
+            cursor=before
         )
         
         return {
@@ -499,6 +479,8 @@ async def get_chat_history(
             "data": result
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get chat history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -541,6 +523,7 @@ async def mark_messages_as_read(
         ).update({"is_read": True})
         
         db.commit()
+        chat_unread.reset([user_id], chat_room_id)
         
         logger.info(f"✅ Marked {updated_count} messages as read in room {chat_room_id}")
         
@@ -567,27 +550,18 @@ async def get_unread_count(
     Obter contagem de mensagens não lidas em uma sala.
     """
     try:
-        from app.models.chat import ChatRoom, ChatMessage
-        from sqlalchemy import func
-        
         user_id = str(current_user.id)
         
         # Verificar acesso
-        chat_room = db.query(ChatRoom).filter(ChatRoom.id == chat_room_id).first()
-        if not chat_room:
+        members = chat_service.get_room_members(db, chat_room_id)
+        if not members:
             raise HTTPException(status_code=404, detail="Chat room not found")
         
-        if user_id not in [str(chat_room.buyer_id), str(chat_room.seller_id)]:
+        if user_id not in members:
             raise HTTPException(status_code=403, detail="Unauthorized access")
         
-        # Contar mensagens não lidas do outro usuário
-        other_user_id = str(chat_room.seller_id) if str(chat_room.buyer_id) == user_id else str(chat_room.buyer_id)
-        
-        unread_count = db.query(func.count(ChatMessage.id)).filter(
-            ChatMessage.chat_room_id == chat_room_id,
-            ChatMessage.sender_id == other_user_id,
-            ChatMessage.is_read == False
-        ).scalar() or 0
+        # Mensagens do outro usuário ainda não lidas (contador no Redis)
+        unread_count = chat_unread.counts(db, user_id).get(str(chat_room_id), 0)
         
         return {
             "success": True,
@@ -612,34 +586,27 @@ async def search_messages(
 ):
     """
     Buscar mensagens no histórico de uma sala.
-    Retorna mensagens que contêm o termo de busca.
+    Resultados ranqueados por relevância (full-text search).
     """
     try:
-        from app.models.chat import ChatRoom, ChatMessage
-        from app.models.user import User
-        
         user_id = str(current_user.id)
         
         # Verificar acesso
-        chat_room = db.query(ChatRoom).filter(ChatRoom.id == chat_room_id).first()
-        if not chat_room:
+        members = chat_service.get_room_members(db, chat_room_id)
+        if not members:
             raise HTTPException(status_code=404, detail="Chat room not found")
         
-        if user_id not in [str(chat_room.buyer_id), str(chat_room.seller_id)]:
+        if user_id not in members:
             raise HTTPException(status_code=403, detail="Unauthorized access")
         
-        # Buscar mensagens que contêm o termo
-        messages = db.query(ChatMessage).filter(
-            ChatMessage.chat_room_id == chat_room_id,
-            ChatMessage.content.ilike(f"%{q}%")
-        ).order_by(ChatMessage.created_at.desc()).limit(limit).all()
+        # Busca no índice textual + nomes dos remetentes numa query só
+        matches = chat_history.search(db, chat_room_id, q, min(limit, 100))
+        sender_names = chat_history.sender_names(db, (msg.sender_id for msg, _ in matches))
         
         # Formatar resultados
         results = []
-        for msg in messages:
-            # Buscar nome do sender
-            sender = db.query(User).filter(User.id == msg.sender_id).first()
-            sender_name = sender.name if sender else "Usuário"
+        for msg, score in matches:
+            sender_name = sender_names.get(str(msg.sender_id), "Usuário")
             
             results.append({
                 "id": str(msg.id),
@@ -649,6 +616,7 @@ async def search_messages(
                 "is_own": str(msg.sender_id) == user_id,
                 "created_at": msg.created_at.isoformat() if msg.created_at else None,
                 "message_type": msg.message_type.value if msg.message_type else "text",
+                "score": round(score, 4),
             })
         
         logger.info(f"🔍 Search found {len(results)} messages for '{q}' in room {chat_room_id}")
@@ -258,6 +258,7 @@ async def get_chat_history(
     chat_room_id: str,
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    before: Optional[str] = Query(None, description="next_cursor of the previous page (older messages)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -268,7 +269,8 @@ async def get_chat_history(
             chat_room_id,
             str(current_user.id),
             limit,
-            offset
+            offset,
+            cursor=before
         )
         
         return {
@@ -277,7 +279,8 @@ async def get_chat_history(
             "pagination": {
                 "limit": limit,
                 "offset": offset,
-                "total": result.get("total_messages", 0)
+                "total": result.get("total_messages", 0),
+                "next_cursor": result.get("next_cursor")
             }
         }
         
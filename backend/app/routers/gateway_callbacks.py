@@ -24,6 +24,7 @@ from sqlalchemy.orm import Session
 from app.core.db import get_db
 from app.core.config import settings
 from app.services.gateway import GatewayPaymentService, WebhookService
+from app.services.balance_cache_service import balance_cache_service
 
 logger = logging.getLogger(__name__)
 
@@ -217,7 +218,8 @@ async def crypto_webhook(
             address=address,
             tx_hash=tx_hash,
             amount=amount,
-            confirmations=confirmations
+            confirmations=confirmations,
+            network=network
         )
         
         return {"status": "ok"}
@@ -240,11 +242,15 @@ async def process_crypto_confirmation(
     address: str,
     tx_hash: str,
     amount: Decimal,
-    confirmations: int
+    confirmations: int,
+    network: Optional[str] = None
 ):
     """
     Processa confirmação de crypto em background.
     """
+    # 💰 Depósito confirmado: saldo do endereço mudou
+    await balance_cache_service.mark_dirty(address, network)
+    
     try:
         payment_service = GatewayPaymentService(db)
         payment = await payment_service.confirm_crypto_payment(
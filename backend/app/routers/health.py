@@ -8,6 +8,7 @@ from typing import Dict, Any
 from app.core.db import get_db
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.services.notifications.outbox import notification_outbox
 
 router = APIRouter()
 logger = get_logger("health")
@@ -112,7 +113,8 @@ async def get_metrics():
         "requests_per_second": 0,
         "active_connections": 0,
         "memory_usage_mb": 0,
-        "cpu_usage_percent": 0
+        "cpu_usage_percent": 0,
+        "notification_outbox": notification_outbox.metrics()
     }
 
 async def check_external_services() -> Dict[str, Any]:
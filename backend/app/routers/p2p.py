@@ -10,11 +10,12 @@ Notes:
 - All queries use named parameters (:param_name) for security and portability
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status as http_status, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, status as http_status, Query, Body, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import asyncio
 import json
 import uuid
 
@@ -26,6 +27,13 @@ from app.models.user import User
 from app.services.platform_settings_service import platform_settings_service
 from app.services.kyc_service import KYCService
 from app.services.notifications import notify_trade_started, notify_trade_completed, fire_and_forget
+from app.services.p2p_order_listing_service import p2p_order_listing_service, SORTS as P2P_ORDER_SORTS
+from app.services.p2p_order_book_service import p2p_order_book, SIDES as P2P_ORDER_BOOK_SIDES
+from app.services.p2p_matching_engine import p2p_matching_engine, TakerRequest
+from app.services.balance_ledger import balance_ledger, Leg, InsufficientBalance
+from app.services.balance_journal import balance_journal
+from app.services.p2p_stats_service import p2p_stats_service
+from app.services.reputation_scoring import reputation_scoring
 from uuid import UUID
 import logging
 
@@ -595,6 +603,7 @@ async def create_order(
         order_id = order_id_result.id if order_id_result else None
         
         print(f"[DEBUG] Order created successfully - ID: {order_id}")
+        p2p_order_book.refresh_order(db, order_id)
         
         return {
             "success": True,
@@ -630,127 +639,41 @@ async def create_order(
 
 @router.get("/orders")
 async def get_orders(
-    page: int = Query(1, ge=1),
+    page: int = Query(1, ge=1, description="Legacy offset pagination (ignored when cursor is given)"),
     limit: int = Query(20, ge=1, le=100),
     type: Optional[str] = Query(None),
     coin: Optional[str] = Query(None),
     status: Optional[str] = Query('active', description="Filter by status: active, paused, completed, cancelled"),
+    sort: str = Query("newest", description="Sort: newest (created_at desc) or price (best price first)"),
+    cursor: Optional[str] = Query(None, description="pagination.next_cursor from the previous page"),
     db: Session = Depends(get_db)
 ):
-    """Get P2P orders"""
-    conditions = []
-    params = {}
-    
-    # Default to 'active' if not specified
-    if status:
-        conditions.append("status = :status")
-        params["status"] = status.lower()
-    else:
-        conditions.append("status = 'active'")
-    
-    if type:
-        conditions.append("order_type = :order_type")
-        params["order_type"] = type
-    if coin:
-        conditions.append("cryptocurrency = :cryptocurrency")
-        params["cryptocurrency"] = coin.upper()
-    
-    where_clause = " AND ".join(conditions)
-    offset = (page - 1) * limit
-    
-    # Get total count
-    count_query = f"SELECT COUNT(*) as total FROM p2p_orders WHERE {where_clause}"
-    total = db.execute(text(count_query), params).fetchone().total
-    
-    # Get orders
-    query = f"""
-        SELECT * FROM p2p_orders 
-        WHERE {where_clause}
-        ORDER BY created_at DESC
-        LIMIT :limit OFFSET :offset
     """
-    params["limit"] = limit
-    params["offset"] = offset
-    
-    result = db.execute(text(query), params)
-    orders = result.fetchall()
-    
-    # Enrich orders with user data and payment methods
-    enriched_orders = []
-    for o in orders:
-        # Get trader profile data from database
-        # o.user_id might be integer or UUID, so convert to string for comparison
-        user_id_str = str(o.user_id)
-        
-        trader_profile_query = """
-            SELECT tp.display_name, tp.avatar_url, tp.is_verified, tp.verification_level,
-                   tp.total_trades, tp.completed_trades, tp.success_rate, tp.average_rating,
-                   tp.total_reviews, u.email
-            FROM trader_profiles tp
-            LEFT JOIN users u ON tp.user_id = u.id
-            WHERE tp.user_id = :user_id
-        """
-        trader_result = db.execute(text(trader_profile_query), {"user_id": user_id_str}).fetchone()
-        
-        if trader_result:
-            user_data = {
-                "id": str(o.user_id),
-                "username": trader_result.email.split('@')[0] if trader_result.email else f"user_{o.user_id}",
-                "display_name": trader_result.display_name,
-                "avatar": trader_result.avatar_url,
-                "verified": trader_result.is_verified,
-                "verification_level": trader_result.verification_level,
-                "total_trades": trader_result.total_trades or 0,
-                "completed_trades": trader_result.completed_trades or 0,
-                "success_rate": (trader_result.success_rate or 0) * 100,
-                "avg_rating": trader_result.average_rating or 0,
-                "total_reviews": trader_result.total_reviews or 0,
-                "badges": ["verified", "pro_trader"] if trader_result.is_verified else [],
-                "is_online": True
-            }
-        else:
-            # Fallback if no trader profile found
-            user_data = {
-                "id": str(o.user_id),
-                "username": f"user_{o.user_id}",
-                "display_name": f"Trader {o.user_id}",
-                "verified": False,
-                "verification_level": "basic",
-                "total_trades": o.completed_trades or 0,
-                "completed_trades": o.completed_trades or 0,
-                "success_rate": 98.5,
-                "avg_rating": 4.8,
-                "total_reviews": 0,
-                "badges": [],
-                "is_online": True
-            }
-        
-        # Get payment methods (just count for listing)
-        pm_ids = json.loads(o.payment_methods) if o.payment_methods else []
-        
-        enriched_orders.append({
-            "id": str(o.id),
-            "userId": str(o.user_id),
-            "type": o.order_type,
-            "coin": o.cryptocurrency,
-            "cryptocurrency": o.cryptocurrency,
-            "fiat_currency": o.fiat_currency,  # snake_case
-            "fiatCurrency": o.fiat_currency,  # camelCase
-            "price": str(o.price),
-            "amount": str(o.total_amount),
-            "minAmount": str(o.min_order_limit),
-            "maxAmount": str(o.max_order_limit),
-            "paymentMethods": pm_ids,  # Just IDs for listing (full objects in details)
-            "status": o.status,
-            "user": user_data,
-            "completedTrades": o.completed_trades,
-            "successRate": user_data["success_rate"],
-            "avgRating": user_data["avg_rating"],
-            "badges": user_data["badges"],
-            "isOnline": user_data["is_online"],
-            "createdAt": str(o.created_at)
-        })
-    
+    Get P2P orders
+
+    Trader data comes in the same query (JOIN) and pagination is keyset-based:
+    pass pagination.next_cursor back as `cursor` to fetch the next page.
+    `total` is a cached count (refreshed every few seconds).
+    """
+    if sort not in P2P_ORDER_SORTS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Use one of: {', '.join(P2P_ORDER_SORTS)}")
+
+    try:
+        enriched_orders, next_cursor = p2p_order_listing_service.list_orders(
+            db,
+            status=status,
+            order_type=type,
+            coin=coin,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            offset=0 if cursor else (page - 1) * limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total = await p2p_order_listing_service.count(db, status=status, order_type=type, coin=coin)
+
     return {
         "success": True,
         "data": enriched_orders,
@@ -758,11 +681,75 @@ async def get_orders(
             "page": page,
             "limit": limit,
             "total": total,
-            "pages": (total + limit - 1) // limit
+            "pages": (total + limit - 1) // limit,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         }
     }
 
 
+@router.get("/orderbook/{coin}")
+async def get_order_book(
+    coin: str,
+    fiat: str = Query("BRL"),
+    type: str = Query("sell", description="Book side: sell (lowest price first) or buy (highest first)"),
+    depth: int = Query(20, ge=1, le=100)
+):
+    """Order book snapshot served from memory: best price, price levels and top orders"""
+    if type not in P2P_ORDER_BOOK_SIDES:
+        raise HTTPException(status_code=400, detail="Order type must be 'buy' or 'sell'")
+    if not p2p_order_book.loaded:
+        raise HTTPException(status_code=http_status.HTTP_503_SERVICE_UNAVAILABLE, detail="Order book not loaded")
+    return {"success": True, "data": p2p_order_book.snapshot(coin, fiat, type, depth)}
+
+
+@router.websocket("/ws/orderbook/{coin}")
+async def order_book_feed(
+    websocket: WebSocket,
+    coin: str,
+    fiat: str = "BRL",
+    type: str = "sell",
+    depth: int = 20
+):
+    """
+    Order book feed: one snapshot, then deltas with increasing seq.
+
+    Deltas with seq <= the snapshot seq are already applied. On
+    {"type": "resync"} the client should drop its state; a fresh snapshot
+    follows.
+    """
+    if type not in P2P_ORDER_BOOK_SIDES:
+        await websocket.close(code=4000, reason="Invalid order type")
+        return
+    depth = max(1, min(depth, 100))
+
+    await websocket.accept()
+    subscription = p2p_order_book.subscribe(coin, fiat, type)
+    # Reading the socket is what notices a disconnect on a quiet book
+    receiver = asyncio.create_task(websocket.receive_text())
+    try:
+        await websocket.send_json(p2p_order_book.snapshot(coin, fiat, type, depth))
+        while True:
+            getter = asyncio.create_task(subscription.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                receiver.result()  # WebSocketDisconnect when the client leaves
+                receiver = asyncio.create_task(websocket.receive_text())  # client messages are ignored
+                continue
+            message = getter.result()
+            await websocket.send_json(message)
+            if message["type"] == "resync":
+                await websocket.send_json(p2p_order_book.snapshot(coin, fiat, type, depth))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Order book feed error: {e}")
+    finally:
+        receiver.cancel()
+        p2p_order_book.unsubscribe(subscription)
+
+
 @router.get("/my-orders")
 async def get_my_orders(
     page: int = Query(1, ge=1),
@@ -1097,6 +1084,7 @@ async def update_order(
         db.commit()
         
         print(f"[DEBUG] Order {order_id_value} updated successfully")
+        p2p_order_book.refresh_order(db, order_id_value)
         
         return {
             "success": True,
@@ -1179,6 +1167,7 @@ async def cancel_order(
         db.commit()
         
         print(f"[DEBUG] Order {order_id_value} cancelled successfully")
+        p2p_order_book.remove(str(order_id_value))
         
         return {
             "success": True,
@@ -1200,6 +1189,50 @@ async def cancel_order(
 # TRADES ENDPOINTS
 # ============================================
 
+def _taker_request(data: Dict[str, Any], taker_id: Optional[str] = None, allow_split: bool = True) -> TakerRequest:
+    """Taker request from a JSON body (amount is in fiat, like POST /trades)"""
+    side = str(data.get("side", "buy")).lower()
+    if side not in P2P_ORDER_BOOK_SIDES:
+        raise HTTPException(status_code=400, detail="side must be 'buy' or 'sell'")
+    try:
+        fiat_amount = float(data.get("fiat_amount") or data.get("amount") or 0)
+        min_reputation = float(data.get("min_reputation") or data.get("minReputation") or 0)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid amount")
+    if fiat_amount <= 0:
+        raise HTTPException(status_code=400, detail="amount must be greater than 0")
+    return TakerRequest(
+        cryptocurrency=str(data.get("coin", "")).upper(),
+        fiat_currency=str(data.get("fiat") or data.get("fiat_currency") or "BRL").upper(),
+        side=side,
+        fiat_amount=fiat_amount,
+        payment_methods=data.get("payment_methods") or data.get("paymentMethods") or [],
+        min_reputation=min_reputation,
+        allow_split=bool(data.get("allow_split", allow_split)),
+        taker_id=taker_id
+    )
+
+
+@router.post("/match")
+async def match_orders(
+    match_data: Dict[str, Any],
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Match a taker request against the in-memory order book.
+
+    Body: coin, fiat (BRL), side (buy/sell, taker's side), amount (fiat),
+    payment_methods, min_reputation (0-100), allow_split.
+    Returns the best fill (or a split across makers); nothing is reserved
+    here - each fill becomes a trade via POST /trades, which reserves the
+    maker liquidity atomically.
+    """
+    if not p2p_order_book.loaded:
+        raise HTTPException(status_code=http_status.HTTP_503_SERVICE_UNAVAILABLE, detail="Order book not loaded")
+    request = _taker_request(match_data, str(current_user.id))
+    return {"success": True, "data": p2p_matching_engine.match(request).to_dict()}
+
+
 @router.post("/trades")
 async def start_trade(
     trade_data: Dict[str, Any],
@@ -1215,7 +1248,7 @@ async def start_trade(
     - KYC Avançado para trades acima de R$ 100.000
     """
     buyer_id = str(current_user.id)  # ✅ UUID do usuário autenticado
-    print(f"[DEBUG] POST /trades - buyer_id: {buyer_id}, data: {trade_data}")
+    logger.debug(f"POST /trades - buyer_id: {buyer_id}, data: {trade_data}")
     
     try:
         from uuid import UUID as PyUUID
@@ -1235,6 +1268,15 @@ async def start_trade(
         
         # Aceitar tanto orderId (camelCase) quanto order_id (snake_case)
         order_id_raw = trade_data.get("orderId") or trade_data.get("order_id")
+        if not order_id_raw and trade_data.get("coin"):
+            # Sem ordem escolhida: o matching engine escolhe a melhor ordem que comporta o valor
+            match = p2p_matching_engine.match(_taker_request(trade_data, buyer_id, allow_split=False))
+            if not match.fills:
+                raise HTTPException(
+                    status_code=http_status.HTTP_404_NOT_FOUND,
+                    detail="No order matches this request"
+                )
+            order_id_raw = match.fills[0].order_id
         if not order_id_raw:
             raise HTTPException(
                 status_code=http_status.HTTP_400_BAD_REQUEST,
@@ -1250,12 +1292,12 @@ async def start_trade(
             order_uuid = PyUUID(str(order_id_raw))
             order_id_value = str(order_uuid)
             is_uuid = True
-            print(f"[DEBUG] Order ID is UUID: {order_id_value}")
+            logger.debug(f"Order ID is UUID: {order_id_value}")
         except ValueError:
             try:
                 # Tenta como int
                 order_id_value = int(order_id_raw)
-                print(f"[DEBUG] Order ID is integer: {order_id_value}")
+                logger.debug(f"Order ID is integer: {order_id_value}")
             except (ValueError, TypeError):
                 raise HTTPException(
                     status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -1285,7 +1327,7 @@ async def start_trade(
         fiat_amount = amount  # Valor em BRL enviado pelo frontend
         crypto_amount = fiat_amount / float(order.price)  # Calcula quantidade de crypto
         
-        print(f"[DEBUG] Trade calculation: fiat_amount={fiat_amount} BRL, price={order.price}, crypto_amount={crypto_amount} {order.cryptocurrency}")
+        logger.debug(f"Trade calculation: fiat_amount={fiat_amount} BRL, price={order.price}, crypto_amount={crypto_amount} {order.cryptocurrency}")
         
         # Validations - min/max limits são em FIAT (BRL)
         if fiat_amount < float(order.min_order_limit) or fiat_amount > float(order.max_order_limit):
@@ -1294,8 +1336,9 @@ async def start_trade(
                 detail=f"Valor deve estar entre R$ {float(order.min_order_limit):.2f} e R$ {float(order.max_order_limit):.2f}"
             )
         
-        # Verificar se há crypto suficiente disponível na ordem
-        if crypto_amount > float(order.available_amount):
+        # Reserva atômica da liquidez (UPDATE condicional): takers concorrentes
+        # não executam a mesma quantidade; confirmada no commit do trade
+        if crypto_amount > float(order.available_amount) or not p2p_matching_engine.reserve_order(db, order.id, crypto_amount):
             raise HTTPException(
                 status_code=http_status.HTTP_400_BAD_REQUEST,
                 detail=f"Quantidade insuficiente na ordem. Disponível: {float(order.available_amount):.8f} {order.cryptocurrency}"
@@ -1365,36 +1408,42 @@ async def start_trade(
         trade_id_result = result.fetchone()
         trade_id = trade_id_result.id if trade_id_result else None
         
-        print(f"[DEBUG] Trade created - ID: {trade_id}")
+        logger.debug(f"Trade created - ID: {trade_id}")
         
-        # ✅ PHASE 1: Freeze balances for the trade
+        # ✅ PHASE 1: Freeze balances for the trade (UPDATE condicional no ledger)
         try:
             if order.order_type == 'buy':
                 # Freeze BRL on buyer side
-                db.execute(text("""
-                    UPDATE wallet_balances
-                    SET locked_balance = locked_balance + :amount,
-                        available_balance = available_balance - :amount,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE user_id = :user_id AND cryptocurrency = 'BRL'
-                """), {"user_id": buyer_id, "amount": fiat_amount})
+                balance_ledger.freeze(
+                    db, buyer_id, 'BRL', fiat_amount,
+                    reason="Frozen: P2P Trade", reference_id=str(trade_id), commit=False
+                )
             else:
                 # Freeze crypto on seller side
-                db.execute(text("""
-                    UPDATE wallet_balances
-                    SET locked_balance = locked_balance + :amount,
-                        available_balance = available_balance - :amount,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency
-                """), {"user_id": order.user_id, "amount": crypto_amount, "cryptocurrency": order.cryptocurrency})
+                balance_ledger.freeze(
+                    db, order.user_id, order.cryptocurrency, crypto_amount,
+                    reason="Frozen: P2P Trade", reference_id=str(trade_id), commit=False
+                )
             
+            p2p_stats_service.safe_record_transition(db, "created", [buyer_id, order.user_id])
             db.commit()
-            print(f"[DEBUG] Balances frozen for trade {trade_id}")
+            reputation_scoring.mark_dirty([buyer_id, order.user_id])
+            logger.debug(f"Balances frozen for trade {trade_id}")
+            p2p_order_book.refresh_order(db, actual_order_id)  # execução (parcial) da ordem
         except Exception as freeze_error:
             # If freezing fails, delete the trade and rollback
+            db.rollback()
             db.execute(text("DELETE FROM p2p_trades WHERE id = :id"), {"id": trade_id})
+            p2p_matching_engine.release_order(db, actual_order_id, crypto_amount)
             db.commit()
-            print(f"[ERROR] Failed to freeze balance: {str(freeze_error)}")
+            p2p_order_book.refresh_order(db, actual_order_id)
+            logger.error(f"Failed to freeze balance: {str(freeze_error)}")
+            if isinstance(freeze_error, InsufficientBalance):
+                # Saldo consumido entre a validação e o freeze
+                raise HTTPException(
+                    status_code=http_status.HTTP_402_PAYMENT_REQUIRED,
+                    detail="Saldo insuficiente para bloquear o valor do trade"
+                )
             raise HTTPException(
                 status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to freeze balance for trade: {str(freeze_error)}"
@@ -1412,9 +1461,9 @@ async def start_trade(
                 total_fiat=fiat_amount,
                 fiat_currency=order.fiat_currency or "BRL"
             ))
-            print(f"[DEBUG] Trade notification queued for trade {trade_id}")
+            logger.debug(f"Trade notification queued for trade {trade_id}")
         except Exception as notif_error:
-            print(f"[WARNING] Failed to send trade notification: {notif_error}")
+            logger.warning(f"Failed to send trade notification: {notif_error}")
         
         return {
             "success": True,
@@ -1438,7 +1487,7 @@ async def start_trade(
         raise
     except Exception as e:
         db.rollback()
-        print(f"[ERROR] Failed to start trade: {str(e)}")
+        logger.error(f"Failed to start trade: {str(e)}")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to start trade: {str(e)}"
@@ -1643,6 +1692,12 @@ async def complete_trade(
     - Fee is deducted from the SELLER side (person receiving payment)
     - Fee is added to system_wallets
     - Fee is recorded in fee_history
+    
+    The pending -> completed transition is a conditional UPDATE and runs
+    before any balance leg; a concurrent or repeated call gets 409.
+    
+    NOTE: this endpoint is not authenticated (no current_user) and does not
+    check that the caller is a party of the trade.
     """
     print(f"[DEBUG] POST /trades/{trade_id}/complete")
     
@@ -1651,20 +1706,28 @@ async def complete_trade(
     SYSTEM_WALLET_ID = settings.SYSTEM_BLOCKCHAIN_WALLET_ID  # Carteira blockchain do sistema
     
     try:
-        # Get trade details
-        trade_query = text("SELECT * FROM p2p_trades WHERE id = :id")
-        trade = db.execute(trade_query, {"id": trade_id}).fetchone()
+        # Transição pending -> completed é o primeiro statement: dois completes
+        # concorrentes nunca liquidam o mesmo trade (o segundo não casa a linha)
+        trade = db.execute(text("""
+            UPDATE p2p_trades
+            SET status = 'completed', updated_at = CURRENT_TIMESTAMP
+            WHERE id = :id AND status = 'pending'
+            RETURNING *
+        """), {"id": trade_id}).fetchone()
         
         if not trade:
+            current = db.execute(
+                text("SELECT status FROM p2p_trades WHERE id = :id"), {"id": trade_id}
+            ).fetchone()
+            db.rollback()
+            if not current:
+                raise HTTPException(
+                    status_code=http_status.HTTP_404_NOT_FOUND,
+                    detail="Trade not found"
+                )
             raise HTTPException(
-                status_code=http_status.HTTP_404_NOT_FOUND,
-                detail="Trade not found"
-            )
-        
-        if trade.status != 'pending':
-            raise HTTPException(
-                status_code=http_status.HTTP_400_BAD_REQUEST,
-                detail=f"Can only complete trades with 'pending' status. Current status: {trade.status}"
+                status_code=http_status.HTTP_409_CONFLICT,
+                detail=f"Can only complete trades with 'pending' status. Current status: {current.status}"
             )
         
         # Get the order to determine trade type
@@ -1684,88 +1747,33 @@ async def complete_trade(
         print(f"[DEBUG] Trade {trade_id}: gross={trade.total_price}, fee={fee_amount_brl}, net={net_amount_brl}")
         
         # RELEASE BALANCE BASED ON ORDER TYPE
+        # Todas as pernas numa única transação (commit junto com o status do trade)
+        received = "Trade completed - received payment (net after 0.5% fee)"
+        released = "Trade completed - released balance"
         if order.order_type == 'buy':
             # BUY ORDER: Buyer paid BRL, seller receives BRL (minus fee)
             # Release buyer's frozen BRL → Seller gets NET amount
-            db.execute(text("""
-                UPDATE wallet_balances
-                SET available_balance = available_balance + :amount,
-                    updated_at = CURRENT_TIMESTAMP,
-                    last_updated_reason = 'Trade completed - received payment (net after 0.5% fee)'
-                WHERE user_id = :user_id AND cryptocurrency = 'BRL'
-            """), {"user_id": trade.seller_id, "amount": net_amount_brl})
-            
-            # Move locked balance to available for seller
-            db.execute(text("""
-                UPDATE wallet_balances
-                SET locked_balance = locked_balance - :amount,
-                    updated_at = CURRENT_TIMESTAMP,
-                    last_updated_reason = 'Trade completed - released balance'
-                WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency
-            """), {"user_id": trade.buyer_id, "amount": trade.total_price, "cryptocurrency": 'BRL'})
+            legs = [
+                Leg("credit", trade.seller_id, 'BRL', net_amount_brl, received, str(trade_id)),
+                Leg("debit_locked", trade.buyer_id, 'BRL', trade.total_price, released, str(trade_id)),
+            ]
         else:
             # SELL ORDER: Seller paid crypto, buyer receives crypto
-            # Seller receives BRL payment (minus fee)
-            seller_brl_balance = db.execute(
-                text("SELECT available_balance FROM wallet_balances WHERE user_id = :user_id AND cryptocurrency = 'BRL'"),
-                {"user_id": trade.seller_id}
-            ).fetchone()
-            
-            if seller_brl_balance:
-                # Update existing BRL balance - Seller receives NET amount
-                db.execute(text("""
-                    UPDATE wallet_balances
-                    SET available_balance = available_balance + :amount,
-                        updated_at = CURRENT_TIMESTAMP,
-                        last_updated_reason = 'Trade completed - received payment (net after 0.5% fee)'
-                    WHERE user_id = :user_id AND cryptocurrency = 'BRL'
-                """), {"user_id": trade.seller_id, "amount": net_amount_brl})
-            else:
-                # Create new BRL balance for seller with NET amount
-                db.execute(text("""
-                    INSERT INTO wallet_balances (id, user_id, cryptocurrency, available_balance, locked_balance, total_balance, last_updated_reason)
-                    VALUES (gen_random_uuid(), :user_id, 'BRL', :amount, 0, :amount, 'Trade completed - received payment (net after 0.5% fee)')
-                """), {"user_id": trade.seller_id, "amount": net_amount_brl})
-            
-            # Buyer receives crypto
-            buyer_crypto_balance = db.execute(
-                text("SELECT available_balance FROM wallet_balances WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency"),
-                {"user_id": trade.buyer_id, "cryptocurrency": trade.cryptocurrency}
-            ).fetchone()
-            
-            if buyer_crypto_balance:
-                # Update existing crypto balance
-                db.execute(text("""
-                    UPDATE wallet_balances
-                    SET available_balance = available_balance + :amount,
-                        updated_at = CURRENT_TIMESTAMP,
-                        last_updated_reason = 'Trade completed - received crypto'
-                    WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency
-                """), {"user_id": trade.buyer_id, "amount": trade.amount, "cryptocurrency": trade.cryptocurrency})
-            else:
-                # Create new crypto balance for buyer
-                db.execute(text("""
-                    INSERT INTO wallet_balances (id, user_id, cryptocurrency, available_balance, locked_balance, total_balance, last_updated_reason)
-                    VALUES (gen_random_uuid(), :user_id, :cryptocurrency, :amount, 0, :amount, 'Trade completed - received crypto')
-                """), {"user_id": trade.buyer_id, "amount": trade.amount, "cryptocurrency": trade.cryptocurrency})
-            
-            # Release seller's locked crypto
-            db.execute(text("""
-                UPDATE wallet_balances
-                SET locked_balance = locked_balance - :amount,
-                    updated_at = CURRENT_TIMESTAMP,
-                    last_updated_reason = 'Trade completed - released balance'
-                WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency
-            """), {"user_id": trade.seller_id, "amount": trade.amount, "cryptocurrency": trade.cryptocurrency})
-            
-            # Release buyer's locked BRL
-            db.execute(text("""
-                UPDATE wallet_balances
-                SET locked_balance = locked_balance - :amount,
-                    updated_at = CURRENT_TIMESTAMP,
-                    last_updated_reason = 'Trade completed - released balance'
-                WHERE user_id = :user_id AND cryptocurrency = 'BRL'
-            """), {"user_id": trade.buyer_id, "amount": trade.total_price})
+            # Seller receives BRL payment (minus fee); seller's locked crypto goes to buyer
+            legs = [
+                Leg("credit", trade.seller_id, 'BRL', net_amount_brl, received, str(trade_id)),
+                Leg("credit", trade.buyer_id, trade.cryptocurrency, trade.amount,
+                    "Trade completed - received crypto", str(trade_id)),
+                Leg("debit_locked", trade.seller_id, trade.cryptocurrency, trade.amount, released, str(trade_id)),
+            ]
+        try:
+            balance_ledger.apply(db, legs, commit=False)
+        except InsufficientBalance as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=http_status.HTTP_409_CONFLICT,
+                detail=f"Saldo bloqueado insuficiente para liquidar o trade: {e}"
+            )
         
         # 💰 ADD FEE TO SYSTEM WALLET (Contábil)
         try:
@@ -1835,16 +1843,13 @@ async def complete_trade(
         except Exception as fee_history_error:
             print(f"[WARNING] Could not record fee history (table may not exist): {fee_history_error}")
         
-        # Update trade status to completed
-        db.execute(text("""
-            UPDATE p2p_trades
-            SET status = 'completed', updated_at = CURRENT_TIMESTAMP
-            WHERE id = :id
-        """), {"id": trade_id})
+        p2p_stats_service.safe_record_transition(db, "completed", [trade.buyer_id, trade.seller_id])
         
         db.commit()
+        reputation_scoring.mark_dirty([trade.buyer_id, trade.seller_id])
         
         print(f"[DEBUG] Trade {trade_id} completed successfully with fee collection")
+        p2p_order_book.refresh_order(db, order.id)
         
         # 📧 SEND NOTIFICATION: Trade completed
         try:
@@ -1892,33 +1897,10 @@ async def get_market_stats(
     coin: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
-    """Get market statistics"""
-    params = {}
-    where_clause = "status = 'active'"
-    
-    if coin:
-        where_clause += " AND cryptocurrency = :cryptocurrency"
-        params["cryptocurrency"] = coin.upper()
-    
-    # Get order counts
-    count_query = f"""
-        SELECT 
-            COUNT(*) as total,
-            SUM(CASE WHEN order_type = 'buy' THEN 1 ELSE 0 END) as buy_orders,
-            SUM(CASE WHEN order_type = 'sell' THEN 1 ELSE 0 END) as sell_orders
-        FROM p2p_orders
-        WHERE {where_clause}
-    """
-    stats = db.execute(text(count_query), params).fetchone()
-    
+    """Get market statistics (in-memory snapshot, refreshed every few seconds)"""
     return {
         "success": True,
-        "data": {
-            "coin": coin if coin else "ALL",
-            "total_active_orders": stats.total or 0,
-            "total_buy_orders": stats.buy_orders or 0,
-            "total_sell_orders": stats.sell_orders or 0
-        }
+        "data": p2p_stats_service.market_stats(db, coin)
     }
 
 
@@ -1958,60 +1940,19 @@ async def deposit_balance(
         if amount <= 0:
             raise ValueError("Amount must be greater than 0")
         
-        # Get or create balance
-        balance = db.execute(
-            text("SELECT id, available_balance, locked_balance FROM wallet_balances WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency"),
-            {"user_id": user_id, "cryptocurrency": cryptocurrency}
-        ).fetchone()
-        
-        old_available = balance.available_balance if balance else 0
-        
-        if not balance:
-            # CREATE NEW BALANCE ENTRY
-            db.execute(text("""
-                INSERT INTO wallet_balances (id, user_id, cryptocurrency, available_balance, locked_balance, total_balance, last_updated_reason)
-                VALUES (lower(hex(randomblob(8))), :user_id, :cryptocurrency, :amount, 0, :amount, :reason)
-            """), {"user_id": user_id, "cryptocurrency": cryptocurrency, "amount": amount, "reason": reason})
-        else:
-            # UPDATE EXISTING BALANCE
-            db.execute(text("""
-                UPDATE wallet_balances
-                SET available_balance = available_balance + :amount,
-                    total_balance = total_balance + :amount,
-                    updated_at = CURRENT_TIMESTAMP,
-                    last_updated_reason = :reason
-                WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency
-            """), {"user_id": user_id, "cryptocurrency": cryptocurrency, "amount": amount, "reason": reason})
-        
-        # RECORD TRANSACTION IN HISTORY (for audit trail)
-        db.execute(text("""
-            INSERT INTO balance_history (id, user_id, cryptocurrency, operation_type, amount, balance_before, balance_after, locked_before, locked_after, reference_id, reason)
-            VALUES (lower(hex(randomblob(8))), :user_id, :cryptocurrency, 'deposit', :amount, :balance_before, :balance_after, 0, 0, :reference_id, :reason)
-        """), {
-            "user_id": user_id,
-            "cryptocurrency": cryptocurrency,
-            "amount": amount,
-            "balance_before": old_available,
-            "balance_after": old_available + amount,
-            "reference_id": tx_hash,
-            "reason": reason
-        })
-        
-        db.commit()
-        
-        # Get updated balance
-        updated = db.execute(
-            text("SELECT available_balance, locked_balance FROM wallet_balances WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency"),
-            {"user_id": user_id, "cryptocurrency": cryptocurrency}
-        ).fetchone()
+        # Upsert + histórico numa única transação
+        updated = balance_ledger.credit(
+            db, user_id, cryptocurrency, amount,
+            reason=reason, reference_id=tx_hash, history_type="deposit"
+        )
         
         return {
             "success": True,
             "data": {
                 "cryptocurrency": cryptocurrency,
-                "available_balance": float(updated.available_balance),
-                "locked_balance": float(updated.locked_balance),
-                "total_balance": float(updated.available_balance + updated.locked_balance),
+                "available_balance": float(updated["available_balance"]),
+                "locked_balance": float(updated["locked_balance"]),
+                "total_balance": float(updated["total_balance"]),
                 "amount_deposited": amount
             },
             "message": f"Deposited {amount} {cryptocurrency} successfully"
@@ -2111,81 +2052,18 @@ async def freeze_balance(
         reason = balance_data.get("reason", "P2P Trade")
         reference_id = balance_data.get("reference_id")
         
-        # Get or create balance
-        balance_query = text("""
-            SELECT available_balance, locked_balance FROM wallet_balances
-            WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency
-        """)
-        balance = db.execute(
-            balance_query,
-            {"user_id": user_id, "cryptocurrency": cryptocurrency}
-        ).fetchone()
-        
-        if not balance:
-            # Create new balance
-            db.execute(text("""
-                INSERT INTO wallet_balances (id, user_id, cryptocurrency, available_balance, locked_balance, total_balance)
-                VALUES (lower(hex(randomblob(8))), :user_id, :cryptocurrency, 0, 0, 0)
-            """), {"user_id": user_id, "cryptocurrency": cryptocurrency})
-            db.commit()
-            raise ValueError(f"Insufficient balance for freeze")
-        
-        # Check sufficient balance
-        if balance.available_balance < amount:
-            raise ValueError(
-                f"Insufficient available balance. Available: {balance.available_balance}, Requested: {amount}"
-            )
-        
-        # Freeze balance
-        freeze_query = text("""
-            UPDATE wallet_balances
-            SET available_balance = available_balance - :amount,
-                locked_balance = locked_balance + :amount,
-                updated_at = CURRENT_TIMESTAMP,
-                last_updated_reason = :reason
-            WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency
-        """)
-        
-        db.execute(
-            freeze_query,
-            {
-                "user_id": user_id,
-                "cryptocurrency": cryptocurrency,
-                "amount": amount,
-                "reason": f"Frozen: {reason}"
-            }
+        # UPDATE condicional (available >= amount) + histórico
+        updated = balance_ledger.freeze(
+            db, user_id, cryptocurrency, amount,
+            reason=f"Frozen: {reason}", reference_id=reference_id
         )
         
-        # Record in history
-        db.execute(text("""
-            INSERT INTO balance_history (id, user_id, cryptocurrency, operation_type, amount, balance_before, balance_after, locked_before, locked_after, reference_id, reason)
-            VALUES (lower(hex(randomblob(8))), :user_id, :cryptocurrency, 'freeze', :amount, :balance_before, :balance_after, :locked_before, :locked_after, :reference_id, :reason)
-        """), {
-            "user_id": user_id,
-            "cryptocurrency": cryptocurrency,
-            "amount": amount,
-            "balance_before": balance.available_balance,
-            "balance_after": balance.available_balance - amount,
-            "locked_before": balance.locked_balance,
-            "locked_after": balance.locked_balance + amount,
-            "reference_id": reference_id,
-            "reason": reason
-        })
-        
-        db.commit()
-        
-        # Get updated balance
-        updated = db.execute(
-            balance_query,
-            {"user_id": user_id, "cryptocurrency": cryptocurrency}
-        ).fetchone()
-        
         return {
             "success": True,
             "data": {
-                "available_balance": float(updated.available_balance),
-                "locked_balance": float(updated.locked_balance),
-                "total_balance": float(updated.available_balance + updated.locked_balance)
+                "available_balance": float(updated["available_balance"]),
+                "locked_balance": float(updated["locked_balance"]),
+                "total_balance": float(updated["total_balance"])
             },
             "message": f"Frozen {amount} {cryptocurrency} successfully"
         }
@@ -2212,71 +2090,18 @@ async def unfreeze_balance(
         reason = balance_data.get("reason", "Trade Cancelled")
         reference_id = balance_data.get("reference_id")
         
-        # Get balance
-        balance_query = text("""
-            SELECT available_balance, locked_balance FROM wallet_balances
-            WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency
-        """)
-        balance = db.execute(
-            balance_query,
-            {"user_id": user_id, "cryptocurrency": cryptocurrency}
-        ).fetchone()
-        
-        if not balance or balance.locked_balance < amount:
-            raise ValueError(
-                f"Insufficient locked balance. Locked: {balance.locked_balance if balance else 0}, Requested: {amount}"
-            )
-        
-        # Unfreeze balance
-        unfreeze_query = text("""
-            UPDATE wallet_balances
-            SET available_balance = available_balance + :amount,
-                locked_balance = locked_balance - :amount,
-                updated_at = CURRENT_TIMESTAMP,
-                last_updated_reason = :reason
-            WHERE user_id = :user_id AND cryptocurrency = :cryptocurrency
-        """)
-        
-        db.execute(
-            unfreeze_query,
-            {
-                "user_id": user_id,
-                "cryptocurrency": cryptocurrency,
-                "amount": amount,
-                "reason": f"Unfrozen: {reason}"
-            }
+        # UPDATE condicional (locked >= amount) + histórico
+        updated = balance_ledger.unfreeze(
+            db, user_id, cryptocurrency, amount,
+            reason=f"Unfrozen: {reason}", reference_id=reference_id
         )
         
-        # Record in history
-        db.execute(text("""
-            INSERT INTO balance_history (id, user_id, cryptocurrency, operation_type, amount, balance_before, balance_after, locked_before, locked_after, reference_id, reason)
-            VALUES (lower(hex(randomblob(8))), :user_id, :cryptocurrency, 'unfreeze', :amount, :balance_before, :balance_after, :locked_before, :locked_after, :reference_id, :reason)
-        """), {
-            "user_id": user_id,
-            "cryptocurrency": cryptocurrency,
-            "amount": amount,
-            "balance_before": balance.available_balance,
-            "balance_after": balance.available_balance + amount,
-            "locked_before": balance.locked_balance,
-            "locked_after": balance.locked_balance - amount,
-            "reference_id": reference_id,
-            "reason": reason
-        })
-        
-        db.commit()
-        
-        # Get updated balance
-        updated = db.execute(
-            balance_query,
-            {"user_id": user_id, "cryptocurrency": cryptocurrency}
-        ).fetchone()
-        
         return {
             "success": True,
             "data": {
-                "available_balance": float(updated.available_balance),
-                "locked_balance": float(updated.locked_balance),
-                "total_balance": float(updated.available_balance + updated.locked_balance)
+                "available_balance": float(updated["available_balance"]),
+                "locked_balance": float(updated["locked_balance"]),
+                "total_balance": float(updated["total_balance"])
             },
             "message": f"Unfrozen {amount} {cryptocurrency} successfully"
         }
@@ -2294,31 +2119,16 @@ async def get_balance_history(
     cryptocurrency: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (preferred over offset)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get balance change history"""
+    """Get balance change history (keyset pagination on created_at, id)"""
     user_id = str(current_user.id)  # ✅ UUID
     try:
-        params = {"user_id": user_id}
-        where_clause = "user_id = :user_id"
-        
-        if cryptocurrency:
-            where_clause += " AND cryptocurrency = :cryptocurrency"
-            params["cryptocurrency"] = cryptocurrency.upper()
-        
-        history_query = text(f"""
-            SELECT id, operation_type, amount, balance_before, balance_after, reference_id, reason, created_at
-            FROM balance_history
-            WHERE {where_clause}
-            ORDER BY created_at DESC
-            LIMIT :limit OFFSET :offset
-        """)
-        
-        params["limit"] = limit
-        params["offset"] = offset
-        
-        history = db.execute(history_query, params).fetchall()
+        history, next_cursor = balance_journal.page(
+            db, user_id, cryptocurrency, limit=limit, cursor=cursor, offset=offset
+        )
         
         return {
             "success": True,
@@ -2333,11 +2143,42 @@ async def get_balance_history(
                     "created_at": str(h.created_at)
                 }
                 for h in history
-            ]
+            ],
+            "pagination": {
+                "limit": limit,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
+            }
         }
+    except ValueError as e:
+        # Cursor inválido
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         print(f"[ERROR] Failed to get history: {str(e)}")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+
+
+@router.get("/wallet/balance-at")
+async def get_balance_at(
+    cryptocurrency: str = Query(...),
+    at: datetime = Query(..., description="Point in time (ISO 8601, UTC)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Balance at a point in time: latest snapshot plus the last history row before `at`"""
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    balance = balance_journal.balance_at(db, current_user.id, cryptocurrency, at)
+    return {
+        "success": True,
+        "data": balance or {
+            "cryptocurrency": cryptocurrency,
+            "available_balance": 0.0,
+            "locked_balance": 0.0,
+            "total_balance": 0.0,
+            "as_of": None
+        }
+    }
@@ -21,6 +21,8 @@ from app.models.transaction import Transaction, TransactionStatus
 from app.services.wallet_service import WalletService
 from app.services.blockchain_service import BlockchainService
 from app.services.transaction_service import transaction_service
+from app.services.balance_cache_service import balance_cache_service
+from app.services.confirmation_tracker import confirmation_tracker
 from app.services.blockchain_signer import blockchain_signer
 from app.services.usdt_transaction_service import USDTTransactionService, usdt_transaction_service
 from app.services.user_activity_service import UserActivityService
@@ -706,16 +708,21 @@ async def get_wallet_mnemonic(
 async def get_wallet_transactions(
     wallet_id: str,
     network: Optional[str] = Query(None, description="Filter by specific network"),
+    token: Optional[str] = Query(None, description="Filter by token symbol (e.g. USDT, MATIC)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from previous page (next_cursor)"),
     limit: int = Query(50, ge=1, le=100, description="Number of transactions to return"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get real blockchain transactions for a wallet.
-    Fetches transactions directly from blockchain APIs (Blockstream, Polygon RPC, etc).
+    Get blockchain transaction history for a wallet.
+    
+    History is stored locally (address_tx_history) and synced incrementally
+    from explorers: only blocks newer than the last synced cursor are fetched.
+    Pages are served by keyset pagination on (timestamp, tx_hash) - pass
+    `next_cursor` back as `cursor` to load older transactions.
     """
-    from app.services.blockchain_service import BlockchainService
-    from datetime import datetime
+    from app.services.transaction_history_service import transaction_history_service
     
     # Verify wallet ownership
     wallet = db.query(Wallet).filter(
@@ -736,98 +743,51 @@ async def get_wallet_transactions(
         return {
             "wallet_id": wallet_id,
             "transactions": [],
-            "total": 0
+            "total": 0,
+            "next_cursor": None
         }
     
-    blockchain_service = BlockchainService()
-    all_transactions = []
-    
-    # Supported networks for transaction history
-    networks_to_check = ["polygon"] if network else ["bitcoin", "ethereum", "polygon", "bsc"]
-    
-    # Network to symbol mapping (for correct display)
-    network_symbols = {
-        "bitcoin": "BTC",
-        "ethereum": "ETH",
-        "polygon": "MATIC",
-        "bsc": "BNB",
-        "tron": "TRX",
-        "base": "ETH",
-        "solana": "SOL",
-        "litecoin": "LTC",
-        "dogecoin": "DOGE",
-        "cardano": "ADA",
-        "avalanche": "AVAX",
-        "polkadot": "DOT",
-        "chainlink": "LINK",
-        "shiba": "SHIB",
-        "xrp": "XRP"
-    }
+    pairs = [
+        (str(address_obj.address), str(address_obj.network or wallet.network).lower())
+        for address_obj in addresses
+    ]
+    if network:
+        pairs = [pair for pair in pairs if pair[1] == network.lower()]
     
     try:
-        # Fetch transactions for each address/network combination
-        for address_obj in addresses:
-            address_str = str(address_obj.address)
-            network_str = str(address_obj.network or wallet.network)
-            
-            # Skip if filtering by network and this isn't it
-            if network and network_str != network:
-                continue
-            
-            # Only fetch for supported networks
-            if network_str not in networks_to_check:
-                continue
-            
+        # Sync incremental apenas na primeira página (páginas seguintes são só leitura)
+        if not cursor:
             try:
-                logger.info(f"Fetching transactions for {address_str} on {network_str}")
-                txs = await blockchain_service.get_address_transactions(
-                    address_str,
-                    network_str,
-                    limit=limit
-                )
-                
-                # Format transactions
-                for tx in txs:
-                    # Determine if it's incoming or outgoing
-                    is_incoming = tx.get('to', '').lower() == address_str.lower()
-                    
-                    formatted_tx = {
-                        "id": tx.get('hash', tx.get('txid', '')),
-                        "hash": tx.get('hash', tx.get('txid', '')),
-                        "network": network_str,
-                        "type": "receive" if is_incoming else "send",
-                        "from_address": tx.get('from', ''),
-                        "to_address": tx.get('to', ''),
-                        "amount": str(tx.get('value', 0)),
-                        "token_symbol": network_symbols.get(network_str, network_str.upper()),
-                        "status": "confirmed" if tx.get('confirmations', 0) > 0 else "pending",
-                        "confirmations": tx.get('confirmations', 0),
-                        "block_number": tx.get('block_number', tx.get('blockheight', 0)),
-                        "timestamp": datetime.fromtimestamp(tx.get('timestamp', 0)) if tx.get('timestamp') else datetime.utcnow(),
-                        "created_at": datetime.fromtimestamp(tx.get('timestamp', 0)) if tx.get('timestamp') else datetime.utcnow(),
-                        "fee": str(tx.get('fee', 0))
-                    }
-                    
-                    all_transactions.append(formatted_tx)
-                    
-            except Exception as e:
-                logger.error(f"Error fetching transactions for {network_str} address {address_str}: {str(e)}")
-                # Continue with other addresses even if one fails
-                continue
-        
-        # Sort by timestamp (newest first)
-        all_transactions.sort(key=lambda x: x['timestamp'], reverse=True)
+                await transaction_history_service.sync_addresses(db, pairs)
+            except Exception as sync_error:
+                # Histórico local continua disponível mesmo se o explorer falhar
+                logger.warning(f"Transaction history sync failed for wallet {wallet_id}: {sync_error}")
+                db.rollback()
+        
+        rows, next_cursor = transaction_history_service.get_history(
+            db,
+            pairs,
+            network=network,
+            token=token,
+            cursor=cursor,
+            limit=limit
+        )
         
-        # Limit total results
-        all_transactions = all_transactions[:limit]
+        transactions = [row.to_dict() for row in rows]
         
         return {
             "wallet_id": wallet_id,
             "wallet_name": str(wallet.name),
-            "transactions": all_transactions,
-            "total": len(all_transactions)
+            "transactions": transactions,
+            "total": len(transactions),
+            "next_cursor": next_cursor
         }
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Failed to fetch wallet transactions: {e}")
         raise HTTPException(
@@ -1966,6 +1926,12 @@ async def send_transaction(
                     logger.info("🔐 Consuming biometric token...")
                     webauthn_service.consume_biometric_token(biometric_token_to_consume)
                 
+                # 💰 Saldos de origem e destino mudaram: refresh no próximo acesso
+                await balance_cache_service.mark_dirty_many([
+                    (from_address, request.network),
+                    (request.to_address, request.network),
+                ])
+                
                 return {
                     "success": True,
                     "mode": "custodial",
@@ -2109,6 +2075,9 @@ async def send_transaction(
                 transaction_id = transaction_record.id
                 
                 logger.info(f"✅ Transaction saved to database: ID={transaction_id}, Hash={tx_hash}")
+                
+                # Status atualizado em lote pelo confirmation_tracker quando o receipt sair
+                confirmation_tracker.track(network_lower, tx_hash)
             except Exception as db_error:
                 logger.error(f"❌ Error saving transaction to database: {db_error}")
                 # Even if DB save fails, transaction was already sent to blockchain!
@@ -2146,6 +2115,12 @@ async def send_transaction(
             except Exception as notif_error:
                 logger.warning(f"Failed to send withdrawal notification: {notif_error}")
             
+            # 💰 Saldos de origem e destino mudaram: refresh no próximo acesso
+            await balance_cache_service.mark_dirty_many([
+                (from_address, request.network),
+                (request.to_address, request.network),
+            ])
+            
             return {
                 "success": True,
                 "mode": "custodial",
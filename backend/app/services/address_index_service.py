@@ -0,0 +1,569 @@
+"""
+👁️ Watched Address Index - Índice em memória de endereços monitorados
+======================================================================
+
+Índice compacto por rede para que scanners de depósito (carteiras de
+usuários, endereços de pagamento do Gateway e carteiras do sistema)
+consigam verificar o `to` de cada log/transação em O(1), sem consultar o
+banco de dados para cada endereço.
+
+Estrutura:
+- Cada endereço vira uma chave fixa de 20 bytes:
+    * EVM (0x + 40 hex): os próprios 20 bytes do endereço
+    * Demais redes (BTC, TRX, SOL, XRP...): BLAKE2b-160 do endereço normalizado
+- As chaves ficam numa hash table de endereçamento aberto sobre um único
+  `bytearray` (20 bytes/slot) + `array('i')` com a referência do dono.
+  ~48 bytes por endereço com fator de carga 0.5, contra ~200+ bytes de um
+  `dict[str, objeto]`.
+- Donos (wallet/usuário/pagamento) são deduplicados numa tabela única
+  compartilhada por todas as redes: uma carteira multi-chain com 15 redes
+  ocupa uma única entrada. A tabela tem lock próprio e conta referências:
+  o dono é liberado quando o último endereço dele sai do índice.
+- Bloom filter opcional, serializável para o Redis, para que outros
+  workers descartem rapidamente endereços que certamente não são nossos.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import base64
+import hashlib
+import logging
+import math
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+KEY_SIZE = 20
+
+# Marcadores de slot na tabela de referências
+_EMPTY = -1
+_DELETED = -2
+
+_EVM_ADDRESS_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+# Prefixos bech32 (case-insensitive por especificação)
+_BECH32_PREFIXES = ("bc1", "tb1", "ltc1", "tltc1")
+
+
+class OwnerType:
+    """Tipos de dono de um endereço monitorado"""
+    USER_WALLET = "user_wallet"
+    GATEWAY_PAYMENT = "gateway_payment"
+    SYSTEM_WALLET = "system_wallet"
+
+
+class AddressOwner(NamedTuple):
+    """Dono de um endereço monitorado"""
+    owner_type: str
+    owner_id: str
+    user_id: Optional[str] = None
+
+
+def address_to_key(address: str) -> bytes:
+    """
+    Converte um endereço em chave fixa de 20 bytes.
+
+    Endereços EVM são case-insensitive (EIP-55 é apenas checksum), então a
+    chave são os próprios bytes. Para as demais redes usamos BLAKE2b-160 do
+    endereço normalizado (bech32 em minúsculas; base58 preserva o case).
+    """
+    address = address.strip()
+    if _EVM_ADDRESS_RE.match(address):
+        return bytes.fromhex(address[2:])
+
+    lowered = address.lower()
+    if lowered.startswith(_BECH32_PREFIXES):
+        address = lowered
+
+    return hashlib.blake2b(address.encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+
+def topic_to_key(topic: str) -> bytes:
+    """
+    Extrai a chave de um topic de log EVM (32 bytes, endereço nos 20 finais).
+
+    Ex: topics[2] de um evento Transfer(address,address,uint256).
+    """
+    if topic.startswith("0x"):
+        topic = topic[2:]
+    return bytes.fromhex(topic[-40:])
+
+
+class _OwnerTable:
+    """
+    Tabela de donos deduplicada, compartilhada entre as redes.
+
+    Cada slot de índice que aponta para um dono conta uma referência;
+    quando a última sai (remove/troca de dono), o dono é liberado. A
+    posição liberada não é reutilizada: uma leitura sem lock que ainda
+    segure a referência antiga nunca enxerga outro dono, só None.
+    """
+
+    def __init__(self):
+        self._owners: List[Optional[AddressOwner]] = []
+        self._counts: List[int] = []
+        self._refs: Dict[AddressOwner, int] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, owner: AddressOwner) -> int:
+        """Referência do dono (+1 uso)"""
+        with self._lock:
+            ref = self._refs.get(owner)
+            if ref is None:
+                ref = len(self._owners)
+                self._owners.append(owner)
+                self._counts.append(0)
+                self._refs[owner] = ref
+            self._counts[ref] += 1
+            return ref
+
+    def release(self, ref: int):
+        """-1 uso; sem usos o dono é liberado"""
+        with self._lock:
+            self._counts[ref] -= 1
+            if self._counts[ref] <= 0:
+                owner = self._owners[ref]
+                self._owners[ref] = None
+                self._refs.pop(owner, None)
+
+    def get(self, ref: int) -> Optional[AddressOwner]:
+        return self._owners[ref]
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+
+class _Table:
+    """Estado imutável-por-troca da hash table (trocado inteiro no resize)"""
+
+    __slots__ = ("keys", "refs", "mask")
+
+    def __init__(self, capacity: int):
+        self.keys = bytearray(capacity * KEY_SIZE)
+        self.refs = array("i", [_EMPTY]) * capacity
+        self.mask = capacity - 1
+
+
+class WatchedAddressIndex:
+    """
+    Hash table de endereçamento aberto com chaves fixas de 20 bytes.
+
+    Leituras não usam lock (a tabela é trocada atomicamente no resize);
+    escritas são serializadas por um lock.
+    """
+
+    MAX_LOAD_FACTOR = 0.5
+
+    def __init__(self, network: str, owners: _OwnerTable, initial_capacity: int = 1024):
+        self.network = network
+        self._owners = owners
+        capacity = 1 << max(4, math.ceil(math.log2(max(initial_capacity, 16))))
+        self._table = _Table(capacity)
+        self._size = 0
+        self._used = 0  # ocupados + tombstones
+        self._lock = threading.Lock()
+
+    # ===================================
+    # CORE
+    # ===================================
+
+    @staticmethod
+    def _probe(table: _Table, key: bytes) -> Tuple[int, bool]:
+        """
+        Retorna (slot, encontrado). Se não encontrado, o slot é o primeiro
+        livre (ou tombstone) onde a chave pode ser inserida.
+        """
+        keys = table.keys
+        refs = table.refs
+        mask = table.mask
+        i = hash(key) & mask
+        first_deleted = -1
+
+        while True:
+            ref = refs[i]
+            if ref == _EMPTY:
+                return (first_deleted if first_deleted >= 0 else i), False
+            if ref == _DELETED:
+                if first_deleted < 0:
+                    first_deleted = i
+            else:
+                offset = i * KEY_SIZE
+                if keys[offset:offset + KEY_SIZE] == key:
+                    return i, True
+            i = (i + 1) & mask
+
+    def _resize(self, capacity: int):
+        old = self._table
+        new = _Table(capacity)
+        old_keys = old.keys
+        for slot, ref in enumerate(old.refs):
+            if ref < 0:
+                continue
+            offset = slot * KEY_SIZE
+            key = bytes(old_keys[offset:offset + KEY_SIZE])
+            new_slot, _ = self._probe(new, key)
+            new_offset = new_slot * KEY_SIZE
+            new.keys[new_offset:new_offset + KEY_SIZE] = key
+            new.refs[new_slot] = ref
+        self._table = new
+        self._used = self._size
+
+    def add_key(self, key: bytes, owner: AddressOwner) -> bool:
+        """
+        Insere/atualiza uma chave. Retorna True se a chave é nova.
+        """
+        if len(key) != KEY_SIZE:
+            raise ValueError(f"Chave deve ter {KEY_SIZE} bytes")
+
+        with self._lock:
+            capacity = self._table.mask + 1
+            if (self._used + 1) > capacity * self.MAX_LOAD_FACTOR:
+                # Dobra se estiver cheia de verdade; senão só limpa tombstones
+                grow = (self._size + 1) > capacity * self.MAX_LOAD_FACTOR / 2
+                self._resize(capacity * 2 if grow else capacity)
+
+            table = self._table
+            slot, found = self._probe(table, key)
+            ref = self._owners.intern(owner)
+
+            if found:
+                previous = table.refs[slot]
+                table.refs[slot] = ref
+                self._owners.release(previous)
+                return False
+
+            offset = slot * KEY_SIZE
+            table.keys[offset:offset + KEY_SIZE] = key
+            if table.refs[slot] == _EMPTY:
+                self._used += 1
+            self._size += 1
+            table.refs[slot] = ref
+            return True
+
+    def reserve(self, expected_size: int):
+        """Pré-aloca capacidade para uma carga em lote (evita resizes)"""
+        with self._lock:
+            needed = int(expected_size / self.MAX_LOAD_FACTOR) + 1
+            capacity = 1 << max(4, math.ceil(math.log2(needed)))
+            if capacity > self._table.mask + 1:
+                self._resize(capacity)
+
+    def remove_key(self, key: bytes) -> bool:
+        """Remove uma chave (deixa tombstone). Retorna True se existia."""
+        with self._lock:
+            table = self._table
+            slot, found = self._probe(table, key)
+            if not found:
+                return False
+            ref = table.refs[slot]
+            table.refs[slot] = _DELETED
+            self._size -= 1
+            self._owners.release(ref)
+            return True
+
+    def get_key(self, key: bytes) -> Optional[AddressOwner]:
+        """Busca O(1) pela chave de 20 bytes"""
+        table = self._table
+        slot, found = self._probe(table, key)
+        if not found:
+            return None
+        ref = table.refs[slot]
+        return self._owners.get(ref) if ref >= 0 else None
+
+    # ===================================
+    # API POR ENDEREÇO
+    # ===================================
+
+    def add(self, address: str, owner: AddressOwner) -> bool:
+        return self.add_key(address_to_key(address), owner)
+
+    def remove(self, address: str) -> bool:
+        return self.remove_key(address_to_key(address))
+
+    def get(self, address: str) -> Optional[AddressOwner]:
+        return self.get_key(address_to_key(address))
+
+    def __contains__(self, address: str) -> bool:
+        return self.get(address) is not None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def match(self, addresses: Iterable[str]) -> Dict[str, AddressOwner]:
+        """
+        Filtra uma lista de endereços (ex: `to` de todos os logs de um range
+        de blocos) retornando apenas os monitorados.
+        """
+        result: Dict[str, AddressOwner] = {}
+        get_key = self.get_key
+        for address in addresses:
+            if not address or address in result:
+                continue
+            owner = get_key(address_to_key(address))
+            if owner is not None:
+                result[address] = owner
+        return result
+
+    def iter_keys(self) -> Iterable[bytes]:
+        table = self._table
+        for slot, ref in enumerate(table.refs):
+            if ref >= 0:
+                offset = slot * KEY_SIZE
+                yield bytes(table.keys[offset:offset + KEY_SIZE])
+
+    def memory_bytes(self) -> int:
+        """Memória aproximada da tabela (sem a tabela de donos)"""
+        table = self._table
+        return len(table.keys) + table.refs.itemsize * len(table.refs)
+
+    def build_bloom(self, error_rate: float = 0.01) -> "AddressBloomFilter":
+        bloom = AddressBloomFilter(max(self._size, 1), error_rate)
+        for key in self.iter_keys():
+            bloom.add_key(key)
+        return bloom
+
+
+class AddressBloomFilter:
+    """
+    Bloom filter sobre as chaves de 20 bytes.
+
+    Os hashes são determinísticos (BLAKE2b), então o filtro pode ser
+    serializado e compartilhado entre workers via Redis.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: bytes) -> Iterable[int]:
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % m
+
+    def add_key(self, key: bytes):
+        bits = self._bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain_key(self, key: bytes) -> bool:
+        bits = self._bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, address: str):
+        self.add_key(address_to_key(address))
+
+    def might_contain(self, address: str) -> bool:
+        return self.might_contain_key(address_to_key(address))
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "bits": base64.b64encode(bytes(self._bits)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "AddressBloomFilter":
+        bloom = cls.__new__(cls)
+        bloom.capacity = int(data["capacity"])
+        bloom.error_rate = float(data["error_rate"])
+        bloom.num_bits = int(data["num_bits"])
+        bloom.num_hashes = int(data["num_hashes"])
+        bloom._bits = bytearray(base64.b64decode(data["bits"]))
+        return bloom
+
+
+class WatchedAddressRegistry:
+    """
+    Registro de índices por rede + tabela de donos compartilhada.
+
+    Uso:
+        watched_addresses.add("polygon", "0xabc...", AddressOwner(...))
+        hits = watched_addresses.match("polygon", [log["to"] for log in logs])
+    """
+
+    BLOOM_CACHE_TTL = 600  # 10 minutos
+
+    def __init__(self):
+        self._owners = _OwnerTable()
+        self._indexes: Dict[str, WatchedAddressIndex] = {}
+        self._lock = threading.Lock()
+        self.is_loaded = False
+
+    def index(self, network: str) -> WatchedAddressIndex:
+        network = network.lower()
+        index = self._indexes.get(network)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(network)
+                if index is None:
+                    index = WatchedAddressIndex(network, self._owners)
+                    self._indexes[network] = index
+        return index
+
+    def networks(self) -> List[str]:
+        return list(self._indexes.keys())
+
+    def add(
+        self,
+        network: str,
+        address: str,
+        owner_type: str,
+        owner_id: str,
+        user_id: Optional[str] = None
+    ) -> bool:
+        if not address or not network:
+            return False
+        owner = AddressOwner(owner_type, str(owner_id), str(user_id) if user_id else None)
+        return self.index(network).add(address, owner)
+
+    def remove(self, network: str, address: str) -> bool:
+        index = self._indexes.get(network.lower())
+        return index.remove(address) if index else False
+
+    def lookup(self, network: str, address: str) -> Optional[AddressOwner]:
+        index = self._indexes.get(network.lower())
+        return index.get(address) if index else None
+
+    def match(self, network: str, addresses: Iterable[str]) -> Dict[str, AddressOwner]:
+        index = self._indexes.get(network.lower())
+        return index.match(addresses) if index else {}
+
+    def clear(self):
+        with self._lock:
+            self._owners = _OwnerTable()
+            self._indexes = {}
+            self.is_loaded = False
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "loaded": self.is_loaded,
+            "owners": len(self._owners),
+            "networks": {
+                network: {
+                    "addresses": len(index),
+                    "memory_bytes": index.memory_bytes(),
+                }
+                for network, index in self._indexes.items()
+            },
+        }
+
+    # ===================================
+    # CARGA INICIAL
+    # ===================================
+
+    def load_from_db(self, db, batch_size: int = 10000) -> int:
+        """
+        Carrega todos os endereços monitorados do banco em streaming.
+
+        Síncrono (rodar via asyncio.to_thread no startup).
+        """
+        from app.models.address import Address
+        from app.models.wallet import Wallet
+        from app.models.gateway import GatewayPayment, GatewayPaymentStatus
+        from app.models.system_blockchain_wallet import SystemBlockchainAddress
+
+        total = 0
+
+        rows = db.query(
+            Address.address, Address.network, Address.wallet_id, Wallet.user_id
+        ).join(
+            Wallet, Wallet.id == Address.wallet_id
+        ).filter(
+            Address.is_active == True
+        ).yield_per(batch_size)
+
+        for address, network, wallet_id, user_id in rows:
+            if self.add(network, address, OwnerType.USER_WALLET, wallet_id, user_id):
+                total += 1
+
+        payments = db.query(
+            GatewayPayment.crypto_address, GatewayPayment.crypto_network, GatewayPayment.payment_id
+        ).filter(
+            GatewayPayment.crypto_address.isnot(None),
+            GatewayPayment.status.in_([
+                GatewayPaymentStatus.PENDING,
+                GatewayPaymentStatus.PROCESSING
+            ])
+        ).yield_per(batch_size)
+
+        for address, network, payment_id in payments:
+            if self.add(network or "ethereum", address, OwnerType.GATEWAY_PAYMENT, payment_id):
+                total += 1
+
+        system_rows = db.query(
+            SystemBlockchainAddress.address, SystemBlockchainAddress.network, SystemBlockchainAddress.wallet_id
+        ).filter(
+            SystemBlockchainAddress.is_active == True
+        ).yield_per(batch_size)
+
+        for address, network, wallet_id in system_rows:
+            if self.add(network, address, OwnerType.SYSTEM_WALLET, wallet_id):
+                total += 1
+
+        self.is_loaded = True
+        logger.info(f"👁️ Índice de endereços carregado: {total} endereços em {len(self._indexes)} redes")
+        return total
+
+    # ===================================
+    # BLOOM FILTER COMPARTILHADO (REDIS)
+    # ===================================
+
+    async def publish_bloom(self, network: str, error_rate: float = 0.01) -> bool:
+        """Publica o Bloom filter da rede no Redis para outros workers"""
+        from app.services.cache_service import cache_service
+
+        bloom = self.index(network).build_bloom(error_rate)
+        return await cache_service.set(
+            f"watched_addresses:bloom:{network.lower()}",
+            bloom.to_dict(),
+            self.BLOOM_CACHE_TTL
+        )
+
+    async def load_bloom(self, network: str) -> Optional[AddressBloomFilter]:
+        """Carrega o Bloom filter publicado por outro worker"""
+        from app.services.cache_service import cache_service
+
+        data = await cache_service.get(f"watched_addresses:bloom:{network.lower()}")
+        if not data:
+            return None
+        return AddressBloomFilter.from_dict(data)
+
+
+# Instância global
+watched_addresses = WatchedAddressRegistry()
+
+
+async def load_watched_addresses() -> int:
+    """Carrega o índice global a partir do banco sem bloquear o event loop"""
+    import asyncio
+    from app.core.db import SessionLocal
+
+    def _load() -> int:
+        db = SessionLocal()
+        try:
+            return watched_addresses.load_from_db(db)
+        finally:
+            db.close()
+
+    try:
+        return await asyncio.to_thread(_load)
+    except Exception as e:
+        logger.error(f"❌ Erro ao carregar índice de endereços: {e}")
+        return 0
@@ -0,0 +1,215 @@
+"""
+💰 Balance Cache Service - Cache de saldos orientado a eventos
+==============================================================
+
+Cache de saldos on-chain com stale-while-revalidate:
+
+- Leituras sempre devolvem o último valor conhecido imediatamente; se ele
+  estiver velho (ou o endereço estiver "sujo"), o refresh roda em background.
+- Envios (`/wallets/send`, SystemWalletSendService), depósitos do Instant
+  Trade e confirmações de webhook marcam o (endereço, rede) como sujo.
+  O endereço continua sujo até um refresh observar a mudança de saldo (ou o
+  marcador expirar), então a transação pendente é refletida assim que
+  confirmar, sem esperar o TTL. Cada entrada (nativo e `:tokens`) tem o
+  próprio marcador: o refresh de uma não limpa o da outra.
+- Endereços sem movimentação há mais de QUIET_AFTER_SECONDS usam um TTL
+  mais longo (CACHE_TTL_BALANCE_QUIET).
+
+Chaves Redis:
+    balance:swr:{network}:{address}[:tokens]  -> {"data", "fetched_at", "changed_at"}
+    balance:dirty:{network}:{address}[:tokens] -> timestamp do evento
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+
+BalanceFetcher = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+def _normalize(address: str) -> str:
+    """Endereços EVM são case-insensitive"""
+    return address.lower() if address.startswith("0x") else address
+
+
+class BalanceCacheService:
+    """Cache de saldos com invalidação por eventos + stale-while-revalidate"""
+
+    # Quanto tempo o último valor fica disponível para servir "stale"
+    ENTRY_TTL = 86400  # 24h
+    # Quanto tempo um endereço fica sujo esperando a mudança aparecer on-chain
+    DIRTY_TTL = 900  # 15 min
+    # Intervalo mínimo entre refreshes de um endereço sujo
+    DIRTY_REFRESH_INTERVAL = 5
+    # Sem mudança de saldo há mais que isso => endereço "quieto"
+    QUIET_AFTER_SECONDS = 3600
+
+    def __init__(self):
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _entry_key(address: str, network: str, include_tokens: bool = False) -> str:
+        key = f"balance:swr:{network.lower()}:{_normalize(address)}"
+        return f"{key}:tokens" if include_tokens else key
+
+    @staticmethod
+    def _dirty_key(address: str, network: str, include_tokens: bool = False) -> str:
+        key = f"balance:dirty:{network.lower()}:{_normalize(address)}"
+        return f"{key}:tokens" if include_tokens else key
+
+    def _dirty_keys(self, address: str, network: str) -> Tuple[str, str]:
+        """Um marcador por entrada do endereço (nativo e :tokens)"""
+        return self._dirty_key(address, network), self._dirty_key(address, network, include_tokens=True)
+
+    # ===================================
+    # LEITURA
+    # ===================================
+
+    async def get_balance(
+        self,
+        address: str,
+        network: str,
+        fetcher: BalanceFetcher,
+        include_tokens: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Retorna o saldo do cache (mesmo velho) e agenda refresh se necessário.
+        Só bloqueia no fetcher quando não existe nenhum valor em cache.
+        """
+        entry_key = self._entry_key(address, network, include_tokens)
+        dirty_key = self._dirty_key(address, network, include_tokens)
+
+        entry, dirty_at = await cache_service.get_many([entry_key, dirty_key])
+
+        if not entry:
+            data = await fetcher()
+            await self._store(entry_key, data, previous=None, started_at=time.time())
+            return data
+
+        now = time.time()
+        age = now - entry.get("fetched_at", 0)
+        quiet = now - entry.get("changed_at", 0) >= self.QUIET_AFTER_SECONDS
+
+        if dirty_at:
+            needs_refresh = age >= self.DIRTY_REFRESH_INTERVAL
+        else:
+            ttl = settings.CACHE_TTL_BALANCE_QUIET if quiet else settings.CACHE_TTL_BALANCE
+            needs_refresh = age >= ttl
+
+        if needs_refresh:
+            self._schedule_refresh(entry_key, dirty_key, entry, fetcher)
+
+        data = dict(entry["data"])
+        data["is_stale"] = bool(dirty_at) or needs_refresh
+        return data
+
+    def _schedule_refresh(
+        self,
+        entry_key: str,
+        dirty_key: str,
+        entry: Dict[str, Any],
+        fetcher: BalanceFetcher
+    ):
+        # Dedup por processo: um refresh em voo por chave
+        if entry_key in self._refreshing:
+            return
+        self._refreshing.add(entry_key)
+
+        task = asyncio.create_task(self._refresh(entry_key, dirty_key, entry, fetcher))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(
+        self,
+        entry_key: str,
+        dirty_key: str,
+        entry: Dict[str, Any],
+        fetcher: BalanceFetcher
+    ):
+        started_at = time.time()
+        try:
+            data = await fetcher()
+            if data.get("error"):
+                return
+            changed = await self._store(entry_key, data, previous=entry, started_at=started_at)
+
+            # Limpa o marcador apenas se o saldo mudou e nenhum evento chegou durante o fetch
+            if changed:
+                dirty_at = await cache_service.get(dirty_key)
+                if dirty_at and float(dirty_at) <= started_at:
+                    await cache_service.delete(dirty_key)
+        except Exception as e:
+            logger.warning(f"⚠️ Refresh de saldo falhou ({entry_key}): {e}")
+        finally:
+            self._refreshing.discard(entry_key)
+
+    async def _store(
+        self,
+        entry_key: str,
+        data: Dict[str, Any],
+        previous: Optional[Dict[str, Any]],
+        started_at: float
+    ) -> bool:
+        """Salva o valor; retorna True se o saldo mudou em relação ao anterior"""
+        if data.get("error"):
+            return False
+
+        snapshot = {k: v for k, v in data.items() if k != "is_stale"}
+        changed = previous is None or self._fingerprint(previous.get("data", {})) != self._fingerprint(snapshot)
+        changed_at = started_at if changed or previous is None else previous.get("changed_at", started_at)
+
+        await cache_service.set(
+            entry_key,
+            {"data": snapshot, "fetched_at": started_at, "changed_at": changed_at},
+            self.ENTRY_TTL
+        )
+        return changed
+
+    @staticmethod
+    def _fingerprint(data: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (
+            str(data.get("native_balance")),
+            repr(sorted((data.get("token_balances") or {}).items())),
+        )
+
+    # ===================================
+    # EVENTOS
+    # ===================================
+
+    async def mark_dirty(self, address: Optional[str], network: Optional[str]):
+        """Marca (endereço, rede) como sujo após envio/depósito/confirmação"""
+        if not address or not network:
+            return
+        now = time.time()
+        for dirty_key in self._dirty_keys(address, network):
+            await cache_service.set(dirty_key, now, self.DIRTY_TTL)
+
+    async def mark_dirty_many(self, pairs: Iterable[Tuple[Optional[str], Optional[str]]]):
+        for address, network in pairs:
+            await self.mark_dirty(address, network)
+
+    def mark_dirty_sync(self, address: Optional[str], network: Optional[str]):
+        """Versão síncrona para serviços que não rodam no event loop"""
+        if not address or not network or not cache_service.is_connected():
+            return
+        try:
+            now = str(time.time())
+            for dirty_key in self._dirty_keys(address, network):
+                cache_service.redis_client.setex(dirty_key, self.DIRTY_TTL, now)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao marcar saldo sujo {network}:{address}: {e}")
+
+
+# Instância global
+balance_cache_service = BalanceCacheService()
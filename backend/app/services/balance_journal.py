@@ -0,0 +1,257 @@
+"""
+📓 HOLD Wallet - Balance Journal
+================================
+
+Histórico de saldo (balance_history) como journal append-only:
+
+- Linhas ficam num buffer da sessão e são gravadas num único INSERT
+  multi-linha no commit (before_commit); rollback da transação descarta
+  o buffer e rollback de SAVEPOINT descarta só o que entrou nele, então
+  o histórico nunca diverge do saldo
+- Snapshots periódicos por usuário/ativo (balance_snapshots) para os
+  saldos alterados desde o último snapshot
+- "Saldo em T": último snapshot <= T + última linha do histórico entre o
+  snapshot e T (dois range scans em índice, sem replay)
+- Páginas do histórico por keyset (created_at, id) no índice
+  (user_id, created_at)
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, event, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.balance import BalanceHistory, BalanceSnapshot, WalletBalance
+from app.utils.keyset import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = "balance_journal_buffer"
+SAVEPOINTS_KEY = "balance_journal_savepoints"
+
+
+def asset_variants(cryptocurrency: str) -> List[str]:
+    """Linhas antigas gravaram o ativo em maiúsculas; novas usam rede_token em minúsculas"""
+    return sorted({cryptocurrency.upper(), cryptocurrency.lower()})
+
+
+class BalanceJournal:
+    """Buffer de escrita, snapshots e leituras por índice do histórico"""
+
+    SNAPSHOT_CHUNK = 1000
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Escrita (append-only, em lote no commit)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def append(db: Session, rows: Sequence[Dict[str, Any]]) -> None:
+        """Enfileira linhas de histórico; gravadas no próximo commit da sessão"""
+        now = datetime.utcnow()
+        buffer = db.info.setdefault(BUFFER_KEY, [])
+        for row in rows:
+            row.setdefault("id", uuid.uuid4())
+            row.setdefault("created_at", now)
+            buffer.append(row)
+
+    @staticmethod
+    def flush(db: Session) -> int:
+        """Grava o buffer num único INSERT multi-linha (executemany agrupado pelo driver)"""
+        rows = db.info.pop(BUFFER_KEY, None)
+        if not rows:
+            return 0
+        db.execute(insert(BalanceHistory), rows)
+        return len(rows)
+
+    @staticmethod
+    def discard(db: Session) -> None:
+        db.info.pop(BUFFER_KEY, None)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def page(
+        self,
+        db: Session,
+        user_id: Any,
+        cryptocurrency: Optional[str] = None,
+        operation_type: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[BalanceHistory], Optional[str]]:
+        """
+        Página do histórico (mais recente primeiro).
+
+        Returns:
+            (linhas, next_cursor) - next_cursor None na última página
+        """
+        query = db.query(BalanceHistory).filter(BalanceHistory.user_id == str(user_id))
+        if cryptocurrency:
+            query = query.filter(BalanceHistory.cryptocurrency.in_(asset_variants(cryptocurrency)))
+        if operation_type:
+            query = query.filter(BalanceHistory.operation_type == operation_type)
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                BalanceHistory.created_at < created_at,
+                and_(BalanceHistory.created_at == created_at, BalanceHistory.id < row_id)
+            ))
+        elif offset:
+            query = query.offset(offset)
+
+        rows = query.order_by(BalanceHistory.created_at.desc(), BalanceHistory.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
+
+    def balance_at(self, db: Session, user_id: Any, cryptocurrency: str, at: datetime) -> Optional[Dict[str, Any]]:
+        """Saldo do usuário/ativo no instante `at` (None se não havia saldo)"""
+        user_id = str(user_id)
+        variants = asset_variants(cryptocurrency)
+
+        snapshot = db.query(BalanceSnapshot).filter(
+            BalanceSnapshot.user_id == user_id,
+            BalanceSnapshot.cryptocurrency.in_(variants),
+            BalanceSnapshot.snapshot_at <= at
+        ).order_by(BalanceSnapshot.snapshot_at.desc()).first()
+
+        query = db.query(BalanceHistory).filter(
+            BalanceHistory.user_id == user_id,
+            BalanceHistory.cryptocurrency.in_(variants),
+            BalanceHistory.created_at <= at
+        )
+        if snapshot is not None:
+            query = query.filter(BalanceHistory.created_at > snapshot.snapshot_at)
+        last = query.order_by(BalanceHistory.created_at.desc(), BalanceHistory.id.desc()).first()
+
+        if last is not None:
+            available, locked = float(last.balance_after), float(last.locked_after)
+            return {
+                "cryptocurrency": last.cryptocurrency,
+                "available_balance": available,
+                "locked_balance": locked,
+                "total_balance": available + locked,
+                "as_of": last.created_at.isoformat(),
+            }
+        if snapshot is not None:
+            return {
+                "cryptocurrency": snapshot.cryptocurrency,
+                "available_balance": float(snapshot.available_balance),
+                "locked_balance": float(snapshot.locked_balance),
+                "total_balance": float(snapshot.total_balance),
+                "as_of": snapshot.snapshot_at.isoformat(),
+            }
+        return None
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def take_snapshots(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Snapshot dos saldos alterados desde o último snapshot de cada usuário/ativo"""
+        now = now or datetime.utcnow()
+        latest = select(func.max(BalanceSnapshot.snapshot_at)).where(
+            BalanceSnapshot.user_id == WalletBalance.user_id,
+            BalanceSnapshot.cryptocurrency == WalletBalance.cryptocurrency
+        ).scalar_subquery()
+
+        changed = db.execute(
+            select(
+                WalletBalance.user_id, WalletBalance.cryptocurrency,
+                WalletBalance.available_balance, WalletBalance.locked_balance, WalletBalance.total_balance
+            ).where(or_(latest.is_(None), WalletBalance.updated_at > latest))
+        ).all()
+
+        for start in range(0, len(changed), self.SNAPSHOT_CHUNK):
+            db.execute(insert(BalanceSnapshot), [
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": row.user_id,
+                    "cryptocurrency": row.cryptocurrency,
+                    "available_balance": row.available_balance,
+                    "locked_balance": row.locked_balance,
+                    "total_balance": row.total_balance,
+                    "snapshot_at": now,
+                }
+                for row in changed[start:start + self.SNAPSHOT_CHUNK]
+            ])
+        db.commit()
+        return len(changed)
+
+    async def _snapshot_loop(self, interval: int):
+        from app.core import db as core_db
+
+        def _run():
+            db = core_db.SessionLocal()
+            try:
+                return self.take_snapshots(db)
+            finally:
+                db.close()
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                count = await asyncio.to_thread(_run)
+                if count:
+                    logger.info(f"📓 {count} snapshots de saldo gravados")
+            except Exception as e:
+                logger.error(f"❌ Erro gravando snapshots de saldo: {e}")
+
+    def start(self, interval: int = 3600):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._snapshot_loop(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+@event.listens_for(Session, "before_commit")
+def _flush_on_commit(session: Session):
+    BalanceJournal.flush(session)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _mark_savepoint(session: Session, transaction):
+    # Tamanho do buffer no início do SAVEPOINT: rollback do savepoint
+    # descarta só as linhas enfileiradas dentro dele
+    if transaction.nested:
+        session.info.setdefault(SAVEPOINTS_KEY, {})[id(transaction)] = len(session.info.get(BUFFER_KEY, ()))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, previous_transaction):
+    if previous_transaction.nested:
+        mark = session.info.get(SAVEPOINTS_KEY, {}).pop(id(previous_transaction), None)
+        buffer = session.info.get(BUFFER_KEY)
+        if mark is not None and buffer:
+            del buffer[mark:]
+    elif previous_transaction.parent is None:
+        BalanceJournal.discard(session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_savepoints(session: Session, transaction):
+    if transaction.parent is None and not transaction.nested:
+        session.info.pop(SAVEPOINTS_KEY, None)
+
+
+# Instância global
+balance_journal = BalanceJournal()
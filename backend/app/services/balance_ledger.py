@@ -0,0 +1,256 @@
+"""
+📒 HOLD Wallet - Balance Ledger
+===============================
+
+Operações de saldo (wallet_balances) em um único statement por perna:
+
+- UPDATE condicional com a guarda no WHERE (ex.: available >= :x) e
+  RETURNING do estado final: sem janela de corrida (o SELECT prévio só
+  resolve a grafia gravada do ativo; o UPDATE casa exatamente uma linha)
+- Crédito é UPDATE e, se a linha não existir, INSERT ... ON CONFLICT
+- Valores em NUMERIC(36, 18) quantizados (sem drift de float)
+- Liquidações com várias pernas rodam numa única transação, em ordem
+  estável de (usuário, ativo) para evitar deadlock entre trades
+- Histórico (balance_history) montado a partir do RETURNING e enviado ao
+  journal, que grava tudo num INSERT multi-linha no commit
+
+Operações:
+    freeze          available -= x, locked += x     (available >= x)
+    unfreeze        available += x, locked -= x     (locked >= x)
+    debit_locked    locked -= x, total -= x         (locked >= x)
+    debit_available available -= x, total -= x      (available >= x)
+    credit          available += x, total += x      (upsert)
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, ROUND_DOWN
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.balance import WalletBalance
+from app.services.balance_journal import balance_journal
+
+logger = logging.getLogger(__name__)
+
+SCALE = Decimal("1e-18")  # NUMERIC(36, 18)
+
+# operação -> (delta available, delta locked, delta total, coluna da guarda)
+OPERATIONS = {
+    "freeze": (-1, 1, 0, "available_balance"),
+    "unfreeze": (1, -1, 0, "locked_balance"),
+    "debit_locked": (0, -1, -1, "locked_balance"),
+    "debit_available": (-1, 0, -1, "available_balance"),
+    "credit": (1, 0, 1, None),
+}
+
+HISTORY_TYPES = {"debit_locked": "debit", "debit_available": "debit"}
+
+
+class InsufficientBalance(ValueError):
+    """Saldo (disponível ou bloqueado) insuficiente para a perna"""
+
+    def __init__(self, leg: "Leg"):
+        self.leg = leg
+        column = "locked" if OPERATIONS[leg.operation][3] == "locked_balance" else "available"
+        super().__init__(
+            f"Insufficient {column} balance for {leg.operation}: "
+            f"{leg.amount} {leg.cryptocurrency} (user {leg.user_id})"
+        )
+
+
+def to_units(amount: Union[float, int, str, Decimal]) -> Decimal:
+    """Valor exato na escala da coluna (floats entram pela representação decimal)"""
+    value = amount if isinstance(amount, Decimal) else Decimal(str(amount))
+    return value.quantize(SCALE, rounding=ROUND_DOWN)
+
+
+def normalize_asset(cryptocurrency: str) -> str:
+    """Formato gravado em linhas novas: rede_token em minúsculas, moedas nativas/fiat em maiúsculas"""
+    return cryptocurrency.lower() if "_" in cryptocurrency else cryptocurrency.upper()
+
+
+@dataclass
+class Leg:
+    """Uma perna de movimentação de saldo"""
+    operation: str
+    user_id: Any
+    cryptocurrency: str
+    amount: Union[float, Decimal]
+    reason: Optional[str] = None
+    reference_id: Optional[str] = None
+    history_type: Optional[str] = None  # operation_type no histórico (padrão: a operação)
+
+
+class BalanceLedger:
+    """Aplicação atômica de pernas de saldo"""
+
+    _COLUMNS = [c for c in WalletBalance.__table__.c]
+
+    def apply(self, db: Session, legs: Sequence[Leg], commit: bool = True) -> List[Dict[str, Any]]:
+        """
+        Aplica as pernas numa transação (tudo ou nada).
+
+        Returns:
+            Estado final da linha de cada perna (na ordem recebida)
+
+        Raises:
+            InsufficientBalance: alguma guarda falhou (nada é aplicado)
+        """
+        # Ordem estável por linha: pernas da mesma linha mantêm a ordem original
+        order = sorted(range(len(legs)), key=lambda i: (str(legs[i].user_id), legs[i].cryptocurrency.lower()))
+        results: List[Optional[Dict[str, Any]]] = [None] * len(legs)
+        history: List[Dict[str, Any]] = []
+        try:
+            for i in order:
+                leg = legs[i]
+                row = self._apply_leg(db, leg)
+                results[i] = row
+                history.append(self._history_row(leg, row))
+            balance_journal.append(db, history)
+            if commit:
+                db.commit()
+        except Exception:
+            if commit:
+                db.rollback()
+            raise
+        return results  # type: ignore[return-value]
+
+    def _apply_leg(self, db: Session, leg: Leg) -> Dict[str, Any]:
+        if leg.operation not in OPERATIONS:
+            raise ValueError(f"Unknown ledger operation: {leg.operation}")
+        amount = to_units(leg.amount)
+        if amount <= 0:
+            raise ValueError("Amount must be greater than 0")
+
+        d_available, d_locked, d_total, guard = OPERATIONS[leg.operation]
+        table = WalletBalance.__table__
+        values: Dict[str, Any] = {
+            "updated_at": datetime.utcnow(),
+            "last_updated_reason": (leg.reason or leg.operation)[:200],
+        }
+        for column, delta in (("available_balance", d_available), ("locked_balance", d_locked), ("total_balance", d_total)):
+            if delta:
+                values[column] = table.c[column] + amount if delta > 0 else table.c[column] - amount
+
+        asset = self._resolve_asset(db, leg)
+        if asset is None:
+            if leg.operation != "credit":
+                raise InsufficientBalance(leg)
+            return self._insert_credit(db, leg, amount, values)
+
+        # Casa o valor gravado exato (a unique constraint é case-sensitive)
+        stmt = update(table).where(
+            table.c.user_id == str(leg.user_id),
+            table.c.cryptocurrency == asset
+        )
+        if guard:
+            stmt = stmt.where(table.c[guard] >= amount)
+        rows = db.execute(stmt.values(**values).returning(*self._COLUMNS)).mappings().all()
+        if len(rows) > 1:
+            raise RuntimeError(f"Ledger leg matched {len(rows)} rows for {asset} (user {leg.user_id})")
+        if not rows:
+            raise InsufficientBalance(leg)
+        return dict(rows[0])
+
+    @staticmethod
+    def _resolve_asset(db: Session, leg: Leg) -> Optional[str]:
+        """
+        Nome gravado do ativo para a perna. Linhas legadas podem existir com
+        grafias diferentes (POLYGON_USDT / polygon_usdt): prefere a grafia
+        exata, depois a normalizada, depois a primeira em ordem estável.
+        """
+        table = WalletBalance.__table__
+        stored = db.execute(
+            select(table.c.cryptocurrency).where(
+                table.c.user_id == str(leg.user_id),
+                func.lower(table.c.cryptocurrency) == leg.cryptocurrency.lower()
+            ).order_by(table.c.cryptocurrency)
+        ).scalars().all()
+        if not stored:
+            return None
+        for candidate in (leg.cryptocurrency, normalize_asset(leg.cryptocurrency)):
+            if candidate in stored:
+                return candidate
+        return stored[0]
+
+    def _insert_credit(self, db: Session, leg: Leg, amount: Decimal, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Crédito para linha inexistente: INSERT ... ON CONFLICT DO UPDATE (corrida com outro crédito)"""
+        table = WalletBalance.__table__
+        if db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(table).values(
+            id=uuid.uuid4(),
+            user_id=str(leg.user_id),
+            cryptocurrency=normalize_asset(leg.cryptocurrency),
+            available_balance=amount,
+            locked_balance=Decimal(0),
+            total_balance=amount,
+            created_at=values["updated_at"],
+            updated_at=values["updated_at"],
+            last_updated_reason=values["last_updated_reason"]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.cryptocurrency],
+            set_={
+                "available_balance": table.c.available_balance + amount,
+                "total_balance": table.c.total_balance + amount,
+                "updated_at": values["updated_at"],
+                "last_updated_reason": values["last_updated_reason"],
+            }
+        )
+        return dict(db.execute(stmt.returning(*self._COLUMNS)).mappings().one())
+
+    @staticmethod
+    def _history_row(leg: Leg, row: Dict[str, Any]) -> Dict[str, Any]:
+        amount = float(to_units(leg.amount))
+        d_available, d_locked, _, _ = OPERATIONS[leg.operation]
+        available_after = float(row["available_balance"])
+        locked_after = float(row["locked_balance"])
+        return {
+            "id": uuid.uuid4(),
+            "user_id": str(leg.user_id),
+            "cryptocurrency": row["cryptocurrency"],
+            "operation_type": leg.history_type or HISTORY_TYPES.get(leg.operation, leg.operation),
+            "amount": amount,
+            "balance_before": available_after - d_available * amount,
+            "balance_after": available_after,
+            "locked_before": locked_after - d_locked * amount,
+            "locked_after": locked_after,
+            "reference_id": str(leg.reference_id) if leg.reference_id is not None else None,
+            "reason": leg.reason,
+            "created_at": datetime.utcnow(),
+        }
+
+    # ------------------------------------------------------------------
+    # Atalhos de uma perna
+    # ------------------------------------------------------------------
+
+    def freeze(self, db: Session, user_id, cryptocurrency: str, amount, reason: str = None, reference_id: str = None, commit: bool = True) -> Dict[str, Any]:
+        return self.apply(db, [Leg("freeze", user_id, cryptocurrency, amount, reason, reference_id)], commit)[0]
+
+    def unfreeze(self, db: Session, user_id, cryptocurrency: str, amount, reason: str = None, reference_id: str = None, commit: bool = True) -> Dict[str, Any]:
+        return self.apply(db, [Leg("unfreeze", user_id, cryptocurrency, amount, reason, reference_id)], commit)[0]
+
+    def credit(self, db: Session, user_id, cryptocurrency: str, amount, reason: str = None, reference_id: str = None, commit: bool = True, history_type: str = None) -> Dict[str, Any]:
+        return self.apply(db, [Leg("credit", user_id, cryptocurrency, amount, reason, reference_id, history_type)], commit)[0]
+
+    def debit_locked(self, db: Session, user_id, cryptocurrency: str, amount, reason: str = None, reference_id: str = None, commit: bool = True) -> Dict[str, Any]:
+        return self.apply(db, [Leg("debit_locked", user_id, cryptocurrency, amount, reason, reference_id)], commit)[0]
+
+    def debit_available(self, db: Session, user_id, cryptocurrency: str, amount, reason: str = None, reference_id: str = None, commit: bool = True) -> Dict[str, Any]:
+        return self.apply(db, [Leg("debit_available", user_id, cryptocurrency, amount, reason, reference_id)], commit)[0]
+
+
+# Instância global
+balance_ledger = BalanceLedger()
@@ -8,6 +8,7 @@ Suporta múltiplas redes: Ethereum, Polygon, Base, Bitcoin, etc.
 Author: HOLD Wallet Team
 """
 
+import asyncio
 import logging
 from decimal import Decimal
 from typing import Optional, Dict, Any
@@ -19,7 +20,13 @@ from sqlalchemy.orm import Session
 from app.models.wallet import Wallet
 from app.models.address import Address
 from app.models.instant_trade import InstantTrade, TradeStatus
+from app.models.payout import PayoutReferenceType, PayoutStatus
 from app.core.config import settings
+from app.services.balance_cache_service import balance_cache_service
+from app.services.nonce_manager import BroadcastUncertain, nonce_manager
+from app.services.rpc_pool import rpc_pools
+from app.services.gas_oracle_service import gas_oracle_service
+from app.services.payout_batch_service import payout_batch_service
 from app.services.notifications import notify_deposit_received, fire_and_forget
 
 logger = logging.getLogger(__name__)
@@ -105,7 +112,7 @@ class BlockchainDepositService:
                 logger.error(f"❌ Rede não suportada: {network}")
                 return None
             
-            w3 = Web3(Web3.HTTPProvider(config["rpc_url"]))
+            w3 = rpc_pools.web3(network, config["rpc_url"])
             if not w3.is_connected():
                 logger.error(f"❌ Não conectou à rede {network}")
                 return None
@@ -174,6 +181,9 @@ class BlockchainDepositService:
         
         Returns:
             tx_hash se sucesso, None se erro
+
+        Raises:
+            BroadcastUncertain: envio com resultado desconhecido (não reenviar)
         """
         try:
             # Verificar se private key está configurada
@@ -187,33 +197,29 @@ class BlockchainDepositService:
             # Converte amount para Wei
             amount_wei = w3.to_wei(float(amount), 'ether')
             
-            # Busca nonce
-            nonce = w3.eth.get_transaction_count(account.address)
-            
-            # Busca gas price
-            gas_price = w3.eth.gas_price
+            # Fees EIP-1559 do gas oracle (em memória)
+            fee_fields = gas_oracle_service.tx_fee_fields(network, w3=w3)
             
-            # Cria transação
+            # Cria transação (nonce alocado pelo nonce_manager)
             transaction = {
-                'nonce': nonce,
                 'to': Web3.to_checksum_address(to_address),
                 'value': amount_wei,
                 'gas': config["gas_limit"],
-                'gasPrice': gas_price,
+                **fee_fields,
                 'chainId': config["chain_id"]
             }
             
-            # Assina transação
-            signed_txn = w3.eth.account.sign_transaction(transaction, self.platform_wallet_private_key)
-            
-            # Envia transação (compatível com diferentes versões do web3.py)
-            raw_tx = getattr(signed_txn, 'rawTransaction', None) or getattr(signed_txn, 'raw_transaction', None)
-            tx_hash = w3.eth.send_raw_transaction(raw_tx)
-            tx_hash_hex = w3.to_hex(tx_hash)
+            # Assina e envia
+            tx_hash_hex = nonce_manager.send_transaction(
+                w3, transaction, self.platform_wallet_private_key, sender=account.address
+            )
             
             logger.info(f"✅ Token nativo enviado! TX: {tx_hash_hex}")
             return tx_hash_hex
             
+        except BroadcastUncertain:
+            # A TX pode estar na rede: quem chamou não pode tratar como falha
+            raise
         except Exception as e:
             logger.error(f"❌ Erro enviando token nativo: {str(e)}")
             return None
@@ -231,6 +237,9 @@ class BlockchainDepositService:
         
         Returns:
             tuple: (tx_hash, error_message) - tx_hash se sucesso, error_message se erro
+
+        Raises:
+            BroadcastUncertain: envio com resultado desconhecido (não reenviar)
         """
         try:
             # Verificar se private key está configurada
@@ -274,34 +283,29 @@ class BlockchainDepositService:
                 logger.error(f"❌ {error_msg}")
                 return (None, error_msg)
             
-            # Busca nonce
-            nonce = w3.eth.get_transaction_count(account.address)
-            
-            # Busca gas price
-            gas_price = w3.eth.gas_price
+            # Fees EIP-1559 do gas oracle (em memória)
+            fee_fields = gas_oracle_service.tx_fee_fields(network, w3=w3)
             
-            # Cria transação de transfer
+            # Cria transação de transfer (nonce alocado pelo nonce_manager)
             transaction = contract.functions.transfer(
                 Web3.to_checksum_address(to_address),
                 amount_units
             ).build_transaction({
-                'nonce': nonce,
                 'gas': 100000,  # Gas limit maior para ERC20
-                'gasPrice': gas_price,
+                **fee_fields,
                 'chainId': config["chain_id"]
             })
             
-            # Assina transação
-            signed_txn = w3.eth.account.sign_transaction(transaction, self.platform_wallet_private_key)
-            
-            # Envia transação (compatível com diferentes versões do web3.py)
-            raw_tx = getattr(signed_txn, 'rawTransaction', None) or getattr(signed_txn, 'raw_transaction', None)
-            tx_hash = w3.eth.send_raw_transaction(raw_tx)
-            tx_hash_hex = w3.to_hex(tx_hash)
+            # Assina e envia
+            tx_hash_hex = nonce_manager.send_transaction(
+                w3, transaction, self.platform_wallet_private_key, sender=account.address
+            )
             
             logger.info(f"✅ Token ERC20 enviado! TX: {tx_hash_hex}")
             return (tx_hash_hex, None)
             
+        except BroadcastUncertain:
+            raise
         except Exception as e:
             error_msg = str(e)
             logger.error(f"❌ Erro enviando token ERC20: {error_msg}")
@@ -444,6 +448,10 @@ class BlockchainDepositService:
             
             logger.info(f"✅ Depósito concluído! TX: {tx_hash}")
             
+            # 💰 Saldo do usuário e da plataforma mudaram
+            balance_cache_service.mark_dirty_sync(str(user_address.address), network)
+            balance_cache_service.mark_dirty_sync(settings.PLATFORM_WALLET_ADDRESS, network)
+            
             # 📧 SEND NOTIFICATION: Deposit received
             try:
                 fire_and_forget(notify_deposit_received(
@@ -600,6 +608,11 @@ class BlockchainDepositService:
                 
                 logger.info(f"✅ BTC enviado! TX: {result.tx_hash}")
                 
+                await balance_cache_service.mark_dirty_many([
+                    (str(user_address.address), "bitcoin"),
+                    (platform_address, "bitcoin"),
+                ])
+                
                 return {
                     "success": True,
                     "tx_hash": result.tx_hash,
@@ -629,6 +642,84 @@ class BlockchainDepositService:
                 "error": str(e)
             }
     
+    # ============================================
+    # PAYOUTS EM LOTE
+    # ============================================
+    
+    async def queue_deposit_to_user(
+        self,
+        db: Session,
+        trade: InstantTrade,
+        network: str = "polygon",
+        bypass_restriction: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Versão em lote de deposit_crypto_to_user/send_btc_to_user: o envio entra
+        na fila do payout_batch_service e sai junto com outros payouts do mesmo
+        (rede, ativo). Aguarda a transmissão do lote e retorna o mesmo formato.
+        O trade é concluído pelo handler `_complete_trade_from_payout`.
+        """
+        network = network.lower()
+        result = {
+            "success": False,
+            "tx_hash": None,
+            "wallet_address": None,
+            "network": network,
+            "error": None
+        }
+        
+        if not bypass_restriction:
+            from app.services.wallet_restriction_service import WalletRestrictionService
+            if not WalletRestrictionService.can_credit_deposit(db, str(trade.user_id)):
+                result["error"] = "Depósitos estão temporariamente suspensos para esta conta. Entre em contato com o suporte."
+                result["restriction_blocked"] = True
+                return result
+        
+        if trade.status != TradeStatus.PAYMENT_CONFIRMED:
+            result["error"] = f"Trade não está com pagamento confirmado (status: {trade.status})"
+            return result
+        
+        if network != "bitcoin" and network not in self.NETWORK_CONFIG:
+            result["error"] = f"Rede não suportada: {network}"
+            return result
+        
+        user_address = self.get_user_wallet(db, str(trade.user_id), network)
+        if not user_address:
+            result["error"] = f"Wallet não encontrada para network={network}"
+            return result
+        result["wallet_address"] = str(user_address.address)
+        
+        payout = await payout_batch_service.submit(
+            db,
+            network=network,
+            asset=str(trade.symbol).upper(),
+            to_address=str(user_address.address),
+            amount=Decimal(str(trade.crypto_amount)),
+            reference_type=PayoutReferenceType.INSTANT_TRADE.value,
+            reference_id=str(trade.id)
+        )
+        result["payout_id"] = payout.id
+        
+        try:
+            payout_data = await payout_batch_service.wait(payout.id)
+        except asyncio.TimeoutError:
+            # Continua na fila; o handler conclui o trade quando o lote sair
+            result["error"] = "Payout na fila, aguardando envio do lote"
+            result["queued"] = True
+            return result
+        
+        db.refresh(trade)
+        result["success"] = payout_batch_service.is_settled(payout_data)
+        if not result["success"] and payout_data.get("status") in (
+            PayoutStatus.QUEUED.value, PayoutStatus.PROCESSING.value, PayoutStatus.SUBMITTED.value
+        ):
+            # Transmitido (aguardando receipt) ou em outro lote: o handler conclui o trade
+            result["queued"] = True
+        result["tx_hash"] = payout_data.get("tx_hash")
+        result["error"] = payout_data.get("error")
+        result["batch_size"] = payout_data.get("batch_size")
+        return result
+    
     def is_btc_auto_enabled(self, db: Session = None) -> bool:
         """
         Verifica se o envio automático de BTC está configurado.
@@ -700,5 +791,53 @@ class BlockchainDepositService:
             return None
 
 
+async def _notify_deposit_from_payout(**kwargs) -> None:
+    """Notificação do depósito no loop principal, com sessão própria"""
+    from app.core.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        await notify_deposit_received(db=db, **kwargs)
+    except Exception as notif_error:
+        logger.warning(f"Failed to send deposit notification: {notif_error}")
+    finally:
+        db.close()
+
+
+def _complete_trade_from_payout(db: Session, payout):
+    """
+    Conclui o InstantTrade quando o payout (ou seu lote) foi liquidado.
+
+    Roda numa worker thread; devolve a notificação para o payout service
+    agendá-la no event loop principal depois do commit.
+    """
+    trade = db.query(InstantTrade).filter(InstantTrade.id == payout.reference_id).first()
+    if not trade or trade.status != TradeStatus.PAYMENT_CONFIRMED:
+        return None
+    
+    user_address = blockchain_deposit_service.get_user_wallet(db, str(trade.user_id), payout.network)
+    if user_address:
+        trade.wallet_id = str(user_address.wallet_id)
+    trade.wallet_address = payout.to_address
+    trade.network = payout.network
+    trade.tx_hash = payout.tx_hash
+    trade.status = TradeStatus.COMPLETED
+    trade.completed_at = datetime.now()
+    
+    logger.info(f"✅ Depósito concluído via lote {payout.batch_id}! Trade {trade.reference_code} TX: {payout.tx_hash}")
+    
+    balance_cache_service.mark_dirty_sync(payout.to_address, payout.network)
+    
+    return _notify_deposit_from_payout(
+        user_id=str(trade.user_id),
+        amount=float(trade.crypto_amount),
+        cryptocurrency=trade.symbol,
+        tx_hash=str(payout.tx_hash),
+        network=payout.network
+    )
+
+
 # Instância singleton
 blockchain_deposit_service = BlockchainDepositService()
+
+payout_batch_service.register_handler(PayoutReferenceType.INSTANT_TRADE.value, _complete_trade_from_payout)
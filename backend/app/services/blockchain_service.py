@@ -8,6 +8,10 @@ from typing import Dict, List, Any, Optional, Union
 from decimal import Decimal
 from app.core.config import settings
 from app.services.cache_service import cache_service, cached
+from app.services.balance_cache_service import balance_cache_service
+from app.services.chain_adapters import ChainAdapter, ServiceAdapter, chain_adapters
+from app.services.rpc_pool import RPCEndpointPool, rpc_pools
+from app.services.gas_oracle_service import gas_oracle_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,16 +25,25 @@ class BlockchainService:
         self.polygon_service = PolygonService()
         self.bsc_service = BSCService()
         self.base_service = BaseService()
-        self.tron_service = TronService()
-        self.solana_service = SolanaService()
-        self.litecoin_service = LitecoinService()
-        self.dogecoin_service = DogecoinService()
         self.cardano_service = CardanoService()
         self.avalanche_service = AvalancheService()
-        self.polkadot_service = PolkadotService()
         self.chainlink_service = ChainlinkService()
         self.shiba_service = ShibaService()
-        self.xrp_service = XRPService()
+        
+        # Todas as redes pela mesma interface: adapters assíncronos (não-EVM)
+        # e os serviços acima expostos via ServiceAdapter
+        self.adapters: Dict[str, ChainAdapter] = {
+            "bitcoin": ServiceAdapter("bitcoin", self.bitcoin_service),
+            "ethereum": ServiceAdapter("ethereum", self.ethereum_service, supports_tokens=True),
+            "polygon": ServiceAdapter("polygon", self.polygon_service, supports_tokens=True),
+            "bsc": ServiceAdapter("bsc", self.bsc_service, supports_tokens=True),
+            "base": ServiceAdapter("base", self.base_service, supports_tokens=True),
+            "cardano": ServiceAdapter("cardano", self.cardano_service),
+            "avalanche": ServiceAdapter("avalanche", self.avalanche_service),
+            "chainlink": ServiceAdapter("chainlink", self.chainlink_service),
+            "shiba": ServiceAdapter("shiba", self.shiba_service),
+            **chain_adapters
+        }
     
     async def get_address_balance(
         self, 
@@ -38,54 +51,20 @@ class BlockchainService:
         network: str, 
         include_tokens: bool = False
     ) -> Dict[str, Any]:
-        """Obtém saldo para um endereço em uma rede específica"""
+        """
+        Obtém saldo para um endereço em uma rede específica.
+        
+        Servido pelo balance_cache_service (stale-while-revalidate): o último
+        saldo conhecido volta imediatamente e o refresh acontece em background
+        quando o endereço foi marcado como sujo ou o TTL expirou.
+        """
         try:
-            # Verificar cache primeiro
-            cached_balance = await cache_service.get_balance_cache(address, network)
-            if cached_balance:
-                logger.debug(f"Cache hit para saldo {address} na rede {network}")
-                return cached_balance
-            
-            # Obter saldo da blockchain
-            network_lower = network.lower()
-            
-            if network_lower == "bitcoin":
-                balance_data = await self.bitcoin_service.get_balance(address)
-            elif network_lower == "ethereum":
-                balance_data = await self.ethereum_service.get_balance(address, include_tokens=include_tokens)
-            elif network_lower == "polygon":
-                balance_data = await self.polygon_service.get_balance(address, include_tokens=include_tokens)
-            elif network_lower == "bsc":
-                balance_data = await self.bsc_service.get_balance(address, include_tokens=include_tokens)
-            elif network_lower == "base":
-                balance_data = await self.base_service.get_balance(address, include_tokens=include_tokens)
-            elif network_lower == "tron":
-                balance_data = await self.tron_service.get_balance(address)
-            elif network_lower == "solana":
-                balance_data = await self.solana_service.get_balance(address)
-            elif network_lower == "litecoin":
-                balance_data = await self.litecoin_service.get_balance(address)
-            elif network_lower == "dogecoin":
-                balance_data = await self.dogecoin_service.get_balance(address)
-            elif network_lower == "cardano":
-                balance_data = await self.cardano_service.get_balance(address)
-            elif network_lower == "avalanche":
-                balance_data = await self.avalanche_service.get_balance(address)
-            elif network_lower == "polkadot":
-                balance_data = await self.polkadot_service.get_balance(address)
-            elif network_lower == "chainlink":
-                balance_data = await self.chainlink_service.get_balance(address)
-            elif network_lower == "shiba":
-                balance_data = await self.shiba_service.get_balance(address)
-            elif network_lower == "xrp":
-                balance_data = await self.xrp_service.get_balance(address)
-            else:
-                raise ValueError(f"Rede não suportada: {network}")
-            
-            # Cachear resultado
-            await cache_service.set_balance_cache(address, network, balance_data)
-            
-            return balance_data
+            return await balance_cache_service.get_balance(
+                address,
+                network,
+                lambda: self._fetch_address_balance(address, network, include_tokens),
+                include_tokens=include_tokens
+            )
             
         except Exception as e:
             logger.error(f"Erro ao obter saldo para {address} na rede {network}: {str(e)}")
@@ -96,6 +75,21 @@ class BlockchainService:
                 "error": str(e)
             }
     
+    async def _fetch_address_balance(
+        self,
+        address: str,
+        network: str,
+        include_tokens: bool = False
+    ) -> Dict[str, Any]:
+        """Consulta o saldo diretamente na blockchain (sem cache)"""
+        return await self._adapter(network).balance_payload(address, include_tokens=include_tokens)
+    
+    def _adapter(self, network: str) -> ChainAdapter:
+        adapter = self.adapters.get(network.lower())
+        if adapter is None:
+            raise ValueError(f"Rede não suportada: {network}")
+        return adapter
+    
     async def get_address_transactions(
         self,
         address: str,
@@ -111,16 +105,7 @@ class BlockchainService:
                 return cached_txs[:limit]
             
             # Obter transações da blockchain
-            if network.lower() == "bitcoin":
-                transactions = await self.bitcoin_service.get_transactions(address, limit)
-            elif network.lower() == "ethereum":
-                transactions = await self.ethereum_service.get_transactions(address, limit)
-            elif network.lower() == "polygon":
-                transactions = await self.polygon_service.get_transactions(address, limit)
-            elif network.lower() == "bsc":
-                transactions = await self.bsc_service.get_transactions(address, limit)
-            else:
-                raise ValueError(f"Rede não suportada: {network}")
+            transactions = await self._adapter(network).get_transactions(address, limit=limit)
             
             # Cachear resultado
             await cache_service.set_transaction_cache(address, network, transactions)
@@ -160,13 +145,7 @@ class BlockchainService:
                 return cached_fees
             
             # Obter taxas da blockchain
-            if network.lower() == "bitcoin":
-                fees = await self.bitcoin_service.estimate_fees()
-            elif network.lower() in ["ethereum", "polygon", "bsc"]:
-                service = getattr(self, f"{network.lower()}_service")
-                fees = await service.estimate_fees()
-            else:
-                raise ValueError(f"Rede não suportada: {network}")
+            fees = await self._adapter(network).estimate_fee()
             
             # Cachear resultado
             await cache_service.set_fees_cache(network, fees)
@@ -191,13 +170,11 @@ class BlockchainService:
     ) -> Dict[str, Any]:
         """Broadcast de uma transação assinada."""
         try:
-            if network.lower() == "bitcoin":
-                return await self.bitcoin_service.broadcast_transaction(signed_tx)
-            elif network.lower() in ["ethereum", "polygon", "bsc"]:
-                service = getattr(self, f"{network.lower()}_service")
-                return await service.broadcast_transaction(signed_tx)
-            else:
-                raise ValueError(f"Rede não suportada: {network}")
+            tx_hash = await self._adapter(network).broadcast(signed_tx)
+            return {
+                "transaction_hash": tx_hash,
+                "status": "broadcasted"
+            }
         except Exception as e:
             logger.error(f"Erro ao fazer broadcast na rede {network}: {str(e)}")
             return {
@@ -205,6 +182,27 @@ class BlockchainService:
                 "status": "failed",
                 "error": str(e)
             }
+    
+    def _get_network_currency(self, network: str) -> str:
+        """Retorna a moeda nativa de uma rede."""
+        currency_map = {
+            'bitcoin': 'BTC',
+            'ethereum': 'ETH',
+            'polygon': 'MATIC',
+            'bsc': 'BNB',
+            'base': 'ETH',
+            'tron': 'TRX',
+            'solana': 'SOL',
+            'litecoin': 'LTC',
+            'dogecoin': 'DOGE',
+            'cardano': 'ADA',
+            'avalanche': 'AVAX',
+            'polkadot': 'DOT',
+            'chainlink': 'LINK',
+            'shiba': 'SHIB',
+            'xrp': 'XRP'
+        }
+        return currency_map.get(network.lower(), 'Unknown')
 
 
 class BitcoinService:
@@ -310,8 +308,12 @@ class BitcoinService:
 class EthereumService:
     """Serviço base para redes compatíveis com Ethereum"""
     
-    def __init__(self, rpc_url: Optional[str] = None):
+    def __init__(self, rpc_url: Optional[str] = None, network: str = "ethereum"):
         self.rpc_url = rpc_url or settings.ETHEREUM_RPC_URL
+        self.network = network
+    
+    def _pool(self) -> RPCEndpointPool:
+        return rpc_pools.pool(self.network, self.rpc_url)
     
     async def get_token_balance(self, address: str, token_contract: str, token_decimals: int = 18) -> Decimal:
         """Obtém saldo de um token ERC-20 para um endereço"""
@@ -320,29 +322,18 @@ class EthereumService:
             # balanceOf(address) = 0x70a08231 (selector) + endereço padronizado
             function_selector = "0x70a08231"
             
-            async with httpx.AsyncClient() as client:
-                payload = {
-                    "jsonrpc": "2.0",
-                    "method": "eth_call",
-                    "params": [
-                        {
-                            "to": token_contract,
-                            "data": function_selector + address[2:].zfill(64)
-                        },
-                        "latest"
-                    ],
-                    "id": 1
-                }
-                
-                response = await client.post(self.rpc_url, json=payload, timeout=10.0)
-                response.raise_for_status()
-                
-                result = response.json()
-                if "result" in result and result["result"] != "0x":
-                    balance_wei = int(result["result"], 16)
-                    balance = Decimal(balance_wei) / Decimal(10**token_decimals)
-                    return balance
-                return Decimal('0')
+            result = await self._pool().call("eth_call", [
+                {
+                    "to": token_contract,
+                    "data": function_selector + address[2:].zfill(64)
+                },
+                "latest"
+            ])
+            if result and result != "0x":
+                balance_wei = int(result, 16)
+                balance = Decimal(balance_wei) / Decimal(10**token_decimals)
+                return balance
+            return Decimal('0')
         except Exception as e:
             logger.error(f"Erro ao obter saldo do token {token_contract}: {str(e)}")
             return Decimal('0')
@@ -350,124 +341,107 @@ class EthereumService:
     async def get_balance(self, address: str, include_tokens: bool = False) -> Dict[str, Any]:
         """Obtém saldo ETH de um endereço e opcionalmente tokens USDT/USDC"""
         logger.info(f"🔍 EthereumService.get_balance chamado para {address}, include_tokens={include_tokens}")
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "jsonrpc": "2.0",
-                "method": "eth_getBalance",
-                "params": [address, "latest"],
-                "id": 1
-            }
+        # Leitura crítica: pool com failover (e hedge, se habilitado)
+        result = await self._pool().call("eth_getBalance", [address, "latest"])
+        balance_wei = int(result or "0x0", 16)
+        balance_eth = Decimal(balance_wei) / Decimal(10**18)
+        
+        balance_data = {
+            "native_balance": str(balance_eth),
+            "balance_wei": balance_wei,
+            "network": "ethereum",
+            "token_balances": {}
+        }
+        
+        # Buscar tokens se solicitado
+        if include_tokens:
+            from app.config.token_contracts import USDT_CONTRACTS, USDC_CONTRACTS, SHIB_CONTRACTS, TRAY_CONTRACTS
             
-            response = await client.post(self.rpc_url, json=payload, timeout=10.0)
-            response.raise_for_status()
+            network = self.network
             
-            result = response.json()
-            balance_wei = int(result.get("result", "0x0"), 16)
-            balance_eth = Decimal(balance_wei) / Decimal(10**18)
-            
-            balance_data = {
-                "native_balance": str(balance_eth),
-                "balance_wei": balance_wei,
-                "network": "ethereum",
-                "token_balances": {}
-            }
+            logger.info(f"🔍 Buscando tokens para {address} na rede {network}")
             
-            # Buscar tokens se solicitado
-            if include_tokens:
-                from app.config.token_contracts import USDT_CONTRACTS, USDC_CONTRACTS, SHIB_CONTRACTS, TRAY_CONTRACTS
-                
-                # Detectar rede e buscar tokens
-                network = "ethereum"
-                if "polygon" in self.rpc_url.lower():
-                    network = "polygon"
-                elif "base" in self.rpc_url.lower():
-                    network = "base"
-                elif "bsc" in self.rpc_url.lower():
-                    network = "bsc"
-                
-                logger.info(f"🔍 Buscando tokens para {address} na rede {network}")
-                
-                # Buscar USDT
-                if network in USDT_CONTRACTS:
-                    try:
-                        usdt_contract = USDT_CONTRACTS[network]
-                        logger.info(f"📋 USDT Contract: {usdt_contract['address']}")
-                        usdt_balance = await self.get_token_balance(
-                            address, 
-                            usdt_contract['address'],
-                            usdt_contract.get('decimals', 6)
-                        )
-                        logger.info(f"💰 USDT Balance: {usdt_balance}")
-                        if usdt_balance > 0:
-                            balance_data["token_balances"][usdt_contract['address'].lower()] = {
-                                'symbol': 'USDT',
-                                'balance': str(usdt_balance),
-                                'decimals': usdt_contract.get('decimals', 6)
-                            }
-                            logger.info(f"✅ USDT adicionado: {usdt_balance}")
-                    except Exception as e:
-                        logger.error(f"Erro ao buscar USDT em {network}: {str(e)}", exc_info=True)
-                
-                # Buscar USDC
-                if network in USDC_CONTRACTS:
-                    try:
-                        usdc_contract = USDC_CONTRACTS[network]
-                        logger.info(f"📋 USDC Contract: {usdc_contract['address']}")
-                        usdc_balance = await self.get_token_balance(
-                            address,
-                            usdc_contract['address'],
-                            usdc_contract.get('decimals', 6)
-                        )
-                        if usdc_balance > 0:
-                            balance_data["token_balances"][usdc_contract['address'].lower()] = {
-                                'symbol': 'USDC',
-                                'balance': str(usdc_balance),
-                                'decimals': usdc_contract.get('decimals', 6)
-                            }
-                    except Exception as e:
-                        logger.error(f"Erro ao buscar USDC em {network}: {str(e)}")
-                
-                # Buscar SHIB (Shiba Inu)
-                if network in SHIB_CONTRACTS:
-                    try:
-                        shib_contract = SHIB_CONTRACTS[network]
-                        logger.info(f"📋 SHIB Contract: {shib_contract['address']}")
-                        shib_balance = await self.get_token_balance(
-                            address,
-                            shib_contract['address'],
-                            shib_contract.get('decimals', 18)
-                        )
-                        if shib_balance > 0:
-                            balance_data["token_balances"][shib_contract['address'].lower()] = {
-                                'symbol': 'SHIB',
-                                'balance': str(shib_balance),
-                                'decimals': shib_contract.get('decimals', 18)
-                            }
-                            logger.info(f"✅ SHIB adicionado: {shib_balance}")
-                    except Exception as e:
-                        logger.error(f"Erro ao buscar SHIB em {network}: {str(e)}")
-                
-                # Buscar TRAY (Trayon) - Token na Polygon/QuickSwap
-                if network in TRAY_CONTRACTS:
-                    try:
-                        tray_contract = TRAY_CONTRACTS[network]
-                        logger.info(f"📋 TRAY Contract: {tray_contract['address']}")
-                        tray_balance = await self.get_token_balance(
-                            address,
-                            tray_contract['address'],
-                            tray_contract.get('decimals', 18)
-                        )
-                        if tray_balance > 0:
-                            balance_data["token_balances"][tray_contract['address'].lower()] = {
-                                'symbol': 'TRAY',
-                                'balance': str(tray_balance),
-                                'decimals': tray_contract.get('decimals', 18)
-                            }
-                            logger.info(f"✅ TRAY adicionado: {tray_balance}")
-                    except Exception as e:
-                        logger.error(f"Erro ao buscar TRAY em {network}: {str(e)}")
-            
-            return balance_data
+            # Buscar USDT
+            if network in USDT_CONTRACTS:
+                try:
+                    usdt_contract = USDT_CONTRACTS[network]
+                    logger.info(f"📋 USDT Contract: {usdt_contract['address']}")
+                    usdt_balance = await self.get_token_balance(
+                        address, 
+                        usdt_contract['address'],
+                        usdt_contract.get('decimals', 6)
+                    )
+                    logger.info(f"💰 USDT Balance: {usdt_balance}")
+                    if usdt_balance > 0:
+                        balance_data["token_balances"][usdt_contract['address'].lower()] = {
+                            'symbol': 'USDT',
+                            'balance': str(usdt_balance),
+                            'decimals': usdt_contract.get('decimals', 6)
+                        }
+                        logger.info(f"✅ USDT adicionado: {usdt_balance}")
+                except Exception as e:
+                    logger.error(f"Erro ao buscar USDT em {network}: {str(e)}", exc_info=True)
+            
+            # Buscar USDC
+            if network in USDC_CONTRACTS:
+                try:
+                    usdc_contract = USDC_CONTRACTS[network]
+                    logger.info(f"📋 USDC Contract: {usdc_contract['address']}")
+                    usdc_balance = await self.get_token_balance(
+                        address,
+                        usdc_contract['address'],
+                        usdc_contract.get('decimals', 6)
+                    )
+                    if usdc_balance > 0:
+                        balance_data["token_balances"][usdc_contract['address'].lower()] = {
+                            'symbol': 'USDC',
+                            'balance': str(usdc_balance),
+                            'decimals': usdc_contract.get('decimals', 6)
+                        }
+                except Exception as e:
+                    logger.error(f"Erro ao buscar USDC em {network}: {str(e)}")
+            
+            # Buscar SHIB (Shiba Inu)
+            if network in SHIB_CONTRACTS:
+                try:
+                    shib_contract = SHIB_CONTRACTS[network]
+                    logger.info(f"📋 SHIB Contract: {shib_contract['address']}")
+                    shib_balance = await self.get_token_balance(
+                        address,
+                        shib_contract['address'],
+                        shib_contract.get('decimals', 18)
+                    )
+                    if shib_balance > 0:
+                        balance_data["token_balances"][shib_contract['address'].lower()] = {
+                            'symbol': 'SHIB',
+                            'balance': str(shib_balance),
+                            'decimals': shib_contract.get('decimals', 18)
+                        }
+                        logger.info(f"✅ SHIB adicionado: {shib_balance}")
+                except Exception as e:
+                    logger.error(f"Erro ao buscar SHIB em {network}: {str(e)}")
+            
+            # Buscar TRAY (Trayon) - Token na Polygon/QuickSwap
+            if network in TRAY_CONTRACTS:
+                try:
+                    tray_contract = TRAY_CONTRACTS[network]
+                    logger.info(f"📋 TRAY Contract: {tray_contract['address']}")
+                    tray_balance = await self.get_token_balance(
+                        address,
+                        tray_contract['address'],
+                        tray_contract.get('decimals', 18)
+                    )
+                    if tray_balance > 0:
+                        balance_data["token_balances"][tray_contract['address'].lower()] = {
+                            'symbol': 'TRAY',
+                            'balance': str(tray_balance),
+                            'decimals': tray_contract.get('decimals', 18)
+                        }
+                        logger.info(f"✅ TRAY adicionado: {tray_balance}")
+                except Exception as e:
+                    logger.error(f"Erro ao buscar TRAY em {network}: {str(e)}")
+        
+        return balance_data
     
     async def get_transactions(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -542,29 +516,18 @@ class EthereumService:
             return []
     
     async def estimate_fees(self) -> Dict[str, Any]:
-        """Estima taxas Ethereum"""
-        async with httpx.AsyncClient() as client:
-            # Get gas price
-            payload = {
-                "jsonrpc": "2.0",
-                "method": "eth_gasPrice",
-                "params": [],
-                "id": 1
-            }
-            
-            response = await client.post(self.rpc_url, json=payload)
-            response.raise_for_status()
-            
-            result = response.json()
-            gas_price_wei = int(result.get("result", "0x0"), 16)
-            gas_price_gwei = Decimal(gas_price_wei) / Decimal(10**9)
-            
-            return {
-                "gas_price": str(gas_price_gwei),
-                "gas_limit": 21000,
-                "estimated_fee": str(gas_price_gwei * Decimal(21000) / Decimal(10**9)),
-                "unit": "ETH"
-            }
+        """Estima taxas Ethereum (gas oracle EIP-1559 em memória)"""
+        w3 = rpc_pools.web3(self.network, self.rpc_url)
+        estimate = await asyncio.to_thread(gas_oracle_service.get_estimate, self.network, w3)
+        gas_price_gwei = Decimal(estimate.expected_fee("standard")) / Decimal(10**9)
+        
+        return {
+            "gas_price": str(gas_price_gwei),
+            "gas_limit": 21000,
+            "estimated_fee": str(gas_price_gwei * Decimal(21000) / Decimal(10**9)),
+            "unit": "ETH",
+            **estimate.to_dict()
+        }
     
     async def broadcast_transaction(self, signed_tx: str) -> Dict[str, Any]:
         """Broadcast transação Ethereum"""
@@ -610,7 +573,7 @@ class PolygonService(EthereumService):
     """Serviço específico para Polygon"""
     
     def __init__(self):
-        super().__init__(rpc_url=settings.POLYGON_RPC_URL)
+        super().__init__(rpc_url=settings.POLYGON_RPC_URL, network="polygon")
     
     async def get_balance(self, address: str, include_tokens: bool = False) -> Dict[str, Any]:
         """Obtém saldo MATIC e tokens opcionalmente"""
@@ -623,7 +586,7 @@ class BSCService(EthereumService):
     """Serviço específico para Binance Smart Chain"""
     
     def __init__(self):
-        super().__init__(rpc_url=settings.BSC_RPC_URL)
+        super().__init__(rpc_url=settings.BSC_RPC_URL, network="bsc")
     
     async def get_balance(self, address: str, include_tokens: bool = False) -> Dict[str, Any]:
         """Obtém saldo BNB e tokens opcionalmente"""
@@ -636,7 +599,7 @@ class BaseService(EthereumService):
     """Serviço específico para Base (Layer 2 Ethereum)"""
     
     def __init__(self):
-        super().__init__(rpc_url="https://mainnet.base.org")
+        super().__init__(rpc_url="https://mainnet.base.org", network="base")
     
     async def get_balance(self, address: str, include_tokens: bool = False) -> Dict[str, Any]:
         """Obtém saldo ETH na Base e tokens opcionalmente"""
@@ -645,123 +608,6 @@ class BaseService(EthereumService):
         return result
 
 
-class TronService:
-    """Serviço específico para Tron"""
-    
-    def __init__(self):
-        self.base_url = "https://api.trongrid.io"
-    
-    async def get_balance(self, address: str) -> Dict[str, Any]:
-        """Obtém saldo TRX de um endereço"""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/v1/accounts/{address}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    balance_sun = data.get("data", [{}])[0].get("balance", 0)
-                    balance_trx = Decimal(balance_sun) / Decimal(1_000_000)
-                    
-                    return {
-                        "native_balance": str(balance_trx),
-                        "balance_sun": balance_sun,
-                        "network": "tron"
-                    }
-        except Exception as e:
-            logger.error(f"Erro ao obter saldo Tron: {e}")
-        
-        return {"native_balance": "0", "network": "tron"}
-
-
-class SolanaService:
-    """Serviço específico para Solana"""
-    
-    def __init__(self):
-        self.rpc_url = "https://api.mainnet-beta.solana.com"
-    
-    async def get_balance(self, address: str) -> Dict[str, Any]:
-        """Obtém saldo SOL de um endereço"""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                payload = {
-                    "jsonrpc": "2.0",
-                    "id": 1,
-                    "method": "getBalance",
-                    "params": [address]
-                }
-                
-                response = await client.post(self.rpc_url, json=payload)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    balance_lamports = data.get("result", {}).get("value", 0)
-                    balance_sol = Decimal(balance_lamports) / Decimal(1_000_000_000)
-                    
-                    return {
-                        "native_balance": str(balance_sol),
-                        "balance_lamports": balance_lamports,
-                        "network": "solana"
-                    }
-        except Exception as e:
-            logger.error(f"Erro ao obter saldo Solana: {e}")
-        
-        return {"native_balance": "0", "network": "solana"}
-
-
-class LitecoinService:
-    """Serviço específico para Litecoin"""
-    
-    def __init__(self):
-        self.base_url = "https://api.blockcypher.com/v1/ltc/main"
-    
-    async def get_balance(self, address: str) -> Dict[str, Any]:
-        """Obtém saldo LTC de um endereço"""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/addrs/{address}/balance")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    balance_satoshis = data.get("final_balance", 0)
-                    balance_ltc = Decimal(balance_satoshis) / Decimal(100_000_000)
-                    
-                    return {
-                        "native_balance": str(balance_ltc),
-                        "balance_satoshis": balance_satoshis,
-                        "network": "litecoin"
-                    }
-        except Exception as e:
-            logger.error(f"Erro ao obter saldo Litecoin: {e}")
-        
-        return {"native_balance": "0", "network": "litecoin"}
-
-
-class DogecoinService:
-    """Serviço específico para Dogecoin"""
-    
-    def __init__(self):
-        self.base_url = "https://dogechain.info/api/v1"
-    
-    async def get_balance(self, address: str) -> Dict[str, Any]:
-        """Obtém saldo DOGE de um endereço"""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/address/balance/{address}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    balance_doge = Decimal(str(data.get("balance", 0)))
-                    
-                    return {
-                        "native_balance": str(balance_doge),
-                        "network": "dogecoin"
-                    }
-        except Exception as e:
-            logger.error(f"Erro ao obter saldo Dogecoin: {e}")
-        
-        return {"native_balance": "0", "network": "dogecoin"}
-
-
 class CardanoService:
     """Serviço específico para Cardano"""
     
@@ -795,7 +641,7 @@ class AvalancheService(EthereumService):
     """Serviço específico para Avalanche"""
     
     def __init__(self):
-        super().__init__(rpc_url="https://api.avax.network/ext/bc/C/rpc")
+        super().__init__(rpc_url="https://api.avax.network/ext/bc/C/rpc", network="avalanche")
     
     async def get_balance(self, address: str) -> Dict[str, Any]:
         """Obtém saldo AVAX"""
@@ -804,35 +650,6 @@ class AvalancheService(EthereumService):
         return result
 
 
-class PolkadotService:
-    """Serviço específico para Polkadot"""
-    
-    def __init__(self):
-        self.base_url = "https://polkadot.api.subscan.io/api/scan"
-    
-    async def get_balance(self, address: str) -> Dict[str, Any]:
-        """Obtém saldo DOT de um endereço"""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                payload = {"address": address}
-                response = await client.post(f"{self.base_url}/account", json=payload)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    balance_planck = int(data.get("data", {}).get("balance", 0))
-                    balance_dot = Decimal(balance_planck) / Decimal(10_000_000_000)
-                    
-                    return {
-                        "native_balance": str(balance_dot),
-                        "balance_planck": balance_planck,
-                        "network": "polkadot"
-                    }
-        except Exception as e:
-            logger.error(f"Erro ao obter saldo Polkadot: {e}")
-        
-        return {"native_balance": "0", "network": "polkadot"}
-
-
 class ChainlinkService(EthereumService):
     """Serviço específico para Chainlink (ERC-20 token na Ethereum)"""
     
@@ -897,62 +714,5 @@ class ShibaService(EthereumService):
             return {"native_balance": "0", "network": "shiba"}
 
 
-class XRPService:
-    """Serviço específico para XRP (Ripple)"""
-    
-    def __init__(self):
-        self.rpc_url = "https://s1.ripple.com:51234"
-    
-    async def get_balance(self, address: str) -> Dict[str, Any]:
-        """Obtém saldo XRP de um endereço"""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                payload = {
-                    "method": "account_info",
-                    "params": [{
-                        "account": address,
-                        "ledger_index": "current"
-                    }]
-                }
-                
-                response = await client.post(self.rpc_url, json=payload)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    balance_drops = int(data.get("result", {}).get("account_data", {}).get("Balance", 0))
-                    balance_xrp = Decimal(balance_drops) / Decimal(1_000_000)
-                    
-                    return {
-                        "native_balance": str(balance_xrp),
-                        "balance_drops": balance_drops,
-                        "network": "xrp"
-                    }
-        except Exception as e:
-            logger.error(f"Erro ao obter saldo XRP: {e}")
-        
-        return {"native_balance": "0", "network": "xrp"}
-    
-    def _get_network_currency(self, network: str) -> str:
-        """Retorna a moeda nativa de uma rede."""
-        currency_map = {
-            'bitcoin': 'BTC',
-            'ethereum': 'ETH',
-            'polygon': 'MATIC',
-            'bsc': 'BNB',
-            'base': 'ETH',
-            'tron': 'TRX',
-            'solana': 'SOL',
-            'litecoin': 'LTC',
-            'dogecoin': 'DOGE',
-            'cardano': 'ADA',
-            'avalanche': 'AVAX',
-            'polkadot': 'DOT',
-            'chainlink': 'LINK',
-            'shiba': 'SHIB',
-            'xrp': 'XRP'
-        }
-        return currency_map.get(network.lower(), 'Unknown')
-
-
 # Instância global do serviço
 blockchain_service = BlockchainService()
@@ -29,6 +29,9 @@ from app.models.instant_trade import InstantTrade, TradeStatus
 from app.services.crypto_service import CryptoService
 from app.core.config import settings
 from app.services.gas_sponsor_service import gas_sponsor_service
+from app.services.nonce_manager import nonce_manager
+from app.services.rpc_pool import rpc_pools
+from app.services.gas_oracle_service import gas_oracle_service
 
 logger = logging.getLogger(__name__)
 
@@ -145,7 +148,7 @@ class BlockchainWithdrawService:
                 logger.error(f"❌ Rede não suportada: {network}")
                 return None
             
-            w3 = Web3(Web3.HTTPProvider(config["rpc_url"]))
+            w3 = rpc_pools.web3(network, config["rpc_url"])
             if not w3.is_connected():
                 logger.error(f"❌ Não conectou à rede {network}")
                 return None
@@ -309,29 +312,20 @@ class BlockchainWithdrawService:
             # Converte amount para Wei
             amount_wei = w3.to_wei(float(amount), 'ether')
             
-            # Busca nonce
-            nonce = w3.eth.get_transaction_count(Web3.to_checksum_address(from_address))
+            # Fees EIP-1559 do gas oracle (em memória)
+            fee_fields = gas_oracle_service.tx_fee_fields(network, w3=w3)
             
-            # Busca gas price
-            gas_price = w3.eth.gas_price
-            
-            # Cria transação
+            # Cria transação (nonce alocado pelo nonce_manager)
             transaction = {
-                'nonce': nonce,
                 'to': Web3.to_checksum_address(to_address),
                 'value': amount_wei,
                 'gas': config["gas_limit"],
-                'gasPrice': gas_price,
+                **fee_fields,
                 'chainId': config["chain_id"]
             }
             
-            # Assina transação com a chave do USUÁRIO
-            signed_txn = w3.eth.account.sign_transaction(transaction, private_key)
-            
-            # Envia transação (compatível com diferentes versões do web3.py)
-            raw_tx = getattr(signed_txn, 'rawTransaction', None) or getattr(signed_txn, 'raw_transaction', None)
-            tx_hash = w3.eth.send_raw_transaction(raw_tx)
-            tx_hash_hex = w3.to_hex(tx_hash)
+            # Assina com a chave do USUÁRIO e envia
+            tx_hash_hex = nonce_manager.send_transaction(w3, transaction, private_key, sender=from_address)
             
             logger.info(f"✅ Token nativo transferido! TX: {tx_hash_hex}")
             return tx_hash_hex
@@ -371,31 +365,22 @@ class BlockchainWithdrawService:
             # Converte amount considerando decimals
             amount_units = int(float(amount) * (10 ** decimals))
             
-            # Busca nonce
-            nonce = w3.eth.get_transaction_count(Web3.to_checksum_address(from_address))
+            # Fees EIP-1559 do gas oracle (em memória)
+            fee_fields = gas_oracle_service.tx_fee_fields(network, w3=w3)
             
-            # Busca gas price
-            gas_price = w3.eth.gas_price
-            
-            # Cria transação de transfer
+            # Cria transação de transfer (nonce alocado pelo nonce_manager)
             transaction = contract.functions.transfer(
                 Web3.to_checksum_address(to_address),
                 amount_units
             ).build_transaction({
                 'from': Web3.to_checksum_address(from_address),
-                'nonce': nonce,
                 'gas': 100000,  # Gas limit maior para ERC20
-                'gasPrice': gas_price,
+                **fee_fields,
                 'chainId': config["chain_id"]
             })
             
-            # Assina transação com a chave do USUÁRIO
-            signed_txn = w3.eth.account.sign_transaction(transaction, private_key)
-            
-            # Envia transação (compatível com diferentes versões do web3.py)
-            raw_tx = getattr(signed_txn, 'rawTransaction', None) or getattr(signed_txn, 'raw_transaction', None)
-            tx_hash = w3.eth.send_raw_transaction(raw_tx)
-            tx_hash_hex = w3.to_hex(tx_hash)
+            # Assina com a chave do USUÁRIO e envia
+            tx_hash_hex = nonce_manager.send_transaction(w3, transaction, private_key, sender=from_address)
             
             logger.info(f"✅ Token ERC20 transferido! TX: {tx_hash_hex}")
             return tx_hash_hex
@@ -590,7 +575,7 @@ class BlockchainWithdrawService:
             if contract_address is None:
                 # Token nativo (ETH, MATIC) - PRECISA RESERVAR GAS!
                 # Calcula quanto gas vai custar a transação
-                gas_price_wei = w3.eth.gas_price
+                gas_price_wei = gas_oracle_service.get_estimate(network, w3).max_fee()
                 gas_cost_wei = gas_price_wei * config["gas_limit"]
                 gas_cost = Decimal(str(w3.from_wei(gas_cost_wei, 'ether')))
                 gas_cost_with_margin = gas_cost * Decimal("1.5")  # 50% margem de segurança
@@ -888,7 +873,7 @@ class BlockchainWithdrawService:
             
             if contract_address is None:
                 # Token nativo - reserva gas
-                gas_price_wei = w3.eth.gas_price
+                gas_price_wei = gas_oracle_service.get_estimate(network, w3).max_fee()
                 gas_cost_wei = gas_price_wei * config["gas_limit"]
                 gas_cost = Decimal(str(w3.from_wei(gas_cost_wei, 'ether')))
                 gas_cost_with_margin = gas_cost * Decimal("1.5")
@@ -1093,7 +1078,7 @@ class BlockchainWithdrawService:
             
             if contract_address is None:
                 # Token nativo
-                gas_price_wei = w3.eth.gas_price
+                gas_price_wei = gas_oracle_service.get_estimate(network, w3).max_fee()
                 gas_limit = config.get("gas_limit", 21000)
                 gas_cost_wei = gas_price_wei * gas_limit
                 gas_cost = Decimal(str(w3.from_wei(gas_cost_wei, 'ether')))
@@ -20,6 +20,12 @@ from dataclasses import dataclass
 
 from app.core.config import settings
 from app.core.exceptions import BlockchainError
+from app.services.utxo_service import (
+    InsufficientFundsError,
+    script_pubkey_for_address,
+    select_coins,
+    utxo_cache,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +51,7 @@ class UTXO:
     vout: int
     value: int  # em satoshis
     script_pubkey: str = ""
+    confirmed: bool = True
 
 
 @dataclass
@@ -55,6 +62,7 @@ class BTCTransactionResult:
     error: Optional[str] = None
     fee_paid: int = 0  # em satoshis
     explorer_url: Optional[str] = None
+    broadcast_attempted: bool = False  # falha depois disso é incerta (a TX pode estar na rede)
 
 
 class BTCService:
@@ -210,18 +218,21 @@ class BTCService:
             
             utxos_data = response.json()
             
+            # scriptPubKey é o mesmo para todos os UTXOs do endereço: deriva localmente
+            try:
+                script_pubkey = script_pubkey_for_address(address, 'testnet' if self.testnet else 'bitcoin')
+            except ValueError:
+                script_pubkey = None
+            
             utxos = []
             for utxo in utxos_data:
                 # Só usar UTXOs confirmados
                 if utxo.get('status', {}).get('confirmed', False):
-                    # Buscar script_pubkey da transação original
-                    script_pubkey = self._get_utxo_script(utxo['txid'], utxo['vout'])
-                    
                     utxos.append(UTXO(
                         txid=utxo['txid'],
                         vout=utxo['vout'],
                         value=utxo['value'],
-                        script_pubkey=script_pubkey
+                        script_pubkey=script_pubkey or self._get_utxo_script(utxo['txid'], utxo['vout'])
                     ))
             
             logger.info(f"📦 Found {len(utxos)} UTXOs for {address[:10]}...")
@@ -231,10 +242,20 @@ class BTCService:
             logger.error(f"❌ Error fetching UTXOs: {e}")
             raise BlockchainError(f"Falha ao consultar UTXOs: {str(e)}")
     
+    def get_cached_utxos(self, address: str, max_age: Optional[int] = None) -> List[UTXO]:
+        """UTXOs do cache incremental (consulta a API só quando o cache está velho)"""
+        return utxo_cache.get(self._cache_network, address, lambda: self.get_utxos(address), max_age)
+    
+    @property
+    def _cache_network(self) -> str:
+        return 'testnet' if self.testnet else 'bitcoin'
+    
     def _get_utxo_script(self, txid: str, vout: int) -> str:
         """
         Busca o scriptPubKey de um UTXO específico.
         
+        Usado apenas quando o tipo do endereço não permite derivar o script localmente.
+        
         Args:
             txid: Hash da transação
             vout: Índice do output
@@ -316,34 +337,72 @@ class BTCService:
         Returns:
             BTCTransactionResult com resultado da transação
         """
-        try:
-            logger.info(f"🔶 Iniciando envio BTC: {amount_btc} BTC")
-            
-            # SEGURANÇA: Validar endereço de destino antes de prosseguir
-            if not self.validate_address(to_address):
-                return BTCTransactionResult(
-                    success=False,
-                    error=f"Endereço de destino inválido: {to_address[:10]}..."
-                )
-            
-            # SEGURANÇA: Validar valor mínimo (dust limit)
-            if amount_btc < 0.00000546:
-                return BTCTransactionResult(
-                    success=False,
-                    error="Valor abaixo do limite mínimo (dust limit: 546 satoshis)"
-                )
+        logger.info(f"🔶 Iniciando envio BTC: {amount_btc} BTC")
+        
+        # SEGURANÇA: Validar valor mínimo (dust limit)
+        if amount_btc < 0.00000546:
+            return BTCTransactionResult(
+                success=False,
+                error="Valor abaixo do limite mínimo (dust limit: 546 satoshis)"
+            )
+        
+        # Converter para satoshis
+        amount_satoshis = int(Decimal(str(amount_btc)) * SATOSHI)
+        
+        return await self.send_btc_many(
+            from_address=from_address,
+            outputs=[(to_address, amount_satoshis)],
+            private_key_wif=private_key_wif,
+            fee_level=fee_level
+        )
+    
+    async def send_btc_many(
+        self,
+        from_address: str,
+        outputs: List[Tuple[str, int]],
+        private_key_wif: str,
+        fee_level: str = 'hour'
+    ) -> BTCTransactionResult:
+        """
+        Envia Bitcoin para vários destinos em uma única transação (payouts em lote).
+        
+        Args:
+            from_address: Endereço de origem
+            outputs: Lista de (endereço_destino, valor_em_satoshis)
+            private_key_wif: Private key em formato WIF
+            fee_level: 'fastest', 'half_hour', 'hour', 'economy'
             
-            # Converter para satoshis
-            amount_satoshis = int(Decimal(str(amount_btc)) * SATOSHI)
+        Returns:
+            BTCTransactionResult com resultado da transação
+        """
+        broadcast_attempted = False
+        try:
+            if not outputs:
+                return BTCTransactionResult(success=False, error="Nenhum destino informado")
+            
+            # SEGURANÇA: Validar endereços e valores antes de prosseguir
+            for to_address, amount_satoshis in outputs:
+                if not self.validate_address(to_address):
+                    return BTCTransactionResult(
+                        success=False,
+                        error=f"Endereço de destino inválido: {to_address[:10]}..."
+                    )
+                if amount_satoshis < 546:
+                    return BTCTransactionResult(
+                        success=False,
+                        error="Valor abaixo do limite mínimo (dust limit: 546 satoshis)"
+                    )
+            
+            total_satoshis = sum(amount for _, amount in outputs)
             
             # Obter fee rate
             fees = self.get_recommended_fees()
             fee_rate = fees.get(fee_level, fees['hour'])
             
-            logger.info(f"💰 Fee rate: {fee_rate} sat/vByte")
+            logger.info(f"💰 Fee rate: {fee_rate} sat/vByte ({len(outputs)} destino(s))")
             
-            # Obter UTXOs
-            utxos = self.get_utxos(from_address)
+            # Obter UTXOs (cache incremental)
+            utxos = self.get_cached_utxos(from_address)
             if not utxos:
                 return BTCTransactionResult(
                     success=False,
@@ -354,31 +413,35 @@ class BTCService:
             total_available = sum(u.value for u in utxos)
             logger.info(f"📦 Total disponível: {total_available} satoshis ({total_available / SATOSHI} BTC)")
             
-            # Estimar tamanho da transação (P2PKH: ~148 bytes por input, ~34 por output)
-            estimated_size = len(utxos) * 148 + 2 * 34 + 10
-            estimated_fee = estimated_size * fee_rate
-            
-            # Garantir fee mínimo
-            if estimated_fee < 250:
-                estimated_fee = 250
-            
-            logger.info(f"📊 Fee estimado: {estimated_fee} satoshis")
-            
-            # Verificar saldo suficiente
-            if total_available < amount_satoshis + estimated_fee:
-                deficit = (amount_satoshis + estimated_fee - total_available) / SATOSHI
+            # Seleção de moedas: menor fee/troco em vez de gastar todos os UTXOs
+            try:
+                selection = select_coins(
+                    utxos,
+                    target=total_satoshis,
+                    fee_rate=fee_rate,
+                    n_outputs=len(outputs),
+                    min_fee=250  # Garantir fee mínimo
+                )
+            except InsufficientFundsError:
+                estimated_fee = max((len(utxos) * 148 + (len(outputs) + 1) * 34 + 10) * fee_rate, 250)
+                deficit = max(total_satoshis + estimated_fee - total_available, 0) / SATOSHI
                 return BTCTransactionResult(
                     success=False,
                     error=f"Saldo insuficiente. Faltam {deficit:.8f} BTC (incluindo taxa de {estimated_fee} satoshis)"
                 )
             
-            # Usar bitcoinlib Wallet para criar transação
+            estimated_fee = selection.fee
+            logger.info(
+                f"📊 Fee estimado: {estimated_fee} satoshis "
+                f"({len(selection.inputs)}/{len(utxos)} UTXOs, {selection.algorithm}, troco {selection.change})"
+            )
+            
+            # Usar bitcoinlib para criar transação
             raw_tx = self._create_and_sign_transaction(
                 from_address=from_address,
-                to_address=to_address,
-                amount_satoshis=amount_satoshis,
+                outputs=outputs,
                 private_key_wif=private_key_wif,
-                utxos=utxos,
+                utxos=selection.inputs,
                 fee_satoshis=estimated_fee
             )
             
@@ -391,12 +454,25 @@ class BTCService:
             logger.info(f"📝 Transação criada: {len(raw_tx)} caracteres hex")
             
             # Broadcast via API gratuita
+            broadcast_attempted = True
             tx_hash = await self._broadcast_transaction(raw_tx)
             
             if tx_hash:
                 explorer_url = f"{self.explorer_base}/{tx_hash}"
                 logger.info(f"✅ BTC enviado! TX: {tx_hash}")
                 
+                # Atualiza o cache: inputs gastos saem, troco (último output) entra
+                change_utxos = []
+                if selection.change > 546:
+                    change_utxos.append(UTXO(
+                        txid=tx_hash,
+                        vout=len(outputs),
+                        value=selection.change,
+                        script_pubkey=selection.inputs[0].script_pubkey,
+                        confirmed=False
+                    ))
+                utxo_cache.apply_spend(self._cache_network, from_address, selection.inputs, change_utxos)
+                
                 return BTCTransactionResult(
                     success=True,
                     tx_hash=tx_hash,
@@ -404,23 +480,26 @@ class BTCService:
                     explorer_url=explorer_url
                 )
             else:
+                # Algum input pode já ter sido gasto: reconsulta na próxima
+                utxo_cache.invalidate(self._cache_network, from_address)
                 return BTCTransactionResult(
                     success=False,
-                    error="Falha ao transmitir transação para a rede"
+                    error="Falha ao transmitir transação para a rede",
+                    broadcast_attempted=True
                 )
                 
         except Exception as e:
             logger.error(f"❌ Error sending BTC: {e}")
             return BTCTransactionResult(
                 success=False,
-                error=f"Erro ao enviar Bitcoin: {str(e)}"
+                error=f"Erro ao enviar Bitcoin: {str(e)}",
+                broadcast_attempted=broadcast_attempted
             )
     
     def _create_and_sign_transaction(
         self,
         from_address: str,
-        to_address: str,
-        amount_satoshis: int,
+        outputs: List[Tuple[str, int]],
         private_key_wif: str,
         utxos: List[UTXO],
         fee_satoshis: int
@@ -448,6 +527,7 @@ class BTCService:
             
             # Calcular total disponível
             total_input = sum(u.value for u in utxos)
+            amount_satoshis = sum(amount for _, amount in outputs)
             change_amount = total_input - amount_satoshis - fee_satoshis
             
             logger.info(f"📊 Total input: {total_input}, amount: {amount_satoshis}, fee: {fee_satoshis}, change: {change_amount}")
@@ -472,9 +552,10 @@ class BTCService:
                 )
                 logger.info(f"  ➕ Input: {utxo.txid[:16]}...:{utxo.vout} = {utxo.value} sats")
             
-            # Adicionar output para destinatário
-            tx.add_output(amount_satoshis, to_address)
-            logger.info(f"  ➡️ Output: {to_address[:16]}... = {amount_satoshis} sats")
+            # Adicionar output para cada destinatário
+            for to_address, output_amount in outputs:
+                tx.add_output(output_amount, to_address)
+                logger.info(f"  ➡️ Output: {to_address[:16]}... = {output_amount} sats")
             
             # Adicionar output de troco (se houver e for maior que dust limit)
             if change_amount > 546:
@@ -0,0 +1,199 @@
+"""
+🏭 HOLD Wallet - Bulk Address Derivation
+========================================
+
+Geração de endereços em lote para criação de carteiras e backfills.
+
+- A seed (PBKDF2 do mnemonic) é calculada uma única vez por carteira
+- O caminho BIP44 é percorrido uma vez por coin type (as redes EVM
+  compartilham m/44'/60'/...) via CryptoService.derive_network_addresses
+- Backfills distribuem as carteiras num pool de processos (a derivação é
+  CPU-bound e o GIL serializaria threads)
+- Os endereços são gravados com um único bulk insert por lote
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.address import Address
+from app.services.address_index_service import watched_addresses, OwnerType
+from app.services.crypto_service import crypto_service
+
+logger = logging.getLogger(__name__)
+
+# Redes suportadas pela carteira multi
+ALL_NETWORKS = [
+    "bitcoin", "ethereum", "polygon", "bsc", "base",
+    "tron", "solana", "litecoin", "dogecoin", "cardano",
+    "avalanche", "polkadot", "chainlink", "shiba", "xrp"
+]
+
+DerivedAddresses = Dict[str, Dict[str, Any]]  # rede -> dados do endereço
+WalletJob = Tuple[Any, str, Sequence[str]]  # (wallet_id, encrypted_seed, redes)
+
+
+def derive_wallet_addresses(
+    encrypted_seed: str,
+    networks: Sequence[str],
+    passphrase: str = "",
+    address_index: int = 0
+) -> DerivedAddresses:
+    """Deriva os endereços (índice receiving `address_index`) de várias redes de uma carteira"""
+    mnemonic = crypto_service.decrypt_data(encrypted_seed)
+    seed = crypto_service.mnemonic_to_seed(mnemonic, passphrase)
+    master_keys = crypto_service.derive_master_keys(seed)
+    return crypto_service.derive_network_addresses(
+        bip32=master_keys["bip32"],
+        networks=list(networks),
+        address_index=address_index,
+        seed=seed
+    )
+
+
+def _init_worker():
+    # Um log por endereço derivado é ruído num backfill de milhares de carteiras
+    logging.getLogger("app.services.crypto_service").setLevel(logging.ERROR)
+
+
+def _derive_job(job: WalletJob) -> Tuple[Any, DerivedAddresses, Optional[str]]:
+    """Executado nos processos do pool; o mnemonic só é decifrado dentro do worker"""
+    wallet_id, encrypted_seed, networks = job
+    try:
+        return wallet_id, derive_wallet_addresses(encrypted_seed, networks), None
+    except Exception as e:
+        return wallet_id, {}, str(e)
+
+
+class BulkAddressService:
+    """Derivação de endereços de várias redes/carteiras e gravação em lote"""
+
+    PARALLEL_MIN_WALLETS = 32  # abaixo disso o custo de subir o pool não compensa
+    CHUNK_SIZE = 16
+
+    def derive_many(
+        self,
+        jobs: Iterable[WalletJob],
+        workers: Optional[int] = None
+    ) -> Dict[Any, DerivedAddresses]:
+        """
+        Deriva os endereços de várias carteiras.
+
+        A partir de PARALLEL_MIN_WALLETS carteiras (e workers > 1) usa um
+        pool de processos. Carteiras com erro são logadas e ficam de fora.
+        """
+        jobs = list(jobs)
+        workers = workers or os.cpu_count() or 1
+
+        if workers > 1 and len(jobs) >= self.PARALLEL_MIN_WALLETS:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                outcomes = list(pool.map(_derive_job, jobs, chunksize=self.CHUNK_SIZE))
+        else:
+            outcomes = [_derive_job(job) for job in jobs]
+
+        derived: Dict[Any, DerivedAddresses] = {}
+        for wallet_id, addresses, error in outcomes:
+            if error:
+                logger.error(f"❌ Erro derivando endereços da carteira {wallet_id}: {error}")
+                continue
+            derived[wallet_id] = addresses
+        return derived
+
+    def insert_addresses(
+        self,
+        db: Session,
+        derived: Dict[Any, DerivedAddresses],
+        owners: Optional[Dict[Any, Any]] = None
+    ) -> int:
+        """
+        Grava os endereços derivados com um único bulk insert.
+
+        Pares (carteira, rede) já existentes são ignorados (uq_wallet_network).
+        `owners` (wallet_id -> user_id) registra os endereços no índice de
+        endereços monitorados.
+        """
+        if not derived:
+            return 0
+
+        existing = set(
+            db.query(Address.wallet_id, Address.network).filter(
+                Address.wallet_id.in_(list(derived))
+            ).all()
+        )
+
+        rows: List[Dict[str, Any]] = []
+        for wallet_id, addresses in derived.items():
+            for network, data in addresses.items():
+                if (wallet_id, network) in existing:
+                    continue
+                rows.append({
+                    "wallet_id": wallet_id,
+                    "address": data["address"],
+                    "network": network,
+                    "address_type": "change" if data.get("change") else "receiving",
+                    "derivation_index": data.get("address_index", 0),
+                    "encrypted_private_key": data["private_key_encrypted"],
+                    "derivation_path": data["derivation_path"],
+                    "is_active": True
+                })
+
+        if not rows:
+            return 0
+
+        try:
+            db.bulk_insert_mappings(Address, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        if owners:
+            for row in rows:
+                watched_addresses.add(
+                    row["network"], row["address"], OwnerType.USER_WALLET,
+                    row["wallet_id"], owners.get(row["wallet_id"])
+                )
+
+        logger.info(f"🏭 {len(rows)} endereços gravados para {len(derived)} carteiras")
+        return len(rows)
+
+    def backfill(
+        self,
+        db: Session,
+        wallets: Sequence[Any],
+        networks: Sequence[str] = ALL_NETWORKS,
+        workers: Optional[int] = None
+    ) -> int:
+        """Deriva e grava as redes que faltam em cada carteira; retorna quantos endereços foram criados"""
+        if not wallets:
+            return 0
+
+        existing: Dict[Any, set] = {}
+        for wallet_id, network in db.query(Address.wallet_id, Address.network).filter(
+            Address.wallet_id.in_([w.id for w in wallets])
+        ).all():
+            existing.setdefault(wallet_id, set()).add(network)
+
+        jobs: List[WalletJob] = []
+        for wallet in wallets:
+            missing = [n for n in networks if n not in existing.get(wallet.id, set())]
+            if missing and wallet.encrypted_seed:
+                jobs.append((wallet.id, str(wallet.encrypted_seed), missing))
+
+        if not jobs:
+            return 0
+
+        logger.info(f"🏭 Derivando endereços de {len(jobs)} carteiras")
+        derived = self.derive_many(jobs, workers=workers)
+        owners = {w.id: w.user_id for w in wallets}
+        return self.insert_addresses(db, derived, owners)
+
+
+# Instância global
+bulk_address_service = BulkAddressService()
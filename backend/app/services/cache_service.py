@@ -4,7 +4,7 @@ Cache Service - Sistema de cache Redis para performance
 import redis
 import json
 import asyncio
-from typing import Any, Optional, Union
+from typing import Any, List, Optional, Union
 from datetime import timedelta
 from app.core.config import settings
 import logging
@@ -69,6 +69,20 @@ class CacheService:
             logger.error(f"Erro ao obter cache key '{key}': {e}")
             return None
     
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Obtém vários valores do cache em um único round-trip (MGET)
+        """
+        if not self.is_connected() or not keys:
+            return [None] * len(keys)
+        
+        try:
+            values = await asyncio.to_thread(self.redis_client.mget, keys)
+            return [json.loads(value) if value else None for value in values]
+        except Exception as e:
+            logger.error(f"Erro ao obter cache keys {keys}: {e}")
+            return [None] * len(keys)
+    
     async def set(
         self, 
         key: str, 
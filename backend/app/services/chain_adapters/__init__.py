@@ -0,0 +1,56 @@
+"""
+🔌 Chain Adapters
+=================
+
+Interface assíncrona comum por rede (saldo, token, histórico, fee,
+broadcast) com clientes HTTP em pool.
+"""
+
+from typing import Dict, Optional
+
+from .base import ChainAdapter, ChainRPCError, HTTPClientPool, JsonRpcAdapter, ServiceAdapter, http_pool
+from .polkadot import PolkadotAdapter
+from .solana import SolanaAdapter
+from .tron import TronAdapter
+from .utxo import BlockcypherAdapter, dogecoin_adapter, litecoin_adapter
+from .xrp import XRPAdapter
+
+# Instâncias globais
+solana_adapter = SolanaAdapter()
+tron_adapter = TronAdapter()
+xrp_adapter = XRPAdapter()
+ltc_adapter = litecoin_adapter()
+doge_adapter = dogecoin_adapter()
+polkadot_adapter = PolkadotAdapter()
+
+chain_adapters: Dict[str, ChainAdapter] = {
+    adapter.network: adapter
+    for adapter in (solana_adapter, tron_adapter, xrp_adapter, ltc_adapter, doge_adapter, polkadot_adapter)
+}
+
+
+def get_adapter(network: str) -> Optional[ChainAdapter]:
+    return chain_adapters.get(network.lower())
+
+
+__all__ = [
+    "ChainAdapter",
+    "ChainRPCError",
+    "HTTPClientPool",
+    "JsonRpcAdapter",
+    "ServiceAdapter",
+    "http_pool",
+    "SolanaAdapter",
+    "TronAdapter",
+    "XRPAdapter",
+    "BlockcypherAdapter",
+    "PolkadotAdapter",
+    "solana_adapter",
+    "tron_adapter",
+    "xrp_adapter",
+    "ltc_adapter",
+    "doge_adapter",
+    "polkadot_adapter",
+    "chain_adapters",
+    "get_adapter",
+]
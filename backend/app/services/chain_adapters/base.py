@@ -0,0 +1,245 @@
+"""
+🔌 Chain Adapter - Interface Comum
+==================================
+
+Interface assíncrona única para redes não-EVM (saldo, saldo de token,
+histórico, estimativa de fee e broadcast) sobre um pool de clientes
+httpx compartilhado - nenhuma chamada bloqueia o event loop.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import weakref
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+
+from app.core.exceptions import BlockchainError
+
+logger = logging.getLogger(__name__)
+
+
+class ChainRPCError(BlockchainError):
+    """Erro de RPC/API de uma rede"""
+
+
+class HTTPClientPool:
+    """
+    Um httpx.AsyncClient por event loop (keep-alive e limite de conexões
+    compartilhados entre todos os adapters).
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 20, timeout: float = 10.0):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive
+        )
+        self._timeout = httpx.Timeout(timeout)
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+
+# Instância global
+http_pool = HTTPClientPool()
+
+
+def chunked(items: Sequence, size: int) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ChainAdapter:
+    """
+    Base dos adapters por rede.
+
+    Subclasses implementam get_balance / get_transactions / estimate_fee /
+    broadcast; get_balances e get_token_balance podem ser sobrescritos
+    quando a API oferece consulta em lote.
+    """
+
+    network: str = ""
+    symbol: str = ""
+    decimals: int = 0
+    max_concurrency: int = 10
+    # Tokens incluídos em balance_payload(include_tokens=True): símbolo -> (id do token, decimais)
+    default_tokens: Dict[str, Tuple[str, int]] = {}
+
+    def __init__(self, base_url: str, client: Optional[httpx.AsyncClient] = None):
+        self.base_url = base_url.rstrip("/")
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or http_pool.client()
+
+    def from_units(self, value: Any, decimals: Optional[int] = None) -> Decimal:
+        decimals = self.decimals if decimals is None else decimals
+        return Decimal(str(value or 0)) / (Decimal(10) ** decimals)
+
+    def _url(self, path: str) -> str:
+        if path.startswith("http"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}" if path else self.base_url
+
+    async def get(self, path: str = "", **params) -> Any:
+        """GET JSON; levanta ChainRPCError em status != 2xx"""
+        try:
+            response = await self.client.get(self._url(path), params=params or None)
+        except httpx.HTTPError as e:
+            raise ChainRPCError(f"{self.network}: {e}") from e
+        if response.status_code >= 300:
+            raise ChainRPCError(f"{self.network}: HTTP {response.status_code} {response.text[:200]}")
+        return response.json()
+
+    async def post(self, path: str = "", payload: Any = None, timeout: Optional[float] = None) -> httpx.Response:
+        """POST cru (quem chama decide como tratar o status)"""
+        try:
+            kwargs = {"json": payload}
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+            return await self.client.post(self._url(path), **kwargs)
+        except httpx.HTTPError as e:
+            raise ChainRPCError(f"{self.network}: {e}") from e
+
+    async def post_json(self, path: str = "", payload: Any = None) -> Any:
+        response = await self.post(path, payload)
+        if response.status_code >= 300:
+            raise ChainRPCError(f"{self.network}: HTTP {response.status_code} {response.text[:200]}")
+        return response.json()
+
+    # ------------------------------------------------------------------
+    # Interface
+    # ------------------------------------------------------------------
+
+    async def get_balance(self, address: str) -> Decimal:
+        raise NotImplementedError
+
+    async def get_balances(self, addresses: Sequence[str]) -> Dict[str, Decimal]:
+        """Saldos de vários endereços (padrão: consultas concorrentes limitadas)"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(address: str) -> Tuple[str, Decimal]:
+            async with semaphore:
+                return address, await self.get_balance(address)
+
+        return dict(await asyncio.gather(*(one(a) for a in addresses)))
+
+    async def get_token_balance(self, address: str, token: str) -> Decimal:
+        raise NotImplementedError(f"{self.network} não suporta tokens")
+
+    async def get_transactions(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def estimate_fee(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def broadcast(self, signed_tx: str) -> str:
+        """Transmite uma transação assinada e retorna o hash"""
+        raise NotImplementedError
+
+    async def balance_payload(self, address: str, include_tokens: bool = False) -> Dict[str, Any]:
+        """Formato usado por BlockchainService.get_address_balance"""
+        payload: Dict[str, Any] = {
+            "native_balance": str(await self.get_balance(address)),
+            "network": self.network
+        }
+        if include_tokens and self.default_tokens:
+            # Mesmo formato das redes EVM: {id do token: {symbol, balance, decimals}}
+            balances = await asyncio.gather(
+                *(self.get_token_balance(address, token) for token, _ in self.default_tokens.values()),
+                return_exceptions=True
+            )
+            payload["token_balances"] = {
+                token: {"symbol": symbol, "balance": str(balance), "decimals": decimals}
+                for (symbol, (token, decimals)), balance in zip(self.default_tokens.items(), balances)
+                if not isinstance(balance, Exception)
+            }
+        return payload
+
+
+class JsonRpcAdapter(ChainAdapter):
+    """Adapter sobre JSON-RPC 2.0 (com suporte a batch)"""
+
+    async def rpc(self, method: str, params: Optional[list] = None) -> Any:
+        data = await self.post_json("", {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []})
+        if data.get("error"):
+            raise ChainRPCError(f"{self.network} {method}: {data['error']}")
+        return data.get("result")
+
+    async def rpc_batch(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        """Várias chamadas em uma única requisição HTTP (resultados na ordem das chamadas)"""
+        if not calls:
+            return []
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        data = await self.post_json("", payload)
+        by_id = {item.get("id"): item for item in data}
+        results = []
+        for i, (method, _) in enumerate(calls):
+            item = by_id.get(i, {})
+            if item.get("error") or "result" not in item:
+                raise ChainRPCError(f"{self.network} {method}: {item.get('error', 'sem resposta')}")
+            results.append(item["result"])
+        return results
+
+
+class ServiceAdapter(ChainAdapter):
+    """
+    Expõe um serviço assíncrono já existente (BitcoinService, EthereumService...)
+    pela mesma interface, para que BlockchainService roteie todas as redes
+    pelo registro de adapters.
+    """
+
+    def __init__(self, network: str, service: Any, supports_tokens: bool = False):
+        super().__init__(base_url="")
+        self.network = network
+        self.service = service
+        self.supports_tokens = supports_tokens
+
+    async def balance_payload(self, address: str, include_tokens: bool = False) -> Dict[str, Any]:
+        if self.supports_tokens:
+            return await self.service.get_balance(address, include_tokens=include_tokens)
+        return await self.service.get_balance(address)
+
+    async def get_balance(self, address: str) -> Decimal:
+        payload = await self.balance_payload(address)
+        return Decimal(str(payload.get("native_balance", "0")))
+
+    async def get_transactions(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
+        if not hasattr(self.service, "get_transactions"):
+            raise NotImplementedError
+        return await self.service.get_transactions(address, limit=limit)
+
+    async def estimate_fee(self) -> Dict[str, Any]:
+        if not hasattr(self.service, "estimate_fees"):
+            raise NotImplementedError
+        return await self.service.estimate_fees()
+
+    async def broadcast(self, signed_tx: str) -> str:
+        if not hasattr(self.service, "broadcast_transaction"):
+            raise NotImplementedError
+        result = await self.service.broadcast_transaction(signed_tx)
+        if not result.get("transaction_hash"):
+            raise ChainRPCError(f"{self.network}: {result.get('error', 'broadcast falhou')}")
+        return result["transaction_hash"]
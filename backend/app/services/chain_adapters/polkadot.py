@@ -0,0 +1,70 @@
+"""
+🔴 Polkadot Adapter
+===================
+
+Saldo e histórico via Subscan, broadcast via JSON-RPC do node.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from app.services.chain_adapters.base import ChainRPCError, JsonRpcAdapter
+
+POLKADOT_RPC = "https://rpc.polkadot.io"
+SUBSCAN_API = "https://polkadot.api.subscan.io"
+# Fee típica de um transfer_keep_alive (~0.016 DOT); o valor exato exige o extrinsic assinado
+TYPICAL_TRANSFER_FEE_PLANCK = 160_000_000
+
+
+class PolkadotAdapter(JsonRpcAdapter):
+    network = "polkadot"
+    symbol = "DOT"
+    decimals = 10
+
+    def __init__(self, rpc_url: str = POLKADOT_RPC, subscan_url: str = SUBSCAN_API, client=None):
+        super().__init__(rpc_url, client)
+        self.subscan_url = subscan_url.rstrip("/")
+
+    async def _subscan(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        data = await self.post_json(f"{self.subscan_url}{path}", payload)
+        if data.get("code") != 0:
+            raise ChainRPCError(f"polkadot: {data.get('message', 'subscan falhou')}")
+        return data.get("data") or {}
+
+    async def get_balance(self, address: str) -> Decimal:
+        data = await self._subscan("/api/v2/scan/account", {"address": address})
+        # Subscan retorna o saldo já em DOT
+        return Decimal(str(data.get("account", {}).get("balance", "0")))
+
+    async def get_transactions(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
+        data = await self._subscan("/api/v2/scan/transfers", {"address": address, "row": limit, "page": 0})
+        return [
+            {
+                "tx_hash": item.get("hash"),
+                "from": item.get("from"),
+                "to": item.get("to"),
+                "value": str(item.get("amount", "0")),
+                "block_number": item.get("block_num"),
+                "timestamp": item.get("block_timestamp"),
+                "status": "confirmed" if item.get("success") else "failed",
+                "network": self.network
+            }
+            for item in data.get("transfers") or []
+        ]
+
+    async def estimate_fee(self) -> Dict[str, Any]:
+        return {
+            "transfer_fee": str(self.from_units(TYPICAL_TRANSFER_FEE_PLANCK)),
+            "estimated": True,
+            "unit": "DOT"
+        }
+
+    async def get_nonce(self, address: str) -> int:
+        return await self.rpc("system_accountNextIndex", [address])
+
+    async def broadcast(self, signed_tx: str) -> str:
+        """signed_tx = extrinsic SCALE em hex"""
+        return await self.rpc("author_submitExtrinsic", [signed_tx])
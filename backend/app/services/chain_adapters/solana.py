@@ -0,0 +1,103 @@
+"""
+☀️ Solana Adapter
+=================
+
+JSON-RPC assíncrono da Solana. Saldos em lote via getMultipleAccounts
+(até 100 contas por chamada, sem baixar os dados da conta).
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import statistics
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence
+
+from app.services.chain_adapters.base import JsonRpcAdapter, chunked
+
+SOLANA_RPC_MAINNET = "https://api.mainnet-beta.solana.com"
+BASE_FEE_LAMPORTS = 5000  # por assinatura
+MAX_ACCOUNTS_PER_CALL = 100
+
+USDT_MINT = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+SPL_STABLE_DECIMALS = 6
+
+
+class SolanaAdapter(JsonRpcAdapter):
+    network = "solana"
+    symbol = "SOL"
+    decimals = 9
+    default_tokens = {"USDT": (USDT_MINT, SPL_STABLE_DECIMALS), "USDC": (USDC_MINT, SPL_STABLE_DECIMALS)}
+
+    def __init__(self, rpc_url: str = SOLANA_RPC_MAINNET, client=None):
+        super().__init__(rpc_url, client)
+
+    async def get_balance(self, address: str) -> Decimal:
+        result = await self.rpc("getBalance", [address])
+        return self.from_units(result.get("value", 0))
+
+    async def get_balances(self, addresses: Sequence[str]) -> Dict[str, Decimal]:
+        """getMultipleAccounts em blocos de 100; conta inexistente = saldo 0"""
+        addresses = list(addresses)
+
+        async def chunk_balances(chunk: Sequence[str]) -> List[Decimal]:
+            result = await self.rpc("getMultipleAccounts", [
+                list(chunk),
+                {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}
+            ])
+            return [self.from_units(account["lamports"] if account else 0) for account in result["value"]]
+
+        chunks = list(chunked(addresses, MAX_ACCOUNTS_PER_CALL))
+        results = await asyncio.gather(*(chunk_balances(c) for c in chunks))
+        balances: Dict[str, Decimal] = {}
+        for chunk, values in zip(chunks, results):
+            balances.update(zip(chunk, values))
+        return balances
+
+    async def get_token_balance(self, address: str, token: str) -> Decimal:
+        """Soma das token accounts do dono para o mint (SPL)"""
+        result = await self.rpc("getTokenAccountsByOwner", [
+            address,
+            {"mint": token},
+            {"encoding": "jsonParsed"}
+        ])
+        total = Decimal(0)
+        for account in result.get("value", []):
+            amount = account["account"]["data"]["parsed"]["info"]["tokenAmount"]
+            total += self.from_units(amount["amount"], amount["decimals"])
+        return total
+
+    async def get_transactions(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
+        signatures = await self.rpc("getSignaturesForAddress", [address, {"limit": limit}])
+        return [
+            {
+                "tx_hash": item["signature"],
+                "block_number": item.get("slot"),
+                "timestamp": item.get("blockTime"),
+                "status": "failed" if item.get("err") else "confirmed",
+                "network": self.network
+            }
+            for item in signatures
+        ]
+
+    async def estimate_fee(self) -> Dict[str, Any]:
+        fees = await self.rpc("getRecentPrioritizationFees", [])
+        priority = [item.get("prioritizationFee", 0) for item in fees or []]
+        return {
+            "base_fee": BASE_FEE_LAMPORTS,
+            "priority_fee": int(statistics.median(priority)) if priority else 0,
+            "unit": "lamports (priority em micro-lamports/CU)"
+        }
+
+    async def get_recent_blockhash(self) -> str:
+        result = await self.rpc("getLatestBlockhash")
+        return result["value"]["blockhash"]
+
+    async def broadcast(self, signed_tx: str) -> str:
+        """signed_tx em base64"""
+        return await self.rpc("sendTransaction", [
+            signed_tx,
+            {"encoding": "base64", "preflightCommitment": "confirmed"}
+        ])
@@ -0,0 +1,127 @@
+"""
+🔺 Tron Adapter
+===============
+
+TronGrid assíncrono. Uma única consulta de conta (/v1/accounts) traz o TRX
+e todos os saldos TRC20, então native + tokens de um endereço saem da
+mesma requisição (deduplicada enquanto está em voo e por alguns segundos).
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.services.chain_adapters.base import ChainAdapter, ChainRPCError
+
+TRONGRID_API = "https://api.trongrid.io"
+USDT_TRC20_CONTRACT = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+USDC_TRC20_CONTRACT = "TEkxiTehnzSmSe2XqrBj4w32RUN966rdz8"
+TRC20_DECIMALS = 6
+
+
+class TronAdapter(ChainAdapter):
+    network = "tron"
+    symbol = "TRX"
+    decimals = 6
+    default_tokens = {"USDT": (USDT_TRC20_CONTRACT, TRC20_DECIMALS), "USDC": (USDC_TRC20_CONTRACT, TRC20_DECIMALS)}
+
+    ACCOUNT_TTL = 5  # segundos
+    MAX_CACHED_ACCOUNTS = 1000
+
+    def __init__(self, api_url: str = TRONGRID_API, client=None):
+        super().__init__(api_url, client)
+        self._accounts: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get_account(self, address: str) -> Dict[str, Any]:
+        """Conta completa (balance + trc20); {} se a conta ainda não foi ativada"""
+        cached = self._accounts.get(address)
+        if cached and time.monotonic() - cached[0] < self.ACCOUNT_TTL:
+            return cached[1]
+        if address in self._inflight:
+            return await asyncio.shield(self._inflight[address])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[address] = future
+        try:
+            data = await self.get(f"/v1/accounts/{address}")
+            if data.get("success") is False:
+                raise ChainRPCError(f"tron: {data.get('error', 'consulta falhou')}")
+            account = (data.get("data") or [{}])[0]
+            self._remember(address, account)
+            future.set_result(account)
+            return account
+        except Exception as e:
+            future.set_exception(e)
+            # Evita "exception was never retrieved" quando ninguém mais aguardava
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(address, None)
+
+    def _remember(self, address: str, account: Dict[str, Any]):
+        """Guarda a conta no cache, descartando expiradas e o excesso acima do limite"""
+        now = time.monotonic()
+        self._accounts.pop(address, None)
+        self._accounts[address] = (now, account)
+        # Ordem de inserção = ordem de tempo: as mais antigas estão na frente
+        while len(self._accounts) > 1:
+            oldest, (stored_at, _) = next(iter(self._accounts.items()))
+            if len(self._accounts) <= self.MAX_CACHED_ACCOUNTS and now - stored_at < self.ACCOUNT_TTL:
+                break
+            del self._accounts[oldest]
+
+    async def get_balance(self, address: str) -> Decimal:
+        account = await self.get_account(address)
+        return self.from_units(account.get("balance", 0))
+
+    async def get_token_balance(self, address: str, token: str) -> Decimal:
+        account = await self.get_account(address)
+        for entry in account.get("trc20", []):
+            if token in entry:
+                return self.from_units(entry[token], TRC20_DECIMALS)
+        return Decimal(0)
+
+    async def get_account_balances(self, addresses: Sequence[str]) -> Dict[str, Dict[str, Decimal]]:
+        """TRX + tokens padrão de vários endereços (uma consulta por conta)"""
+        accounts = await self.get_balances(addresses)  # popula o cache de contas
+        result = {}
+        for address in addresses:
+            balances = {self.symbol: accounts[address]}
+            for symbol, (contract, _) in self.default_tokens.items():
+                balances[symbol] = await self.get_token_balance(address, contract)
+            result[address] = balances
+        return result
+
+    async def get_transactions(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
+        data = await self.get(f"/v1/accounts/{address}/transactions", limit=limit)
+        return [
+            {
+                "tx_hash": tx.get("txID"),
+                "block_number": tx.get("blockNumber"),
+                "timestamp": tx.get("block_timestamp"),
+                "status": (tx.get("ret") or [{}])[0].get("contractRet", "").lower() or "unknown",
+                "network": self.network
+            }
+            for tx in data.get("data", [])
+        ]
+
+    async def estimate_fee(self) -> Dict[str, Any]:
+        data = await self.get("/wallet/getchainparameters")
+        params = {p.get("key"): p.get("value") for p in data.get("chainParameter", [])}
+        return {
+            "bandwidth_price": params.get("getTransactionFee", 1000),
+            "energy_price": params.get("getEnergyFee", 420),
+            "unit": "sun"
+        }
+
+    async def broadcast(self, signed_tx: str) -> str:
+        """signed_tx em hex (protobuf serializado)"""
+        result = await self.post_json("/wallet/broadcasthex", {"transaction": signed_tx})
+        if not result.get("result"):
+            raise ChainRPCError(f"tron: {result.get('message', 'broadcast falhou')}")
+        return result.get("txid")
@@ -0,0 +1,85 @@
+"""
+🪙 UTXO Adapter (Litecoin / Dogecoin)
+=====================================
+
+Blockcypher assíncrono. Saldos em lote com /addrs/{a1;a2;...}/balance.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence
+
+from app.services.chain_adapters.base import ChainAdapter, ChainRPCError, chunked
+
+LTC_BLOCKCYPHER_API = "https://api.blockcypher.com/v1/ltc/main"
+DOGE_BLOCKCYPHER_API = "https://api.blockcypher.com/v1/doge/main"
+MAX_ADDRESSES_PER_CALL = 100
+
+
+class BlockcypherAdapter(ChainAdapter):
+    decimals = 8
+
+    def __init__(self, network: str, symbol: str, api_url: str, client=None):
+        super().__init__(api_url, client)
+        self.network = network
+        self.symbol = symbol
+
+    async def get_balance(self, address: str) -> Decimal:
+        data = await self.get(f"/addrs/{address}/balance")
+        return self.from_units(data.get("final_balance", 0))
+
+    async def get_balances(self, addresses: Sequence[str]) -> Dict[str, Decimal]:
+        addresses = list(addresses)
+
+        async def chunk_balances(chunk: Sequence[str]) -> List[Dict[str, Any]]:
+            data = await self.get(f"/addrs/{';'.join(chunk)}/balance")
+            return data if isinstance(data, list) else [data]
+
+        results = await asyncio.gather(*(chunk_balances(c) for c in chunked(addresses, MAX_ADDRESSES_PER_CALL)))
+        balances = {address: Decimal(0) for address in addresses}
+        for items in results:
+            for item in items:
+                if "error" in item:
+                    raise ChainRPCError(f"{self.network}: {item['error']}")
+                balances[item["address"]] = self.from_units(item.get("final_balance", 0))
+        return balances
+
+    async def get_transactions(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
+        data = await self.get(f"/addrs/{address}", limit=limit)
+        refs = data.get("unconfirmed_txrefs", []) + data.get("txrefs", [])
+        return [
+            {
+                "tx_hash": ref.get("tx_hash"),
+                "value": str(self.from_units(ref.get("value", 0))),
+                "direction": "out" if ref.get("tx_input_n", -1) >= 0 else "in",
+                "block_number": ref.get("block_height"),
+                "confirmations": ref.get("confirmations", 0),
+                "status": "confirmed" if ref.get("confirmations", 0) > 0 else "pending",
+                "network": self.network
+            }
+            for ref in refs[:limit]
+        ]
+
+    async def estimate_fee(self) -> Dict[str, Any]:
+        data = await self.get()
+        return {
+            "slow_fee": data.get("low_fee_per_kb", 0) // 1000,
+            "standard_fee": data.get("medium_fee_per_kb", 0) // 1000,
+            "fast_fee": data.get("high_fee_per_kb", 0) // 1000,
+            "unit": "sat/byte"
+        }
+
+    async def broadcast(self, signed_tx: str) -> str:
+        data = await self.post_json("/txs/push", {"tx": signed_tx})
+        return data.get("tx", {}).get("hash")
+
+
+def litecoin_adapter(client=None) -> BlockcypherAdapter:
+    return BlockcypherAdapter("litecoin", "LTC", LTC_BLOCKCYPHER_API, client)
+
+
+def dogecoin_adapter(client=None) -> BlockcypherAdapter:
+    return BlockcypherAdapter("dogecoin", "DOGE", DOGE_BLOCKCYPHER_API, client)
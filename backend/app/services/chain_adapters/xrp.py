@@ -0,0 +1,83 @@
+"""
+💎 XRP Ledger Adapter
+=====================
+
+JSON-RPC assíncrono do rippled (formato {"method", "params": [{...}]}).
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from app.services.chain_adapters.base import ChainAdapter, ChainRPCError
+
+XRPL_MAINNET = "https://xrplcluster.com"
+
+
+class XRPAdapter(ChainAdapter):
+    network = "xrp"
+    symbol = "XRP"
+    decimals = 6
+
+    def __init__(self, rpc_url: str = XRPL_MAINNET, client=None):
+        super().__init__(rpc_url, client)
+
+    async def rpc(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        data = await self.post_json("", {"method": method, "params": [params or {}]})
+        result = data.get("result", {})
+        if result.get("status") == "error":
+            raise ChainRPCError(f"xrp {method}: {result.get('error')} {result.get('error_message', '')}".strip())
+        return result
+
+    async def get_account_info(self, address: str, ledger_index: str = "validated") -> Optional[Dict[str, Any]]:
+        """account_data; None para conta não ativada (actNotFound)"""
+        try:
+            result = await self.rpc("account_info", {"account": address, "ledger_index": ledger_index})
+        except ChainRPCError as e:
+            if "actNotFound" in str(e):
+                return None
+            raise
+        return result.get("account_data")
+
+    async def get_balance(self, address: str) -> Decimal:
+        account = await self.get_account_info(address)
+        return self.from_units(account.get("Balance", 0) if account else 0)
+
+    async def get_account_sequence(self, address: str) -> Optional[int]:
+        account = await self.get_account_info(address, ledger_index="current")
+        return account.get("Sequence") if account else None
+
+    async def get_transactions(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
+        result = await self.rpc("account_tx", {"account": address, "limit": limit})
+        transactions = []
+        for item in result.get("transactions", []):
+            tx = item.get("tx") or item.get("tx_json") or {}
+            transactions.append({
+                "tx_hash": tx.get("hash") or item.get("hash"),
+                "from": tx.get("Account"),
+                "to": tx.get("Destination"),
+                "value": str(self.from_units(tx["Amount"])) if isinstance(tx.get("Amount"), str) else None,
+                "block_number": tx.get("ledger_index") or item.get("ledger_index"),
+                "status": "confirmed" if item.get("validated") else "pending",
+                "network": self.network
+            })
+        return transactions
+
+    async def estimate_fee(self) -> Dict[str, Any]:
+        result = await self.rpc("fee")
+        drops = result.get("drops", {})
+        return {
+            "base_fee": int(drops.get("base_fee", 10)),
+            "open_ledger_fee": int(drops.get("open_ledger_fee", drops.get("base_fee", 10))),
+            "unit": "drops"
+        }
+
+    async def broadcast(self, signed_tx: str) -> str:
+        """signed_tx = tx_blob hex"""
+        result = await self.rpc("submit", {"tx_blob": signed_tx})
+        engine_result = result.get("engine_result", "")
+        if not (engine_result.startswith("tes") or engine_result == "terQUEUED"):
+            raise ChainRPCError(f"xrp: {engine_result} {result.get('engine_result_message', '')}".strip())
+        return result.get("tx_json", {}).get("hash")
@@ -0,0 +1,231 @@
+"""
+📡 HOLD Wallet - Chat Fan-out
+=============================
+
+Entrega das mensagens de chat para os WebSockets de todos os workers:
+
+- Cada worker guarda só as conexões locais, indexadas por sala
+- Broadcast publicado uma vez no Redis (canal chat:room:<id>); cada
+  worker assina apenas os canais das salas com conexões locais
+- O worker que publica entrega direto às suas conexões e ignora o eco
+  (campo origin); sem Redis, a entrega fica local (um worker só)
+- Cada socket tem fila limitada e uma task de envio própria: o broadcast
+  nunca espera um cliente, e os envios para muitos sockets correm em
+  paralelo
+- Cliente lento (fila cheia ou envio acima do timeout) é desconectado
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict, Optional, Set
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "chat:room:"
+
+
+def room_channel(chat_room_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{chat_room_id}"
+
+
+class LocalConnection:
+    """WebSocket local com fila de saída limitada"""
+
+    def __init__(self, session_id: str, websocket: WebSocket, user_id: str, chat_room_id: str, maxsize: int):
+        self.session_id = session_id
+        self.websocket = websocket
+        self.user_id = user_id
+        self.chat_room_id = chat_room_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.sender: Optional[asyncio.Task] = None
+
+
+class ChatFanout:
+    """Conexões locais por sala + publicação/assinatura no Redis"""
+
+    QUEUE_SIZE = 256  # mensagens pendentes por socket antes de desconectar
+    SEND_TIMEOUT = 5.0  # segundos por envio
+    SLOW_CONSUMER_CLOSE_CODE = 1013  # "try again later"
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self.connections: Dict[str, LocalConnection] = {}  # session_id -> conexão
+        self.rooms: Dict[str, Set[str]] = {}  # chat_room_id -> session_ids locais
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Conexões locais
+    # ------------------------------------------------------------------
+
+    async def register(self, session_id: str, websocket: WebSocket, user_id: str, chat_room_id: str) -> None:
+        connection = LocalConnection(session_id, websocket, user_id, str(chat_room_id), self.QUEUE_SIZE)
+        connection.sender = asyncio.create_task(self._send_loop(connection))
+        self.connections[session_id] = connection
+        sessions = self.rooms.setdefault(connection.chat_room_id, set())
+        sessions.add(session_id)
+        if len(sessions) == 1:
+            await self._subscribe(connection.chat_room_id)
+
+    async def unregister(self, session_id: str) -> None:
+        connection = self.connections.pop(session_id, None)
+        if connection is None:
+            return
+        if connection.sender and connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+        sessions = self.rooms.get(connection.chat_room_id)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self.rooms[connection.chat_room_id]
+                await self._unsubscribe(connection.chat_room_id)
+
+    def deliver_local(self, chat_room_id: str, payload: Dict[str, Any]) -> int:
+        """Enfileira o payload para os sockets locais da sala (não bloqueia)"""
+        delivered = 0
+        for session_id in list(self.rooms.get(str(chat_room_id), ())):
+            connection = self.connections.get(session_id)
+            if connection is None:
+                continue
+            try:
+                connection.queue.put_nowait(payload)
+                delivered += 1
+            except asyncio.QueueFull:
+                asyncio.create_task(self._evict(connection, "queue full"))
+        return delivered
+
+    async def _send_loop(self, connection: LocalConnection):
+        while True:
+            payload = await connection.queue.get()
+            try:
+                await asyncio.wait_for(connection.websocket.send_json(payload), self.SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                await self._evict(connection, "send timeout")
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Falha enviando para a sessão {connection.session_id}: {e}")
+                await self.unregister(connection.session_id)
+                return
+
+    async def _evict(self, connection: LocalConnection, reason: str):
+        if connection.session_id not in self.connections:
+            return
+        logger.warning(f"🐢 Sessão de chat {connection.session_id} desconectada (cliente lento: {reason})")
+        await self.unregister(connection.session_id)
+        try:
+            await asyncio.wait_for(
+                connection.websocket.close(code=self.SLOW_CONSUMER_CLOSE_CODE, reason="Slow consumer"),
+                self.SEND_TIMEOUT
+            )
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------
+    # Broadcast entre workers
+    # ------------------------------------------------------------------
+
+    async def publish(self, chat_room_id: str, payload: Dict[str, Any]) -> None:
+        """Entrega local imediata + uma publicação no Redis para os outros workers"""
+        chat_room_id = str(chat_room_id)
+        self.deliver_local(chat_room_id, payload)
+        if self._redis is None:
+            return
+        try:
+            envelope = json.dumps({"origin": self.worker_id, "payload": payload}, default=str)
+            await self._redis.publish(room_channel(chat_room_id), envelope)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha publicando no Redis (sala {chat_room_id}): {e}")
+
+    def dispatch(self, channel: str, data: str) -> int:
+        """Mensagem recebida do Redis: entrega às conexões locais (ignora o próprio eco)"""
+        if not channel.startswith(CHANNEL_PREFIX):
+            return 0
+        try:
+            envelope = json.loads(data)
+        except ValueError:
+            return 0
+        if envelope.get("origin") == self.worker_id:
+            return 0
+        return self.deliver_local(channel[len(CHANNEL_PREFIX):], envelope.get("payload"))
+
+    async def _subscribe(self, chat_room_id: str):
+        if self._pubsub is None:
+            return
+        try:
+            await self._pubsub.subscribe(room_channel(chat_room_id))
+        except Exception as e:
+            logger.warning(f"⚠️ Falha assinando canal da sala {chat_room_id}: {e}")
+
+    async def _unsubscribe(self, chat_room_id: str):
+        if self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(room_channel(chat_room_id))
+        except Exception as e:
+            logger.warning(f"⚠️ Falha cancelando canal da sala {chat_room_id}: {e}")
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message.get("type") == "message":
+                    self.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erro no listener Redis do chat: {e}")
+                await asyncio.sleep(1)
+                await self._resubscribe()
+
+    async def _resubscribe(self):
+        try:
+            channels = [room_channel(room_id) for room_id in self.rooms]
+            await self._pubsub.subscribe(self._control_channel(), *channels)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha reassinando canais do chat: {e}")
+
+    def _control_channel(self) -> str:
+        # Mantém a conexão de pub/sub aberta mesmo sem salas locais
+        return f"chat:worker:{self.worker_id}"
+
+    async def start(self, redis_url: str):
+        """Conecta ao Redis; sem Redis o fan-out continua local"""
+        if self._listener and not self._listener.done():
+            return
+        try:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(redis_url, decode_responses=True, socket_connect_timeout=5)
+            await self._redis.ping()
+            self._pubsub = self._redis.pubsub()
+            await self._resubscribe()
+            self._listener = asyncio.create_task(self._listen())
+            logger.info(f"📡 Chat fan-out via Redis ativo (worker {self.worker_id[:8]})")
+        except Exception as e:
+            logger.warning(f"⚠️ Redis indisponível para o chat, entrega apenas local: {e}")
+            self._redis = self._pubsub = None
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        for session_id in list(self.connections):
+            await self.unregister(session_id)
+        if self._pubsub is not None:
+            await asyncio.gather(self._pubsub.close(), return_exceptions=True)
+        if self._redis is not None:
+            await asyncio.gather(self._redis.close(), return_exceptions=True)
+        self._redis = self._pubsub = None
+
+
+# Instância global
+chat_fanout = ChatFanout()
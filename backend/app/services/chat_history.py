@@ -0,0 +1,136 @@
+"""
+🗂️ HOLD Wallet - Chat History
+=============================
+
+Leituras do histórico do chat P2P por índice:
+
+- Páginas por keyset (created_at, id) no índice
+  (chat_room_id, created_at, id): "carregar anteriores" sem OFFSET
+- Busca textual ranqueada: tsvector + GIN no PostgreSQL, FTS5 no SQLite
+  (desenvolvimento local); ILIKE só quando não há índice de busca
+- Nomes dos remetentes carregados numa única query
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, literal_column, or_, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import column, table
+
+from app.models.chat import CHAT_SEARCH_CONFIG, CHAT_SEARCH_VECTOR, ChatMessage
+from app.utils.keyset import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "p2p_chat_messages_fts"
+
+
+def fts5_query(q: str) -> str:
+    """Termos do usuário como frases FTS5 (sem operadores); último termo como prefixo"""
+    terms = ['"' + term.replace('"', '""') + '"' for term in q.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class ChatHistory:
+    """Paginação e busca das mensagens de uma sala"""
+
+    def __init__(self):
+        self._fts_ready: Dict[str, bool] = {}  # url do engine -> tabela FTS5 existe
+
+    def page(
+        self,
+        db: Session,
+        chat_room_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[ChatMessage], Optional[str]]:
+        """
+        Página do histórico, mais recente primeiro.
+
+        Returns:
+            (mensagens, next_cursor) - next_cursor aponta para as mensagens
+            anteriores; None quando não há mais
+        """
+        query = db.query(ChatMessage).filter(ChatMessage.chat_room_id == chat_room_id)
+        if cursor:
+            created_at, message_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                ChatMessage.created_at < created_at,
+                and_(ChatMessage.created_at == created_at, ChatMessage.id < message_id)
+            ))
+        elif offset:
+            query = query.offset(offset)
+
+        rows = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
+
+    def search(self, db: Session, chat_room_id: str, q: str, limit: int = 20) -> List[Tuple[ChatMessage, float]]:
+        """Mensagens da sala que casam com `q`, da mais relevante para a menos (score maior = melhor)"""
+        q = (q or "").strip()
+        if not q:
+            return []
+        room_filter = ChatMessage.chat_room_id == chat_room_id
+        dialect = db.get_bind().dialect.name
+
+        if dialect == "postgresql":
+            vector = literal_column(CHAT_SEARCH_VECTOR)
+            tsquery = func.websearch_to_tsquery(literal_column(CHAT_SEARCH_CONFIG), q)
+            rank = func.ts_rank_cd(vector, tsquery)
+            rows = db.query(ChatMessage, rank).filter(
+                room_filter, vector.op("@@")(tsquery)
+            ).order_by(rank.desc(), ChatMessage.created_at.desc()).limit(limit).all()
+            return [(message, float(score)) for message, score in rows]
+
+        if dialect == "sqlite" and self._has_fts(db):
+            fts = table(FTS_TABLE, column("rowid"), column("rank"))
+            rows = db.query(ChatMessage, fts.c.rank).join(
+                fts, literal_column("p2p_chat_messages.rowid") == fts.c.rowid
+            ).filter(
+                room_filter, text(f"{FTS_TABLE} MATCH :fts_query")
+            ).params(fts_query=fts5_query(q)).order_by(
+                fts.c.rank, ChatMessage.created_at.desc()
+            ).limit(limit).all()
+            # bm25 do FTS5 é negativo (menor = melhor)
+            return [(message, -float(score)) for message, score in rows]
+
+        rows = db.query(ChatMessage).filter(
+            room_filter, ChatMessage.content.ilike(f"%{q}%")
+        ).order_by(ChatMessage.created_at.desc()).limit(limit).all()
+        return [(message, 0.0) for message in rows]
+
+    def _has_fts(self, db: Session) -> bool:
+        key = str(db.get_bind().url)
+        if key not in self._fts_ready:
+            self._fts_ready[key] = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE}
+            ).first() is not None
+            if not self._fts_ready[key]:
+                logger.warning("⚠️ Tabela FTS5 do chat ausente; busca por LIKE")
+        return self._fts_ready[key]
+
+    @staticmethod
+    def sender_names(db: Session, sender_ids: Iterable[Any]) -> Dict[str, str]:
+        """user_id -> username dos remetentes, numa única query"""
+        from app.models.user import User
+
+        ids = {str(sender_id) for sender_id in sender_ids if sender_id}
+        if not ids:
+            return {}
+        rows = db.query(User.id, User.username).filter(User.id.in_(ids)).all()
+        return {str(row.id): row.username for row in rows}
+
+
+# Instância global
+chat_history = ChatHistory()
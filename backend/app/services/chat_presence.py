@@ -0,0 +1,140 @@
+"""
+🟢 HOLD Wallet - Chat Presence
+==============================
+
+Presença online dos usuários do chat, compartilhada entre workers:
+
+- Um sorted set por usuário no Redis (chat:presence:<user_id>):
+  membro = sessão WebSocket, score = expiração
+- Cada worker renova as sessões locais a cada HEARTBEAT_INTERVAL; sessão
+  de worker que caiu expira sozinha após SESSION_TTL
+- "Online" = alguma sessão com expiração no futuro (ZCOUNT), O(log n)
+- Sem Redis, só as sessões deste worker são consideradas
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from app.services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+
+class ChatPresence:
+    """Heartbeat das sessões locais + consulta de presença global"""
+
+    SESSION_TTL = 60  # segundos sem heartbeat até a sessão expirar
+    HEARTBEAT_INTERVAL = 20
+
+    def __init__(self, use_redis: bool = True):
+        self.use_redis = use_redis
+        self._local: Dict[str, Set[str]] = {}  # user_id -> session_ids deste worker
+        self._task: Optional[asyncio.Task] = None
+
+    def _redis(self):
+        if self.use_redis and cache_service.is_connected():
+            return cache_service.redis_client
+        return None
+
+    @staticmethod
+    def _key(user_id: Any) -> str:
+        return f"chat:presence:{user_id}"
+
+    # ------------------------------------------------------------------
+    # Sessões
+    # ------------------------------------------------------------------
+
+    def touch(self, user_id: Any, session_id: str) -> None:
+        user_id = str(user_id)
+        self._local.setdefault(user_id, set()).add(session_id)
+        try:
+            self._refresh({user_id: {session_id}})
+        except Exception as e:
+            logger.warning(f"⚠️ Falha registrando presença de {user_id}: {e}")
+
+    def leave(self, user_id: Any, session_id: str) -> None:
+        user_id = str(user_id)
+        sessions = self._local.get(user_id)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self._local[user_id]
+        redis_client = self._redis()
+        if redis_client is None:
+            return
+        try:
+            redis_client.zrem(self._key(user_id), session_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha removendo presença de {user_id}: {e}")
+
+    def _refresh(self, sessions_by_user: Dict[str, Set[str]]) -> None:
+        redis_client = self._redis()
+        if redis_client is None or not sessions_by_user:
+            return
+        now = time.time()
+        expires_at = now + self.SESSION_TTL
+        pipe = redis_client.pipeline()
+        for user_id, sessions in sessions_by_user.items():
+            key = self._key(user_id)
+            pipe.zadd(key, {session_id: expires_at for session_id in sessions})
+            pipe.zremrangebyscore(key, "-inf", now)  # sessões de workers que caíram
+            pipe.expire(key, self.SESSION_TTL)
+        pipe.execute()
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def is_online(self, user_id: Any) -> bool:
+        return self.online_users([user_id]).get(str(user_id), False)
+
+    def online_users(self, user_ids: Iterable[Any]) -> Dict[str, bool]:
+        """Presença de vários usuários num único round-trip"""
+        user_ids = [str(user_id) for user_id in user_ids]
+        local = {user_id: bool(self._local.get(user_id)) for user_id in user_ids}
+        redis_client = self._redis()
+        if redis_client is None or not user_ids:
+            return local
+        try:
+            now = time.time()
+            pipe = redis_client.pipeline()
+            for user_id in user_ids:
+                pipe.zcount(self._key(user_id), now, "+inf")
+            counts = pipe.execute()
+            return {user_id: local[user_id] or count > 0 for user_id, count in zip(user_ids, counts)}
+        except Exception as e:
+            logger.warning(f"⚠️ Redis indisponível para presença, usando sessões locais: {e}")
+            return local
+
+    # ------------------------------------------------------------------
+    # Heartbeat
+    # ------------------------------------------------------------------
+
+    async def _heartbeat_loop(self, interval: int):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                snapshot = {user_id: set(sessions) for user_id, sessions in self._local.items()}
+                await asyncio.to_thread(self._refresh, snapshot)
+            except Exception as e:
+                logger.error(f"❌ Erro no heartbeat de presença do chat: {e}")
+
+    def start(self, interval: Optional[int] = None):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._heartbeat_loop(interval or self.HEARTBEAT_INTERVAL))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Instância global
+chat_presence = ChatPresence()
@@ -3,7 +3,8 @@
 ============================
 
 Serviço de chat em tempo real para transações P2P com:
-- WebSocket para mensagens instantâneas
+- WebSocket para mensagens instantâneas (fan-out entre workers via
+  Redis pub/sub, ver chat_fanout)
 - Upload de comprovantes de pagamento
 - Sistema de notificações
 - Moderação automática
@@ -14,34 +15,44 @@ Author: HOLD Wallet Team
 
 from fastapi import WebSocket, UploadFile
 from sqlalchemy.orm import Session
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from decimal import Decimal
 import json
 import uuid
 import logging
 import asyncio
-import aiofiles
 import os
 from pathlib import Path
 
 from app.core.exceptions import ValidationError
 from app.models.chat import ChatRoom, ChatMessage, FileUpload, ChatSession, MessageType
 from app.services.billing import billing_service
+from app.services.chat_fanout import chat_fanout
+from app.services.chat_history import chat_history
+from app.services.chat_uploads import ChatUploadStore
+from app.services.chat_presence import chat_presence
+from app.services.chat_unread import chat_unread
 
 logger = logging.getLogger(__name__)
 
 class ChatService:
     """Serviço de chat em tempo real para P2P"""
     
+    ROOM_CACHE_SIZE = 10_000
+    
     def __init__(self):
-        # Conexões WebSocket ativas
-        self.active_connections: Dict[str, WebSocket] = {}
+        # Sessões WebSocket locais deste worker (conexões ficam no chat_fanout)
         self.user_sessions: Dict[str, List[str]] = {}  # user_id -> [session_ids]
         
+        # Participantes por sala (imutáveis após a criação): room_id -> (buyer_id, seller_id)
+        self._room_members: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        
         # Configurações de upload
         self.UPLOAD_DIR = Path("uploads/p2p_chat")
         self.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        self.upload_store = ChatUploadStore(self.UPLOAD_DIR)
         
         self.MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
         self.ALLOWED_EXTENSIONS = {
@@ -54,6 +65,28 @@ class ChatService:
         self.DISPUTE_FEE = Decimal("25.00")  # R$ 25 por disputa
         self.PREMIUM_CHAT_FEE = Decimal("2.00")  # R$ 2 para chat premium
     
+    @property
+    def active_connections(self) -> Dict[str, Any]:
+        """Conexões WebSocket locais (session_id -> conexão)"""
+        return chat_fanout.connections
+    
+    def get_room_members(self, db: Session, chat_room_id: str) -> Optional[Tuple[str, str]]:
+        """(buyer_id, seller_id) da sala, do cache em memória ou do banco"""
+        key = str(chat_room_id)
+        members = self._room_members.get(key)
+        if members is not None:
+            self._room_members.move_to_end(key)
+            return members
+        
+        row = db.query(ChatRoom.buyer_id, ChatRoom.seller_id).filter(ChatRoom.id == chat_room_id).first()
+        if not row:
+            return None
+        members = (str(row.buyer_id), str(row.seller_id))
+        self._room_members[key] = members
+        if len(self._room_members) > self.ROOM_CACHE_SIZE:
+            self._room_members.popitem(last=False)
+        return members
+    
     async def create_chat_room(
         self,
         db: Session,
@@ -90,6 +123,7 @@ class ChatService:
             db.add(chat_room)
             db.commit()
             db.refresh(chat_room)
+            self._room_members[str(chat_room.id)] = (str(buyer_id), str(seller_id))
             
             # Enviar mensagem de boas-vindas do sistema
             await self.send_system_message(
@@ -128,12 +162,13 @@ class ChatService:
             # Gerar ID único para esta sessão
             session_id = str(uuid.uuid4())
             
-            # Salvar conexão
-            self.active_connections[session_id] = websocket
+            # Registrar conexão local (assina o canal da sala no Redis)
+            await chat_fanout.register(session_id, websocket, user_id, chat_room_id)
             
             if user_id not in self.user_sessions:
                 self.user_sessions[user_id] = []
             self.user_sessions[user_id].append(session_id)
+            chat_presence.touch(user_id, session_id)
             
             # Salvar sessão no banco
             chat_session = ChatSession(
@@ -167,8 +202,7 @@ class ChatService:
         """Desconectar usuário do WebSocket"""
         try:
             # Remover conexão
-            if session_id in self.active_connections:
-                del self.active_connections[session_id]
+            await chat_fanout.unregister(session_id)
             
             if user_id in self.user_sessions:
                 self.user_sessions[user_id] = [
@@ -176,6 +210,7 @@ class ChatService:
                 ]
                 if not self.user_sessions[user_id]:
                     del self.user_sessions[user_id]
+            chat_presence.leave(user_id, session_id)
             
             # Atualizar sessão no banco
             chat_session = db.query(ChatSession).filter(
@@ -207,11 +242,11 @@ class ChatService:
         """Enviar mensagem no chat"""
         try:
             # Verificar se sala existe e usuário tem permissão
-            chat_room = db.query(ChatRoom).filter(ChatRoom.id == chat_room_id).first()
-            if not chat_room:
+            members = self.get_room_members(db, chat_room_id)
+            if not members:
                 raise ValidationError("Chat room not found")
             
-            if sender_id not in [chat_room.buyer_id, chat_room.seller_id]:
+            if str(sender_id) not in members:
                 raise ValidationError("User not authorized for this chat")
             
             # Verificar limites de mensagem por tier
@@ -230,6 +265,7 @@ class ChatService:
             db.add(message)
             db.commit()
             db.refresh(message)
+            chat_unread.increment(self._other_member(members, sender_id), chat_room_id)
             
             # Preparar dados da mensagem para broadcast
             message_data = {
@@ -249,7 +285,7 @@ class ChatService:
             # ✅ NOVO: Enviar Push Notification para usuário offline
             await self._send_offline_notification(
                 db=db,
-                chat_room=chat_room,
+                members=members,
                 sender_id=sender_id,
                 content=content,
                 chat_room_id=chat_room_id
@@ -282,12 +318,13 @@ class ChatService:
         """Upload de arquivo (comprovante de pagamento, documento)"""
         try:
             # Verificar permissões
-            chat_room = db.query(ChatRoom).filter(ChatRoom.id == chat_room_id).first()
-            if not chat_room or uploader_id not in [chat_room.buyer_id, chat_room.seller_id]:
+            members = self.get_room_members(db, chat_room_id)
+            if not members or str(uploader_id) not in members:
                 raise ValidationError("Unauthorized file upload")
             
-            # Verificar tamanho do arquivo
-            if file.size > self.MAX_FILE_SIZE:
+            # Verificar tamanho do arquivo (quando informado; o limite também
+            # é aplicado durante a cópia)
+            if file.size is not None and file.size > self.MAX_FILE_SIZE:
                 raise ValidationError(f"File too large. Max size: {self.MAX_FILE_SIZE // 1024 // 1024}MB")
             
             # Verificar extensão
@@ -295,15 +332,11 @@ class ChatService:
             if not self._is_allowed_extension(file_ext):
                 raise ValidationError(f"File type not allowed: {file_ext}")
             
-            # Gerar nome único
-            unique_filename = f"{uuid.uuid4().hex}{file_ext}"
-            file_path = self.UPLOAD_DIR / chat_room_id / unique_filename
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Salvar arquivo
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
+            # Salvar arquivo em blocos (endereçado pelo SHA-256: arquivos iguais
+            # são gravados uma vez só)
+            stored = await self.upload_store.save(file, file_ext, self.MAX_FILE_SIZE)
+            file_path = stored.path
+            unique_filename = file_path.name
             
             # Criar mensagem com arquivo
             message = ChatMessage(
@@ -314,14 +347,16 @@ class ChatService:
                 attachments=[{
                     "filename": file.filename,
                     "file_path": str(file_path),
-                    "file_size": file.size,
-                    "mime_type": file.content_type
+                    "file_size": stored.size,
+                    "mime_type": file.content_type,
+                    "sha256": stored.sha256
                 }]
             )
             
             db.add(message)
             db.commit()
             db.refresh(message)
+            chat_unread.increment(self._other_member(members, uploader_id), chat_room_id)
             
             # Criar registro do arquivo
             file_upload = FileUpload(
@@ -330,8 +365,9 @@ class ChatService:
                 filename=unique_filename,
                 original_filename=file.filename,
                 file_path=str(file_path),
-                file_size=file.size,
+                file_size=stored.size,
                 mime_type=file.content_type,
+                content_sha256=stored.sha256,
                 expires_at=datetime.utcnow() + timedelta(days=90)  # 90 dias de retenção
             )
             
@@ -351,10 +387,14 @@ class ChatService:
             
             await self.broadcast_to_room(chat_room_id, message_data, db)
             
+            # Miniatura de imagem em background (pool de threads)
+            self.upload_store.schedule_preview(stored, file_ext)
+            
             return {
                 "success": True,
                 "message": message_data,
-                "file_id": str(file_upload.id)
+                "file_id": str(file_upload.id),
+                "deduplicated": stored.deduplicated
             }
             
         except Exception as e:
@@ -405,33 +445,18 @@ class ChatService:
         self,
         chat_room_id: str,
         message_data: Dict,
-        db: Session
+        db: Optional[Session] = None
     ):
-        """Enviar mensagem para todos os usuários da sala"""
+        """
+        Enviar mensagem para todas as sessões da sala, em qualquer worker.
+        
+        Publicado uma vez (Redis); cada worker entrega às suas conexões locais.
+        """
         try:
-            # Buscar usuários da sala
-            chat_room = db.query(ChatRoom).filter(ChatRoom.id == chat_room_id).first()
-            if not chat_room:
-                return
-            
-            room_users = [chat_room.buyer_id, chat_room.seller_id]
-            
-            # Enviar para todas as sessões ativas desses usuários
-            for user_id in room_users:
-                if user_id in self.user_sessions:
-                    for session_id in self.user_sessions[user_id]:
-                        if session_id in self.active_connections:
-                            try:
-                                websocket = self.active_connections[session_id]
-                                await websocket.send_json({
-                                    "type": "message",
-                                    "data": message_data
-                                })
-                            except Exception as e:
-                                logger.error(f"Failed to send to session {session_id}: {e}")
-                                # Remover conexão problemática
-                                del self.active_connections[session_id]
-            
+            await chat_fanout.publish(chat_room_id, {
+                "type": "message",
+                "data": message_data
+            })
         except Exception as e:
             logger.error(f"Failed to broadcast to room: {e}")
     
@@ -503,20 +528,23 @@ class ChatService:
         chat_room_id: str,
         user_id: str,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Obter histórico do chat com paginação"""
+        """
+        Obter histórico do chat com paginação.
+        
+        `cursor` (next_cursor da página anterior) carrega as mensagens mais
+        antigas por keyset; `offset` fica para clientes antigos.
+        """
         try:
             # Verificar permissões
-            chat_room = db.query(ChatRoom).filter(ChatRoom.id == chat_room_id).first()
-            # Converter UUIDs para strings para comparação correta
-            if not chat_room or user_id not in [str(chat_room.buyer_id), str(chat_room.seller_id)]:
+            members = self.get_room_members(db, chat_room_id)
+            if not members or str(user_id) not in members:
                 raise ValidationError("Unauthorized access to chat history")
             
-            # Buscar mensagens com paginação
-            messages = db.query(ChatMessage).filter(
-                ChatMessage.chat_room_id == chat_room_id
-            ).order_by(ChatMessage.created_at.desc()).offset(offset).limit(limit).all()
+            # Buscar mensagens (índice chat_room_id, created_at, id)
+            messages, next_cursor = chat_history.page(db, chat_room_id, limit, cursor, offset)
             
             # Contar total de mensagens
             total_messages = db.query(ChatMessage).filter(
@@ -539,7 +567,8 @@ class ChatService:
                 "success": True,
                 "messages": messages_data,
                 "total_messages": total_messages,
-                "has_more": (offset + limit) < total_messages
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor
             }
             
         except Exception as e:
@@ -563,15 +592,21 @@ class ChatService:
             if not message:
                 return None
             
-            chat_room = db.query(ChatRoom).filter(ChatRoom.id == message.chat_room_id).first()
-            if not chat_room or user_id not in [chat_room.buyer_id, chat_room.seller_id]:
+            members = self.get_room_members(db, message.chat_room_id)
+            if not members or str(user_id) not in members:
                 return None
             
+            preview_path = None
+            if file_upload.content_sha256:
+                thumbnail = self.upload_store.thumbnail_path(file_upload.content_sha256)
+                preview_path = str(thumbnail) if thumbnail.exists() else None
+            
             return {
                 "file_path": file_upload.file_path,
                 "original_filename": file_upload.original_filename,
                 "mime_type": file_upload.mime_type,
-                "file_size": file_upload.file_size
+                "file_size": file_upload.file_size,
+                "preview_path": preview_path
             }
             
         except Exception as e:
@@ -590,11 +625,9 @@ class ChatService:
             if not chat_room or user_id not in [chat_room.buyer_id, chat_room.seller_id]:
                 raise ValidationError("Unauthorized access to chat room")
             
-            # Verificar usuários online
-            online_users = []
-            for room_user_id in [chat_room.buyer_id, chat_room.seller_id]:
-                if room_user_id in self.user_sessions:
-                    online_users.append(room_user_id)
+            # Verificar usuários online (presença global, todos os workers)
+            presence = chat_presence.online_users([chat_room.buyer_id, chat_room.seller_id])
+            online_users = [room_user_id for room_user_id, online in presence.items() if online]
             
             return {
                 "room_id": chat_room_id,
@@ -632,6 +665,7 @@ class ChatService:
             chat_room.is_active = False
             chat_room.closed_at = datetime.utcnow()
             db.commit()
+            chat_unread.reset([chat_room.buyer_id, chat_room.seller_id], chat_room_id)
             
             # Enviar mensagem de sistema
             await self.send_system_message(
@@ -811,13 +845,18 @@ class ChatService:
         pass
     
     def _is_user_online(self, user_id: str) -> bool:
-        """Verifica se usuário tem conexão WebSocket ativa"""
-        return user_id in self.user_sessions and len(self.user_sessions.get(user_id, [])) > 0
+        """Verifica se usuário tem conexão WebSocket ativa (em qualquer worker)"""
+        return chat_presence.is_online(user_id)
+    
+    @staticmethod
+    def _other_member(members: Tuple[str, str], user_id: str) -> str:
+        buyer_id, seller_id = members
+        return seller_id if str(user_id) == buyer_id else buyer_id
     
     async def _send_offline_notification(
         self,
         db: Session,
-        chat_room: ChatRoom,
+        members: Tuple[str, str],
         sender_id: str,
         content: str,
         chat_room_id: str
@@ -829,7 +868,7 @@ class ChatService:
             from app.models.user import User
             
             # Determinar quem é o destinatário
-            recipient_id = chat_room.seller_id if sender_id == chat_room.buyer_id else chat_room.buyer_id
+            recipient_id = self._other_member(members, sender_id)
             
             # Verificar se destinatário está offline (não tem WebSocket ativo)
             if self._is_user_online(str(recipient_id)):
@@ -0,0 +1,126 @@
+"""
+🔔 HOLD Wallet - Chat Unread Counters
+=====================================
+
+Contadores de mensagens não lidas por (usuário, sala) mantidos de forma
+incremental no Redis:
+
+- Um hash por usuário (chat:unread:<user_id>, campo = sala)
+- HINCRBY no envio da mensagem (para o outro participante), HDEL ao
+  marcar como lidas ou fechar a sala
+- Hash sem o marcador "_seeded" (primeiro acesso, TTL expirado, Redis
+  reiniciado) é recalculado do banco numa única query agrupada
+- Sem Redis, a contagem vem do banco (mesma query)
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import logging
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.chat import ChatMessage, ChatRoom
+from app.services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+SEEDED_FIELD = "_seeded"
+
+
+class ChatUnreadCounters:
+    """Badges de não lidas em O(1) por requisição"""
+
+    KEY_TTL = 24 * 3600  # recalcula do banco ao menos uma vez por dia
+
+    def __init__(self, use_redis: bool = True):
+        self.use_redis = use_redis
+
+    def _redis(self):
+        if self.use_redis and cache_service.is_connected():
+            return cache_service.redis_client
+        return None
+
+    @staticmethod
+    def _key(user_id: Any) -> str:
+        return f"chat:unread:{user_id}"
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def counts(self, db: Session, user_id: Any) -> Dict[str, int]:
+        """Não lidas por sala ativa do usuário (só salas com contagem > 0)"""
+        user_id = str(user_id)
+        redis_client = self._redis()
+        if redis_client is None:
+            return self.db_counts(db, user_id)
+        try:
+            data = redis_client.hgetall(self._key(user_id))
+            if SEEDED_FIELD in data:
+                return {room: int(count) for room, count in data.items() if room != SEEDED_FIELD and int(count) > 0}
+            return self._seed(redis_client, db, user_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis indisponível para não lidas, contando no banco: {e}")
+            return self.db_counts(db, user_id)
+
+    @staticmethod
+    def db_counts(db: Session, user_id: Any) -> Dict[str, int]:
+        """Mensagens do outro participante ainda não lidas, por sala ativa (uma query)"""
+        user_id = str(user_id)
+        rows = db.query(ChatMessage.chat_room_id, func.count(ChatMessage.id)).join(
+            ChatRoom, ChatRoom.id == ChatMessage.chat_room_id
+        ).filter(
+            ChatRoom.is_active == True,
+            ChatMessage.is_read == False,
+            or_(
+                and_(ChatRoom.buyer_id == user_id, ChatMessage.sender_id == ChatRoom.seller_id),
+                and_(ChatRoom.seller_id == user_id, ChatMessage.sender_id == ChatRoom.buyer_id)
+            )
+        ).group_by(ChatMessage.chat_room_id).all()
+        return {str(room_id): int(count) for room_id, count in rows if count}
+
+    def _seed(self, redis_client, db: Session, user_id: str) -> Dict[str, int]:
+        counts = self.db_counts(db, user_id)
+        key = self._key(user_id)
+        pipe = redis_client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={SEEDED_FIELD: 1, **counts})
+        pipe.expire(key, self.KEY_TTL)
+        pipe.execute()
+        return counts
+
+    # ------------------------------------------------------------------
+    # Escrita (depois do commit da mensagem / leitura)
+    # ------------------------------------------------------------------
+
+    def increment(self, user_id: Any, chat_room_id: Any, amount: int = 1) -> None:
+        redis_client = self._redis()
+        if redis_client is None:
+            return
+        try:
+            pipe = redis_client.pipeline()
+            pipe.hincrby(self._key(user_id), str(chat_room_id), amount)
+            pipe.expire(self._key(user_id), self.KEY_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Falha incrementando não lidas de {user_id}: {e}")
+
+    def reset(self, user_ids: Iterable[Any], chat_room_id: Any) -> None:
+        """Zera a sala para os usuários (mensagens lidas ou sala fechada)"""
+        redis_client = self._redis()
+        if redis_client is None:
+            return
+        try:
+            pipe = redis_client.pipeline()
+            for user_id in user_ids:
+                pipe.hdel(self._key(user_id), str(chat_room_id))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Falha zerando não lidas da sala {chat_room_id}: {e}")
+
+
+# Instância global
+chat_unread = ChatUnreadCounters()
@@ -0,0 +1,134 @@
+"""
+📎 HOLD Wallet - Chat Uploads
+=============================
+
+Armazenamento dos arquivos do chat P2P:
+
+- Upload copiado em blocos de tamanho fixo para um arquivo temporário
+  (memória constante por upload, independente do tamanho)
+- SHA-256 calculado durante a cópia; o arquivo final é endereçado pelo
+  hash (blobs/<aa>/<sha256><ext>), então arquivos idênticos são gravados
+  uma única vez
+- Limite de tamanho verificado durante a cópia (não depende do
+  Content-Length informado pelo cliente)
+- Miniaturas de imagem geradas num pool de threads depois da resposta
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+from fastapi import UploadFile
+
+from app.core.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+
+@dataclass
+class StoredFile:
+    sha256: str
+    path: Path
+    size: int
+    deduplicated: bool
+
+
+def _make_thumbnail(source: Path, target: Path, size: int) -> None:
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.draft("RGB", (size, size))  # JPEG: decodifica já reduzido
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+        image.save(tmp, "WEBP", quality=80)
+    os.replace(tmp, target)
+
+
+class ChatUploadStore:
+    """Gravação em streaming com dedupe por hash e miniaturas em background"""
+
+    CHUNK_SIZE = 1024 * 1024  # 1 MiB
+    THUMBNAIL_SIZE = 320
+    PREVIEW_WORKERS = 2
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def blob_path(self, sha256: str, ext: str) -> Path:
+        return self.root / "blobs" / sha256[:2] / f"{sha256}{ext}"
+
+    def thumbnail_path(self, sha256: str) -> Path:
+        return self.root / "blobs" / sha256[:2] / f"{sha256}_thumb.webp"
+
+    async def save(self, file: UploadFile, ext: str, max_size: int) -> StoredFile:
+        """
+        Copia o upload em blocos, calculando o SHA-256 e o tamanho.
+
+        Raises:
+            ValidationError: arquivo acima de `max_size` (nada fica gravado)
+        """
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = tmp_dir / uuid.uuid4().hex
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out:
+                while True:
+                    chunk = await file.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_size:
+                        raise ValidationError(f"File too large. Max size: {max_size // 1024 // 1024}MB")
+                    digest.update(chunk)
+                    await out.write(chunk)
+
+            sha256 = digest.hexdigest()
+            final_path = self.blob_path(sha256, ext)
+            deduplicated = final_path.exists()
+            if deduplicated:
+                tmp_path.unlink()
+            else:
+                final_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, final_path)  # atômico: uploads iguais simultâneos não se corrompem
+            return StoredFile(sha256=sha256, path=final_path, size=size, deduplicated=deduplicated)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def schedule_preview(self, stored: StoredFile, ext: str) -> Optional[asyncio.Future]:
+        """Gera a miniatura de imagens fora do event loop (não atrasa a resposta)"""
+        if ext not in IMAGE_EXTENSIONS:
+            return None
+        target = self.thumbnail_path(stored.sha256)
+        if target.exists():
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.PREVIEW_WORKERS, thread_name_prefix="chat-preview")
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, _make_thumbnail, stored.path, target, self.THUMBNAIL_SIZE
+        )
+        future.add_done_callback(self._log_preview_error)
+        return future
+
+    @staticmethod
+    def _log_preview_error(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception():
+            logger.warning(f"⚠️ Falha gerando miniatura do upload: {future.exception()}")
@@ -0,0 +1,362 @@
+"""
+⏳ Confirmation Tracker
+=======================
+
+Rastreador central de confirmações de transações EVM:
+- Dono de todos os tx hashes pendentes, agrupados por rede
+- Um poller por rede: a cada bloco novo busca os receipts de todos os
+  pendentes em uma requisição JSON-RPC em lote (eth_getTransactionReceipt)
+- Atualiza o status de Transaction em lote (confirmed / failed)
+- Chamadores aguardam um future (async ou síncrono) ou registram callback
+
+1000 transações pendentes custam um RPC em lote por bloco, em vez de 1000
+loops de wait_for_transaction_receipt.
+
+Os pollers rodam em um event loop próprio (thread dedicada): fluxos
+síncronos (gas sponsor, saques) podem bloquear esperando a confirmação
+sem travar o loop que faz o polling.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.chain_adapters.base import ChainRPCError, chunked, http_pool
+
+logger = logging.getLogger(__name__)
+
+# Tempo médio de bloco por rede (segundos) = intervalo de polling
+BLOCK_TIMES: Dict[str, float] = {
+    "ethereum": 12,
+    "polygon": 2,
+    "bsc": 3,
+    "base": 2,
+    "avalanche": 2,
+    "arbitrum": 1,
+    "optimism": 2,
+}
+DEFAULT_BLOCK_TIME = 3
+RECEIPT_BATCH_SIZE = 100  # receipts por requisição em lote
+
+
+class ConfirmationTimeout(Exception):
+    """Transação não confirmou dentro do prazo de rastreamento"""
+
+
+@dataclass
+class TxConfirmation:
+    """Resultado final de uma transação rastreada"""
+    network: str
+    tx_hash: str
+    success: bool
+    block_number: int
+    confirmations: int
+    gas_used: Optional[int] = None
+    effective_gas_price: Optional[int] = None
+
+    @property
+    def status(self) -> str:
+        return "confirmed" if self.success else "failed"
+
+
+@dataclass
+class PendingTx:
+    """Transação aguardando confirmação"""
+    network: str
+    tx_hash: str
+    confirmations: int
+    deadline: float
+    checked_block: int = -1  # último bloco em que o receipt foi consultado
+    future: concurrent.futures.Future = field(default_factory=concurrent.futures.Future)
+    callbacks: List[Callable[[TxConfirmation], Any]] = field(default_factory=list)
+
+
+def _hex_int(value: Optional[str]) -> Optional[int]:
+    return int(value, 16) if value else None
+
+
+class ConfirmationTracker:
+    """Receipts em lote por bloco, para todas as transações pendentes"""
+
+    MAX_TRACK_SECONDS = 3600  # desiste de hashes que não confirmam em 1h
+
+    def __init__(self, pool_factory: Optional[Callable[[str], Any]] = None):
+        self._pool_factory = pool_factory
+        self._pending: Dict[str, Dict[str, PendingTx]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _pool(self, network: str):
+        if self._pool_factory:
+            return self._pool_factory(network)
+        from app.services.rpc_pool import rpc_pools
+        return rpc_pools.pool(network)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def track(
+        self,
+        network: str,
+        tx_hash: str,
+        callback: Optional[Callable[[TxConfirmation], Any]] = None,
+        confirmations: int = 1,
+        timeout: Optional[float] = None,
+        start: bool = True
+    ) -> concurrent.futures.Future:
+        """
+        Passa a rastrear um tx hash (idempotente: o mesmo hash compartilha o future).
+
+        Args:
+            network: Rede EVM (ethereum, polygon, bsc, base...)
+            tx_hash: Hash da transação
+            callback: Chamado com o TxConfirmation (pode ser coroutine)
+            confirmations: Blocos necessários para considerar confirmada
+            timeout: Prazo de rastreamento em segundos
+            start: Inicia o poller da rede (False em testes)
+
+        Returns:
+            Future resolvido com TxConfirmation (ou ConfirmationTimeout)
+        """
+        network = network.lower()
+        tx_hash = tx_hash if tx_hash.startswith("0x") else f"0x{tx_hash}"
+        key = tx_hash.lower()
+        deadline = time.monotonic() + (timeout or self.MAX_TRACK_SECONDS)
+
+        with self._lock:
+            pending = self._pending.setdefault(network, {}).get(key)
+            if pending is None:
+                pending = PendingTx(network, tx_hash, confirmations, deadline)
+                self._pending[network][key] = pending
+            else:
+                pending.confirmations = max(pending.confirmations, confirmations)
+                pending.deadline = max(pending.deadline, deadline)
+            if callback:
+                pending.callbacks.append(callback)
+
+        if start:
+            self._ensure_poller(network)
+        return pending.future
+
+    async def wait(
+        self,
+        network: str,
+        tx_hash: str,
+        timeout: float = 120,
+        confirmations: int = 1
+    ) -> TxConfirmation:
+        """Aguarda a confirmação sem bloquear o event loop (asyncio.TimeoutError no prazo)"""
+        future = self.track(network, tx_hash, confirmations=confirmations)
+        # shield: o timeout de um chamador não cancela o future compartilhado
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+
+    def wait_sync(
+        self,
+        network: str,
+        tx_hash: str,
+        timeout: float = 120,
+        confirmations: int = 1
+    ) -> TxConfirmation:
+        """Versão bloqueante (concurrent.futures.TimeoutError no prazo)"""
+        return self.track(network, tx_hash, confirmations=confirmations).result(timeout)
+
+    def is_tracking(self, network: str, tx_hash: str) -> bool:
+        key = tx_hash.lower() if tx_hash.startswith("0x") else f"0x{tx_hash.lower()}"
+        with self._lock:
+            return key in self._pending.get(network.lower(), {})
+
+    def pending_count(self, network: Optional[str] = None) -> int:
+        with self._lock:
+            if network:
+                return len(self._pending.get(network.lower(), {}))
+            return sum(len(p) for p in self._pending.values())
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+
+    async def poll_once(self, network: str) -> List[TxConfirmation]:
+        """
+        Uma rodada de polling: se houver bloco novo, busca todos os
+        receipts pendentes em lote e resolve os confirmados.
+        """
+        network = network.lower()
+        self._expire(network)
+        with self._lock:
+            pending = list(self._pending.get(network, {}).values())
+        if not pending:
+            return []
+
+        pool = self._pool(network)
+        head = int(await pool.call("eth_blockNumber"), 16)
+        # Sem bloco novo, só os hashes que ainda não foram consultados neste bloco
+        pending = [p for p in pending if p.checked_block < head]
+        if not pending:
+            return []
+
+        resolved: List[TxConfirmation] = []
+        for batch in chunked(pending, RECEIPT_BATCH_SIZE):
+            receipts = await pool.call_batch([("eth_getTransactionReceipt", [p.tx_hash]) for p in batch])
+            for item, receipt in zip(batch, receipts):
+                item.checked_block = head
+                if not receipt or not receipt.get("blockNumber"):
+                    continue
+                block_number = int(receipt["blockNumber"], 16)
+                confirmation = TxConfirmation(
+                    network=network,
+                    tx_hash=item.tx_hash,
+                    success=_hex_int(receipt.get("status")) == 1,
+                    block_number=block_number,
+                    confirmations=head - block_number + 1,
+                    gas_used=_hex_int(receipt.get("gasUsed")),
+                    effective_gas_price=_hex_int(receipt.get("effectiveGasPrice"))
+                )
+                # Falha é final; sucesso espera as confirmações pedidas
+                if confirmation.success and confirmation.confirmations < item.confirmations:
+                    continue
+                resolved.append(confirmation)
+
+        if resolved:
+            await asyncio.to_thread(self._persist, resolved)
+            for confirmation in resolved:
+                await self._resolve(confirmation)
+            logger.info(
+                f"⏳ {network}: {len(resolved)} de {len(pending)} transações finalizadas no bloco {head}"
+            )
+        return resolved
+
+    async def _resolve(self, confirmation: TxConfirmation):
+        with self._lock:
+            pending = self._pending.get(confirmation.network, {}).pop(confirmation.tx_hash.lower(), None)
+        if pending is None:
+            return
+        if not pending.future.done():
+            pending.future.set_result(confirmation)
+        for callback in pending.callbacks:
+            try:
+                result = callback(confirmation)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"❌ Erro no callback de confirmação {confirmation.tx_hash}: {e}")
+
+    def _expire(self, network: str):
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending.get(network, {})
+            expired = [key for key, item in pending.items() if item.deadline <= now]
+            expired = [pending.pop(key) for key in expired]
+        for item in expired:
+            logger.warning(f"⚠️ {network}: deixando de rastrear {item.tx_hash} (sem confirmação no prazo)")
+            if not item.future.done():
+                item.future.set_exception(ConfirmationTimeout(item.tx_hash))
+
+    def _persist(self, confirmations: List[TxConfirmation]):
+        """Atualiza as Transactions correspondentes em lote"""
+        from app.core import db as core_db
+        from app.models.transaction import Transaction, TransactionStatus
+
+        by_hash = {c.tx_hash.lower(): c for c in confirmations}
+        hashes = [c.tx_hash for c in confirmations]
+        hashes += [h[2:] for h in hashes]  # hashes gravados sem 0x
+        db = core_db.SessionLocal()
+        try:
+            rows = db.query(Transaction.id, Transaction.tx_hash).filter(
+                Transaction.tx_hash.in_(hashes),
+                Transaction.status == TransactionStatus.pending
+            ).all()
+            now = datetime.utcnow()
+            mappings = []
+            for row_id, tx_hash in rows:
+                key = tx_hash.lower() if tx_hash.startswith("0x") else f"0x{tx_hash.lower()}"
+                confirmation = by_hash[key]
+                mappings.append({
+                    "id": row_id,
+                    "status": TransactionStatus.confirmed if confirmation.success else TransactionStatus.failed,
+                    "confirmations": confirmation.confirmations,
+                    "block_number": confirmation.block_number,
+                    "confirmed_at": now if confirmation.success else None,
+                    "error_message": None if confirmation.success else "Transação revertida on-chain",
+                    "updated_at": now
+                })
+            if mappings:
+                db.bulk_update_mappings(Transaction, mappings)
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Erro atualizando status das transações: {e}")
+        finally:
+            db.close()
+
+    async def _poll(self, network: str):
+        interval = BLOCK_TIMES.get(network, DEFAULT_BLOCK_TIME)
+        try:
+            while self.pending_count(network):
+                try:
+                    await self.poll_once(network)
+                except (ChainRPCError, ValueError) as e:
+                    logger.warning(f"⚠️ {network}: erro buscando receipts: {e}")
+                except Exception as e:
+                    logger.error(f"❌ {network}: erro no polling de confirmações: {e}")
+                await asyncio.sleep(interval)
+        finally:
+            self._tasks.pop(network, None)
+
+    # ------------------------------------------------------------------
+    # Event loop dedicado
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="confirmation-tracker", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _ensure_poller(self, network: str):
+        loop = self._ensure_loop()
+
+        def start():
+            task = self._tasks.get(network)
+            if task is None or task.done():
+                self._tasks[network] = loop.create_task(self._poll(network))
+
+        loop.call_soon_threadsafe(start)
+
+    async def stop(self):
+        """Encerra os pollers e o loop dedicado (shutdown da aplicação)"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        async def shutdown():
+            tasks = list(self._tasks.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await http_pool.aclose()
+
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(shutdown(), loop))
+        loop.call_soon_threadsafe(loop.stop)
+        await asyncio.to_thread(thread.join, 5)
+        loop.close()
+
+
+# Instância global
+confirmation_tracker = ConfirmationTracker()
@@ -16,6 +16,7 @@ from cryptography.hazmat.backends import default_backend
 import base64
 import secrets
 from bip32 import BIP32
+from coincurve import PrivateKey
 import logging
 from datetime import datetime
 from Crypto.Hash import keccak
@@ -24,6 +25,25 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Network-specific derivation paths (BIP44)
+BIP44_COIN_TYPES = {
+    "bitcoin": "0",
+    "ethereum": "60",
+    "polygon": "60",
+    "bsc": "60",
+    "tron": "195",  # Tron has its own coin type
+    "base": "60",   # Base is Ethereum L2, uses same derivation as ETH
+    "litecoin": "2",
+    "multi": "60"  # Multi-chain wallet uses Ethereum derivation (EVM compatible)
+}
+
+# Networks that share an address format (same public key -> same address)
+ADDRESS_FAMILIES = {
+    "bitcoin": "p2pkh", "litecoin": "p2pkh", "dogecoin": "p2pkh",
+    "ethereum": "evm", "polygon": "evm", "bsc": "evm", "usdt": "evm", "multi": "evm", "base": "evm",
+    "avalanche": "evm", "polkadot": "evm", "chainlink": "evm", "usdc": "evm", "shiba": "evm",
+}
+
 class CryptoService:
     """Service for cryptographic operations."""
     
@@ -178,7 +198,8 @@ class CryptoService:
         """
         try:
             private_key = bip32.get_privkey_from_path(derivation_path)
-            public_key = bip32.get_pubkey_from_path(derivation_path)
+            # Public key from the private key: avoids walking the path twice
+            public_key = PrivateKey(private_key).public_key.format(compressed=True)
             
             return {
                 "private_key": private_key.hex(),
@@ -298,19 +319,7 @@ class CryptoService:
             # ============================================
             # OUTRAS REDES - BIP44/secp256k1 padrão
             # ============================================
-            # Network-specific derivation paths (BIP44)
-            coin_types = {
-                "bitcoin": "0",
-                "ethereum": "60",
-                "polygon": "60",
-                "bsc": "60",
-                "tron": "195",  # Tron has its own coin type
-                "base": "60",   # Base is Ethereum L2, uses same derivation as ETH
-                "litecoin": "2",
-                "multi": "60"  # Multi-chain wallet uses Ethereum derivation (EVM compatible)
-            }
-            
-            coin_type = coin_types.get(network_lower, "0")
+            coin_type = BIP44_COIN_TYPES.get(network_lower, "0")
             derivation_path = f"m/44'/{coin_type}'/{account}'/{change}/{address_index}"
             
             # Derive keys
@@ -333,6 +342,71 @@ class CryptoService:
             logger.error(f"Failed to derive {network} address: {e}")
             raise
     
+    def derive_network_addresses(
+        self,
+        bip32: BIP32,
+        networks: List[str],
+        account: int = 0,
+        change: int = 0,
+        address_index: int = 0,
+        seed: Optional[bytes] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Derive addresses for several networks from the same master key.
+        
+        Same output as calling derive_network_address for each network, but
+        each BIP44 path is walked once (EVM chains share m/44'/60'/...) and
+        each address format is computed once per public key.
+        
+        Args:
+            bip32: BIP32 object
+            networks: Network names
+            account: Account index
+            change: Change index (0=receiving, 1=change)
+            address_index: Address index
+            seed: Raw seed bytes (required for Ed25519 networks like Solana)
+            
+        Returns:
+            Dictionary network -> address data. Networks that fail are logged
+            and left out.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        keys_by_path: Dict[str, Dict[str, str]] = {}
+        addresses: Dict[Tuple[str, str], str] = {}
+        
+        for network in networks:
+            network_lower = network.lower()
+            try:
+                if network_lower == 'solana':
+                    results[network] = self._derive_solana_address(seed, address_index)
+                    continue
+                
+                coin_type = BIP44_COIN_TYPES.get(network_lower, "0")
+                derivation_path = f"m/44'/{coin_type}'/{account}'/{change}/{address_index}"
+                
+                keys = keys_by_path.get(derivation_path)
+                if keys is None:
+                    keys = keys_by_path[derivation_path] = self.derive_address_keys(bip32, derivation_path)
+                
+                address_key = (derivation_path, ADDRESS_FAMILIES.get(network_lower, network_lower))
+                if address_key not in addresses:
+                    addresses[address_key] = self._generate_network_address(keys["public_key"], network)
+                
+                results[network] = {
+                    "address": addresses[address_key],
+                    "derivation_path": derivation_path,
+                    "public_key": keys["public_key"],
+                    "private_key_encrypted": self.encrypt_data(keys["private_key"]),
+                    "network": network,
+                    "account": account,
+                    "change": change,
+                    "address_index": address_index
+                }
+            except Exception as e:
+                logger.warning(f"Failed to derive {network} address: {e}")
+        
+        return results
+    
     def _derive_solana_address(self, seed: Optional[bytes], address_index: int = 0) -> Dict[str, Any]:
         """
         Derive Solana address using Ed25519.
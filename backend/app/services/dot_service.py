@@ -14,10 +14,8 @@ Data: Janeiro 2026
 """
 
 import asyncio
-import requests
 import logging
-from decimal import Decimal
-from typing import Dict, Optional
+from typing import Optional
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
@@ -58,36 +56,6 @@ class DOTService:
         self.explorer_base = SUBSCAN_EXPLORER
         logger.info("🔴 DOTService initialized (mainnet)")
     
-    def _rpc_call(self, method: str, params: list = None) -> Optional[Dict]:
-        """Faz uma chamada RPC para o node Polkadot."""
-        try:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": method,
-                "params": params or []
-            }
-            
-            response = requests.post(
-                self.rpc_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if 'error' in result:
-                    logger.error(f"❌ RPC error: {result['error']}")
-                    return None
-                return result.get('result')
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"❌ RPC call failed: {e}")
-            return None
-    
     def validate_address(self, address: str) -> bool:
         """Valida um endereço Polkadot (começa com 1, 47-48 chars)."""
         if not address:
@@ -99,40 +67,6 @@ class DOTService:
             return False
         return True
     
-    def get_balance(self, address: str) -> Optional[Decimal]:
-        """Consulta saldo de um endereço DOT via Subscan API."""
-        try:
-            response = requests.post(
-                f"{self.subscan_api}/api/v2/scan/account",
-                json={"address": address},
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('code') == 0:
-                    balance_str = data.get('data', {}).get('account', {}).get('balance', '0')
-                    balance_planck = int(float(balance_str) * PLANCK)
-                    return Decimal(str(balance_planck)) / Decimal(str(PLANCK))
-            return None
-        except Exception as e:
-            logger.error(f"❌ Erro consultando saldo DOT: {e}")
-            return None
-    
-    def get_nonce(self, address: str) -> Optional[int]:
-        """Obtém o nonce da conta."""
-        result = self._rpc_call("system_accountNextIndex", [address])
-        return result
-    
-    def get_runtime_version(self) -> Optional[Dict]:
-        """Obtém versão do runtime."""
-        return self._rpc_call("state_getRuntimeVersion")
-    
-    def get_genesis_hash(self) -> Optional[str]:
-        """Obtém genesis hash."""
-        return self._rpc_call("chain_getBlockHash", [0])
-    
     async def send_dot(
         self,
         from_address: str,
@@ -152,9 +86,18 @@ class DOTService:
         Returns:
             DOTTransactionResult com status da transação
         """
+        logger.info(f"🔴 Enviando {amount_dot} DOT de {from_address[:10]}... para {to_address[:10]}...")
+        # substrate-interface é síncrono (websocket + espera pela inclusão): roda fora do event loop
+        return await asyncio.to_thread(self._submit_transfer, to_address, amount_dot, private_key_hex)
+    
+    def _submit_transfer(
+        self,
+        to_address: str,
+        amount_dot: float,
+        private_key_hex: str
+    ) -> DOTTransactionResult:
+        """Compõe, assina e envia o transfer_keep_alive (bloqueante)."""
         try:
-            logger.info(f"🔴 Enviando {amount_dot} DOT de {from_address[:10]}... para {to_address[:10]}...")
-            
             # Usar substrate-interface para criar e assinar transação
             try:
                 from substrateinterface import SubstrateInterface, Keypair
@@ -12,6 +12,7 @@ Author: WOLK NOW LLC
 """
 
 import os
+import asyncio
 import logging
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -421,7 +422,8 @@ class EmailService:
             return {"success": False, "message": "Email service not configured", "log_only": True}
         
         try:
-            result = resend.Emails.send({
+            # Cliente HTTP do resend é síncrono: roda em thread para não travar o event loop
+            result = await asyncio.to_thread(resend.Emails.send, {
                 "from": from_email or self.FROM_EMAIL,
                 "to": to_email,
                 "subject": subject,
@@ -0,0 +1,253 @@
+"""
+⛽ Gas Oracle Service
+=====================
+
+Oráculo de gas EIP-1559 compartilhado por rede:
+- Consulta eth_feeHistory em intervalo curto (poller em background)
+- Calcula maxFeePerGas / maxPriorityFeePerGas para slow / standard / fast
+  a partir dos percentis de priority fee dos últimos blocos
+- Serve tudo da memória para todos os chamadores (envios, estimativas,
+  gas sponsor, swap)
+- Mantém um ring buffer histórico para detectar picos de fee
+
+Redes sem EIP-1559 (ou se eth_feeHistory falhar) caem para eth_gasPrice.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GWEI = 10 ** 9
+SPEEDS = ("slow", "standard", "fast")
+
+# Percentis de priority fee consultados (um por velocidade)
+REWARD_PERCENTILES = [10, 50, 90]
+# Folga sobre o base fee do próximo bloco (o base fee sobe até 12,5% por bloco)
+BASE_FEE_MULTIPLIERS = {"slow": 1.125, "standard": 1.25, "fast": 2.0}
+# Fallback legado (gasPrice)
+LEGACY_MULTIPLIERS = {"slow": 0.9, "standard": 1.0, "fast": 1.25}
+
+
+@dataclass
+class GasEstimate:
+    """Snapshot de preços de gas (valores em wei)"""
+    network: str
+    base_fee: int
+    priority_fees: Dict[str, int]
+    max_fees: Dict[str, int]
+    block_number: Optional[int] = None
+    eip1559: bool = True
+    updated_at: float = field(default_factory=time.time)
+
+    def max_fee(self, speed: str = "standard") -> int:
+        """maxFeePerGas (limite que a conta precisa cobrir)"""
+        return self.max_fees[speed]
+
+    def priority_fee(self, speed: str = "standard") -> int:
+        return self.priority_fees[speed]
+
+    def expected_fee(self, speed: str = "standard") -> int:
+        """Preço efetivo esperado por unidade de gas (base + gorjeta)"""
+        if not self.eip1559:
+            return self.max_fees[speed]
+        return self.base_fee + self.priority_fees[speed]
+
+    def tx_fields(self, speed: str = "standard") -> Dict[str, int]:
+        """Campos de fee para montar a transação"""
+        if not self.eip1559:
+            return {"gasPrice": self.max_fees[speed]}
+        return {
+            "maxFeePerGas": self.max_fees[speed],
+            "maxPriorityFeePerGas": self.priority_fees[speed]
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "network": self.network,
+            "eip1559": self.eip1559,
+            "block_number": self.block_number,
+            "base_fee_gwei": self.base_fee / GWEI,
+            **{
+                speed: {
+                    "max_fee_gwei": self.max_fees[speed] / GWEI,
+                    "priority_fee_gwei": self.priority_fees[speed] / GWEI,
+                    "expected_fee_gwei": self.expected_fee(speed) / GWEI
+                }
+                for speed in SPEEDS
+            },
+            "updated_at": self.updated_at
+        }
+
+
+def estimate_from_fee_history(network: str, history: Dict[str, Any]) -> GasEstimate:
+    """
+    Monta o GasEstimate a partir da resposta de eth_feeHistory.
+
+    baseFeePerGas tem N+1 itens (o último é o base fee do próximo bloco);
+    reward tem um item por bloco com os percentis pedidos.
+    """
+    base_fees = history["baseFeePerGas"]
+    next_base_fee = int(base_fees[-1])
+    rewards = history.get("reward") or []
+
+    priority_fees = {}
+    for index, speed in enumerate(SPEEDS):
+        samples = [int(block[index]) for block in rewards if len(block) > index]
+        # Mediana entre blocos suaviza blocos vazios e outliers
+        priority_fees[speed] = int(statistics.median(samples)) if samples else 0
+    # Mantém a ordem slow <= standard <= fast
+    priority_fees["standard"] = max(priority_fees["standard"], priority_fees["slow"])
+    priority_fees["fast"] = max(priority_fees["fast"], priority_fees["standard"])
+
+    max_fees = {
+        speed: int(next_base_fee * BASE_FEE_MULTIPLIERS[speed]) + priority_fees[speed]
+        for speed in SPEEDS
+    }
+    oldest = history.get("oldestBlock")
+    block_number = int(oldest) + len(base_fees) - 2 if oldest is not None else None
+    return GasEstimate(network, next_base_fee, priority_fees, max_fees, block_number)
+
+
+def estimate_from_gas_price(network: str, gas_price: int) -> GasEstimate:
+    fees = {speed: int(gas_price * LEGACY_MULTIPLIERS[speed]) for speed in SPEEDS}
+    return GasEstimate(network, 0, {speed: 0 for speed in SPEEDS}, fees, eip1559=False)
+
+
+class GasOracle:
+    """Estimativa em memória + histórico de uma rede"""
+
+    HISTORY_BLOCKS = 20
+    HISTORY_SIZE = 360  # amostras no ring buffer
+    MAX_AGE = 30  # segundos; acima disso get() consulta na hora
+    SPIKE_FACTOR = 2.0  # base fee >= 2x a mediana recente = pico
+    SPIKE_MIN_SAMPLES = 10
+
+    def __init__(self, network: str, w3=None):
+        self.network = network
+        self._w3 = w3
+        self.estimate: Optional[GasEstimate] = None
+        # (timestamp, base fee, max fee standard)
+        self.history: Deque[Tuple[float, int, int]] = deque(maxlen=self.HISTORY_SIZE)
+        self._lock = threading.Lock()
+
+    @property
+    def w3(self):
+        if self._w3 is None:
+            from app.services.rpc_pool import rpc_pools
+            self._w3 = rpc_pools.web3(self.network)
+        return self._w3
+
+    def refresh(self) -> GasEstimate:
+        """Consulta eth_feeHistory (ou eth_gasPrice) e atualiza a memória"""
+        try:
+            history = self.w3.eth.fee_history(self.HISTORY_BLOCKS, "latest", REWARD_PERCENTILES)
+            if not history.get("baseFeePerGas") or not int(history["baseFeePerGas"][-1]):
+                raise ValueError("rede sem base fee")
+            estimate = estimate_from_fee_history(self.network, history)
+        except Exception as e:
+            logger.debug(f"⛽ {self.network}: feeHistory indisponível ({e}), usando eth_gasPrice")
+            estimate = estimate_from_gas_price(self.network, int(self.w3.eth.gas_price))
+
+        with self._lock:
+            self.estimate = estimate
+            self.history.append((estimate.updated_at, estimate.base_fee, estimate.max_fee("standard")))
+        return estimate
+
+    def get(self, max_age: Optional[float] = None) -> GasEstimate:
+        max_age = self.MAX_AGE if max_age is None else max_age
+        estimate = self.estimate
+        if estimate is None or time.time() - estimate.updated_at > max_age:
+            estimate = self.refresh()
+        return estimate
+
+    def is_spike(self) -> bool:
+        """Preço atual muito acima da mediana do histórico"""
+        with self._lock:
+            if len(self.history) < self.SPIKE_MIN_SAMPLES:
+                return False
+            # Base fee quando EIP-1559, senão o preço legado
+            index = 1 if self.history[-1][1] else 2
+            current = self.history[-1][index]
+            baseline = statistics.median(sample[index] for sample in list(self.history)[:-1])
+        return baseline > 0 and current >= baseline * self.SPIKE_FACTOR
+
+    def recent(self, limit: int = 60) -> List[Dict[str, Any]]:
+        with self._lock:
+            samples = list(self.history)[-limit:]
+        return [
+            {"timestamp": ts, "base_fee_gwei": base / GWEI, "standard_max_fee_gwei": fee / GWEI}
+            for ts, base, fee in samples
+        ]
+
+
+class GasOracleService:
+    """Oráculos por rede + poller em background"""
+
+    def __init__(self):
+        self._oracles: Dict[str, GasOracle] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def oracle(self, network: str, w3=None) -> GasOracle:
+        network = network.lower()
+        with self._lock:
+            oracle = self._oracles.get(network)
+            if oracle is None:
+                oracle = GasOracle(network, w3)
+                self._oracles[network] = oracle
+            return oracle
+
+    def get_estimate(self, network: str, w3=None) -> GasEstimate:
+        """Estimativa em memória (consulta a rede só se estiver velha)"""
+        return self.oracle(network, w3).get()
+
+    def tx_fee_fields(self, network: str, speed: str = "standard", w3=None) -> Dict[str, int]:
+        return self.get_estimate(network, w3).tx_fields(speed)
+
+    def is_spike(self, network: str) -> bool:
+        return self.oracle(network).is_spike()
+
+    async def _poll(self, oracle: GasOracle, interval: float):
+        while True:
+            try:
+                estimate = await asyncio.to_thread(oracle.refresh)
+                if oracle.is_spike():
+                    logger.warning(
+                        f"⛽ Pico de gas em {oracle.network}: base fee {estimate.base_fee / GWEI:.2f} gwei"
+                    )
+            except Exception as e:
+                logger.debug(f"⛽ Erro atualizando gas de {oracle.network}: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, networks: Optional[List[str]] = None, interval: Optional[float] = None):
+        """Inicia o poller das redes (chamado no startup da aplicação)"""
+        networks = networks or settings.GAS_ORACLE_NETWORKS
+        interval = interval or settings.GAS_ORACLE_POLL_SECONDS
+        for network in networks:
+            if network in self._tasks and not self._tasks[network].done():
+                continue
+            self._tasks[network] = asyncio.create_task(self._poll(self.oracle(network), interval))
+        logger.info(f"⛽ Gas oracle ativo para {', '.join(networks)} (a cada {interval}s)")
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Instância global
+gas_oracle_service = GasOracleService()
@@ -27,6 +27,10 @@ from web3 import Web3
 from eth_account import Account
 
 from app.core.config import settings
+from app.services.nonce_manager import nonce_manager
+from app.services.rpc_pool import rpc_pools
+from app.services.gas_oracle_service import gas_oracle_service
+from app.services.confirmation_tracker import confirmation_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -93,7 +97,7 @@ class GasSponsorService:
                 logger.error(f"❌ Rede não suportada: {network}")
                 return None
             
-            w3 = Web3(Web3.HTTPProvider(config["rpc_url"]))
+            w3 = rpc_pools.web3(network, config["rpc_url"])
             if not w3.is_connected():
                 logger.error(f"❌ Não conectou à rede {network}")
                 return None
@@ -129,8 +133,8 @@ class GasSponsorService:
             balance_wei = w3.eth.get_balance(Web3.to_checksum_address(user_address))
             balance = Decimal(str(w3.from_wei(balance_wei, 'ether')))
             
-            # Gas price atual
-            gas_price_wei = w3.eth.gas_price
+            # Gas price atual (maxFeePerGas do gas oracle: é o que o nó exige de saldo)
+            gas_price_wei = gas_oracle_service.get_estimate(network, w3).max_fee()
             gas_price_gwei = Decimal(str(w3.from_wei(gas_price_wei, 'gwei')))
             
             # Gas limit baseado no tipo de transação
@@ -309,32 +313,25 @@ class GasSponsorService:
             # Converte para Wei
             amount_wei = w3.to_wei(float(gas_amount), 'ether')
             
-            # Prepara a transação
-            nonce = w3.eth.get_transaction_count(
-                Web3.to_checksum_address(self.platform_address)
-            )
-            gas_price = w3.eth.gas_price
+            # Prepara a transação (nonce alocado pelo nonce_manager)
+            fee_fields = gas_oracle_service.tx_fee_fields(network, w3=w3)
             
             transaction = {
-                'nonce': nonce,
                 'to': Web3.to_checksum_address(user_address),
                 'value': amount_wei,
                 'gas': config["gas_limit_transfer"],
-                'gasPrice': gas_price,
+                **fee_fields,
                 'chainId': config["chain_id"]
             }
             
-            # Assina com a chave da plataforma
-            signed_txn = w3.eth.account.sign_transaction(
+            # Assina com a chave da plataforma e envia
+            tx_hash_hex = nonce_manager.send_transaction(
+                w3,
                 transaction,
-                self.platform_private_key
+                self.platform_private_key,
+                sender=self.platform_address
             )
             
-            # Envia (compatível com diferentes versões do web3.py)
-            raw_tx = getattr(signed_txn, 'rawTransaction', None) or getattr(signed_txn, 'raw_transaction', None)
-            tx_hash = w3.eth.send_raw_transaction(raw_tx)
-            tx_hash_hex = w3.to_hex(tx_hash)
-            
             logger.info(f"✅ Gas enviado para usuário! TX: {tx_hash_hex}")
             logger.info(f"   Quantidade: {gas_amount} {config['native_symbol']}")
             logger.info(f"   Destino: {user_address}")
@@ -358,15 +355,18 @@ class GasSponsorService:
     
     def wait_for_gas_confirmation(
         self,
-        w3: Web3,
+        network: str,
         tx_hash: str,
         timeout: int = 120
     ) -> bool:
         """
         Aguarda confirmação da transação de gas.
         
+        O receipt é buscado pelo confirmation_tracker (um RPC em lote por
+        bloco para todas as transações pendentes da rede).
+        
         Args:
-            w3: Instância Web3
+            network: Rede da transação
             tx_hash: Hash da transação
             timeout: Tempo máximo em segundos
         
@@ -376,20 +376,31 @@ class GasSponsorService:
         try:
             logger.info(f"⏳ Aguardando confirmação do gas... TX: {tx_hash}")
             
-            receipt = w3.eth.wait_for_transaction_receipt(
-                tx_hash,
-                timeout=timeout
-            )
+            confirmation = confirmation_tracker.wait_sync(network, tx_hash, timeout=timeout)
             
-            if receipt['status'] == 1:
-                logger.info(f"✅ Gas confirmado! Block: {receipt['blockNumber']}")
+            if confirmation.success:
+                logger.info(f"✅ Gas confirmado! Block: {confirmation.block_number}")
                 return True
             else:
                 logger.error("❌ Transação de gas falhou!")
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ Erro aguardando confirmação: {str(e)}")
+            logger.error(f"❌ Erro aguardando confirmação: {str(e) or type(e).__name__}")
+            return False
+    
+    async def wait_for_gas_confirmation_async(
+        self,
+        network: str,
+        tx_hash: str,
+        timeout: int = 120
+    ) -> bool:
+        """Versão assíncrona de wait_for_gas_confirmation (não ocupa worker)"""
+        try:
+            confirmation = await confirmation_tracker.wait(network, tx_hash, timeout=timeout)
+            return confirmation.success
+        except Exception as e:
+            logger.error(f"❌ Erro aguardando confirmação: {str(e) or type(e).__name__}")
             return False
     
     def sponsor_gas_for_sell(
@@ -519,7 +530,7 @@ class GasSponsorService:
             
             # 7. Aguarda confirmação
             confirmed = self.wait_for_gas_confirmation(
-                w3=w3,
+                network=network,
                 tx_hash=send_result["tx_hash"],
                 timeout=120
             )
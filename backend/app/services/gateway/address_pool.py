@@ -0,0 +1,162 @@
+"""
+💳 WolkPay Gateway - Address Pool
+==================================
+
+Pool de endereços de pagamento pré-derivados por (merchant, moeda, rede).
+
+O índice de pagamento vem do contador do merchant (next_payment_index);
+o pool guarda os endereços dos próximos índices já derivados. Na criação
+do checkout o endereço sai do pool (sem matemática de curva elíptica no
+request) e, quando o estoque fica baixo, o pool é reabastecido em
+background.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[int, str, str]  # (merchant hd_index, moeda, rede)
+
+
+class GatewayAddressPool:
+    """Endereços pré-derivados por merchant/moeda/rede, reabastecidos em background"""
+
+    WARM_LOOKBACK_DAYS = 30  # combinações usadas recentemente são aquecidas no startup
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size or settings.GATEWAY_ADDRESS_POOL_SIZE
+        self.low_watermark = max(self.size // 4, 1)
+        self._pools: Dict[PoolKey, Dict[int, str]] = {}
+        self._refilling: Set[PoolKey] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(merchant_index: int, currency: str, network: str) -> PoolKey:
+        return (merchant_index, currency.upper(), network.lower())
+
+    def _hd_wallet(self):
+        from app.services.gateway.hd_wallet_service import get_gateway_hd_wallet
+        return get_gateway_hd_wallet()
+
+    def take(self, merchant_index: int, currency: str, network: str, payment_index: int) -> Optional[str]:
+        """
+        Retira o endereço do índice de pagamento, se já derivado.
+
+        Índices menores (consumidos por outros pagamentos, ex: PIX) são
+        descartados. Agenda reabastecimento quando o estoque fica baixo.
+        """
+        key = self._key(merchant_index, currency, network)
+        with self._lock:
+            pool = self._pools.setdefault(key, {})
+            address = pool.pop(payment_index, None)
+            for index in [i for i in pool if i < payment_index]:
+                del pool[index]
+            remaining = len(pool)
+            if address:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if remaining < self.low_watermark:
+            self.schedule_refill(merchant_index, currency, network, payment_index + 1)
+        return address
+
+    def fill(self, merchant_index: int, currency: str, network: str, start_index: int) -> int:
+        """Deriva os endereços que faltam em [start_index, start_index + size); retorna quantos"""
+        hd_wallet = self._hd_wallet()
+        if not hd_wallet.is_initialized:
+            return 0
+
+        key = self._key(merchant_index, currency, network)
+        with self._lock:
+            existing = set(self._pools.get(key, {}))
+        missing = [i for i in range(start_index, start_index + self.size) if i not in existing]
+        if not missing:
+            return 0
+
+        addresses = hd_wallet.derive_addresses(currency, network, merchant_index, missing)
+        with self._lock:
+            pool = self._pools.setdefault(key, {})
+            pool.update({i: a for i, a in addresses.items() if i >= start_index})
+        logger.debug(f"💳 Pool {key}: +{len(addresses)} endereços (a partir do índice {start_index})")
+        return len(addresses)
+
+    def schedule_refill(self, merchant_index: int, currency: str, network: str, start_index: int):
+        """Reabastece em background (uma tarefa por chave)"""
+        key = self._key(merchant_index, currency, network)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+
+        async def refill():
+            try:
+                await asyncio.to_thread(self.fill, merchant_index, currency, network, start_index)
+            except Exception as e:
+                logger.error(f"❌ Erro reabastecendo pool de endereços {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refilling.discard(key)
+
+        loop.create_task(refill())
+
+    async def warm(self) -> int:
+        """Aquece os pools das combinações merchant/moeda/rede usadas recentemente (startup)"""
+        from app.core import db as core_db
+        from app.models.gateway import GatewayMerchant, GatewayPayment
+
+        since = datetime.now(timezone.utc) - timedelta(days=self.WARM_LOOKBACK_DAYS)
+
+        def load():
+            db = core_db.SessionLocal()
+            try:
+                return db.query(
+                    GatewayMerchant.hd_index,
+                    GatewayMerchant.next_payment_index,
+                    GatewayPayment.crypto_currency,
+                    GatewayPayment.crypto_network
+                ).join(
+                    GatewayPayment, GatewayPayment.merchant_id == GatewayMerchant.id
+                ).filter(
+                    GatewayPayment.crypto_currency.isnot(None),
+                    GatewayPayment.crypto_network.isnot(None),
+                    GatewayPayment.created_at >= since
+                ).distinct().all()
+            finally:
+                db.close()
+
+        combos = await asyncio.to_thread(load)
+        total = 0
+        for merchant_index, next_index, currency, network in combos:
+            total += await asyncio.to_thread(self.fill, merchant_index, currency, network, next_index)
+        if combos:
+            logger.info(f"💳 Pool de endereços do gateway aquecido: {total} endereços em {len(combos)} pools")
+        return total
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "pools": len(self._pools),
+                "addresses": sum(len(p) for p in self._pools.values()),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Instância global
+gateway_address_pool = GatewayAddressPool()
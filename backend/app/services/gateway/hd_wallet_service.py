@@ -17,14 +17,21 @@ Segurança:
 - Endereços são derivados sob demanda
 - Cada pagamento tem endereço único
 
+Performance:
+- Os nós de conta (m/44'/coin'/1000') e de merchant (.../merchant_index) ficam
+  em cache como chaves públicas estendidas (xpub)
+- Cada endereço de pagamento custa uma única derivação pública não-hardened
+  a partir do xpub do merchant, sem tocar em private keys
+
 Author: HOLD Wallet Team
 Date: January 2026
 """
 
 import logging
 import hashlib
-from typing import Optional, Dict, Any, Tuple
-from functools import lru_cache
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterable, Tuple
 
 from bip32 import BIP32
 from mnemonic import Mnemonic
@@ -60,6 +67,9 @@ class GatewayHDWalletService:
     # Gateway account number (reservado para o gateway)
     GATEWAY_ACCOUNT = 1000
     
+    # Máximo de nós de merchant (xpub) mantidos em cache
+    MAX_CACHED_MERCHANT_NODES = 1024
+    
     def __init__(self, mnemonic: Optional[str] = None):
         """
         Inicializa o serviço HD Wallet.
@@ -71,6 +81,11 @@ class GatewayHDWalletService:
         self._bip32: Optional[BIP32] = None
         self._initialized = False
         
+        # Cache de nós públicos: coin_type -> conta, (coin_type, merchant) -> merchant
+        self._account_nodes: Dict[int, BIP32] = {}
+        self._merchant_nodes: "OrderedDict[Tuple[int, int], BIP32]" = OrderedDict()
+        self._node_lock = threading.Lock()
+        
     def initialize(self, mnemonic: Optional[str] = None) -> bool:
         """
         Inicializa o BIP32 com a mnemonic.
@@ -101,6 +116,9 @@ class GatewayHDWalletService:
             # Criar BIP32 master key
             self._bip32 = BIP32.from_seed(seed)
             self._initialized = True
+            with self._node_lock:
+                self._account_nodes.clear()
+                self._merchant_nodes.clear()
             
             logger.info("✅ Gateway HD Wallet inicializada com sucesso")
             return True
@@ -163,8 +181,11 @@ class GatewayHDWalletService:
             return None
             
         try:
+            from coincurve import PrivateKey
+            
+            # Uma única caminhada pelo path; a public key sai da private key
             private_key = self._bip32.get_privkey_from_path(derivation_path)
-            public_key = self._bip32.get_pubkey_from_path(derivation_path)
+            public_key = PrivateKey(private_key).public_key.format(compressed=True)
             
             return {
                 "private_key": private_key.hex(),
@@ -176,6 +197,63 @@ class GatewayHDWalletService:
             logger.error(f"❌ Erro na derivação HD: {e}")
             return None
     
+    def _account_node(self, coin_type: int) -> BIP32:
+        """Nó público m/44'/{coin}'/1000' (único passo que exige a master privada)"""
+        node = self._account_nodes.get(coin_type)
+        if node is None:
+            xpub = self._bip32.get_xpub_from_path(f"m/44'/{coin_type}'/{self.GATEWAY_ACCOUNT}'")
+            node = BIP32.from_xpub(xpub)
+            with self._node_lock:
+                self._account_nodes[coin_type] = node
+        return node
+    
+    def _merchant_node(self, coin_type: int, merchant_index: int) -> BIP32:
+        """Nó público do merchant (LRU), derivado do xpub da conta"""
+        key = (coin_type, merchant_index)
+        with self._node_lock:
+            node = self._merchant_nodes.get(key)
+            if node is not None:
+                self._merchant_nodes.move_to_end(key)
+                return node
+        
+        node = BIP32.from_xpub(self._account_node(coin_type).get_xpub_from_path(f"m/{merchant_index}"))
+        with self._node_lock:
+            self._merchant_nodes[key] = node
+            while len(self._merchant_nodes) > self.MAX_CACHED_MERCHANT_NODES:
+                self._merchant_nodes.popitem(last=False)
+        return node
+    
+    def derive_public_key(self, currency: str, merchant_index: int, payment_index: int) -> bytes:
+        """
+        Public key do pagamento: uma derivação não-hardened a partir do
+        xpub do merchant em cache (sem private keys).
+        """
+        merchant_node = self._merchant_node(self.get_coin_type(currency), merchant_index)
+        return merchant_node.get_pubkey_from_path([payment_index])
+    
+    def derive_addresses(
+        self,
+        currency: str,
+        network: str,
+        merchant_index: int,
+        payment_indexes: Iterable[int]
+    ) -> Dict[int, str]:
+        """
+        Deriva vários endereços de pagamento do mesmo merchant (pool).
+        
+        Returns:
+            Dict payment_index -> endereço
+        """
+        if not self.is_initialized:
+            return {}
+        network = network.lower()
+        return {
+            index: self._public_key_to_address(
+                self.derive_public_key(currency, merchant_index, index).hex(), network
+            )
+            for index in payment_indexes
+        }
+    
     def derive_address(
         self,
         currency: str,
@@ -203,13 +281,11 @@ class GatewayHDWalletService:
             # Construir path
             derivation_path = self.build_derivation_path(currency, merchant_index, payment_index)
             
-            # Derivar keys
-            keys = self.derive_keys(derivation_path)
-            if not keys:
-                return None, None
+            # Public key a partir do xpub do merchant em cache
+            public_key = self.derive_public_key(currency, merchant_index, payment_index)
             
             # Gerar endereço baseado na rede
-            address = self._public_key_to_address(keys["public_key"], network.lower())
+            address = self._public_key_to_address(public_key.hex(), network.lower())
             
             logger.info(f"✅ Endereço derivado: {address[:10]}...{address[-6:]} ({derivation_path})")
             
@@ -8,19 +8,20 @@ Features:
 - Criação de pagamentos PIX (via BB API)
 - Criação de pagamentos Crypto (derivação HD)
 - Verificação de status
-- Processamento de confirmações
+- Processamento de confirmações (individual ou em lote, via payment watcher)
 - Expiração automática
 
 Author: HOLD Wallet Team
 Date: January 2026
 """
 
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Set, Tuple
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, update
 
 from app.models.gateway import (
     GatewayPayment,
@@ -34,6 +35,9 @@ from app.models.gateway import (
     GatewayAuditAction
 )
 from app.schemas.gateway import PaymentCreate, PaymentFilterParams
+from app.services.address_index_service import watched_addresses, OwnerType
+from app.services.gateway.address_pool import gateway_address_pool
+from app.services.gateway.payment_watcher import gateway_payment_watcher
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +62,9 @@ class GatewayPaymentService:
         "solana": 32
     }
     
+    # Tolerância no valor recebido (crypto) em relação ao esperado
+    CRYPTO_AMOUNT_TOLERANCE = Decimal('0.01')
+    
     def __init__(self, db: Session):
         self.db = db
         self._settings_cache: Dict[str, Any] = {}
@@ -220,6 +227,10 @@ class GatewayPaymentService:
         self.db.commit()
         self.db.refresh(payment)
         
+        # Endereço crypto passa a ser vigiado bloco a bloco
+        if payment.crypto_address:
+            gateway_payment_watcher.watch(payment)
+        
         logger.info(f"💳 Pagamento criado: {payment_id} - {payment.payment_method.value} - R$ {data.amount}")
         
         return payment
@@ -306,6 +317,15 @@ class GatewayPaymentService:
             payment_hd_index=payment.hd_payment_index
         )
         
+        # Registrar no índice de endereços monitorados
+        if payment.crypto_address:
+            watched_addresses.add(
+                payment.crypto_network,
+                payment.crypto_address,
+                OwnerType.GATEWAY_PAYMENT,
+                payment.payment_id
+            )
+        
         # Calcular quantidade em crypto
         try:
             price_service = PriceService(self.db)
@@ -391,7 +411,14 @@ class GatewayPaymentService:
         hd_wallet = get_gateway_hd_wallet()
         
         if hd_wallet.is_initialized:
-            address, _ = hd_wallet.derive_address(
+            # Endereço pré-derivado (pool reabastecido em background)
+            address = gateway_address_pool.take(merchant_hd_index, currency, network, payment_hd_index)
+            if address:
+                return address
+            
+            # Pool frio: deriva fora do event loop
+            address, _ = await asyncio.to_thread(
+                hd_wallet.derive_address,
                 currency=currency,
                 network=network,
                 merchant_index=merchant_hd_index,
@@ -540,17 +567,17 @@ class GatewayPaymentService:
                 payment.status = GatewayPaymentStatus.PROCESSING
             
             if payment.status == GatewayPaymentStatus.PROCESSING:
-                # Verificar se valor está correto (tolerância de 1%)
                 expected = payment.crypto_amount or Decimal('0')
-                tolerance = expected * Decimal('0.01')
                 
-                if amount >= (expected - tolerance):
+                if self.crypto_amount_matches(expected, amount):
                     payment.status = GatewayPaymentStatus.CONFIRMED
                     payment.confirmed_at = datetime.now(timezone.utc)
                     payment.amount_received = self._convert_crypto_to_brl(
                         amount, payment.usd_rate, payment.brl_rate
                     )
                     
+                    gateway_payment_watcher.unwatch(payment.crypto_network, payment.crypto_address)
+                    
                     logger.info(f"✅ Crypto confirmado: {payment.payment_id} - {amount} {payment.crypto_currency}")
                     
                     # Disparar webhook
@@ -566,11 +593,168 @@ class GatewayPaymentService:
         
         return payment
     
+    @classmethod
+    def crypto_amount_matches(cls, expected: Optional[Decimal], received: Decimal) -> bool:
+        """Valor recebido cobre o esperado (com tolerância)"""
+        expected = Decimal(str(expected or 0))
+        return received >= expected - expected * cls.CRYPTO_AMOUNT_TOLERANCE
+    
+    async def mark_crypto_payments_detected(self, detections: List[Dict[str, Any]]) -> int:
+        """
+        Marca em lote como PROCESSING os pagamentos cuja transferência foi
+        detectada on-chain (aguardando confirmações)
+        
+        Args:
+            detections: [{payment_id, amount, tx_hash, confirmations}]
+        """
+        if not detections:
+            return 0
+        
+        by_id = {d["payment_id"]: d for d in detections}
+        claimed = self._claim(
+            list(by_id), [GatewayPaymentStatus.PENDING], GatewayPaymentStatus.PROCESSING
+        )
+        payments = self._load_payments(claimed)
+        
+        for payment in payments:
+            detection = by_id[payment.payment_id]
+            payment.crypto_tx_hash = detection["tx_hash"]
+            payment.crypto_amount_received = detection["amount"]
+            payment.crypto_confirmations = detection["confirmations"]
+        
+        self.db.commit()
+        if payments:
+            for payment in payments:
+                await self._trigger_webhook(payment, "payment.processing")
+            logger.info(f"🔎 {len(payments)} pagamentos crypto detectados, aguardando confirmações")
+        
+        return len(payments)
+    
+    async def confirm_crypto_payments(self, detections: List[Dict[str, Any]]) -> List[GatewayPayment]:
+        """
+        Confirma em lote pagamentos crypto detectados pelo payment watcher
+        
+        Um único commit para todos os pagamentos (e outro para o
+        auto-complete); os webhooks são disparados em seguida. Os
+        pagamentos são reivindicados com UPDATE condicional: se outro
+        worker detectou a mesma transferência, só um deles confirma,
+        completa e dispara os webhooks.
+        
+        Args:
+            detections: [{payment_id, amount, tx_hash, confirmations}]
+            
+        Returns:
+            Pagamentos confirmados
+        """
+        if not detections:
+            return []
+        
+        by_id = {d["payment_id"]: d for d in detections}
+        open_statuses = [GatewayPaymentStatus.PENDING, GatewayPaymentStatus.PROCESSING]
+        expected = dict(
+            self.db.query(GatewayPayment.payment_id, GatewayPayment.crypto_amount).filter(
+                GatewayPayment.payment_id.in_(list(by_id)),
+                GatewayPayment.status.in_(open_statuses)
+            ).all()
+        )
+        matched = [
+            payment_id for payment_id, crypto_amount in expected.items()
+            if self.crypto_amount_matches(crypto_amount, by_id[payment_id]["amount"])
+        ]
+        short = [payment_id for payment_id in expected if payment_id not in matched]
+        
+        now = datetime.now(timezone.utc)
+        claimed = self._claim(matched, open_statuses, GatewayPaymentStatus.CONFIRMED, confirmed_at=now)
+        claimed |= self._claim(short, open_statuses, GatewayPaymentStatus.PROCESSING)
+        
+        confirmed: List[GatewayPayment] = []
+        for payment in self._load_payments(claimed):
+            detection = by_id[payment.payment_id]
+            amount = detection["amount"]
+            payment.crypto_tx_hash = detection["tx_hash"]
+            payment.crypto_confirmations = detection["confirmations"]
+            payment.crypto_amount_received = amount
+            
+            if payment.payment_id not in matched:
+                logger.warning(f"⚠️ Valor insuficiente: esperado {payment.crypto_amount}, recebido {amount}")
+                continue
+            
+            payment.amount_received = self._convert_crypto_to_brl(
+                amount, payment.usd_rate, payment.brl_rate
+            )
+            gateway_payment_watcher.unwatch(payment.crypto_network, payment.crypto_address)
+            confirmed.append(payment)
+        
+        self.db.commit()
+        
+        for payment in confirmed:
+            await self._trigger_webhook(payment, "payment.confirmed")
+        
+        # Auto-completar em lote
+        for payment in confirmed:
+            self._mark_completed(payment)
+        if confirmed:
+            self.db.commit()
+            for payment in confirmed:
+                await self._trigger_webhook(payment, "payment.completed")
+            logger.info(f"✅ {len(confirmed)} pagamentos crypto confirmados em lote")
+        
+        return confirmed
+    
+    def _claim(
+        self,
+        payment_ids: List[str],
+        from_statuses: List[GatewayPaymentStatus],
+        status: GatewayPaymentStatus,
+        **values
+    ) -> Set[str]:
+        """
+        Muda o status só das linhas ainda em from_statuses (UPDATE ... RETURNING)
+        
+        Com vários workers detectando a mesma transferência, a linha fica
+        bloqueada até o commit de quem chegou primeiro; os demais não a
+        recebem de volta e não agem sobre ela.
+        
+        Returns:
+            payment_ids efetivamente alterados por esta transação
+        """
+        if not payment_ids:
+            return set()
+        result = self.db.execute(
+            update(GatewayPayment)
+            .where(
+                GatewayPayment.payment_id.in_(payment_ids),
+                GatewayPayment.status.in_(from_statuses)
+            )
+            .values(status=status, **values)
+            .returning(GatewayPayment.payment_id)
+            .execution_options(synchronize_session=False)
+        )
+        return set(result.scalars())
+    
+    def _load_payments(self, payment_ids: Set[str]) -> List[GatewayPayment]:
+        """Pagamentos reivindicados, recarregados com o status já gravado"""
+        if not payment_ids:
+            return []
+        return self.db.query(GatewayPayment).filter(
+            GatewayPayment.payment_id.in_(list(payment_ids))
+        ).populate_existing().all()
+    
     async def _auto_complete_payment(self, payment: GatewayPayment):
         """Auto-completa pagamento após confirmação"""
         if payment.status != GatewayPaymentStatus.CONFIRMED:
             return
         
+        self._mark_completed(payment)
+        self.db.commit()
+        
+        logger.info(f"✅ Pagamento completado: {payment.payment_id}")
+        
+        # Disparar webhook
+        await self._trigger_webhook(payment, "payment.completed")
+    
+    def _mark_completed(self, payment: GatewayPayment):
+        """Marca pagamento confirmado como completado + auditoria (sem commit)"""
         # Se settlement é em BRL (PIX), marcar como pending
         # Se settlement é em crypto, pode ser automático
         
@@ -591,13 +775,6 @@ class GatewayPaymentService:
             }
         )
         self.db.add(audit_log)
-        
-        self.db.commit()
-        
-        logger.info(f"✅ Pagamento completado: {payment.payment_id}")
-        
-        # Disparar webhook
-        await self._trigger_webhook(payment, "payment.completed")
     
     def _convert_crypto_to_brl(
         self,
@@ -621,35 +798,45 @@ class GatewayPaymentService:
         """
         Expira pagamentos pendentes que passaram do prazo
         
-        Deve ser chamado periodicamente (cron/celery)
+        Deve ser chamado periodicamente (cron/celery ou payment watcher).
+        Um único UPDATE ... RETURNING para todos os expirados; webhooks só
+        para as linhas que este UPDATE de fato mudou (outro worker ou um
+        pagamento detectado no meio do caminho não geram "expired").
         
         Returns:
             int: Número de pagamentos expirados
         """
         now = datetime.now(timezone.utc)
         
-        expired_payments = self.db.query(GatewayPayment).filter(
-            and_(
+        expired = self.db.execute(
+            update(GatewayPayment)
+            .where(
                 GatewayPayment.status == GatewayPaymentStatus.PENDING,
                 GatewayPayment.expires_at < now
             )
+            .values(status=GatewayPaymentStatus.EXPIRED)
+            .returning(
+                GatewayPayment.id,
+                GatewayPayment.merchant_id,
+                GatewayPayment.payment_id,
+                GatewayPayment.crypto_network,
+                GatewayPayment.crypto_address
+            )
+            .execution_options(synchronize_session=False)
         ).all()
+        self.db.commit()
         
-        count = 0
-        for payment in expired_payments:
-            payment.status = GatewayPaymentStatus.EXPIRED
-            count += 1
-            
-            # Disparar webhook
-            await self._trigger_webhook(payment, "payment.expired")
-            
-            logger.info(f"⏰ Pagamento expirado: {payment.payment_id}")
+        if not expired:
+            return 0
         
-        if count > 0:
-            self.db.commit()
-            logger.info(f"⏰ {count} pagamentos expirados")
+        for row in expired:
+            if row.crypto_address:
+                gateway_payment_watcher.unwatch(row.crypto_network, row.crypto_address)
+            # Disparar webhook
+            await self._trigger_webhook(row, "payment.expired")
         
-        return count
+        logger.info(f"⏰ {len(expired)} pagamentos expirados")
+        return len(expired)
     
     # ===================================
     # LISTING & SEARCH
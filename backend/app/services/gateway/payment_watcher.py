@@ -0,0 +1,481 @@
+"""
+👀 WolkPay Gateway - Payment Watcher
+=====================================
+
+Detecção de pagamentos crypto do gateway por observação de blocos, em vez
+de consultar o endereço de cada pagamento pendente.
+
+- Todos os endereços de pagamentos pendentes ficam num índice em memória
+  por rede (chave de 20 bytes, mesma do WatchedAddressIndex)
+- Um poller por rede EVM consome cada bloco novo uma única vez: as
+  transações do bloco (moeda nativa) e os logs Transfer dos tokens
+  vigiados, numa única requisição JSON-RPC em lote
+- Cada transferência é casada em O(1) pelo índice; o valor é acumulado e
+  comparado ao esperado com tolerância
+- Atingidas as confirmações exigidas, os receipts são verificados em lote
+  (reorg / transação revertida) e os pagamentos confirmados em lote, com
+  os webhooks do merchant
+
+A latência de detecção depende do tempo de bloco, não do número de
+pagamentos em aberto. Sem posição em memória (startup, ou rede que ficou
+sem pagamentos abertos) o scan recomeça no bloco estimado de criação do
+pagamento aberto mais antigo: transferências feitas com o worker parado
+não se perdem.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config.token_contracts import get_token_contract
+from app.services.address_index_service import address_to_key, topic_to_key, watched_addresses
+from app.services.chain_adapters.base import ChainRPCError
+from app.services.confirmation_tracker import BLOCK_TIMES, DEFAULT_BLOCK_TIME
+
+logger = logging.getLogger(__name__)
+
+# keccak("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+# Redes vigiadas e suas moedas nativas (demais moedas = tokens ERC-20)
+NATIVE_CURRENCIES: Dict[str, Tuple[str, ...]] = {
+    "ethereum": ("ETH",),
+    "polygon": ("MATIC", "POL"),
+    "bsc": ("BNB",),
+    "base": ("ETH",),
+}
+NATIVE_DECIMALS = 18
+
+
+@dataclass
+class Credit:
+    """Transferência recebida por um endereço de pagamento"""
+    ref: str  # tx hash (nativo) ou tx hash:log index (token)
+    tx_hash: str
+    amount: Decimal
+    block_number: int
+
+
+@dataclass
+class WatchedPayment:
+    """Pagamento pendente vigiado pelo watcher"""
+    payment_id: str
+    network: str
+    address: str
+    currency: str
+    expected_amount: Decimal
+    required_confirmations: int
+    expires_at: Optional[datetime]
+    token_contract: Optional[str] = None  # None = moeda nativa
+    decimals: int = NATIVE_DECIMALS
+    credits: List[Credit] = field(default_factory=list)
+    detected_block: Optional[int] = None  # bloco em que o valor esperado foi atingido
+    created_at: Optional[datetime] = None  # limite inferior do scan após restart
+
+    @property
+    def received(self) -> Decimal:
+        return sum((c.amount for c in self.credits), Decimal(0))
+
+    @property
+    def tx_hash(self) -> Optional[str]:
+        return self.credits[-1].tx_hash if self.credits else None
+
+    def confirmations(self, head: int) -> int:
+        return head - self.detected_block + 1 if self.detected_block is not None else 0
+
+    def detection(self, head: int) -> Dict[str, Any]:
+        return {
+            "payment_id": self.payment_id,
+            "amount": self.received,
+            "tx_hash": self.tx_hash,
+            "confirmations": self.confirmations(head)
+        }
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class GatewayPaymentWatcher:
+    """Índice de pagamentos pendentes por rede + consumo de blocos"""
+
+    STARTUP_LOOKBACK_BLOCKS = 10  # blocos revisitados no primeiro polling de uma rede (mínimo)
+    BACKFILL_SAFETY = 1.5  # margem sobre o tempo de bloco ao estimar o bloco de criação
+    MAX_BACKFILL_SECONDS = 86400  # pagamento aberto há mais que isso não recua além de 24h
+    MAX_BLOCKS_PER_POLL = 20  # limite de blocos por requisição em lote (catch-up)
+    EXPIRE_INTERVAL = 60
+
+    def __init__(self, pool_factory: Optional[Callable[[str], Any]] = None):
+        self._pool_factory = pool_factory
+        self._payments: Dict[str, Dict[bytes, WatchedPayment]] = {}
+        self._last_block: Dict[str, int] = {}
+        self._head: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _pool(self, network: str):
+        if self._pool_factory:
+            return self._pool_factory(network)
+        from app.services.rpc_pool import rpc_pools
+        return rpc_pools.pool(network)
+
+    # ------------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------------
+
+    def watch(self, payment) -> bool:
+        """Passa a vigiar um GatewayPayment crypto (redes EVM). Retorna False se não suportado."""
+        network = (payment.crypto_network or "").lower()
+        if network not in NATIVE_CURRENCIES or not payment.crypto_address or not payment.crypto_amount:
+            return False
+
+        currency = (payment.crypto_currency or "").upper()
+        token_contract, decimals = None, NATIVE_DECIMALS
+        if currency not in NATIVE_CURRENCIES[network]:
+            try:
+                contract = get_token_contract(currency, network)
+            except ValueError:
+                logger.warning(f"⚠️ {currency} em {network} não suportado pelo payment watcher")
+                return False
+            token_contract, decimals = contract["address"].lower(), contract["decimals"]
+
+        item = WatchedPayment(
+            payment_id=payment.payment_id,
+            network=network,
+            address=payment.crypto_address,
+            currency=currency,
+            expected_amount=Decimal(str(payment.crypto_amount)),
+            required_confirmations=payment.crypto_required_confirmations or 1,
+            expires_at=_as_utc(payment.expires_at),
+            token_contract=token_contract,
+            decimals=decimals,
+            created_at=_as_utc(getattr(payment, "created_at", None))
+        )
+        with self._lock:
+            self._payments.setdefault(network, {})[address_to_key(payment.crypto_address)] = item
+        return True
+
+    def unwatch(self, network: Optional[str], address: Optional[str]) -> bool:
+        if not network or not address:
+            return False
+        with self._lock:
+            removed = self._payments.get(network.lower(), {}).pop(address_to_key(address), None)
+        return removed is not None
+
+    def get(self, network: str, address: str) -> Optional[WatchedPayment]:
+        with self._lock:
+            return self._payments.get(network.lower(), {}).get(address_to_key(address))
+
+    def pending_count(self, network: Optional[str] = None) -> int:
+        with self._lock:
+            if network:
+                return len(self._payments.get(network.lower(), {}))
+            return sum(len(p) for p in self._payments.values())
+
+    def load_from_db(self, db) -> int:
+        """Carrega os pagamentos crypto pendentes/processando (síncrono)"""
+        from app.models.gateway import GatewayPayment, GatewayPaymentStatus
+
+        payments = db.query(GatewayPayment).filter(
+            GatewayPayment.crypto_address.isnot(None),
+            GatewayPayment.crypto_network.in_(list(NATIVE_CURRENCIES)),
+            GatewayPayment.status.in_([
+                GatewayPaymentStatus.PENDING,
+                GatewayPaymentStatus.PROCESSING
+            ])
+        ).yield_per(1000)
+        return sum(1 for payment in payments if self.watch(payment))
+
+    async def load(self) -> int:
+        """Carrega o índice a partir do banco sem bloquear o event loop"""
+        from app.core import db as core_db
+
+        def _load() -> int:
+            db = core_db.SessionLocal()
+            try:
+                return self.load_from_db(db)
+            finally:
+                db.close()
+
+        try:
+            total = await asyncio.to_thread(_load)
+            logger.info(f"👀 Payment watcher: {total} pagamentos crypto pendentes vigiados")
+            return total
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar pagamentos pendentes do gateway: {e}")
+            return 0
+
+    # ------------------------------------------------------------------
+    # Casamento de transferências
+    # ------------------------------------------------------------------
+
+    def _credit(self, payment: WatchedPayment, credit: Credit) -> bool:
+        """Acumula a transferência; retorna True se o pagamento acabou de atingir o valor"""
+        from app.services.gateway.payment_service import GatewayPaymentService
+
+        if any(c.ref == credit.ref for c in payment.credits):
+            return False
+        payment.credits.append(credit)
+        if payment.detected_block is None and GatewayPaymentService.crypto_amount_matches(
+            payment.expected_amount, payment.received
+        ):
+            payment.detected_block = credit.block_number
+            return True
+        return False
+
+    def _match_transactions(self, payments: Dict[bytes, WatchedPayment], block: Optional[Dict]) -> List[WatchedPayment]:
+        """Transferências de moeda nativa do bloco para endereços vigiados"""
+        detected = []
+        if not block:
+            return detected
+        block_number = int(block["number"], 16)
+        for tx in block.get("transactions") or []:
+            to = tx.get("to") if isinstance(tx, dict) else None
+            if not to:
+                continue
+            payment = payments.get(address_to_key(to))
+            if payment is None or payment.token_contract is not None:
+                continue
+            value = int(tx.get("value") or "0x0", 16)
+            if not value:
+                continue
+            amount = Decimal(value) / (Decimal(10) ** payment.decimals)
+            if self._credit(payment, Credit(tx["hash"], tx["hash"], amount, block_number)):
+                detected.append(payment)
+        return detected
+
+    def _match_logs(self, payments: Dict[bytes, WatchedPayment], logs: Optional[List[Dict]]) -> List[WatchedPayment]:
+        """Logs Transfer(address,address,uint256) dos tokens vigiados"""
+        detected = []
+        for log in logs or []:
+            topics = log.get("topics") or []
+            if len(topics) < 3 or log.get("removed"):
+                continue
+            payment = payments.get(topic_to_key(topics[2]))
+            if payment is None or payment.token_contract != (log.get("address") or "").lower():
+                continue
+            value = int(log.get("data") or "0x0", 16)
+            if not value:
+                continue
+            amount = Decimal(value) / (Decimal(10) ** payment.decimals)
+            ref = f"{log['transactionHash']}:{int(log.get('logIndex') or '0x0', 16)}"
+            credit = Credit(ref, log["transactionHash"], amount, int(log["blockNumber"], 16))
+            if self._credit(payment, credit):
+                detected.append(payment)
+        return detected
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+
+    async def poll_once(self, network: str) -> Tuple[List[WatchedPayment], List[WatchedPayment]]:
+        """
+        Consome os blocos novos da rede (uma requisição em lote) e confirma
+        os pagamentos que atingiram as confirmações exigidas.
+
+        Returns:
+            (pagamentos detectados nesta rodada, pagamentos confirmados)
+        """
+        network = network.lower()
+        with self._lock:
+            payments = dict(self._payments.get(network, {}))
+        if not payments:
+            # Sem pagamentos abertos não há o que consumir; o próximo recomeça
+            # na criação do pagamento aberto mais antigo (_start_block)
+            self._last_block.pop(network, None)
+            return [], []
+
+        pool = self._pool(network)
+        head = int(await pool.call("eth_blockNumber"), 16)
+        self._head[network] = head
+        last = self._last_block.get(network)
+        if last is None:
+            last = self._start_block(network, payments.values(), head) - 1
+        start, end = last + 1, min(head, last + self.MAX_BLOCKS_PER_POLL)
+
+        detected: List[WatchedPayment] = []
+        if start <= end:
+            native = any(p.token_contract is None for p in payments.values())
+            contracts = sorted({p.token_contract for p in payments.values() if p.token_contract})
+
+            calls = []
+            if native:
+                calls += [("eth_getBlockByNumber", [hex(n), True]) for n in range(start, end + 1)]
+            if contracts:
+                calls.append(("eth_getLogs", [{
+                    "fromBlock": hex(start),
+                    "toBlock": hex(end),
+                    "address": contracts,
+                    "topics": [TRANSFER_TOPIC]
+                }]))
+
+            results = await pool.call_batch(calls)
+            logs = results.pop() if contracts else []
+            for number, block in zip(range(start, end + 1), results):
+                if not block:
+                    # Bloco ainda indisponível no nó: reprocessa a partir dele (créditos são idempotentes)
+                    end = number - 1
+                    break
+                detected += self._match_transactions(payments, block)
+            detected += self._match_logs(payments, logs)
+            self._last_block[network] = end
+
+        if detected:
+            await self._persist(network, "detected", [p.detection(head) for p in detected])
+
+        matured = [
+            p for p in payments.values()
+            if p.detected_block is not None and p.confirmations(head) >= p.required_confirmations
+        ]
+        confirmed = await self._verify(pool, matured, head) if matured else []
+        if confirmed:
+            await self._persist(network, "confirmed", [p.detection(head) for p in confirmed])
+            for payment in confirmed:
+                self.unwatch(network, payment.address)
+                watched_addresses.remove(network, payment.address)
+
+        return detected, confirmed
+
+    def _start_block(self, network: str, payments, head: int) -> int:
+        """
+        Primeiro bloco a consumir sem posição em memória: o bloco estimado
+        (tempo de bloco com margem) de criação do pagamento aberto mais
+        antigo, e no mínimo STARTUP_LOOKBACK_BLOCKS atrás do topo. Créditos
+        são idempotentes, então revisitar blocos é seguro.
+        """
+        start = head - self.STARTUP_LOOKBACK_BLOCKS
+        created = [p.created_at for p in payments if p.created_at is not None]
+        if created:
+            elapsed = (datetime.now(timezone.utc) - min(created)).total_seconds()
+            elapsed = min(max(elapsed, 0), self.MAX_BACKFILL_SECONDS)
+            block_time = BLOCK_TIMES.get(network, DEFAULT_BLOCK_TIME)
+            start = min(start, head - int(elapsed * self.BACKFILL_SAFETY / block_time))
+        if start < head - self.STARTUP_LOOKBACK_BLOCKS:
+            logger.info(f"👀 {network}: retomando scan no bloco {start} (pagamento aberto mais antigo)")
+        return max(start, 0)
+
+    async def _verify(self, pool, matured: List[WatchedPayment], head: int) -> List[WatchedPayment]:
+        """
+        Confere os receipts das transferências (uma requisição em lote):
+        descarta transações revertidas ou removidas por reorg.
+        """
+        hashes = sorted({c.tx_hash for p in matured for c in p.credits})
+        receipts = await pool.call_batch([("eth_getTransactionReceipt", [h]) for h in hashes])
+        by_hash = dict(zip(hashes, receipts))
+
+        from app.services.gateway.payment_service import GatewayPaymentService
+
+        confirmed = []
+        for payment in matured:
+            credits = []
+            for credit in payment.credits:
+                receipt = by_hash.get(credit.tx_hash)
+                if not receipt or not receipt.get("blockNumber") or int(receipt.get("status") or "0x0", 16) != 1:
+                    continue
+                credit.block_number = int(receipt["blockNumber"], 16)
+                credits.append(credit)
+            payment.credits = credits
+
+            if not GatewayPaymentService.crypto_amount_matches(payment.expected_amount, payment.received):
+                logger.warning(f"⚠️ Pagamento {payment.payment_id}: transferência revertida/reorg, voltando a aguardar")
+                payment.detected_block = None
+                continue
+            payment.detected_block = max(c.block_number for c in credits)
+            if payment.confirmations(head) >= payment.required_confirmations:
+                confirmed.append(payment)
+        return confirmed
+
+    async def _persist(self, network: str, stage: str, detections: List[Dict[str, Any]]):
+        """Atualiza os pagamentos em lote via GatewayPaymentService (webhooks inclusos)"""
+        from app.core import db as core_db
+        from app.services.gateway.payment_service import GatewayPaymentService
+
+        db = core_db.SessionLocal()
+        try:
+            service = GatewayPaymentService(db)
+            if stage == "detected":
+                await service.mark_crypto_payments_detected(detections)
+            else:
+                await service.confirm_crypto_payments(detections)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ {network}: erro gravando pagamentos {stage}: {e}")
+        finally:
+            db.close()
+
+    def _drop_expired(self):
+        """Remove do índice pagamentos expirados sem transferência detectada"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for payments in self._payments.values():
+                expired = [
+                    key for key, p in payments.items()
+                    if p.expires_at and p.expires_at < now and p.detected_block is None
+                ]
+                for key in expired:
+                    del payments[key]
+
+    def is_behind(self, network: str) -> bool:
+        last = self._last_block.get(network)
+        return last is not None and last < self._head.get(network, last)
+
+    async def _poll(self, network: str):
+        interval = BLOCK_TIMES.get(network, DEFAULT_BLOCK_TIME)
+        while True:
+            try:
+                await self.poll_once(network)
+            except (ChainRPCError, ValueError) as e:
+                logger.warning(f"⚠️ {network}: erro consumindo blocos: {e}")
+                await asyncio.sleep(interval)
+                continue
+            except Exception as e:
+                logger.error(f"❌ {network}: erro no payment watcher: {e}")
+            # Atrasado (catch-up): segue direto para o próximo lote de blocos
+            await asyncio.sleep(0 if self.is_behind(network) else interval)
+
+    async def _expire_loop(self):
+        from app.core import db as core_db
+        from app.services.gateway.payment_service import GatewayPaymentService
+
+        while True:
+            await asyncio.sleep(self.EXPIRE_INTERVAL)
+            db = core_db.SessionLocal()
+            try:
+                await GatewayPaymentService(db).expire_pending_payments()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"❌ Erro expirando pagamentos do gateway: {e}")
+            finally:
+                db.close()
+            self._drop_expired()
+
+    def start(self, networks: Optional[List[str]] = None):
+        """Inicia os pollers por rede e a expiração periódica (startup da aplicação)"""
+        networks = [n for n in (networks or list(NATIVE_CURRENCIES)) if n in NATIVE_CURRENCIES]
+        for network in networks:
+            if network in self._tasks and not self._tasks[network].done():
+                continue
+            self._tasks[network] = asyncio.create_task(self._poll(network))
+        if "expire" not in self._tasks or self._tasks["expire"].done():
+            self._tasks["expire"] = asyncio.create_task(self._expire_loop())
+        logger.info(f"👀 Payment watcher ativo para {', '.join(networks)}")
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Instância global
+gateway_payment_watcher = GatewayPaymentWatcher()
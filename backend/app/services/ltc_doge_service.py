@@ -17,10 +17,12 @@ import asyncio
 import hashlib
 import requests
 import logging
-from decimal import Decimal
 from typing import Dict, Optional, Tuple, List
 from dataclasses import dataclass
 
+from app.services.chain_adapters import doge_adapter, ltc_adapter
+from app.services.utxo_service import InsufficientFundsError, select_coins, utxo_cache
+
 logger = logging.getLogger(__name__)
 
 # ============================================
@@ -39,6 +41,10 @@ DOGE_BLOCKCYPHER_API = "https://api.blockcypher.com/v1/doge/main"
 DOGE_SOCHAIN_API = "https://sochain.com/api/v2"
 DOGE_EXPLORER = "https://blockchair.com/dogecoin/transaction"
 
+# Dust (abaixo disso o troco vira fee)
+LTC_DUST_LIMIT = 5_460
+DOGE_DUST_LIMIT = 1_000_000
+
 
 @dataclass
 class UTXO:
@@ -47,6 +53,7 @@ class UTXO:
     vout: int
     value: int  # em satoshis
     script_pubkey: str = ""
+    confirmed: bool = True
 
 
 @dataclass
@@ -59,6 +66,63 @@ class TransactionResult:
     explorer_url: Optional[str] = None
 
 
+def _build_tx_request(
+    service,
+    network: str,
+    from_address: str,
+    to_address: str,
+    amount_satoshi: int,
+    dust_limit: int
+) -> Tuple[Dict, Optional[object]]:
+    """
+    Monta o payload de /txs/new com seleção de moedas local.
+    
+    Usa o cache de UTXOs e a seleção branch-and-bound/knapsack compartilhada
+    com o BTC, passando inputs explícitos e a fee calculada ao Blockcypher.
+    Sem UTXOs conhecidos, cai no modo antigo (Blockcypher escolhe os inputs).
+    
+    Returns:
+        (payload, seleção ou None)
+    """
+    outputs = [{"addresses": [to_address], "value": amount_satoshi}]
+    utxos = utxo_cache.get(network, from_address, lambda: service.get_utxos(from_address))
+    if not utxos:
+        return {"inputs": [{"addresses": [from_address]}], "outputs": outputs}, None
+    
+    selection = select_coins(
+        utxos,
+        target=amount_satoshi,
+        fee_rate=service.get_recommended_fee(),
+        dust_limit=dust_limit
+    )
+    logger.info(
+        f"📊 {network}: {len(selection.inputs)}/{len(utxos)} UTXOs "
+        f"({selection.algorithm}), fee {selection.fee}, troco {selection.change}"
+    )
+    tx_data = {
+        "inputs": [{"prev_hash": u.txid, "output_index": u.vout} for u in selection.inputs],
+        "outputs": outputs,
+        "fees": selection.fee
+    }
+    if selection.change:
+        tx_data["change_address"] = from_address
+    else:
+        # Sem troco: o excedente abaixo do dust vai para o minerador
+        tx_data["fees"] = selection.input_value - amount_satoshi
+    return tx_data, selection
+
+
+def _apply_sent(network: str, from_address: str, selection, tx_hash: str):
+    """Atualiza o cache de UTXOs após envio (inputs gastos, troco como novo UTXO)."""
+    if selection is None:
+        utxo_cache.invalidate(network, from_address)
+        return
+    change_utxos = []
+    if selection.change:
+        change_utxos.append(UTXO(txid=tx_hash, vout=1, value=selection.change, confirmed=False))
+    utxo_cache.apply_spend(network, from_address, selection.inputs, change_utxos)
+
+
 class LTCService:
     """
     Serviço para transações Litecoin.
@@ -70,6 +134,8 @@ class LTCService:
         self.sochain_api = LTC_SOCHAIN_API
         self.explorer_base = LTC_EXPLORER
         self.satoshi = LTC_SATOSHI
+        # Cliente assíncrono (pool compartilhado) usado nos envios
+        self.adapter = ltc_adapter
         logger.info("🪙 LTCService initialized (mainnet)")
     
     def validate_address(self, address: str) -> bool:
@@ -85,22 +151,6 @@ class LTCService:
             return True
         return False
     
-    def get_balance(self, address: str) -> Optional[Decimal]:
-        """Consulta saldo de um endereço LTC."""
-        try:
-            response = requests.get(
-                f"{self.api_base}/addrs/{address}/balance",
-                timeout=10
-            )
-            if response.status_code == 200:
-                data = response.json()
-                balance_satoshi = data.get('balance', 0)
-                return Decimal(str(balance_satoshi)) / Decimal(str(self.satoshi))
-            return None
-        except Exception as e:
-            logger.error(f"❌ Erro consultando saldo LTC: {e}")
-            return None
-    
     def get_utxos(self, address: str) -> List[UTXO]:
         """Busca UTXOs de um endereço."""
         utxos = []
@@ -170,19 +220,22 @@ class LTCService:
             
             amount_satoshi = int(amount_ltc * self.satoshi)
             
-            # 1. Criar nova transação
-            tx_data = {
-                "inputs": [{"addresses": [from_address]}],
-                "outputs": [{"addresses": [to_address], "value": amount_satoshi}]
-            }
+            # 1. Criar nova transação (inputs escolhidos localmente)
+            try:
+                tx_data, selection = await asyncio.to_thread(
+                    _build_tx_request, self, 'litecoin', from_address, to_address, amount_satoshi, LTC_DUST_LIMIT
+                )
+            except InsufficientFundsError:
+                return TransactionResult(success=False, error="Saldo LTC insuficiente (incluindo taxa)")
             
-            response = requests.post(
-                f"{self.api_base}/txs/new",
-                json=tx_data,
+            response = await self.adapter.post(
+                "/txs/new",
+                tx_data,
                 timeout=30
             )
             
             if response.status_code != 201:
+                utxo_cache.invalidate('litecoin', from_address)
                 return TransactionResult(
                     success=False,
                     error=f"Erro criando TX: {response.text}"
@@ -209,9 +262,9 @@ class LTCService:
             tx_skeleton['pubkeys'] = pubkeys
             
             # 3. Enviar transação assinada
-            response = requests.post(
-                f"{self.api_base}/txs/send",
-                json=tx_skeleton,
+            response = await self.adapter.post(
+                "/txs/send",
+                tx_skeleton,
                 timeout=30
             )
             
@@ -220,6 +273,7 @@ class LTCService:
                 tx_hash = result.get('tx', {}).get('hash')
                 
                 logger.info(f"✅ LTC enviado! TX: {tx_hash}")
+                _apply_sent('litecoin', from_address, selection, tx_hash)
                 
                 return TransactionResult(
                     success=True,
@@ -252,6 +306,8 @@ class DOGEService:
         self.sochain_api = DOGE_SOCHAIN_API
         self.explorer_base = DOGE_EXPLORER
         self.satoshi = DOGE_SATOSHI
+        # Cliente assíncrono (pool compartilhado) usado nos envios
+        self.adapter = doge_adapter
         logger.info("🐕 DOGEService initialized (mainnet)")
     
     def validate_address(self, address: str) -> bool:
@@ -267,22 +323,6 @@ class DOGEService:
             return True
         return False
     
-    def get_balance(self, address: str) -> Optional[Decimal]:
-        """Consulta saldo de um endereço DOGE."""
-        try:
-            response = requests.get(
-                f"{self.api_base}/addrs/{address}/balance",
-                timeout=10
-            )
-            if response.status_code == 200:
-                data = response.json()
-                balance_satoshi = data.get('balance', 0)
-                return Decimal(str(balance_satoshi)) / Decimal(str(self.satoshi))
-            return None
-        except Exception as e:
-            logger.error(f"❌ Erro consultando saldo DOGE: {e}")
-            return None
-    
     def get_utxos(self, address: str) -> List[UTXO]:
         """Busca UTXOs de um endereço."""
         utxos = []
@@ -338,19 +378,22 @@ class DOGEService:
             
             amount_satoshi = int(amount_doge * self.satoshi)
             
-            # 1. Criar nova transação via Blockcypher
-            tx_data = {
-                "inputs": [{"addresses": [from_address]}],
-                "outputs": [{"addresses": [to_address], "value": amount_satoshi}]
-            }
+            # 1. Criar nova transação via Blockcypher (inputs escolhidos localmente)
+            try:
+                tx_data, selection = await asyncio.to_thread(
+                    _build_tx_request, self, 'dogecoin', from_address, to_address, amount_satoshi, DOGE_DUST_LIMIT
+                )
+            except InsufficientFundsError:
+                return TransactionResult(success=False, error="Saldo DOGE insuficiente (incluindo taxa)")
             
-            response = requests.post(
-                f"{self.api_base}/txs/new",
-                json=tx_data,
+            response = await self.adapter.post(
+                "/txs/new",
+                tx_data,
                 timeout=30
             )
             
             if response.status_code != 201:
+                utxo_cache.invalidate('dogecoin', from_address)
                 return TransactionResult(
                     success=False,
                     error=f"Erro criando TX: {response.text}"
@@ -375,9 +418,9 @@ class DOGEService:
             tx_skeleton['pubkeys'] = pubkeys
             
             # 3. Enviar transação assinada
-            response = requests.post(
-                f"{self.api_base}/txs/send",
-                json=tx_skeleton,
+            response = await self.adapter.post(
+                "/txs/send",
+                tx_skeleton,
                 timeout=30
             )
             
@@ -386,6 +429,7 @@ class DOGEService:
                 tx_hash = result.get('tx', {}).get('hash')
                 
                 logger.info(f"✅ DOGE enviado! TX: {tx_hash}")
+                _apply_sent('dogecoin', from_address, selection, tx_hash)
                 
                 return TransactionResult(
                     success=True,
@@ -215,6 +215,7 @@ class MultiChainSendService:
     async def _send_evm(self, db: Session, trade: InstantTrade, network: str = None, bypass_restriction: bool = False) -> MultiChainSendResult:
         """Envia crypto EVM (ETH, MATIC, USDT, etc)."""
         from app.services.blockchain_deposit_service import blockchain_deposit_service
+        from app.services.payout_batch_service import payout_batch_service
         
         symbol = str(trade.symbol).upper()
         
@@ -222,12 +223,21 @@ class MultiChainSendService:
         if not network:
             network = EVM_CRYPTOS.get(symbol, {}).get('network', 'polygon')
         
-        result = blockchain_deposit_service.deposit_crypto_to_user(
-            db=db,
-            trade=trade,
-            network=network,
-            bypass_restriction=bypass_restriction
-        )
+        if payout_batch_service.enabled:
+            # Agrupa com outros payouts do mesmo (rede, ativo) em uma transação
+            result = await blockchain_deposit_service.queue_deposit_to_user(
+                db=db,
+                trade=trade,
+                network=network,
+                bypass_restriction=bypass_restriction
+            )
+        else:
+            result = blockchain_deposit_service.deposit_crypto_to_user(
+                db=db,
+                trade=trade,
+                network=network,
+                bypass_restriction=bypass_restriction
+            )
         
         return MultiChainSendResult(
             success=result.get('success', False),
@@ -240,8 +250,12 @@ class MultiChainSendService:
     async def _send_btc(self, db: Session, trade: InstantTrade) -> MultiChainSendResult:
         """Envia Bitcoin."""
         from app.services.blockchain_deposit_service import blockchain_deposit_service
+        from app.services.payout_batch_service import payout_batch_service
         
-        result = await blockchain_deposit_service.send_btc_to_user(db=db, trade=trade)
+        if payout_batch_service.enabled:
+            result = await blockchain_deposit_service.queue_deposit_to_user(db=db, trade=trade, network='bitcoin')
+        else:
+            result = await blockchain_deposit_service.send_btc_to_user(db=db, trade=trade)
         
         return MultiChainSendResult(
             success=result.get('success', False),
@@ -0,0 +1,451 @@
+"""
+🔢 Nonce Manager - Alocação de nonces para envios EVM concorrentes
+==================================================================
+
+Antes, cada envio chamava `get_transaction_count` logo antes de assinar:
+dois payouts simultâneos da carteira da plataforma recebiam o mesmo nonce e
+um deles falhava. Este serviço mantém o próximo nonce por (chain_id, sender):
+
+- Alocação local sob lock (ou contador atômico no Redis quando conectado,
+  para múltiplos workers) - a RPC só é consultada na primeira alocação,
+  após erros de nonce e periodicamente (RESYNC_INTERVAL).
+- Nonces de envios recusados definitivamente pelo nó (saldo insuficiente,
+  gas intrínseco...) são devolvidos e reutilizados primeiro, evitando
+  "buracos" que travariam os seguintes. Erros ambíguos (timeout, 5xx,
+  conexão caída) não devolvem o nonce: a transação pode ter sido aceita,
+  então ela fica registrada como pendente (bump_stuck/resync resolvem).
+- Transações pendentes ficam registradas para replace-by-fee (mesmo nonce,
+  gas maior) quando ficam presas.
+
+Uso:
+    tx_hash = nonce_manager.send_transaction(w3, tx, private_key, sender=from_address)
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth_account import Account
+from web3 import Web3
+
+from app.services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+
+# Retorna o próximo nonce livre: primeiro os devolvidos (>= piso), depois o contador.
+# ARGV[1] = piso vindo da RPC (pending count) ou -1 quando não houve resync.
+_ALLOCATE_SCRIPT = """
+local floor = tonumber(ARGV[1])
+if floor >= 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', '(' .. floor)
+end
+local gap = redis.call('ZRANGE', KEYS[2], 0, 0)
+if #gap > 0 then
+    redis.call('ZREM', KEYS[2], gap[1])
+    return tonumber(gap[1])
+end
+local current = redis.call('GET', KEYS[1])
+if not current and floor < 0 then
+    return -1
+end
+current = tonumber(current or '0')
+if current < floor then
+    current = floor
+end
+redis.call('SET', KEYS[1], current + 1, 'EX', tonumber(ARGV[2]))
+return current
+"""
+
+# Devolve um nonce não usado: recua o contador se for o último, senão vira gap.
+_RELEASE_SCRIPT = """
+local nonce = tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '-1')
+if current == nonce + 1 then
+    redis.call('SET', KEYS[1], nonce, 'KEEPTTL')
+else
+    redis.call('ZADD', KEYS[2], nonce, nonce)
+    redis.call('EXPIRE', KEYS[2], tonumber(ARGV[2]))
+end
+return 1
+"""
+
+# Mensagens de nós (geth/erigon/bor) que indicam nonce dessincronizado
+NONCE_ERRORS = (
+    "nonce too low",
+    "nonce too high",
+    "replacement transaction underpriced",
+    "already known",
+    "known transaction",
+    "invalid nonce",
+)
+
+
+# Recusas definitivas: o nó validou e descartou a transação (não entrou no mempool)
+REJECTION_ERRORS = (
+    "insufficient funds",
+    "intrinsic gas too low",
+    "exceeds block gas limit",
+    "gas limit reached",
+    "transaction underpriced",
+    "fee cap less than block base fee",
+    "max fee per gas less than block base fee",
+    "max priority fee per gas higher than max fee per gas",
+    "exceeds the configured cap",
+    "invalid sender",
+    "invalid chain id",
+    "only replay-protected",
+    "oversized data",
+    "transaction type not supported",
+)
+
+
+def is_nonce_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERRORS)
+
+
+def is_rejection_error(error: Exception) -> bool:
+    message = str(error).lower()
+    if "replacement transaction underpriced" in message:
+        return False  # disputa de nonce, tratada por is_nonce_error
+    return any(marker in message for marker in REJECTION_ERRORS)
+
+
+class TransactionRejected(ValueError):
+    """O nó recusou a transação; o nonce foi devolvido"""
+
+
+class BroadcastUncertain(Exception):
+    """
+    Falha ambígua no envio (timeout, 5xx): a transação pode estar no
+    mempool. O nonce continua registrado como pendente - não reenviar.
+    """
+
+    def __init__(self, tx_hash: str, nonce: int, error: Exception):
+        self.tx_hash = tx_hash
+        self.nonce = nonce
+        super().__init__(f"Envio incerto da transação {tx_hash} (nonce {nonce}): {error}")
+
+
+@dataclass
+class PendingTransaction:
+    """Transação enviada e ainda não minerada"""
+    nonce: int
+    tx_hash: str
+    tx: Dict[str, Any]
+    sent_at: float = field(default_factory=time.time)
+    replacements: int = 0
+
+
+@dataclass
+class _SenderState:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    next_nonce: Optional[int] = None
+    synced_at: float = 0.0
+    released: List[int] = field(default_factory=list)  # min-heap
+    pending: Dict[int, PendingTransaction] = field(default_factory=dict)
+
+
+class NonceManager:
+    """Gerencia nonces e transações pendentes por (chain_id, sender)"""
+
+    RESYNC_INTERVAL = 300  # segundos
+    REDIS_TTL = 3600
+    # Nós exigem >= 10% de aumento para substituir; 12.5% dá margem de arredondamento
+    REPLACEMENT_BUMP = 1.125
+    STUCK_AFTER_SECONDS = 180
+
+    def __init__(self, use_redis: bool = True):
+        self.use_redis = use_redis
+        self._states: Dict[Tuple[int, str], _SenderState] = {}
+        self._states_lock = threading.Lock()
+
+    # ===================================
+    # ESTADO
+    # ===================================
+
+    def _state(self, chain_id: int, sender: str) -> _SenderState:
+        key = (int(chain_id), sender.lower())
+        state = self._states.get(key)
+        if state is None:
+            with self._states_lock:
+                state = self._states.setdefault(key, _SenderState())
+        return state
+
+    def _redis(self):
+        if self.use_redis and cache_service.is_connected():
+            return cache_service.redis_client
+        return None
+
+    @staticmethod
+    def _redis_keys(chain_id: int, sender: str) -> List[str]:
+        base = f"nonce:{chain_id}:{sender.lower()}"
+        return [base, f"{base}:released"]
+
+    # ===================================
+    # ALOCAÇÃO
+    # ===================================
+
+    def allocate(self, w3: Web3, chain_id: int, sender: str) -> int:
+        """Reserva o próximo nonce do sender (sem round-trip na maior parte das vezes)"""
+        sender = Web3.to_checksum_address(sender)
+        state = self._state(chain_id, sender)
+
+        with state.lock:
+            needs_sync = state.next_nonce is None or time.time() - state.synced_at > self.RESYNC_INTERVAL
+            floor = self._chain_nonce(w3, sender) if needs_sync else -1
+            if needs_sync:
+                state.synced_at = time.time()
+
+            redis_client = self._redis()
+            if redis_client is not None:
+                try:
+                    nonce = self._allocate_redis(redis_client, chain_id, sender, floor)
+                    if nonce < 0:
+                        # Contador expirou no Redis: resync obrigatório
+                        nonce = self._allocate_redis(
+                            redis_client, chain_id, sender, self._chain_nonce(w3, sender)
+                        )
+                    state.next_nonce = max(state.next_nonce or 0, nonce + 1)
+                    return nonce
+                except Exception as e:
+                    logger.warning(f"⚠️ Redis indisponível para nonce, usando contador local: {e}")
+
+            if floor >= 0:
+                state.next_nonce = max(state.next_nonce or 0, floor)
+                state.released = [n for n in state.released if n >= floor]
+                heapq.heapify(state.released)
+
+            if state.released:
+                return heapq.heappop(state.released)
+
+            nonce = state.next_nonce
+            state.next_nonce += 1
+            return nonce
+
+    def _allocate_redis(self, redis_client, chain_id: int, sender: str, floor: int) -> int:
+        return int(redis_client.eval(
+            _ALLOCATE_SCRIPT, 2, *self._redis_keys(chain_id, sender), floor, self.REDIS_TTL
+        ))
+
+    def release(self, chain_id: int, sender: str, nonce: int):
+        """Devolve um nonce cujo envio falhou antes de entrar no mempool"""
+        sender = Web3.to_checksum_address(sender)
+        state = self._state(chain_id, sender)
+
+        with state.lock:
+            redis_client = self._redis()
+            if redis_client is not None:
+                try:
+                    redis_client.eval(
+                        _RELEASE_SCRIPT, 2, *self._redis_keys(chain_id, sender), nonce, self.REDIS_TTL
+                    )
+                    return
+                except Exception as e:
+                    logger.warning(f"⚠️ Falha ao devolver nonce no Redis: {e}")
+
+            if state.next_nonce == nonce + 1:
+                state.next_nonce = nonce
+            elif nonce not in state.released:
+                heapq.heappush(state.released, nonce)
+
+    def resync(self, w3: Web3, chain_id: int, sender: str):
+        """Descarta o contador e força nova leitura da RPC na próxima alocação"""
+        sender = Web3.to_checksum_address(sender)
+        state = self._state(chain_id, sender)
+
+        with state.lock:
+            state.next_nonce = None
+            state.synced_at = 0.0
+            state.released = []
+            redis_client = self._redis()
+            if redis_client is not None:
+                try:
+                    chain_nonce = self._chain_nonce(w3, sender)
+                    keys = self._redis_keys(chain_id, sender)
+                    redis_client.delete(keys[1])
+                    redis_client.set(keys[0], chain_nonce, ex=self.REDIS_TTL)
+                except Exception as e:
+                    logger.warning(f"⚠️ Falha ao ressincronizar nonce no Redis: {e}")
+
+        logger.info(f"🔄 Nonce ressincronizado: chain={chain_id} sender={sender}")
+
+    @staticmethod
+    def _chain_nonce(w3: Web3, sender: str) -> int:
+        return int(w3.eth.get_transaction_count(sender, "pending"))
+
+    # ===================================
+    # ENVIO
+    # ===================================
+
+    def send_transaction(
+        self,
+        w3: Web3,
+        tx: Dict[str, Any],
+        private_key: str,
+        sender: Optional[str] = None
+    ) -> str:
+        """
+        Aloca nonce, assina e envia. Em erro de nonce ressincroniza e tenta
+        mais uma vez.
+
+        Returns:
+            tx_hash em hex (0x...)
+
+        Raises:
+            TransactionRejected: recusa definitiva do nó (nonce devolvido)
+            BroadcastUncertain: erro ambíguo; a transação segue registrada
+                como pendente com o seu nonce
+        """
+        sender = Web3.to_checksum_address(sender or Account.from_key(private_key).address)
+        chain_id = int(tx.get("chainId") or w3.eth.chain_id)
+
+        for attempt in range(2):
+            nonce = self.allocate(w3, chain_id, sender)
+            signed_tx = w3.eth.account.sign_transaction({**tx, "chainId": chain_id, "nonce": nonce}, private_key)
+            raw_tx = getattr(signed_tx, "rawTransaction", None) or getattr(signed_tx, "raw_transaction", None)
+            tx_hash = Web3.to_hex(signed_tx.hash)
+
+            try:
+                w3.eth.send_raw_transaction(raw_tx)
+            except Exception as e:
+                message = str(e).lower()
+                if "already known" in message or "known transaction" in message:
+                    # A mesma transação já está no mempool (ex: retry da RPC)
+                    break
+                if is_nonce_error(e):
+                    logger.warning(f"⚠️ Erro de nonce {nonce} ({sender}): {e} - ressincronizando")
+                    self.resync(w3, chain_id, sender)
+                    if attempt == 0:
+                        continue
+                    raise
+                if is_rejection_error(e):
+                    self.release(chain_id, sender, nonce)
+                    raise TransactionRejected(str(e)) from e
+                # Timeout/5xx: a transação pode ter sido aceita; reutilizar o
+                # nonce criaria uma transação conflitante
+                self._track(chain_id, sender, PendingTransaction(
+                    nonce=nonce, tx_hash=tx_hash, tx={**tx, "chainId": chain_id, "nonce": nonce}
+                ))
+                logger.warning(f"⚠️ Envio incerto do nonce {nonce} ({sender}): {e} - mantido como pendente")
+                raise BroadcastUncertain(tx_hash, nonce, e) from e
+            break
+
+        self._track(chain_id, sender, PendingTransaction(
+            nonce=nonce, tx_hash=tx_hash, tx={**tx, "chainId": chain_id, "nonce": nonce}
+        ))
+        return tx_hash
+
+    def _track(self, chain_id: int, sender: str, pending: PendingTransaction):
+        state = self._state(chain_id, sender)
+        with state.lock:
+            state.pending[pending.nonce] = pending
+
+    # ===================================
+    # PENDENTES / REPLACE-BY-FEE
+    # ===================================
+
+    def pending_transactions(self, chain_id: int, sender: str) -> List[PendingTransaction]:
+        state = self._state(chain_id, Web3.to_checksum_address(sender))
+        with state.lock:
+            return sorted(state.pending.values(), key=lambda p: p.nonce)
+
+    def prune_mined(self, w3: Web3, chain_id: int, sender: str) -> int:
+        """Remove do registro as transações já mineradas; retorna o nonce confirmado"""
+        sender = Web3.to_checksum_address(sender)
+        mined_nonce = int(w3.eth.get_transaction_count(sender, "latest"))
+        state = self._state(chain_id, sender)
+        with state.lock:
+            for nonce in [n for n in state.pending if n < mined_nonce]:
+                del state.pending[nonce]
+        return mined_nonce
+
+    def stuck_transactions(
+        self,
+        w3: Web3,
+        chain_id: int,
+        sender: str,
+        older_than: Optional[int] = None
+    ) -> List[PendingTransaction]:
+        """Pendentes não mineradas há mais de `older_than` segundos"""
+        self.prune_mined(w3, chain_id, sender)
+        cutoff = time.time() - (older_than if older_than is not None else self.STUCK_AFTER_SECONDS)
+        return [p for p in self.pending_transactions(chain_id, sender) if p.sent_at <= cutoff]
+
+    def replace_transaction(
+        self,
+        w3: Web3,
+        chain_id: int,
+        sender: str,
+        nonce: int,
+        private_key: str,
+        cancel: bool = False
+    ) -> str:
+        """
+        Reenvia a transação pendente com o mesmo nonce e gas maior.
+        cancel=True substitui por uma transferência de 0 para o próprio sender.
+        """
+        sender = Web3.to_checksum_address(sender)
+        state = self._state(chain_id, sender)
+        with state.lock:
+            pending = state.pending.get(nonce)
+        if pending is None:
+            raise ValueError(f"Nonce {nonce} não está pendente para {sender}")
+
+        tx = dict(pending.tx)
+        if cancel:
+            tx.update({"to": sender, "value": 0, "data": b""})
+            tx["gas"] = 21000
+
+        current_gas_price = int(w3.eth.gas_price)
+        if "maxFeePerGas" in tx:
+            tx["maxPriorityFeePerGas"] = int(int(tx["maxPriorityFeePerGas"]) * self.REPLACEMENT_BUMP) + 1
+            tx["maxFeePerGas"] = max(
+                int(int(tx["maxFeePerGas"]) * self.REPLACEMENT_BUMP) + 1,
+                current_gas_price + tx["maxPriorityFeePerGas"]
+            )
+        else:
+            tx["gasPrice"] = max(int(int(tx["gasPrice"]) * self.REPLACEMENT_BUMP) + 1, current_gas_price)
+
+        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
+        raw_tx = getattr(signed_tx, "rawTransaction", None) or getattr(signed_tx, "raw_transaction", None)
+        w3.eth.send_raw_transaction(raw_tx)
+        tx_hash = Web3.to_hex(signed_tx.hash)
+
+        with state.lock:
+            state.pending[nonce] = PendingTransaction(
+                nonce=nonce, tx_hash=tx_hash, tx=tx, replacements=pending.replacements + 1
+            )
+
+        logger.info(f"⛽ Replace-by-fee nonce {nonce} ({sender}): {pending.tx_hash} -> {tx_hash}")
+        return tx_hash
+
+    def bump_stuck(
+        self,
+        w3: Web3,
+        chain_id: int,
+        sender: str,
+        private_key: str,
+        older_than: Optional[int] = None
+    ) -> Dict[int, str]:
+        """Aplica replace-by-fee em todas as pendentes presas; retorna {nonce: novo_hash}"""
+        replaced = {}
+        for pending in self.stuck_transactions(w3, chain_id, sender, older_than):
+            try:
+                replaced[pending.nonce] = self.replace_transaction(
+                    w3, chain_id, sender, pending.nonce, private_key
+                )
+            except Exception as e:
+                logger.error(f"❌ Falha no replace-by-fee do nonce {pending.nonce}: {e}")
+        return replaced
+
+
+# Instância global
+nonce_manager = NonceManager()
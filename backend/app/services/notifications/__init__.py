@@ -13,12 +13,14 @@ Módulos:
 - wallet_notifications: Notificações de depósitos/saques
 - account_notifications: Notificações de conta (KYC, welcome)
 - notification_service: Serviço principal que orquestra tudo
+- outbox: Fila persistente de emails e worker de envio em lote
 
 Author: WOLK NOW LLC
 """
 
 from .notification_service import NotificationService, notification_service
 from .email_templates import EmailTemplates, TRANSLATIONS
+from .outbox import NotificationOutboxWorker, FakeEmailProvider, notification_outbox
 from .notification_integration import (
     # Trade notifications
     notify_trade_started,
@@ -63,6 +65,9 @@ __all__ = [
     "notification_service",
     "EmailTemplates",
     "TRANSLATIONS",
+    "NotificationOutboxWorker",
+    "FakeEmailProvider",
+    "notification_outbox",
     
     # Trade
     "notify_trade_started",
@@ -4,17 +4,23 @@ WOLK NOW - Notification Service
 
 Servico central de notificacoes por email.
 Integra com o email_service existente e respeita preferencias do usuario.
+Os emails vao para a outbox (notification_outbox) e sao enviados em lote
+pelo worker (outbox.py), fora da requisicao.
 
 Author: WOLK NOW LLC
 """
 
+import asyncio
 import os
+import uuid
 import logging
 from typing import Optional, Dict, Any
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from .email_templates import EmailTemplates, TRANSLATIONS
+from .outbox import notification_outbox
 
 logger = logging.getLogger(__name__)
 
@@ -52,16 +58,49 @@ class NotificationService:
         else:
             logger.warning("NotificationService em modo log-only")
     
-    def _get_user_language(self, db: Session, user_id: str) -> str:
-        """Obtem o idioma preferido do usuario."""
+    def _recipient_settings(self, db: Session, user_id: str) -> Dict[str, Any]:
+        """
+        Idioma e preferencias de notificacao do usuario numa unica query.
+        Memoizado na sessao (db.info): varios emails para o mesmo usuario na
+        mesma requisicao nao repetem a consulta.
+        """
+        cache = db.info.setdefault("notification_recipients", {})
+        key = str(user_id)
+        if key in cache:
+            return cache[key]
         try:
             from app.models.user_settings import UserSettings
-            settings = db.query(UserSettings).filter(
-                UserSettings.user_id == user_id
-            ).first()
-            return settings.language if settings and settings.language else "pt"
+            from app.models.user_profile import NotificationSettings
+
+            user_uuid = uuid.UUID(key)
+
+            def pref(column):
+                return select(column).where(NotificationSettings.user_id == user_uuid).scalar_subquery()
+
+            row = db.execute(select(
+                select(UserSettings.language).where(UserSettings.user_id == key).scalar_subquery(),
+                pref(NotificationSettings.trade_alerts),
+                pref(NotificationSettings.security_alerts),
+                pref(NotificationSettings.price_alerts),
+                pref(NotificationSettings.marketing_emails),
+            )).one()
         except Exception:
-            return "pt"
+            return {"language": "pt"}
+
+        language, trade, security, price, marketing = row
+        # Sem linha em notification_settings: tudo habilitado
+        cache[key] = {
+            "language": language or "pt",
+            "trade": trade is not False,
+            "security": security is not False,
+            "price": price is not False,
+            "marketing": marketing is not False,
+        }
+        return cache[key]
+    
+    def _get_user_language(self, db: Session, user_id: str) -> str:
+        """Obtem o idioma preferido do usuario."""
+        return self._recipient_settings(db, user_id)["language"]
     
     def _check_notification_enabled(
         self, 
@@ -70,52 +109,37 @@ class NotificationService:
         notification_type: str
     ) -> bool:
         """Verifica se o usuario tem a notificacao habilitada."""
-        try:
-            from app.models.user_profile import NotificationSettings
-            settings = db.query(NotificationSettings).filter(
-                NotificationSettings.user_id == user_id
-            ).first()
-            
-            if not settings:
-                return True  # Default: habilitado
-            
-            # Mapear tipos de notificacao para campos
-            type_map = {
-                "trade": settings.trade_alerts,
-                "security": settings.security_alerts,
-                "price": settings.price_alerts,
-                "marketing": settings.marketing_emails,
-            }
-            
-            return type_map.get(notification_type, True)
-        except Exception:
-            return True
+        return self._recipient_settings(db, user_id).get(notification_type, True)
     
     async def _send_email(
         self,
+        db: Session,
+        user_id: str,
         to_email: str,
         subject: str,
         html_content: str,
         from_email: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Envia um email."""
-        if not self.is_configured:
-            logger.info(f"[LOG-ONLY] Email para {to_email}: {subject}")
-            return {"success": False, "message": "Email service not configured", "log_only": True}
-        
+        """
+        Coloca o email na outbox; o envio (em lote, com retries) fica com o worker.
+        Grava pela sessao do proprio worker: esta chamada roda em background
+        (fire_and_forget) e nao pode commitar nem desfazer a transacao do
+        handler dono de `db` (usado so para ler idioma/preferencias).
+        """
         try:
-            result = resend.Emails.send({
-                "from": from_email or self.FROM_EMAIL,
-                "to": to_email,
-                "subject": subject,
-                "html": html_content
-            })
-            
-            logger.info(f"Email enviado para {to_email}: {subject}")
-            return {"success": True, "message": "Email sent successfully", "id": str(result)}
+            message = await asyncio.to_thread(
+                notification_outbox.enqueue,
+                to_email=to_email,
+                subject=subject,
+                html=html_content,
+                from_email=from_email or self.FROM_EMAIL,
+                user_id=user_id
+            )
+            logger.info(f"Email para {to_email} na outbox: {subject}")
+            return {"success": True, "message": "Email queued", "queued": True, "id": message.id}
             
         except Exception as e:
-            logger.error(f"Erro ao enviar email para {to_email}: {str(e)}")
+            logger.error(f"Erro ao enfileirar email para {to_email}: {str(e)}")
             return {"success": False, "message": str(e), "error": True}
     
     # ============================================
@@ -171,7 +195,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("trade_created_subject"), content, lang)
-        return await self._send_email(to_email, t("trade_created_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("trade_created_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_trade_match(
         self,
@@ -218,7 +242,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("trade_match_subject"), content, lang)
-        return await self._send_email(to_email, t("trade_match_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("trade_match_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_payment_sent(
         self,
@@ -260,7 +284,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("payment_sent_subject"), content, lang)
-        return await self._send_email(to_email, t("payment_sent_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("payment_sent_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_trade_completed(
         self,
@@ -307,7 +331,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("trade_completed_subject"), content, lang)
-        return await self._send_email(to_email, t("trade_completed_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("trade_completed_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_trade_cancelled(
         self,
@@ -344,7 +368,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("trade_cancelled_subject"), content, lang)
-        return await self._send_email(to_email, t("trade_cancelled_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("trade_cancelled_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     # ============================================
     # INSTANT TRADE
@@ -391,7 +415,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("instant_buy_subject"), content, lang)
-        return await self._send_email(to_email, t("instant_buy_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("instant_buy_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_instant_sell_completed(
         self,
@@ -432,7 +456,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("instant_sell_subject"), content, lang)
-        return await self._send_email(to_email, t("instant_sell_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("instant_sell_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     # ============================================
     # WOLKPAY (INVOICES)
@@ -480,7 +504,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("invoice_created_subject"), content, lang)
-        return await self._send_email(to_email, t("invoice_created_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("invoice_created_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_invoice_paid(
         self,
@@ -526,7 +550,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("invoice_paid_subject"), content, lang)
-        return await self._send_email(to_email, t("invoice_paid_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("invoice_paid_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_invoice_expired(
         self,
@@ -562,7 +586,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("invoice_expired_subject"), content, lang)
-        return await self._send_email(to_email, t("invoice_expired_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("invoice_expired_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     # ============================================
     # BILL PAYMENT (BOLETOS)
@@ -610,7 +634,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("bill_processing_subject"), content, lang)
-        return await self._send_email(to_email, t("bill_processing_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("bill_processing_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_bill_paid(
         self,
@@ -654,7 +678,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("bill_paid_subject"), content, lang)
-        return await self._send_email(to_email, t("bill_paid_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("bill_paid_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_bill_failed(
         self,
@@ -696,7 +720,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("bill_failed_subject"), content, lang)
-        return await self._send_email(to_email, t("bill_failed_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("bill_failed_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     # ============================================
     # WALLET (DEPOSITS/WITHDRAWALS)
@@ -744,7 +768,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("deposit_received_subject"), content, lang)
-        return await self._send_email(to_email, t("deposit_received_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("deposit_received_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     async def send_withdrawal_requested(
         self,
@@ -786,7 +810,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("withdrawal_requested_subject"), content, lang)
-        return await self._send_email(to_email, t("withdrawal_requested_subject"), html, self.FROM_EMAIL_SECURITY)
+        return await self._send_email(db, user_id, to_email, t("withdrawal_requested_subject"), html, self.FROM_EMAIL_SECURITY)
     
     async def send_withdrawal_completed(
         self,
@@ -827,7 +851,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("withdrawal_completed_subject"), content, lang)
-        return await self._send_email(to_email, t("withdrawal_completed_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
+        return await self._send_email(db, user_id, to_email, t("withdrawal_completed_subject"), html, self.FROM_EMAIL_TRANSACTIONS)
     
     # ============================================
     # ACCOUNT
@@ -866,7 +890,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("welcome_subject"), content, lang)
-        return await self._send_email(to_email, t("welcome_subject"), html)
+        return await self._send_email(db, user_id, to_email, t("welcome_subject"), html)
     
     async def send_kyc_approved(
         self,
@@ -898,7 +922,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("kyc_approved_subject"), content, lang)
-        return await self._send_email(to_email, t("kyc_approved_subject"), html)
+        return await self._send_email(db, user_id, to_email, t("kyc_approved_subject"), html)
     
     async def send_kyc_rejected(
         self,
@@ -930,7 +954,7 @@ class NotificationService:
         """
         
         html = EmailTemplates.get_base_template(t("kyc_rejected_subject"), content, lang)
-        return await self._send_email(to_email, t("kyc_rejected_subject"), html)
+        return await self._send_email(db, user_id, to_email, t("kyc_rejected_subject"), html)
 
 
 # Singleton instance
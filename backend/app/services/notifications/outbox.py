@@ -0,0 +1,382 @@
+"""
+📨 HOLD Wallet - Notification Outbox
+====================================
+
+Entrega assíncrona dos emails transacionais:
+
+- Produtores só inserem a mensagem (já renderizada) em notification_outbox
+- O worker reivindica lotes com FOR UPDATE SKIP LOCKED (vários workers
+  nunca pegam a mesma linha) e envia pela API em lote do provedor
+  (Resend: até 100 emails por requisição), com no máximo
+  NOTIFICATION_OUTBOX_CONCURRENCY requisições simultâneas
+- Falhas voltam para a fila com backoff exponencial; após MAX_ATTEMPTS a
+  mensagem fica como failed. Linhas presas em "sending" (worker caiu) são
+  reivindicadas de novo após LOCK_TIMEOUT
+- Sem provedor configurado (RESEND_API_KEY) nada é enviado: as mensagens
+  ficam pendentes e o worker registra erro. FakeEmailProvider é só para testes
+- Os produtores gravam pela sessão do próprio worker (ou, passando `db`,
+  dentro da transação do chamador, que faz o commit)
+- Métricas de vazão em metrics() (/health/metrics)
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboxMessage:
+    id: str
+    to_email: str
+    from_email: str
+    subject: str
+    html: str
+    attempts: int = 0
+
+
+@dataclass
+class SendResult:
+    ok: bool
+    provider_message_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+# ============================================
+# PROVEDORES
+# ============================================
+
+class ResendBatchProvider:
+    """POST /emails/batch do Resend (síncrono; o worker chama em thread)"""
+
+    MAX_BATCH = 100
+
+    def __init__(self, api_key: str):
+        import resend
+        resend.api_key = api_key
+        self._resend = resend
+
+    def send_batch(self, messages: Sequence[OutboxMessage]) -> List[SendResult]:
+        response = self._resend.Batch.send([
+            {"from": m.from_email, "to": m.to_email, "subject": m.subject, "html": m.html}
+            for m in messages
+        ])
+        data = response.get("data") if isinstance(response, dict) else None
+        if not isinstance(data, list) or len(data) != len(messages):
+            raise RuntimeError(f"Resposta inesperada do Resend batch: {response}")
+        return [SendResult(ok=True, provider_message_id=item.get("id")) for item in data]
+
+
+class FakeEmailProvider:
+    """
+    Provedor de testes: registra as mensagens em memória e no log.
+
+    `fail_batches` faz as próximas N chamadas falharem inteiras (erro de
+    rede/rate limit); endereços em `reject` falham individualmente.
+    """
+
+    MAX_BATCH = 100
+
+    def __init__(self, fail_batches: int = 0, reject: Optional[Set[str]] = None, keep: int = 1000):
+        self.fail_batches = fail_batches
+        self.reject = set(reject or ())
+        self.sent: deque = deque(maxlen=keep)
+        self.calls = 0
+
+    def send_batch(self, messages: Sequence[OutboxMessage]) -> List[SendResult]:
+        self.calls += 1
+        if self.fail_batches > 0:
+            self.fail_batches -= 1
+            raise ConnectionError("fake provider unavailable")
+        results = []
+        for message in messages:
+            if message.to_email in self.reject:
+                results.append(SendResult(ok=False, error="rejected by fake provider"))
+                continue
+            self.sent.append(message)
+            logger.info(f"[LOG-ONLY] Email para {message.to_email}: {message.subject}")
+            results.append(SendResult(ok=True, provider_message_id=f"fake-{message.id}"))
+        return results
+
+
+def default_provider():
+    """Resend se configurado; None caso contrário (emails ficam pendentes)"""
+    api_key = os.getenv("RESEND_API_KEY")
+    if not api_key:
+        return None
+    try:
+        return ResendBatchProvider(api_key)
+    except ImportError:
+        logger.error("❌ Resend nao instalado; emails da outbox ficam pendentes")
+        return None
+
+
+# ============================================
+# OUTBOX
+# ============================================
+
+class NotificationOutboxWorker:
+    """Fila persistente de emails com envio em lote"""
+
+    BATCH_SIZE = 100            # Emails por requisição ao provedor
+    MAX_CONCURRENCY = 4         # Requisições simultâneas ao provedor
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_SECONDS = 30     # 30s, 60s, 120s, 240s...
+    LOCK_TIMEOUT = 300          # "sending" há mais tempo que isso = worker caiu
+
+    def __init__(self, provider=None, session_factory: Optional[Callable[[], Session]] = None):
+        self._provider = provider
+        self._session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_ref: Optional[asyncio.AbstractEventLoop] = None
+        self._metrics: Dict[str, float] = {
+            "enqueued": 0, "claimed": 0, "sent": 0, "retried": 0, "failed": 0,
+            "batches": 0, "provider_errors": 0, "busy_seconds": 0.0,
+        }
+        self._last_run: Dict[str, Any] = {}
+        self._warned_no_provider = False
+
+    @property
+    def provider(self):
+        if self._provider is None:
+            self._provider = default_provider()
+        return self._provider
+
+    def _session(self) -> Session:
+        if self._session_factory is None:
+            from app.core import db as core_db
+            return core_db.SessionLocal()
+        return self._session_factory()
+
+    # ------------------------------------------------------------------
+    # Produtores
+    # ------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        db: Optional[Session] = None,
+        *,
+        to_email: str,
+        subject: str,
+        html: str,
+        from_email: str,
+        user_id: Optional[Any] = None
+    ) -> NotificationOutbox:
+        """
+        Insere o email na outbox (o envio fica com o worker).
+
+        Sem `db`, grava e faz commit numa sessão própria, sem tocar na
+        transação de quem chamou. Com `db`, a linha entra na transação do
+        chamador e só existe depois do commit dele (nunca commitamos aqui).
+        """
+        row = NotificationOutbox(
+            user_id=str(user_id) if user_id else None,
+            to_email=to_email,
+            from_email=from_email,
+            subject=subject,
+            html=html,
+            status=OutboxStatus.PENDING.value,
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+        )
+        if db is not None:
+            db.add(row)
+        else:
+            own = self._session()
+            try:
+                own.add(row)
+                own.commit()
+                own.refresh(row)
+            except Exception:
+                own.rollback()
+                raise
+            finally:
+                own.close()
+        self._metrics["enqueued"] += 1
+        if self._wakeup is not None:
+            # acorda o worker (produtor pode estar em outra thread)
+            self._loop_ref.call_soon_threadsafe(self._wakeup.set)
+        return row
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def claim(self, db: Session, limit: int, now: Optional[datetime] = None) -> List[OutboxMessage]:
+        """Reivindica até `limit` mensagens vencidas (SKIP LOCKED) e as marca como sending"""
+        now = now or datetime.utcnow()
+        rows = db.query(NotificationOutbox).filter(or_(
+            and_(
+                NotificationOutbox.status == OutboxStatus.PENDING.value,
+                NotificationOutbox.next_attempt_at <= now
+            ),
+            and_(
+                NotificationOutbox.status == OutboxStatus.SENDING.value,
+                NotificationOutbox.locked_at < now - timedelta(seconds=self.LOCK_TIMEOUT)
+            )
+        )).order_by(NotificationOutbox.next_attempt_at).limit(limit).with_for_update(skip_locked=True).all()
+
+        messages = []
+        for row in rows:
+            row.status = OutboxStatus.SENDING.value
+            row.locked_at = now
+            row.attempts = (row.attempts or 0) + 1
+            messages.append(OutboxMessage(
+                id=row.id, to_email=row.to_email, from_email=row.from_email,
+                subject=row.subject, html=row.html, attempts=row.attempts
+            ))
+        db.commit()
+        return messages
+
+    def complete(self, db: Session, outcomes: Sequence[Tuple[OutboxMessage, SendResult]], now: Optional[datetime] = None) -> None:
+        """Grava o resultado de cada mensagem: sent, nova tentativa com backoff ou failed"""
+        if not outcomes:
+            return
+        now = now or datetime.utcnow()
+        rows = {
+            row.id: row for row in db.query(NotificationOutbox).filter(
+                NotificationOutbox.id.in_([message.id for message, _ in outcomes])
+            ).all()
+        }
+        for message, result in outcomes:
+            row = rows.get(message.id)
+            if row is None:
+                continue
+            row.locked_at = None
+            if result.ok:
+                row.status = OutboxStatus.SENT.value
+                row.provider_message_id = result.provider_message_id
+                row.sent_at = now
+                row.last_error = None
+                self._metrics["sent"] += 1
+            elif row.attempts >= self.MAX_ATTEMPTS:
+                row.status = OutboxStatus.FAILED.value
+                row.last_error = result.error
+                self._metrics["failed"] += 1
+                logger.error(f"❌ Email {row.id} para {row.to_email} falhou após {row.attempts} tentativas: {result.error}")
+            else:
+                row.status = OutboxStatus.PENDING.value
+                row.last_error = result.error
+                row.next_attempt_at = now + timedelta(seconds=self.RETRY_BASE_SECONDS * 2 ** (row.attempts - 1))
+                self._metrics["retried"] += 1
+        db.commit()
+
+    async def _send_chunk(self, semaphore: asyncio.Semaphore, chunk: List[OutboxMessage]) -> List[Tuple[OutboxMessage, SendResult]]:
+        async with semaphore:
+            try:
+                results = await asyncio.to_thread(self.provider.send_batch, chunk)
+                self._metrics["batches"] += 1
+            except Exception as e:
+                self._metrics["provider_errors"] += 1
+                logger.warning(f"⚠️ Lote de {len(chunk)} emails falhou no provedor: {e}")
+                results = [SendResult(ok=False, error=str(e))] * len(chunk)
+        return list(zip(chunk, results))
+
+    async def run_once(self, concurrency: Optional[int] = None) -> int:
+        """Um ciclo: reivindica, envia em lotes concorrentes e grava os resultados"""
+        concurrency = concurrency or self.MAX_CONCURRENCY
+        if self.provider is None:
+            # Sem provedor nada é reivindicado: as mensagens seguem pendentes
+            if not self._warned_no_provider:
+                logger.error("❌ Outbox sem provedor de email (RESEND_API_KEY): emails ficam pendentes")
+                self._warned_no_provider = True
+            return 0
+        batch_size = min(self.BATCH_SIZE, getattr(self.provider, "MAX_BATCH", self.BATCH_SIZE))
+
+        def _claim():
+            db = self._session()
+            try:
+                return self.claim(db, batch_size * concurrency)
+            finally:
+                db.close()
+
+        def _complete(outcomes):
+            db = self._session()
+            try:
+                self.complete(db, outcomes)
+            finally:
+                db.close()
+
+        messages = await asyncio.to_thread(_claim)
+        if not messages:
+            return 0
+
+        started = time.perf_counter()
+        self._metrics["claimed"] += len(messages)
+        semaphore = asyncio.Semaphore(concurrency)
+        chunks = [messages[i:i + batch_size] for i in range(0, len(messages), batch_size)]
+        results = await asyncio.gather(*(self._send_chunk(semaphore, chunk) for chunk in chunks))
+        outcomes = [outcome for chunk_outcomes in results for outcome in chunk_outcomes]
+        await asyncio.to_thread(_complete, outcomes)
+
+        elapsed = time.perf_counter() - started
+        self._metrics["busy_seconds"] += elapsed
+        sent = sum(1 for _, result in outcomes if result.ok)
+        self._last_run = {
+            "at": datetime.utcnow().isoformat(),
+            "messages": len(messages),
+            "sent": sent,
+            "batches": len(chunks),
+            "seconds": round(elapsed, 4),
+        }
+        logger.info(f"📨 Outbox: {sent}/{len(messages)} emails enviados em {len(chunks)} lotes ({elapsed:.2f}s)")
+        return len(messages)
+
+    def metrics(self) -> Dict[str, Any]:
+        busy = self._metrics["busy_seconds"]
+        return {
+            **{key: int(value) for key, value in self._metrics.items() if key != "busy_seconds"},
+            "busy_seconds": round(busy, 3),
+            "emails_per_second": round(self._metrics["sent"] / busy, 1) if busy else 0.0,
+            "last_run": self._last_run,
+            "running": bool(self._task and not self._task.done()),
+        }
+
+    async def _loop(self, interval: float, concurrency: Optional[int]):
+        while True:
+            processed = 0
+            try:
+                processed = await self.run_once(concurrency)
+            except Exception as e:
+                logger.error(f"❌ Erro no worker da outbox de notificações: {e}")
+            if processed:
+                continue  # ainda pode haver fila: próximo ciclo sem esperar
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, interval: float = 2.0, concurrency: Optional[int] = None):
+        if self._task and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._loop_ref = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._loop(interval, concurrency))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._wakeup = None
+        self._loop_ref = None
+
+
+# Instância global
+notification_outbox = NotificationOutboxWorker()
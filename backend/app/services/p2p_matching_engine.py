@@ -0,0 +1,296 @@
+"""
+⚡ HOLD Wallet - P2P Matching Engine
+====================================
+
+Casamento automático de pedidos de takers com as ordens do book em memória.
+
+- Percorre o book (melhor preço primeiro, prioridade de tempo no nível)
+  sem tocar no banco: filtro por método de pagamento, reputação mínima
+  do maker e limites min/max (em fiat) de cada ordem
+- Retorna o melhor fill único ou um fill dividido entre vários makers
+- A reserva da liquidez é um UPDATE condicional em p2p_orders
+  (available_amount >= quantidade): dois takers concorrentes, mesmo em
+  workers diferentes, nunca executam a mesma liquidez duas vezes; a
+  reconciliação periódica (reconcile_liquidity) devolve a liquidez de
+  trades cancelados
+- Reputação dos makers (trader_scores.reputation_score, 0-100) fica em
+  memória e é recarregada periodicamente
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.services.p2p_order_book_service import P2POrderBookService, book_key, p2p_order_book
+
+logger = logging.getLogger(__name__)
+
+# Lado do taker -> lado do book consumido
+MAKER_SIDE = {"buy": "sell", "sell": "buy"}
+
+
+@dataclass
+class TakerRequest:
+    """Pedido do taker; `fiat_amount` é o valor em fiat (mesma unidade dos limites das ordens)"""
+    cryptocurrency: str
+    fiat_currency: str
+    side: str  # "buy" = taker compra crypto
+    fiat_amount: float
+    payment_methods: Sequence[Any] = ()  # vazio = aceita qualquer método
+    min_reputation: float = 0.0
+    allow_split: bool = True
+    taker_id: Optional[str] = None  # ordens do próprio taker são ignoradas
+
+
+@dataclass
+class Fill:
+    order_id: str
+    maker_id: str
+    price: float
+    crypto_amount: float
+    fiat_amount: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "order_id": self.order_id,
+            "maker_id": self.maker_id,
+            "price": self.price,
+            "crypto_amount": self.crypto_amount,
+            "fiat_amount": self.fiat_amount
+        }
+
+
+@dataclass
+class MatchResult:
+    fills: List[Fill] = field(default_factory=list)
+    requested_fiat: float = 0.0
+
+    @property
+    def filled_fiat(self) -> float:
+        return sum(f.fiat_amount for f in self.fills)
+
+    @property
+    def crypto_amount(self) -> float:
+        return sum(f.crypto_amount for f in self.fills)
+
+    @property
+    def average_price(self) -> Optional[float]:
+        crypto = self.crypto_amount
+        return self.filled_fiat / crypto if crypto else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fills": [f.to_dict() for f in self.fills],
+            "requested_fiat": self.requested_fiat,
+            "filled_fiat": self.filled_fiat,
+            "remaining_fiat": max(self.requested_fiat - self.filled_fiat, 0.0),
+            "crypto_amount": self.crypto_amount,
+            "average_price": self.average_price
+        }
+
+
+class LiquidityConflict(Exception):
+    """A liquidez casada foi consumida por outro taker antes da reserva"""
+
+
+class P2PMatchingEngine:
+    """Casamento em memória + reserva atômica no banco"""
+
+    MAX_RESERVE_ATTEMPTS = 3
+    REPUTATION_REFRESH_SECONDS = 300
+
+    def __init__(self, book: P2POrderBookService = p2p_order_book):
+        self.book = book
+        self.reputation: Dict[str, float] = {}  # user_id -> reputation_score
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Casamento (somente memória)
+    # ------------------------------------------------------------------
+
+    def match(self, request: TakerRequest) -> MatchResult:
+        """Melhor fill para o pedido; pode ser parcial se faltar liquidez elegível"""
+        result = MatchResult(requested_fiat=request.fiat_amount)
+        side = MAKER_SIDE.get(request.side.lower())
+        if side is None or request.fiat_amount <= 0:
+            return result
+        book = self.book.books.get(book_key(request.cryptocurrency, request.fiat_currency, side))
+        if book is None:
+            return result
+
+        accepted = {str(m) for m in request.payment_methods}
+        remaining = request.fiat_amount
+
+        for level in book.levels.values():
+            for order in level.orders.values():
+                if request.taker_id and order.user_id == str(request.taker_id):
+                    continue
+                if accepted and not accepted.intersection(str(m) for m in order.payment_methods):
+                    continue
+                if request.min_reputation and self.reputation.get(order.user_id, 0.0) < request.min_reputation:
+                    continue
+
+                capacity = min(order.max_order_limit, order.available_amount * order.price)
+                if not request.allow_split:
+                    # Fill único: a ordem precisa comportar o valor inteiro
+                    if order.min_order_limit <= remaining <= capacity:
+                        result.fills.append(self._fill(order, remaining))
+                        return result
+                    continue
+
+                fiat = min(capacity, remaining)
+                if fiat <= 0 or fiat < order.min_order_limit:
+                    continue
+                result.fills.append(self._fill(order, fiat))
+                remaining -= fiat
+                if remaining <= 1e-9:
+                    return result
+        return result
+
+    @staticmethod
+    def _fill(order, fiat: float) -> Fill:
+        crypto = fiat / order.price
+        if crypto > order.available_amount or order.available_amount - crypto < 1e-12:
+            crypto = order.available_amount  # consome a ordem inteira sem resíduo de float
+        return Fill(order.id, order.user_id, order.price, crypto, fiat)
+
+    # ------------------------------------------------------------------
+    # Reserva (banco)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def reserve_order(db: Session, order_id: Any, crypto_amount: float) -> bool:
+        """
+        Debita `crypto_amount` do available_amount da ordem se ainda houver
+        saldo (UPDATE condicional, atômico no banco). Não faz commit.
+        """
+        from app.models.p2p import P2POrder
+
+        order_uuid = order_id if isinstance(order_id, uuid.UUID) else uuid.UUID(str(order_id))
+        updated = db.query(P2POrder).filter(
+            P2POrder.id == order_uuid,
+            P2POrder.status == "active",
+            P2POrder.available_amount >= crypto_amount
+        ).update({
+            P2POrder.available_amount: P2POrder.available_amount - crypto_amount,
+            P2POrder.updated_at: func.now()
+        }, synchronize_session=False)
+        return updated == 1
+
+    @staticmethod
+    def release_order(db: Session, order_id: Any, crypto_amount: float) -> None:
+        """Devolve liquidez reservada (trade não aberto/cancelado). Não faz commit."""
+        from app.models.p2p import P2POrder
+
+        order_uuid = order_id if isinstance(order_id, uuid.UUID) else uuid.UUID(str(order_id))
+        db.query(P2POrder).filter(P2POrder.id == order_uuid).update({
+            P2POrder.available_amount: P2POrder.available_amount + crypto_amount,
+            P2POrder.updated_at: func.now()
+        }, synchronize_session=False)
+
+    @staticmethod
+    def reconcile_liquidity(db: Session) -> int:
+        """
+        Recalcula available_amount = total_amount - trades não cancelados da
+        ordem (job de reconciliação do p2p_stats_service). Devolve a liquidez
+        de trades cancelados por caminhos que não chamam release_order.
+        Não faz commit; retorna quantas ordens foram corrigidas.
+        """
+        free = """
+            total_amount - COALESCE((
+                SELECT SUM(t.amount) FROM p2p_trades t
+                WHERE t.order_id = p2p_orders.id AND t.status <> 'cancelled'
+            ), 0)
+        """
+        expected = f"CASE WHEN {free} > 0 THEN {free} ELSE 0 END"
+        return db.execute(text(f"""
+            UPDATE p2p_orders
+            SET available_amount = {expected},
+                updated_at = CURRENT_TIMESTAMP
+            WHERE status IN ('active', 'paused')
+              AND ABS(available_amount - ({expected})) > 0.00000001
+        """)).rowcount
+
+    def reserve(self, db: Session, result: MatchResult) -> MatchResult:
+        """
+        Reserva todos os fills numa transação (tudo ou nada).
+
+        Levanta LiquidityConflict se alguma ordem já não tiver saldo; o book
+        é atualizado a partir do banco para o próximo casamento.
+        """
+        try:
+            for fill in result.fills:
+                if not self.reserve_order(db, fill.order_id, fill.crypto_amount):
+                    raise LiquidityConflict(fill.order_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            for fill in result.fills:
+                self.book.refresh_order(db, fill.order_id)
+            raise
+        for fill in result.fills:
+            self.book.refresh_order(db, fill.order_id)
+        return result
+
+    def match_and_reserve(self, db: Session, request: TakerRequest) -> MatchResult:
+        """Casa e reserva; em conflito com outro taker, casa de novo com o book atualizado"""
+        for attempt in range(self.MAX_RESERVE_ATTEMPTS):
+            result = self.match(request)
+            if not result.fills:
+                return result
+            try:
+                return self.reserve(db, result)
+            except LiquidityConflict as e:
+                logger.info(f"⚡ Liquidez da ordem {e} consumida por outro taker, recasando ({attempt + 1})")
+        return MatchResult(requested_fiat=request.fiat_amount)
+
+    # ------------------------------------------------------------------
+    # Reputação dos makers
+    # ------------------------------------------------------------------
+
+    def load_reputation(self, db: Session) -> int:
+        from app.models.reputation import TraderScore
+
+        rows = db.query(TraderScore.user_id, TraderScore.reputation_score).all()
+        self.reputation = {str(user_id): float(score or 0) for user_id, score in rows}
+        return len(self.reputation)
+
+    async def _reputation_loop(self):
+        from app.core import db as core_db
+
+        def _load():
+            db = core_db.SessionLocal()
+            try:
+                return self.load_reputation(db)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                await asyncio.to_thread(_load)
+            except Exception as e:
+                logger.error(f"❌ Erro carregando reputação dos makers: {e}")
+            await asyncio.sleep(self.REPUTATION_REFRESH_SECONDS)
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._reputation_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Instância global
+p2p_matching_engine = P2PMatchingEngine()
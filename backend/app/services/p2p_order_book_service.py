@@ -0,0 +1,465 @@
+"""
+📗 HOLD Wallet - P2P Order Book
+================================
+
+Order book em memória por (cryptocurrency, fiat_currency, order_type).
+
+- Níveis de preço em SortedDict: inserir/atualizar/remover em O(log n);
+  dentro do nível as ordens ficam por prioridade de tempo
+- Venda ordenada por preço crescente, compra por preço decrescente
+  (o primeiro nível é sempre o melhor preço)
+- Alimentado pelos eventos de criação/edição/cancelamento/execução de
+  ordens em routers/p2p.py e reconstruído do banco no startup
+- Feed WebSocket: snapshot inicial + deltas numerados (seq); assinante
+  lento recebe "resync" e um snapshot novo
+- Verificador de consistência compara memória x banco e corrige as
+  divergências (também cobre escritas feitas por outros workers)
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sortedcontainers import SortedDict
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+BookKey = Tuple[str, str, str]  # (cryptocurrency, fiat_currency, order_type)
+SIDES = ("buy", "sell")
+
+
+def book_key(cryptocurrency: str, fiat_currency: str, order_type: str) -> BookKey:
+    return (cryptocurrency.upper(), fiat_currency.upper(), order_type.lower())
+
+
+def book_name(key: BookKey) -> str:
+    return "-".join(key)
+
+
+@dataclass
+class BookOrder:
+    """Ordem ativa no book (apenas o que a listagem precisa)"""
+    id: str
+    user_id: str
+    price: float
+    available_amount: float
+    min_order_limit: float
+    max_order_limit: float
+    payment_methods: List[Any]
+    created_at: str
+
+    @classmethod
+    def from_row(cls, row) -> "BookOrder":
+        methods = row.payment_methods
+        if isinstance(methods, str):
+            try:
+                methods = json.loads(methods)
+            except ValueError:
+                methods = []
+        return cls(
+            id=str(row.id),
+            user_id=str(row.user_id),
+            price=float(row.price),
+            available_amount=float(row.available_amount or 0),
+            min_order_limit=float(row.min_order_limit or 0),
+            max_order_limit=float(row.max_order_limit or 0),
+            payment_methods=methods or [],
+            created_at=str(row.created_at)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "userId": self.user_id,
+            "price": self.price,
+            "availableAmount": self.available_amount,
+            "minAmount": self.min_order_limit,
+            "maxAmount": self.max_order_limit,
+            "paymentMethods": self.payment_methods,
+            "createdAt": self.created_at
+        }
+
+
+@dataclass
+class PriceLevel:
+    """Ordens de um mesmo preço, em ordem de chegada"""
+    price: float
+    orders: Dict[str, BookOrder] = field(default_factory=dict)
+    amount: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"price": self.price, "amount": self.amount, "orders": len(self.orders)}
+
+
+class OrderBook:
+    """Um lado do book de um par (ex.: USDT/BRL venda)"""
+
+    def __init__(self, key: BookKey):
+        self.key = key
+        self.side = key[2]
+        self.levels: SortedDict = SortedDict()  # chave de ordenação -> PriceLevel
+        self.orders: Dict[str, BookOrder] = {}
+        self.seq = 0
+
+    def _sort_key(self, price: float) -> float:
+        # Compra: maior preço primeiro
+        return -price if self.side == "buy" else price
+
+    def _remove_from_level(self, order: BookOrder) -> PriceLevel:
+        sort_key = self._sort_key(order.price)
+        level = self.levels[sort_key]
+        del level.orders[order.id]
+        level.amount -= order.available_amount
+        if not level.orders:
+            del self.levels[sort_key]
+            level.amount = 0.0
+        return level
+
+    def upsert(self, order: BookOrder) -> List[PriceLevel]:
+        """Insere ou atualiza a ordem; retorna os níveis alterados"""
+        current = self.orders.get(order.id)
+        if current and current.price == order.price:
+            level = self.levels[self._sort_key(order.price)]
+            level.amount += order.available_amount - current.available_amount
+            level.orders[order.id] = order  # mantém a prioridade de tempo
+            self.orders[order.id] = order
+            return [level]
+
+        changed = [self._remove_from_level(current)] if current else []
+        sort_key = self._sort_key(order.price)
+        level = self.levels.get(sort_key)
+        if level is None:
+            level = self.levels[sort_key] = PriceLevel(order.price)
+        level.orders[order.id] = order
+        level.amount += order.available_amount
+        self.orders[order.id] = order
+        changed.append(level)
+        return changed
+
+    def remove(self, order_id: str) -> Optional[PriceLevel]:
+        order = self.orders.pop(order_id, None)
+        return self._remove_from_level(order) if order else None
+
+    def best_price(self) -> Optional[float]:
+        if not self.levels:
+            return None
+        return self.levels.peekitem(0)[1].price
+
+    def depth(self, levels: int) -> List[Dict[str, Any]]:
+        return [level.to_dict() for level in self.levels.values()[:levels]]
+
+    def top(self, limit: int) -> List[BookOrder]:
+        result: List[BookOrder] = []
+        for level in self.levels.values():
+            for order in level.orders.values():
+                result.append(order)
+                if len(result) >= limit:
+                    return result
+        return result
+
+
+class Subscription:
+    """Fila de mensagens de um cliente WebSocket"""
+
+    def __init__(self, key: BookKey, maxsize: int):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, message: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Cliente lento: descarta o atraso e pede um snapshot novo
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync", "book": book_name(self.key)})
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+
+class P2POrderBookService:
+    """Books em memória, feed de deltas e verificação de consistência"""
+
+    SUBSCRIBER_QUEUE_SIZE = 500
+    DEFAULT_DEPTH = 20
+
+    def __init__(self):
+        self.books: Dict[BookKey, OrderBook] = {}
+        self._locations: Dict[str, BookKey] = {}  # order_id -> book
+        self._subscribers: Dict[BookKey, Set[Subscription]] = {}
+        self.loaded = False
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Eventos de ordem
+    # ------------------------------------------------------------------
+
+    def apply(self, row) -> None:
+        """
+        Aplica o estado atual de uma ordem (linha de p2p_orders).
+
+        Ordens ativas com saldo disponível entram/atualizam o book; qualquer
+        outro estado (pausada, cancelada, executada) remove.
+        """
+        order_id = str(row.id)
+        if row.status != "active" or float(row.available_amount or 0) <= 0:
+            self.remove(order_id)
+            return
+
+        key = book_key(row.cryptocurrency, row.fiat_currency, row.order_type)
+        if self._locations.get(order_id, key) != key:
+            self.remove(order_id)
+
+        order = BookOrder.from_row(row)
+        book = self.books.get(key)
+        if book is None:
+            book = self.books[key] = OrderBook(key)
+        self._locations[order_id] = key
+        self._publish(book, book.upsert(order), order=order)
+
+    def remove(self, order_id: str) -> None:
+        key = self._locations.pop(str(order_id), None)
+        if key is None:
+            return
+        book = self.books[key]
+        level = book.remove(str(order_id))
+        if level is not None:
+            self._publish(book, [level], removed=str(order_id))
+
+    def refresh_order(self, db: Session, order_id: Any) -> None:
+        """Relê a ordem do banco e aplica (chamado após o commit no router)"""
+        if not self.loaded:
+            return
+        from app.models.p2p import P2POrder
+
+        try:
+            order_uuid = order_id if isinstance(order_id, uuid.UUID) else uuid.UUID(str(order_id))
+            row = db.query(P2POrder).filter(P2POrder.id == order_uuid).first()
+            if row is None:
+                self.remove(str(order_uuid))
+            else:
+                self.apply(row)
+        except Exception as e:
+            # O book nunca derruba a requisição; a reconciliação corrige depois
+            logger.warning(f"⚠️ Order book: falha atualizando ordem {order_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def best_price(self, cryptocurrency: str, fiat_currency: str, order_type: str) -> Optional[float]:
+        book = self.books.get(book_key(cryptocurrency, fiat_currency, order_type))
+        return book.best_price() if book else None
+
+    def top(self, cryptocurrency: str, fiat_currency: str, order_type: str, limit: int = DEFAULT_DEPTH) -> List[Dict[str, Any]]:
+        book = self.books.get(book_key(cryptocurrency, fiat_currency, order_type))
+        return [order.to_dict() for order in book.top(limit)] if book else []
+
+    def snapshot(self, cryptocurrency: str, fiat_currency: str, order_type: str, depth: int = DEFAULT_DEPTH) -> Dict[str, Any]:
+        key = book_key(cryptocurrency, fiat_currency, order_type)
+        book = self.books.get(key) or OrderBook(key)
+        return {
+            "type": "snapshot",
+            "book": book_name(key),
+            "seq": book.seq,
+            "best_price": book.best_price(),
+            "levels": book.depth(depth),
+            "orders": [order.to_dict() for order in book.top(depth)]
+        }
+
+    # ------------------------------------------------------------------
+    # Feed (snapshot + deltas)
+    # ------------------------------------------------------------------
+
+    def subscribe(self, cryptocurrency: str, fiat_currency: str, order_type: str) -> Subscription:
+        key = book_key(cryptocurrency, fiat_currency, order_type)
+        subscription = Subscription(key, self.SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.key)
+        if subscribers:
+            subscribers.discard(subscription)
+
+    def _publish(
+        self,
+        book: OrderBook,
+        levels: Iterable[PriceLevel],
+        order: Optional[BookOrder] = None,
+        removed: Optional[str] = None
+    ) -> None:
+        book.seq += 1
+        subscribers = self._subscribers.get(book.key)
+        if not subscribers:
+            return
+        delta: Dict[str, Any] = {
+            "type": "delta",
+            "book": book_name(book.key),
+            "seq": book.seq,
+            "levels": [level.to_dict() for level in levels],  # amount 0 = nível removido
+        }
+        if order is not None:
+            delta["order"] = order.to_dict()
+        if removed is not None:
+            delta["removed"] = removed
+        for subscription in list(subscribers):
+            subscription.push(delta)
+
+    def _resync_all(self) -> None:
+        for key, subscribers in self._subscribers.items():
+            for subscription in list(subscribers):
+                subscription.push({"type": "resync", "book": book_name(key)})
+
+    # ------------------------------------------------------------------
+    # Banco: rebuild e consistência
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _active_rows(db: Session) -> List[Any]:
+        from app.models.p2p import P2POrder
+
+        return db.query(P2POrder).filter(
+            P2POrder.status == "active",
+            P2POrder.available_amount > 0
+        ).order_by(P2POrder.created_at, P2POrder.id).all()
+
+    def rebuild(self, rows: Iterable[Any]) -> int:
+        """Substitui todos os books pelas linhas dadas (ordens ativas)"""
+        books: Dict[BookKey, OrderBook] = {}
+        locations: Dict[str, BookKey] = {}
+        for row in rows:
+            key = book_key(row.cryptocurrency, row.fiat_currency, row.order_type)
+            book = books.get(key)
+            if book is None:
+                book = books[key] = OrderBook(key)
+            book.upsert(BookOrder.from_row(row))
+            locations[str(row.id)] = key
+
+        for key, book in books.items():
+            previous = self.books.get(key)
+            book.seq = previous.seq + 1 if previous else 0
+        self.books = books
+        self._locations = locations
+        self.loaded = True
+        self._resync_all()
+        return len(locations)
+
+    def load_from_db(self, db: Session) -> int:
+        """Reconstrói os books a partir de p2p_orders (síncrono)"""
+        return self.rebuild(self._active_rows(db))
+
+    async def load(self) -> int:
+        """Reconstrói os books sem bloquear o event loop na leitura do banco"""
+        from app.core import db as core_db
+
+        def _load():
+            db = core_db.SessionLocal()
+            try:
+                return self._active_rows(db)
+            finally:
+                db.close()
+
+        try:
+            total = self.rebuild(await asyncio.to_thread(_load))
+            logger.info(f"📗 Order book P2P: {total} ordens ativas em {len(self.books)} books")
+            return total
+        except Exception as e:
+            logger.error(f"❌ Erro carregando order book P2P: {e}")
+            return 0
+
+    def check(self, rows: Iterable[Any]) -> Dict[str, List[str]]:
+        """
+        Compara a memória com as ordens ativas do banco.
+
+        Returns:
+            missing: ativas no banco e ausentes do book
+            stale: no book mas não ativas no banco
+            mismatched: preço/saldo/par diferentes
+        """
+        report: Dict[str, List[str]] = {"missing": [], "stale": [], "mismatched": []}
+        seen: Set[str] = set()
+        for row in rows:
+            order_id = str(row.id)
+            seen.add(order_id)
+            key = self._locations.get(order_id)
+            if key is None:
+                report["missing"].append(order_id)
+                continue
+            order = self.books[key].orders.get(order_id)
+            expected_key = book_key(row.cryptocurrency, row.fiat_currency, row.order_type)
+            if (
+                order is None or key != expected_key
+                or order.price != float(row.price)
+                or order.available_amount != float(row.available_amount or 0)
+            ):
+                report["mismatched"].append(order_id)
+        report["stale"] = [order_id for order_id in self._locations if order_id not in seen]
+        return report
+
+    def check_db(self, db: Session) -> Dict[str, List[str]]:
+        return self.check(self._active_rows(db))
+
+    def reconcile(self, rows: Iterable[Any]) -> Dict[str, List[str]]:
+        """Verifica e corrige as divergências encontradas"""
+        rows = list(rows)
+        report = self.check(rows)
+        broken = set(report["missing"]) | set(report["mismatched"])
+        for row in rows:
+            if str(row.id) in broken:
+                self.apply(row)
+        for order_id in report["stale"]:
+            self.remove(order_id)
+        return report
+
+    async def _reconcile_loop(self, interval: int):
+        from app.core import db as core_db
+
+        def _load():
+            db = core_db.SessionLocal()
+            try:
+                return self._active_rows(db)
+            finally:
+                db.close()
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                rows = await asyncio.to_thread(_load)
+                if not self.loaded:
+                    self.rebuild(rows)
+                    continue
+                report = self.reconcile(rows)
+                drift = sum(len(ids) for ids in report.values())
+                if drift:
+                    logger.warning(
+                        f"⚠️ Order book P2P divergente do banco (corrigido): "
+                        f"{len(report['missing'])} ausentes, {len(report['stale'])} obsoletas, "
+                        f"{len(report['mismatched'])} diferentes"
+                    )
+            except Exception as e:
+                logger.error(f"❌ Erro na reconciliação do order book P2P: {e}")
+
+    def start(self, interval: int = 60):
+        """Inicia a verificação periódica de consistência (startup da aplicação)"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._reconcile_loop(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Instância global
+p2p_order_book = P2POrderBookService()
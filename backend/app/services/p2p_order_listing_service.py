@@ -0,0 +1,244 @@
+"""
+📋 HOLD Wallet - P2P Order Listing
+===================================
+
+Listagem pública de ordens P2P (GET /p2p/orders) em uma única query:
+
+- Perfil do trader e e-mail do usuário via LEFT JOIN (sem query por linha)
+- Paginação keyset em (created_at, id) ou (price, id) com cursor opaco;
+  o custo não cresce com a profundidade da página
+- Total aproximado: COUNT cacheado por filtro (memória local + Redis)
+- Índice composto ix_p2p_orders_status_coin_type_created cobre os filtros
+  e a ordenação padrão
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Numeric, bindparam, text
+from sqlalchemy.orm import Session
+
+from app.services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+SORT_NEWEST = "newest"
+SORT_PRICE = "price"
+SORTS = (SORT_NEWEST, SORT_PRICE)
+
+
+def encode_cursor(sort: str, key: Any, order_id: Any) -> str:
+    """Cursor opaco para paginação keyset (preço vai como str(Decimal), sem arredondar)"""
+    raw = f"{sort}|{key}|{order_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[str, str]:
+    """Decodifica o cursor (chave de ordenação, id). Levanta ValueError se inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        cursor_sort, key, order_id = raw.split("|", 2)
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if cursor_sort != sort:
+        raise ValueError("Cursor não corresponde à ordenação solicitada")
+    return key, order_id
+
+
+class P2POrderListingService:
+    """Listagem de ordens com trader em JOIN, keyset e contagem cacheada"""
+
+    COUNT_CACHE_TTL = 30  # segundos
+
+    def __init__(self):
+        self._counts: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _filters(status: Optional[str], order_type: Optional[str], coin: Optional[str]) -> Tuple[List[str], Dict[str, Any]]:
+        conditions = ["o.status = :status"]
+        params: Dict[str, Any] = {"status": status.lower() if status else "active"}
+        if order_type:
+            conditions.append("o.order_type = :order_type")
+            params["order_type"] = order_type
+        if coin:
+            conditions.append("o.cryptocurrency = :cryptocurrency")
+            params["cryptocurrency"] = coin.upper()
+        return conditions, params
+
+    @staticmethod
+    def _ordering(sort: str, order_type: Optional[str]) -> Tuple[str, str]:
+        """(coluna, direção): preço crescente para venda, decrescente para compra"""
+        if sort == SORT_PRICE:
+            return "price", "DESC" if order_type == "buy" else "ASC"
+        return "created_at", "DESC"
+
+    async def count(
+        self,
+        db: Session,
+        status: Optional[str] = None,
+        order_type: Optional[str] = None,
+        coin: Optional[str] = None
+    ) -> int:
+        """COUNT(*) do filtro, cacheado por COUNT_CACHE_TTL segundos"""
+        conditions, params = self._filters(status, order_type, coin)
+        key = "p2p:orders:count:" + json.dumps(params, sort_keys=True)
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._counts.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        total = await cache_service.get(key)
+        if total is None:
+            query = f"SELECT COUNT(*) AS total FROM p2p_orders o WHERE {' AND '.join(conditions)}"
+            total = db.execute(text(query), params).fetchone().total
+            await cache_service.set(key, total, self.COUNT_CACHE_TTL)
+
+        with self._lock:
+            self._counts[key] = (now + self.COUNT_CACHE_TTL, int(total))
+        return int(total)
+
+    def list_orders(
+        self,
+        db: Session,
+        status: Optional[str] = None,
+        order_type: Optional[str] = None,
+        coin: Optional[str] = None,
+        sort: str = SORT_NEWEST,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Uma página de ordens já enriquecidas com os dados do trader.
+
+        Args:
+            cursor: next_cursor da página anterior (keyset)
+            offset: paginação legada por página (ignorado quando há cursor)
+
+        Returns:
+            (ordens, next_cursor). next_cursor é None na última página.
+        """
+        conditions, params = self._filters(status, order_type, coin)
+        column, direction = self._ordering(sort, order_type)
+
+        bind_types = []
+        if cursor:
+            key, order_id = decode_cursor(cursor, sort)
+            operator = "<" if direction == "DESC" else ">"
+            conditions.append(f"(o.{column}, o.id) {operator} (:cursor_key, :cursor_id)")
+            if column == "price":
+                # NUMERIC: compara com o valor exato do banco (float arredondaria no empate)
+                try:
+                    key = Decimal(key)
+                except InvalidOperation:
+                    raise ValueError("Cursor inválido")
+                bind_types.append(bindparam("cursor_key", type_=Numeric(20, 8)))
+            params["cursor_key"] = key
+            params["cursor_id"] = order_id
+            offset = 0
+
+        params["limit"] = limit + 1  # uma linha a mais indica se há próxima página
+        params["offset"] = offset
+
+        query = f"""
+            SELECT o.*,
+                   tp.user_id AS tp_user_id, tp.display_name AS tp_display_name,
+                   tp.avatar_url AS tp_avatar_url, tp.is_verified AS tp_is_verified,
+                   tp.verification_level AS tp_verification_level,
+                   tp.total_trades AS tp_total_trades, tp.completed_trades AS tp_completed_trades,
+                   tp.success_rate AS tp_success_rate, tp.average_rating AS tp_average_rating,
+                   tp.total_reviews AS tp_total_reviews, u.email AS u_email
+            FROM p2p_orders o
+            LEFT JOIN trader_profiles tp ON tp.user_id = o.user_id
+            LEFT JOIN users u ON u.id = tp.user_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY o.{column} {direction}, o.id {direction}
+            LIMIT :limit OFFSET :offset
+        """
+        rows = db.execute(text(query).bindparams(*bind_types), params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            key = getattr(last, column)
+            next_cursor = encode_cursor(sort, Decimal(str(key)) if column == "price" else key, last.id)
+
+        return [self._order_to_dict(row) for row in rows], next_cursor
+
+    @staticmethod
+    def _order_to_dict(o) -> Dict[str, Any]:
+        if o.tp_user_id is not None:
+            user_data = {
+                "id": str(o.user_id),
+                "username": o.u_email.split('@')[0] if o.u_email else f"user_{o.user_id}",
+                "display_name": o.tp_display_name,
+                "avatar": o.tp_avatar_url,
+                "verified": o.tp_is_verified,
+                "verification_level": o.tp_verification_level,
+                "total_trades": o.tp_total_trades or 0,
+                "completed_trades": o.tp_completed_trades or 0,
+                "success_rate": (o.tp_success_rate or 0) * 100,
+                "avg_rating": o.tp_average_rating or 0,
+                "total_reviews": o.tp_total_reviews or 0,
+                "badges": ["verified", "pro_trader"] if o.tp_is_verified else [],
+                "is_online": True
+            }
+        else:
+            # Fallback if no trader profile found
+            user_data = {
+                "id": str(o.user_id),
+                "username": f"user_{o.user_id}",
+                "display_name": f"Trader {o.user_id}",
+                "verified": False,
+                "verification_level": "basic",
+                "total_trades": o.completed_trades or 0,
+                "completed_trades": o.completed_trades or 0,
+                "success_rate": 98.5,
+                "avg_rating": 4.8,
+                "total_reviews": 0,
+                "badges": [],
+                "is_online": True
+            }
+
+        # Get payment methods (just count for listing)
+        pm_ids = json.loads(o.payment_methods) if o.payment_methods else []
+
+        return {
+            "id": str(o.id),
+            "userId": str(o.user_id),
+            "type": o.order_type,
+            "coin": o.cryptocurrency,
+            "cryptocurrency": o.cryptocurrency,
+            "fiat_currency": o.fiat_currency,  # snake_case
+            "fiatCurrency": o.fiat_currency,  # camelCase
+            "price": str(o.price),
+            "amount": str(o.total_amount),
+            "minAmount": str(o.min_order_limit),
+            "maxAmount": str(o.max_order_limit),
+            "paymentMethods": pm_ids,  # Just IDs for listing (full objects in details)
+            "status": o.status,
+            "user": user_data,
+            "completedTrades": o.completed_trades,
+            "successRate": user_data["success_rate"],
+            "avgRating": user_data["avg_rating"],
+            "badges": user_data["badges"],
+            "isOnline": user_data["is_online"],
+            "createdAt": str(o.created_at)
+        }
+
+
+# Instância global
+p2p_order_listing_service = P2POrderListingService()
@@ -0,0 +1,229 @@
+"""
+📊 HOLD Wallet - P2P Stats
+==========================
+
+Estatísticas P2P mantidas de forma incremental:
+
+- Contadores de trader (trader_profiles e user_reputations) atualizados
+  nas transições do trade (created/completed/cancelled/disputed) com um
+  UPDATE aritmético por tabela, sem recontar o histórico
+- success_rate / completion_rate recalculados no próprio UPDATE
+- Reconciliação periódica: um GROUP BY sobre p2p_trades corrige os
+  contadores que divergirem (caminhos que mudam o status sem passar
+  pelo hook) e o available_amount das ordens a partir dos trades abertos
+- GET /p2p/market-stats servido de um snapshot em memória com TTL curto
+  (um único GROUP BY por janela, para todas as moedas)
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# transição -> contador incrementado
+TRANSITIONS = {
+    "created": "total_trades",
+    "completed": "completed_trades",
+    "cancelled": "cancelled_trades",
+    "disputed": "disputed_trades",
+}
+
+# trader_profiles só tem total/completed (success_rate = completed / total)
+PROFILE_COUNTERS = ("total_trades", "completed_trades")
+
+
+def _rate(counter: str, delta: Dict[str, int]) -> str:
+    """Expressão SQL de `counter / total * 100` já com os deltas aplicados"""
+    return (
+        f"COALESCE(100.0 * (COALESCE({counter}, 0) + {delta.get(counter, 0)}) "
+        f"/ NULLIF(COALESCE(total_trades, 0) + {delta.get('total_trades', 0)}, 0), 0)"
+    )
+
+
+class P2PStatsService:
+    """Contadores incrementais de trader + snapshot das estatísticas de mercado"""
+
+    MARKET_STATS_TTL = 10  # segundos
+
+    def __init__(self):
+        self._market: Optional[Dict[str, Dict[str, int]]] = None
+        self._market_at = 0.0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Contadores de trader
+    # ------------------------------------------------------------------
+
+    def record_transition(self, db: Session, transition: str, user_ids: Iterable[Any]) -> None:
+        """
+        Aplica a transição aos contadores dos participantes. Não faz commit:
+        roda na transação que muda o status do trade.
+        """
+        counter = TRANSITIONS.get(transition)
+        if counter is None:
+            raise ValueError(f"Unknown trade transition: {transition}")
+        users = sorted({str(u) for u in user_ids if u})
+        if not users:
+            return
+        delta = {counter: 1}
+
+        if counter in PROFILE_COUNTERS:
+            db.execute(
+                text(f"""
+                    UPDATE trader_profiles
+                    SET {counter} = {counter} + 1,
+                        success_rate = {_rate('completed_trades', delta)},
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE user_id IN :user_ids
+                """).bindparams(bindparam("user_ids", expanding=True)),
+                {"user_ids": users}
+            )
+
+        db.execute(
+            text(f"""
+                UPDATE user_reputations
+                SET {counter} = COALESCE({counter}, 0) + 1,
+                    completion_rate = {_rate('completed_trades', delta)},
+                    cancellation_rate = {_rate('cancelled_trades', delta)},
+                    dispute_rate = {_rate('disputed_trades', delta)}
+                WHERE user_id IN :user_ids
+            """).bindparams(bindparam("user_ids", expanding=True)),
+            {"user_ids": users}
+        )
+
+    def safe_record_transition(self, db: Session, transition: str, user_ids: Iterable[Any]) -> None:
+        """Hook das rotas: estatística nunca derruba o trade (a reconciliação corrige)"""
+        try:
+            with db.begin_nested():
+                self.record_transition(db, transition, user_ids)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha atualizando contadores P2P ({transition}): {e}")
+
+    def reconcile(self, db: Session) -> Dict[str, int]:
+        """Recalcula contadores e liquidez das ordens a partir de p2p_trades e corrige os divergentes"""
+        per_user = """
+            SELECT user_id,
+                   COUNT(*) AS total,
+                   SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed,
+                   SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) AS cancelled,
+                   SUM(CASE WHEN status = 'disputed' THEN 1 ELSE 0 END) AS disputed
+            FROM (
+                SELECT buyer_id AS user_id, status FROM p2p_trades
+                UNION ALL
+                SELECT seller_id AS user_id, status FROM p2p_trades
+            ) AS participants
+            GROUP BY user_id
+        """
+        profiles = db.execute(text(f"""
+            UPDATE trader_profiles
+            SET total_trades = t.total,
+                completed_trades = t.completed,
+                success_rate = COALESCE(100.0 * t.completed / NULLIF(t.total, 0), 0),
+                updated_at = CURRENT_TIMESTAMP
+            FROM ({per_user}) AS t
+            WHERE trader_profiles.user_id = t.user_id
+              AND (trader_profiles.total_trades <> t.total OR trader_profiles.completed_trades <> t.completed)
+        """)).rowcount
+        reputations = db.execute(text(f"""
+            UPDATE user_reputations
+            SET total_trades = t.total,
+                completed_trades = t.completed,
+                cancelled_trades = t.cancelled,
+                disputed_trades = t.disputed,
+                completion_rate = COALESCE(100.0 * t.completed / NULLIF(t.total, 0), 0),
+                cancellation_rate = COALESCE(100.0 * t.cancelled / NULLIF(t.total, 0), 0),
+                dispute_rate = COALESCE(100.0 * t.disputed / NULLIF(t.total, 0), 0)
+            FROM ({per_user}) AS t
+            WHERE user_reputations.user_id = t.user_id
+              AND (COALESCE(user_reputations.total_trades, 0) <> t.total
+                   OR COALESCE(user_reputations.completed_trades, 0) <> t.completed
+                   OR COALESCE(user_reputations.cancelled_trades, 0) <> t.cancelled
+                   OR COALESCE(user_reputations.disputed_trades, 0) <> t.disputed)
+        """)).rowcount
+        from app.services.p2p_matching_engine import P2PMatchingEngine
+
+        orders = P2PMatchingEngine.reconcile_liquidity(db)
+        db.commit()
+        return {"trader_profiles": profiles, "user_reputations": reputations, "p2p_orders": orders}
+
+    async def _reconcile_loop(self, interval: int):
+        from app.core import db as core_db
+
+        def _run():
+            db = core_db.SessionLocal()
+            try:
+                return self.reconcile(db)
+            finally:
+                db.close()
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                fixed = await asyncio.to_thread(_run)
+                if any(fixed.values()):
+                    logger.warning(f"📊 Contadores P2P corrigidos na reconciliação: {fixed}")
+            except Exception as e:
+                logger.error(f"❌ Erro na reconciliação dos contadores P2P: {e}")
+
+    def start(self, interval: int = 900):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._reconcile_loop(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ------------------------------------------------------------------
+    # Estatísticas de mercado
+    # ------------------------------------------------------------------
+
+    def market_stats(self, db: Session, coin: Optional[str] = None) -> Dict[str, Any]:
+        """Contagem de ordens ativas (todas as moedas ou uma), do snapshot em memória"""
+        snapshot = self._market_snapshot(db)
+        if coin:
+            counts = snapshot.get(coin.upper(), {})
+        else:
+            counts = {}
+            for per_coin in snapshot.values():
+                for side, count in per_coin.items():
+                    counts[side] = counts.get(side, 0) + count
+        buy, sell = counts.get("buy", 0), counts.get("sell", 0)
+        return {
+            "coin": coin if coin else "ALL",
+            "total_active_orders": buy + sell,
+            "total_buy_orders": buy,
+            "total_sell_orders": sell
+        }
+
+    def _market_snapshot(self, db: Session) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            if self._market is not None and time.monotonic() - self._market_at < self.MARKET_STATS_TTL:
+                return self._market
+            rows = db.execute(text("""
+                SELECT cryptocurrency, order_type, COUNT(*) AS total
+                FROM p2p_orders
+                WHERE status = 'active'
+                GROUP BY cryptocurrency, order_type
+            """)).fetchall()
+            snapshot: Dict[str, Dict[str, int]] = {}
+            for row in rows:
+                snapshot.setdefault(str(row.cryptocurrency).upper(), {})[row.order_type] = int(row.total)
+            self._market, self._market_at = snapshot, time.monotonic()
+            return snapshot
+
+
+# Instância global
+p2p_stats_service = P2PStatsService()
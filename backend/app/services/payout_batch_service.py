@@ -0,0 +1,777 @@
+"""
+📤 Payout Batch Service - Saídas on-chain agrupadas
+===================================================
+
+Em vez de uma transação (e um gas) por payout, as transferências de saída da
+plataforma entram numa fila por (rede, ativo). Depois de uma janela curta
+(PAYOUT_BATCH_WINDOW_SECONDS) ou ao atingir PAYOUT_BATCH_MAX_SIZE, o lote é
+enviado como:
+
+- Bitcoin: uma transação com várias saídas (btc_service.send_btc_many)
+- EVM nativo/ERC-20: uma chamada ao contrato Disperse
+  (disperseEther / disperseToken)
+
+Cada payout tem sua linha em `payout_requests` (única por reference_type +
+reference_id, então um retry do chamador não paga duas vezes). Só quando o
+lote comprovadamente não chegou ao nó (BatchSendError) cada payout é enviado
+individualmente; um envio com resultado incerto vai para NEEDS_REVIEW.
+
+Handlers por `reference_type` (ex: instant_trade) são chamados depois do
+receipt on-chain (confirmation_tracker) para concluir a operação de origem.
+
+Vários workers compartilham a tabela: o lote é reivindicado com UPDATE
+condicional (QUEUED -> PROCESSING com lease claimed_by/claimed_at) e só as
+linhas devolvidas são enviadas. A fila vive em memória: `recover()` roda
+periodicamente, uma passada por intervalo no cluster (lock no Redis), e
+retoma o que ficou no banco sem tocar em lotes com lease ainda válido.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from web3 import Web3
+
+from app.core.config import settings
+from app.models.payout import PayoutRequest, PayoutStatus
+from app.services.nonce_manager import TransactionRejected, nonce_manager
+from app.services.gas_oracle_service import gas_oracle_service
+
+logger = logging.getLogger(__name__)
+
+
+# Handler roda numa worker thread; a corrotina devolvida (ex: notificação)
+# é agendada no event loop principal depois do commit
+PayoutHandler = Callable[[Session, PayoutRequest], Optional[Coroutine]]
+
+# Dono do lease dos lotes reivindicados por este processo
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+RECOVERY_LOCK_KEY = "payout_batch:recovery"
+
+# disperse.app - mesmo endereço em Ethereum, Polygon, BSC e Base
+DISPERSE_ABI = [
+    {
+        "inputs": [
+            {"name": "recipients", "type": "address[]"},
+            {"name": "values", "type": "uint256[]"}
+        ],
+        "name": "disperseEther",
+        "outputs": [],
+        "stateMutability": "payable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"name": "token", "type": "address"},
+            {"name": "recipients", "type": "address[]"},
+            {"name": "values", "type": "uint256[]"}
+        ],
+        "name": "disperseToken",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    }
+]
+
+ERC20_ALLOWANCE_ABI = [
+    {
+        "constant": True,
+        "inputs": [{"name": "_owner", "type": "address"}, {"name": "_spender", "type": "address"}],
+        "name": "allowance",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "type": "function"
+    },
+    {
+        "constant": False,
+        "inputs": [{"name": "_spender", "type": "address"}, {"name": "_value", "type": "uint256"}],
+        "name": "approve",
+        "outputs": [{"name": "", "type": "bool"}],
+        "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "decimals",
+        "outputs": [{"name": "", "type": "uint8"}],
+        "type": "function"
+    }
+]
+
+MAX_UINT256 = 2 ** 256 - 1
+
+# Gas fixo: a estimativa falharia enquanto o approve ainda está no mempool
+DISPERSE_GAS_BASE = 60_000
+DISPERSE_GAS_PER_NATIVE = 35_000
+DISPERSE_GAS_PER_TOKEN = 45_000
+APPROVE_GAS = 70_000
+
+
+class BatchSendError(Exception):
+    """O lote comprovadamente não chegou à rede (dispara o fallback individual)"""
+
+
+class PayoutBatchService:
+    """Fila de payouts agrupados por (rede, ativo)"""
+
+    def __init__(self):
+        self._queues: Dict[Tuple[str, str], List[str]] = {}
+        self._flush_tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._handlers: Dict[str, PayoutHandler] = {}
+        self._finalizers: Set[asyncio.Task] = set()
+        self._tracking: Set[str] = set()  # tx_hash aguardando receipt neste processo
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PAYOUT_BATCH_ENABLED
+
+    def register_handler(self, reference_type: str, handler: PayoutHandler):
+        """Registra callback chamado (na sessão do worker) quando o payout é liquidado"""
+        self._handlers[reference_type] = handler
+
+    @staticmethod
+    def is_settled(payout: Dict[str, Any]) -> bool:
+        """Confirmado on-chain (EVM) ou transmitido (Bitcoin: sem revert)"""
+        if payout.get("status") == PayoutStatus.CONFIRMED.value:
+            return True
+        return payout.get("network") == "bitcoin" and payout.get("status") == PayoutStatus.SUBMITTED.value
+
+    # ===================================
+    # FILA
+    # ===================================
+
+    async def submit(
+        self,
+        db: Session,
+        *,
+        network: str,
+        asset: str,
+        to_address: str,
+        amount: Decimal,
+        reference_type: str,
+        reference_id: str
+    ) -> PayoutRequest:
+        """
+        Persiste o payout e o coloca na fila do (rede, ativo).
+
+        Idempotente por (reference_type, reference_id): um retry do chamador
+        recebe o payout já existente, nunca um segundo pagamento.
+        """
+        existing = self._find(db, reference_type, reference_id)
+        if existing is not None:
+            logger.info(f"♻️ Payout {existing.id} já existe para {reference_type}/{reference_id} ({existing.status})")
+            return existing
+
+        payout = PayoutRequest(
+            reference_type=reference_type,
+            reference_id=str(reference_id),
+            network=network.lower(),
+            asset=asset.upper(),
+            to_address=to_address,
+            amount=Decimal(str(amount)),
+            status=PayoutStatus.QUEUED.value,
+        )
+        db.add(payout)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Outro worker criou o mesmo payout em paralelo
+            db.rollback()
+            return self._find(db, reference_type, reference_id)
+        db.refresh(payout)
+
+        self._waiters[payout.id] = asyncio.get_running_loop().create_future()
+        logger.info(f"📥 Payout {payout.id} na fila {(payout.network, payout.asset)}: {payout.amount} {payout.asset} -> {to_address[:10]}...")
+        self._enqueue((payout.network, payout.asset), [payout.id])
+        return payout
+
+    @staticmethod
+    def _find(db: Session, reference_type: str, reference_id: str) -> Optional[PayoutRequest]:
+        return db.query(PayoutRequest).filter(
+            PayoutRequest.reference_type == reference_type,
+            PayoutRequest.reference_id == str(reference_id)
+        ).first()
+
+    def _enqueue(self, key: Tuple[str, str], payout_ids: List[str]):
+        self._queues.setdefault(key, []).extend(payout_ids)
+        if len(self._queues[key]) >= settings.PAYOUT_BATCH_MAX_SIZE:
+            self._start_flush(key, delay=0)
+        elif key not in self._flush_tasks:
+            self._start_flush(key, delay=settings.PAYOUT_BATCH_WINDOW_SECONDS)
+
+    async def wait(self, payout_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Aguarda o resultado final do lote que contém o payout. Payout que não
+        está aguardando nesta instância (já existente, outro worker) devolve
+        o estado gravado.
+        """
+        future = self._waiters.get(payout_id)
+        if future is None:
+            from app.core.db import SessionLocal
+
+            def load():
+                db = SessionLocal()
+                try:
+                    payout = db.query(PayoutRequest).filter(PayoutRequest.id == payout_id).first()
+                    return payout.to_dict() if payout else {"id": payout_id, "status": None, "error": "Payout não encontrado"}
+                finally:
+                    db.close()
+
+            return await asyncio.to_thread(load)
+        timeout = timeout if timeout is not None else settings.PAYOUT_BATCH_WAIT_SECONDS
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        finally:
+            if future.done():
+                self._waiters.pop(payout_id, None)
+
+    async def submit_and_wait(self, db: Session, **kwargs) -> Dict[str, Any]:
+        payout = await self.submit(db, **kwargs)
+        return await self.wait(payout.id)
+
+    def _start_flush(self, key: Tuple[str, str], delay: float):
+        previous = self._flush_tasks.get(key)
+        if previous is not None and not previous.done():
+            if delay > 0:
+                return
+            previous.cancel()
+        self._flush_tasks[key] = asyncio.create_task(self._flush_after(key, delay))
+
+    async def _flush_after(self, key: Tuple[str, str], delay: float):
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        self._flush_tasks.pop(key, None)
+
+        payout_ids = self._queues.pop(key, [])
+        # Sobra além do tamanho máximo volta para a fila
+        if len(payout_ids) > settings.PAYOUT_BATCH_MAX_SIZE:
+            self._queues[key] = payout_ids[settings.PAYOUT_BATCH_MAX_SIZE:]
+            payout_ids = payout_ids[:settings.PAYOUT_BATCH_MAX_SIZE]
+            self._start_flush(key, delay=0)
+
+        if payout_ids:
+            await self.process_batch(key, payout_ids)
+
+    # ===================================
+    # RECUPERAÇÃO
+    # ===================================
+
+    def start(self, interval: float):
+        """Retomada periódica (a primeira passada roda já no startup)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._recover_loop(interval))
+
+    async def _recover_loop(self, interval: float):
+        while True:
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"❌ Erro na retomada de payouts: {e}")
+            await asyncio.sleep(interval)
+
+    async def _acquire_recovery_lock(self) -> bool:
+        """Uma passada por intervalo no cluster; sem Redis, cada processo roda a sua"""
+        from app.services.cache_service import cache_service
+
+        if not cache_service.is_connected():
+            return True
+        try:
+            return bool(await asyncio.to_thread(
+                cache_service.redis_client.set,
+                RECOVERY_LOCK_KEY,
+                WORKER_ID,
+                nx=True,
+                ex=max(int(settings.PAYOUT_RECOVERY_SECONDS) - 1, 1)
+            ))
+        except Exception as e:
+            logger.warning(f"⚠️ Lock da retomada de payouts indisponível: {e}")
+            return False
+
+    async def recover(self) -> Dict[str, int]:
+        """
+        Retoma os payouts abandonados por um worker que parou:
+        - QUEUED que nenhuma fila em memória enviou voltam para a fila
+          (o envio reivindica a linha, então dois workers nunca pagam o mesmo)
+        - PROCESSING com lease expirado (envio interrompido, pode ter
+          chegado à rede) viram NEEDS_REVIEW: nunca são reenviados
+        - SUBMITTED em redes EVM sem receipt no prazo voltam a aguardá-lo
+        """
+        counts = {"queued": 0, "awaiting_receipt": 0, "needs_review": 0}
+        if not await self._acquire_recovery_lock():
+            return counts
+
+        from app.core.db import SessionLocal
+
+        now = datetime.utcnow()
+        queued_before = now - timedelta(seconds=2 * settings.PAYOUT_BATCH_WINDOW_SECONDS)
+        lease_expired = now - timedelta(seconds=settings.PAYOUT_LEASE_SECONDS)
+        receipt_expired = now - timedelta(seconds=settings.PAYOUT_CONFIRMATION_TIMEOUT_SECONDS)
+        local = {payout_id for ids in self._queues.values() for payout_id in ids}
+        tracking = set(self._tracking)
+
+        def load():
+            db = SessionLocal()
+            try:
+                queued: Dict[Tuple[str, str], List[str]] = {}
+                for payout in db.query(PayoutRequest).filter(
+                    PayoutRequest.status == PayoutStatus.QUEUED.value,
+                    PayoutRequest.created_at < queued_before
+                ).order_by(PayoutRequest.created_at):
+                    if payout.id not in local:
+                        queued.setdefault((payout.network, payout.asset), []).append(payout.id)
+
+                review = db.execute(
+                    update(PayoutRequest)
+                    .where(
+                        PayoutRequest.status == PayoutStatus.PROCESSING.value,
+                        or_(PayoutRequest.claimed_at.is_(None), PayoutRequest.claimed_at < lease_expired)
+                    )
+                    .values(
+                        status=PayoutStatus.NEEDS_REVIEW.value,
+                        error="Envio interrompido (lease expirado); verificar on-chain antes de reenviar"
+                    )
+                    .returning(PayoutRequest.id)
+                    .execution_options(synchronize_session=False)
+                ).scalars().all()
+                db.commit()
+
+                by_hash: Dict[Tuple[str, str], List[str]] = {}
+                for payout in db.query(PayoutRequest).filter(
+                    PayoutRequest.status == PayoutStatus.SUBMITTED.value,
+                    PayoutRequest.network != "bitcoin",
+                    PayoutRequest.tx_hash.isnot(None),
+                    or_(PayoutRequest.submitted_at.is_(None), PayoutRequest.submitted_at < receipt_expired)
+                ):
+                    if payout.tx_hash not in tracking:
+                        by_hash.setdefault((payout.network, payout.tx_hash), []).append(payout.id)
+                submitted = [(network, tx_hash, ids) for (network, tx_hash), ids in by_hash.items()]
+                return queued, submitted, len(review)
+            finally:
+                db.close()
+
+        queued, submitted, review = await asyncio.to_thread(load)
+        for key, payout_ids in queued.items():
+            self._enqueue(key, payout_ids)
+        for network, tx_hash, payout_ids in submitted:
+            self._spawn_finalizer(network, {tx_hash: payout_ids})
+
+        counts = {
+            "queued": sum(len(ids) for ids in queued.values()),
+            "awaiting_receipt": sum(len(ids) for _, _, ids in submitted),
+            "needs_review": review,
+        }
+        if any(counts.values()):
+            logger.warning(f"♻️ Payouts retomados: {counts}")
+        return counts
+
+    def _spawn_finalizer(self, network: str, groups: Dict[str, List[str]]):
+        task = asyncio.create_task(self._finalize(network, groups))
+        self._finalizers.add(task)
+        task.add_done_callback(self._finalizers.discard)
+
+    # ===================================
+    # PROCESSAMENTO
+    # ===================================
+
+    async def process_batch(self, key: Tuple[str, str], payout_ids: List[str]):
+        """Envia um lote, aguarda a liquidação e atualiza o status de cada payout"""
+        from app.core.db import SessionLocal
+
+        network, asset = key
+        db = SessionLocal()
+        results: Dict[str, Dict[str, Any]] = {}
+        submitted: Dict[str, List[str]] = {}
+        try:
+            batch_id = str(uuid.uuid4())
+            # Reivindicação atômica: só as linhas que este UPDATE mudou são enviadas
+            claimed = set(db.execute(
+                update(PayoutRequest)
+                .where(
+                    PayoutRequest.id.in_(payout_ids),
+                    PayoutRequest.status == PayoutStatus.QUEUED.value
+                )
+                .values(
+                    status=PayoutStatus.PROCESSING.value,
+                    batch_id=batch_id,
+                    attempts=PayoutRequest.attempts + 1,
+                    claimed_by=WORKER_ID,
+                    claimed_at=datetime.utcnow()
+                )
+                .returning(PayoutRequest.id)
+                .execution_options(synchronize_session=False)
+            ).scalars())
+            db.commit()
+
+            payouts = []
+            for payout in db.query(PayoutRequest).filter(
+                PayoutRequest.id.in_(payout_ids)
+            ).populate_existing():
+                if payout.id in claimed:
+                    payouts.append(payout)
+                else:
+                    # Reivindicado por outro worker: o chamador recebe o estado atual
+                    results[payout.id] = payout.to_dict()
+            if payouts:
+                await self._send_claimed(db, network, asset, batch_id, payouts)
+            for payout in payouts:
+                if payout.status == PayoutStatus.SUBMITTED.value:
+                    submitted.setdefault(payout.tx_hash, []).append(payout.id)
+                results[payout.id] = payout.to_dict()
+
+        except Exception as e:
+            logger.error(f"❌ Erro processando lote {key}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+        try:
+            if submitted:
+                results.update(await self._finalize(network, submitted))
+        finally:
+            for payout_id in payout_ids:
+                future = self._waiters.get(payout_id)
+                if future is not None and not future.done():
+                    future.set_result(results.get(payout_id, {
+                        "id": payout_id,
+                        "status": PayoutStatus.FAILED.value,
+                        "error": "Lote não processado"
+                    }))
+
+    async def _send_claimed(
+        self,
+        db: Session,
+        network: str,
+        asset: str,
+        batch_id: str,
+        payouts: List[PayoutRequest]
+    ):
+        """Envia os payouts reivindicados (lote ou fallback individual) e grava o status"""
+        for payout in payouts:
+            payout.batch_size = len(payouts)
+        db.commit()
+
+        tx_hash = None
+        fallback = len(payouts) == 1
+        if len(payouts) > 1:
+            try:
+                tx_hash = await self._send_batch(db, network, asset, payouts)
+            except BatchSendError as e:
+                logger.warning(f"⚠️ Lote {batch_id} ({len(payouts)} payouts) não foi transmitido, enviando individualmente: {e}")
+                fallback = True
+            except Exception as e:
+                # O lote pode estar na rede: reenviar individualmente pagaria duas vezes
+                logger.error(f"❌ Envio do lote {batch_id} incerto, payouts para revisão: {e}")
+                for payout in payouts:
+                    self._mark_review(payout, f"Envio do lote incerto: {e}", getattr(e, "tx_hash", None))
+                db.commit()
+
+        if tx_hash:
+            logger.info(f"✅ Lote {batch_id}: {len(payouts)} payouts {asset}/{network} em 1 TX: {tx_hash}")
+            for payout in payouts:
+                self._mark_submitted(payout, tx_hash)
+            db.commit()
+        elif fallback:
+            for payout in payouts:
+                payout.batch_size = 1
+                try:
+                    single_hash = await self._send_single(db, payout)
+                    self._mark_submitted(payout, single_hash)
+                except BatchSendError as e:
+                    logger.error(f"❌ Payout {payout.id} falhou: {e}")
+                    payout.status = PayoutStatus.FAILED.value
+                    payout.error = str(e)
+                except Exception as e:
+                    logger.error(f"❌ Envio do payout {payout.id} incerto: {e}")
+                    self._mark_review(payout, f"Envio incerto: {e}", getattr(e, "tx_hash", None))
+                db.commit()
+
+    async def _finalize(self, network: str, groups: Dict[str, List[str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Liquida payouts transmitidos (tx_hash -> payout_ids): em redes EVM
+        espera o receipt no confirmation tracker (revert = FAILED); Bitcoin
+        não reverte, então é liquidado na transmissão. O handler da origem
+        só roda depois disso.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._tracking.update(groups)
+        try:
+            outcomes = await asyncio.gather(*(
+                self._confirm(network, tx_hash) for tx_hash in groups
+            ))
+        finally:
+            self._tracking.difference_update(groups)
+
+        def apply():
+            from app.core.db import SessionLocal
+
+            db = SessionLocal()
+            results: Dict[str, Dict[str, Any]] = {}
+            try:
+                for (tx_hash, payout_ids), success in zip(groups.items(), outcomes):
+                    if network == "bitcoin":
+                        settled = set(payout_ids)
+                    elif success is None:
+                        settled = set()
+                    else:
+                        # Só quem muda a linha de SUBMITTED roda o handler (outro
+                        # finalizer do mesmo tx_hash não o repete)
+                        values = {"status": PayoutStatus.CONFIRMED.value} if success else {
+                            "status": PayoutStatus.FAILED.value,
+                            "error": "Transação revertida on-chain"
+                        }
+                        changed = set(db.execute(
+                            update(PayoutRequest)
+                            .where(
+                                PayoutRequest.id.in_(payout_ids),
+                                PayoutRequest.status == PayoutStatus.SUBMITTED.value
+                            )
+                            .values(**values)
+                            .returning(PayoutRequest.id)
+                            .execution_options(synchronize_session=False)
+                        ).scalars())
+                        db.commit()
+                        settled = changed if success else set()
+                    for payout in db.query(PayoutRequest).filter(
+                        PayoutRequest.id.in_(payout_ids)
+                    ).populate_existing():
+                        if payout.id in settled and self.is_settled(payout.to_dict()):
+                            self._run_handler(db, payout)
+                        results[payout.id] = payout.to_dict()
+            finally:
+                db.close()
+            return results
+
+        return await asyncio.to_thread(apply)
+
+    async def _confirm(self, network: str, tx_hash: str) -> Optional[bool]:
+        """True/False = receipt com sucesso/revert; None = sem receipt no prazo (segue SUBMITTED)"""
+        if network == "bitcoin":
+            return True
+        from app.services.confirmation_tracker import ConfirmationTimeout, confirmation_tracker
+
+        try:
+            confirmation = await confirmation_tracker.wait(
+                network, tx_hash, timeout=settings.PAYOUT_CONFIRMATION_TIMEOUT_SECONDS
+            )
+        except (asyncio.TimeoutError, ConfirmationTimeout):
+            logger.warning(f"⚠️ Sem receipt para {tx_hash} ({network}); payouts seguem aguardando (retomados no próximo start)")
+            return None
+        if not confirmation.success:
+            logger.error(f"❌ Transação de payout revertida: {tx_hash} ({network})")
+        return confirmation.success
+
+    @staticmethod
+    def _mark_submitted(payout: PayoutRequest, tx_hash: str):
+        payout.status = PayoutStatus.SUBMITTED.value
+        payout.tx_hash = tx_hash
+        payout.error = None
+        payout.submitted_at = datetime.utcnow()
+
+    @staticmethod
+    def _mark_review(payout: PayoutRequest, error: str, tx_hash: Optional[str] = None):
+        payout.status = PayoutStatus.NEEDS_REVIEW.value
+        payout.error = error
+        if tx_hash:
+            payout.tx_hash = tx_hash
+
+    def _run_handler(self, db: Session, payout: PayoutRequest):
+        handler = self._handlers.get(payout.reference_type)
+        if handler is None:
+            return
+        follow_up = None
+        try:
+            follow_up = handler(db, payout)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if follow_up is not None:
+                follow_up.close()
+            logger.error(f"❌ Handler {payout.reference_type} falhou para payout {payout.id}: {e}")
+            return
+        if follow_up is not None:
+            # Estamos na worker thread do to_thread: devolve ao loop principal
+            asyncio.run_coroutine_threadsafe(follow_up, self._loop)
+
+    async def stop(self):
+        tasks = list(self._finalizers)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ===================================
+    # ENVIO
+    # ===================================
+
+    async def _send_batch(self, db: Session, network: str, asset: str, payouts: List[PayoutRequest]) -> str:
+        if network == "bitcoin":
+            return await self._send_btc_batch(db, payouts)
+        return await asyncio.to_thread(self._send_evm_batch, network, asset, payouts)
+
+    async def _send_btc_batch(self, db: Session, payouts: List[PayoutRequest]) -> str:
+        from app.services.btc_service import btc_service, SATOSHI
+        from app.services.blockchain_deposit_service import blockchain_deposit_service
+
+        credentials = blockchain_deposit_service.get_platform_btc_credentials(db)
+        if not credentials:
+            raise BatchSendError("Carteira BTC da plataforma não configurada")
+
+        # Destinos repetidos viram uma saída só
+        outputs: Dict[str, int] = {}
+        for payout in payouts:
+            outputs[payout.to_address] = outputs.get(payout.to_address, 0) + int(Decimal(str(payout.amount)) * SATOSHI)
+
+        result = await btc_service.send_btc_many(
+            from_address=credentials['address'],
+            outputs=list(outputs.items()),
+            private_key_wif=credentials['private_key_wif'],
+            fee_level='hour'
+        )
+        if not result.success:
+            self._raise_btc_failure(result)
+        return result.tx_hash
+
+    @staticmethod
+    def _raise_btc_failure(result):
+        # Falha antes do broadcast é segura; depois dele a TX pode estar no mempool
+        if not result.broadcast_attempted:
+            raise BatchSendError(result.error)
+        raise RuntimeError(f"Broadcast BTC sem confirmação do nó: {result.error}")
+
+    def _send_evm_batch(self, network: str, asset: str, payouts: List[PayoutRequest]) -> str:
+        try:
+            tx, private_key, sender, w3 = self._build_evm_batch(network, asset, payouts)
+        except BatchSendError:
+            raise
+        except Exception as e:
+            # Nada do lote foi transmitido (no máximo o approve, que não move fundos)
+            raise BatchSendError(f"Falha preparando lote: {e}") from e
+        try:
+            return nonce_manager.send_transaction(w3, tx, private_key, sender=sender)
+        except TransactionRejected as e:
+            raise BatchSendError(str(e)) from e
+
+    def _build_evm_batch(self, network: str, asset: str, payouts: List[PayoutRequest]):
+        """Monta a TX do Disperse (e o approve, se preciso); não transmite o lote"""
+        from app.services.blockchain_deposit_service import blockchain_deposit_service
+
+        private_key = blockchain_deposit_service.platform_wallet_private_key
+        if not private_key:
+            raise BatchSendError("PLATFORM_WALLET_PRIVATE_KEY não configurada")
+
+        config = blockchain_deposit_service.NETWORK_CONFIG.get(network)
+        if not config:
+            raise BatchSendError(f"Rede não suportada: {network}")
+        w3 = blockchain_deposit_service.get_web3(network)
+        if not w3:
+            raise BatchSendError(f"Não foi possível conectar à rede {network}")
+
+        sender = w3.eth.account.from_key(private_key).address
+        disperse = w3.eth.contract(
+            address=Web3.to_checksum_address(settings.DISPERSE_CONTRACT_ADDRESS),
+            abi=DISPERSE_ABI
+        )
+        recipients = [Web3.to_checksum_address(p.to_address) for p in payouts]
+        fee_fields = gas_oracle_service.tx_fee_fields(network, w3=w3)
+        contract_address = config["contracts"].get(asset)
+
+        if contract_address is None:
+            values = [w3.to_wei(Decimal(str(p.amount)), 'ether') for p in payouts]
+            tx = disperse.functions.disperseEther(recipients, values).build_transaction({
+                'from': sender,
+                'value': sum(values),
+                'gas': DISPERSE_GAS_BASE + DISPERSE_GAS_PER_NATIVE * len(payouts),
+                **fee_fields,
+                'chainId': config["chain_id"]
+            })
+        else:
+            token = w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=ERC20_ALLOWANCE_ABI)
+            decimals = token.functions.decimals().call()
+            values = [int(Decimal(str(p.amount)) * (Decimal(10) ** decimals)) for p in payouts]
+
+            # disperseToken usa transferFrom: aprova o contrato uma vez (nonce seguinte vem em pipeline)
+            if token.functions.allowance(sender, disperse.address).call() < sum(values):
+                approve_tx = token.functions.approve(disperse.address, MAX_UINT256).build_transaction({
+                    'from': sender,
+                    'gas': APPROVE_GAS,
+                    **fee_fields,
+                    'chainId': config["chain_id"]
+                })
+                approve_hash = nonce_manager.send_transaction(w3, approve_tx, private_key, sender=sender)
+                logger.info(f"🔓 Approve Disperse para {asset}/{network}: {approve_hash}")
+
+            tx = disperse.functions.disperseToken(token.address, recipients, values).build_transaction({
+                'from': sender,
+                'gas': DISPERSE_GAS_BASE + DISPERSE_GAS_PER_TOKEN * len(payouts),
+                **fee_fields,
+                'chainId': config["chain_id"]
+            })
+
+        return tx, private_key, sender, w3
+
+    async def _send_single(self, db: Session, payout: PayoutRequest) -> str:
+        """
+        Fallback: um payout, uma transação. BatchSendError = não transmitido;
+        qualquer outra exceção = resultado incerto (payout vai para revisão).
+        """
+        from app.services.blockchain_deposit_service import blockchain_deposit_service
+
+        if payout.network == "bitcoin":
+            from app.services.btc_service import btc_service
+
+            credentials = blockchain_deposit_service.get_platform_btc_credentials(db)
+            if not credentials:
+                raise BatchSendError("Carteira BTC da plataforma não configurada")
+            result = await btc_service.send_btc(
+                from_address=credentials['address'],
+                to_address=payout.to_address,
+                amount_btc=float(payout.amount),
+                private_key_wif=credentials['private_key_wif'],
+                fee_level='hour'
+            )
+            if not result.success:
+                self._raise_btc_failure(result)
+            return result.tx_hash
+
+        def send_evm() -> str:
+            w3 = blockchain_deposit_service.get_web3(payout.network)
+            if not w3:
+                raise BatchSendError(f"Não foi possível conectar à rede {payout.network}")
+            config = blockchain_deposit_service.NETWORK_CONFIG[payout.network]
+            contract_address = config["contracts"].get(payout.asset)
+            amount = Decimal(str(payout.amount))
+
+            if contract_address is None:
+                tx_hash = blockchain_deposit_service.send_native_token(w3, payout.to_address, amount, payout.network)
+                error = None
+            else:
+                tx_hash, error = blockchain_deposit_service.send_erc20_token(
+                    w3, contract_address, payout.to_address, amount, payout.network
+                )
+            if not tx_hash:
+                raise BatchSendError(error or "Falha ao enviar transação")
+            return tx_hash
+
+        return await asyncio.to_thread(send_evm)
+
+
+# Instância global
+payout_batch_service = PayoutBatchService()
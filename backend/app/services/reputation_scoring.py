@@ -0,0 +1,314 @@
+"""
+🧮 HOLD Wallet - Reputation Scoring Pipeline
+============================================
+
+Reputação, badges e features de risco de fraude calculados em lote:
+
+- Features de todos os traders ativos em uma query (GROUP BY sobre
+  p2p_trades, com LEFT JOIN em users e user_reputations)
+- Scores vetorizados com numpy (mesmas regras do ReputationService)
+- Resultado gravado em trader_scores (uma linha por usuário, upsert em
+  lotes) e lido por chave primária
+- Recalculo completo periódico + recalculo dos usuários marcados por
+  eventos de trade (mark_dirty), agrupados a cada poucos segundos
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Boolean, DateTime, bindparam, text
+from sqlalchemy.orm import Session
+
+from app.models.reputation import TraderLevel, TraderScore
+
+logger = logging.getLogger(__name__)
+
+# Ordem dos bits de trader_scores.badges / risk_flags
+BADGES = ("fast_trader", "high_volume", "trusted_seller", "verified_id", "long_time_user", "dispute_free")
+RISK_FLAGS = (
+    # (flag, pontos de risco)
+    ("new_account", 25.0),
+    ("excessive_activity", 30.0),
+    ("recent_disputes", 20.0),
+)
+
+LEVELS = [level.value for level in TraderLevel]
+LEVEL_THRESHOLDS = np.array([11, 51, 151, 501, 1501, 5000])  # mínimo de trades de cada nível após NEWCOMER
+
+FEATURES = (
+    "total_trades", "completed_trades", "disputed_trades", "recent_disputes", "trades_today",
+    "total_volume_brl", "avg_completion_minutes", "account_age_days", "kyc_verified"
+)
+
+
+def decode_mask(mask: int, names: Sequence) -> List:
+    return [name for bit, name in enumerate(names) if mask & (1 << bit)]
+
+
+def score_batch(features: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Scores de N traders de uma vez.
+
+    `avg_completion_minutes` é NaN para quem não tem trade concluído.
+    """
+    total = features["total_trades"].astype(np.float64)
+    completed = features["completed_trades"].astype(np.float64)
+    disputed = features["disputed_trades"].astype(np.float64)
+    volume = features["total_volume_brl"].astype(np.float64)
+    avg_minutes = features["avg_completion_minutes"].astype(np.float64)
+    age = features["account_age_days"]
+
+    has_trades = total > 0
+    completion_rate = np.divide(completed * 100, total, out=np.zeros_like(total), where=has_trades)
+    dispute_rate = np.divide(disputed * 100, total, out=np.zeros_like(total), where=has_trades)
+
+    # Mesmas regras de calculate_user_reputation
+    speed_bonus = np.maximum(0.0, 20.0 - np.nan_to_num(avg_minutes, nan=20.0))
+    volume_bonus = np.minimum(volume / 10000.0, 20.0)
+    reputation = np.clip(completion_rate - dispute_rate * 10 + volume_bonus + speed_bonus, 0.0, 100.0)
+
+    level_index = np.searchsorted(LEVEL_THRESHOLDS, total, side="right")
+
+    badge_rules = (
+        ~np.isnan(avg_minutes) & (np.nan_to_num(avg_minutes, nan=np.inf) < 10),  # fast_trader
+        volume / 12 > 100000,                                                    # high_volume
+        (completed >= 100) & (completion_rate >= 98),                            # trusted_seller
+        features["kyc_verified"].astype(bool),                                   # verified_id
+        age > 730,                                                               # long_time_user
+        (total >= 500) & (disputed == 0),                                        # dispute_free
+    )
+    badges = np.zeros(len(total), dtype=np.int64)
+    for bit, rule in enumerate(badge_rules):
+        badges |= rule.astype(np.int64) << bit
+
+    risk_rules = (
+        age < 7,                              # new_account
+        features["trades_today"] > 10,        # excessive_activity
+        features["recent_disputes"] > 0,      # recent_disputes
+    )
+    risk_flags = np.zeros(len(total), dtype=np.int64)
+    user_risk = np.zeros(len(total), dtype=np.float64)
+    for bit, (rule, (_, points)) in enumerate(zip(risk_rules, RISK_FLAGS)):
+        risk_flags |= rule.astype(np.int64) << bit
+        user_risk += rule * points
+
+    return {
+        "reputation_score": np.round(reputation, 1),
+        "level_index": level_index,
+        "completion_rate": np.round(completion_rate, 2),
+        "dispute_rate": np.round(dispute_rate, 2),
+        "badges": badges,
+        "risk_flags": risk_flags,
+        "user_risk_score": user_risk,
+    }
+
+
+class ReputationScoringPipeline:
+    """Features em lote -> scores vetorizados -> trader_scores"""
+
+    ACTIVE_DAYS = 90  # traders com trade nesse período entram no recalculo completo
+    WRITE_CHUNK = 5000
+    DIRTY_FLUSH_SECONDS = 5
+
+    def __init__(self):
+        self._dirty: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Features
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _minutes_expr(db: Session) -> str:
+        if db.get_bind().dialect.name == "postgresql":
+            return "EXTRACT(EPOCH FROM (COALESCE(completed_at, updated_at) - created_at)) / 60.0"
+        return "(julianday(COALESCE(completed_at, updated_at)) - julianday(created_at)) * 1440.0"
+
+    def load_features(self, db: Session, user_ids: Optional[Iterable[Any]] = None, now: Optional[datetime] = None):
+        """Features dos traders ativos (ou de `user_ids`) -> (ids, dict de arrays, last_trade_at)"""
+        now = now or datetime.utcnow()
+        params: Dict[str, Any] = {"day": now - timedelta(days=1), "month": now - timedelta(days=30)}
+        if user_ids is not None:
+            params["user_ids"] = sorted({str(u) for u in user_ids})
+            if not params["user_ids"]:
+                return [], {name: np.zeros(0) for name in FEATURES}, []
+            filter_sql, having_sql = "WHERE user_id IN :user_ids", ""
+        else:
+            params["active_since"] = now - timedelta(days=self.ACTIVE_DAYS)
+            filter_sql, having_sql = "", "HAVING MAX(created_at) >= :active_since"
+
+        query = text(f"""
+            SELECT t.*, u.created_at AS user_created_at, COALESCE(r.kyc_verified, false) AS kyc_verified
+            FROM (
+                SELECT user_id,
+                       COUNT(*) AS total_trades,
+                       SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed_trades,
+                       SUM(CASE WHEN status = 'disputed' THEN 1 ELSE 0 END) AS disputed_trades,
+                       SUM(CASE WHEN status = 'disputed' AND created_at >= :month THEN 1 ELSE 0 END) AS recent_disputes,
+                       SUM(CASE WHEN created_at >= :day THEN 1 ELSE 0 END) AS trades_today,
+                       SUM(CASE WHEN status = 'completed' THEN total_fiat ELSE 0 END) AS total_volume_brl,
+                       AVG(CASE WHEN status = 'completed' THEN {self._minutes_expr(db)} END) AS avg_completion_minutes,
+                       MAX(created_at) AS last_trade_at
+                FROM (
+                    SELECT buyer_id AS user_id, status, total_fiat, created_at, completed_at, updated_at FROM p2p_trades
+                    UNION ALL
+                    SELECT seller_id AS user_id, status, total_fiat, created_at, completed_at, updated_at FROM p2p_trades
+                ) AS participants
+                {filter_sql}
+                GROUP BY user_id
+                {having_sql}
+            ) AS t
+            LEFT JOIN users u ON u.id = t.user_id
+            LEFT JOIN user_reputations r ON r.user_id = t.user_id
+        """).columns(last_trade_at=DateTime, user_created_at=DateTime, kyc_verified=Boolean)
+        if "user_ids" in params:
+            query = query.bindparams(bindparam("user_ids", expanding=True))
+
+        rows = db.execute(query, params).fetchall()
+        ids = [str(row.user_id) for row in rows]
+        columns = list(zip(*rows)) if rows else []
+        names = list(rows[0]._fields) if rows else []
+        by_name = dict(zip(names, columns))
+
+        def column(name, dtype):
+            values = by_name.get(name, ())
+            return np.array([np.nan if v is None else v for v in values], dtype=dtype)
+
+        features = {
+            "total_trades": column("total_trades", np.int64),
+            "completed_trades": column("completed_trades", np.int64),
+            "disputed_trades": column("disputed_trades", np.int64),
+            "recent_disputes": column("recent_disputes", np.int64),
+            "trades_today": column("trades_today", np.int64),
+            "total_volume_brl": column("total_volume_brl", np.float64),
+            "avg_completion_minutes": column("avg_completion_minutes", np.float64),
+            "kyc_verified": np.array(by_name.get("kyc_verified", ()), dtype=bool),
+            "account_age_days": np.array(
+                [(now - created).days if created else 0 for created in by_name.get("user_created_at", ())],
+                dtype=np.int64
+            ),
+        }
+        return ids, features, list(by_name.get("last_trade_at", ()))
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    def run(self, db: Session, user_ids: Optional[Iterable[Any]] = None, now: Optional[datetime] = None) -> int:
+        """Recalcula e grava os scores; retorna quantos traders foram atualizados"""
+        now = now or datetime.utcnow()
+        ids, features, last_trade_at = self.load_features(db, user_ids, now)
+        if not ids:
+            return 0
+        scores = score_batch(features)
+        self.store(db, ids, features, scores, last_trade_at, now)
+        return len(ids)
+
+    def store(self, db: Session, ids: List[str], features, scores, last_trade_at, now: datetime) -> None:
+        table = TraderScore.__table__
+        if db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        columns = {
+            "reputation_score": scores["reputation_score"].tolist(),
+            "trader_level": [LEVELS[i] for i in scores["level_index"].tolist()],
+            "badges": scores["badges"].tolist(),
+            "total_trades": features["total_trades"].tolist(),
+            "completed_trades": features["completed_trades"].tolist(),
+            "disputed_trades": features["disputed_trades"].tolist(),
+            "completion_rate": scores["completion_rate"].tolist(),
+            "dispute_rate": scores["dispute_rate"].tolist(),
+            "total_volume_brl": features["total_volume_brl"].tolist(),
+            "avg_completion_minutes": [None if np.isnan(v) else v for v in features["avg_completion_minutes"].tolist()],
+            "trades_today": features["trades_today"].tolist(),
+            "recent_disputes": features["recent_disputes"].tolist(),
+            "account_age_days": features["account_age_days"].tolist(),
+            "last_trade_at": last_trade_at,
+            "user_risk_score": scores["user_risk_score"].tolist(),
+            "risk_flags": scores["risk_flags"].tolist(),
+        }
+        names = list(columns)
+        for start in range(0, len(ids), self.WRITE_CHUNK):
+            end = start + self.WRITE_CHUNK
+            rows = [
+                dict(zip(names, values), user_id=user_id, computed_at=now)
+                for user_id, *values in zip(ids[start:end], *(columns[n][start:end] for n in names))
+            ]
+            stmt = dialect_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={name: stmt.excluded[name] for name in names + ["computed_at"]}
+            )
+            db.execute(stmt, rows)
+        db.commit()
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def get(self, db: Session, user_id: Any, compute: bool = True) -> Optional[TraderScore]:
+        """Score do usuário por chave primária; calcula na hora se ainda não existir"""
+        key = user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+        score = db.get(TraderScore, key)
+        if score is None and compute:
+            self.run(db, [key])
+            score = db.get(TraderScore, key)
+        return score
+
+    # ------------------------------------------------------------------
+    # Agendamento
+    # ------------------------------------------------------------------
+
+    def mark_dirty(self, user_ids: Iterable[Any]) -> None:
+        """Evento de trade: usuários entram no próximo lote incremental"""
+        self._dirty.update(str(u) for u in user_ids if u)
+
+    async def _loop(self, interval: int):
+        from app.core import db as core_db
+
+        def _run(user_ids):
+            db = core_db.SessionLocal()
+            try:
+                return self.run(db, user_ids)
+            finally:
+                db.close()
+
+        next_full = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if loop.time() >= next_full:
+                    self._dirty.clear()
+                    count = await asyncio.to_thread(_run, None)
+                    logger.info(f"🧮 Scores de reputação recalculados: {count} traders")
+                    next_full = loop.time() + interval
+                elif self._dirty:
+                    batch, self._dirty = self._dirty, set()
+                    await asyncio.to_thread(_run, batch)
+            except Exception as e:
+                logger.error(f"❌ Erro no pipeline de reputação: {e}")
+            await asyncio.sleep(self.DIRTY_FLUSH_SECONDS)
+
+    def start(self, interval: int = 3600):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Instância global
+reputation_scoring = ReputationScoringPipeline()
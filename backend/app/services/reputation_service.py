@@ -11,7 +11,7 @@ Author: HOLD Wallet Team
 
 from sqlalchemy.orm import Session
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
 from enum import Enum
 import uuid
@@ -20,6 +20,7 @@ import re
 from dataclasses import dataclass
 
 from app.core.exceptions import ValidationError
+from app.services.reputation_scoring import BADGES, RISK_FLAGS, decode_mask, reputation_scoring
 
 logger = logging.getLogger(__name__)
 
@@ -161,63 +162,62 @@ class ReputationService:
         db: Session,
         user_id: str
     ) -> Dict[str, Any]:
-        """Calcular reputação completa do usuário"""
+        """
+        Reputação completa do usuário.
+        
+        Lida de trader_scores (pipeline em lote, chave primária); só calcula
+        na hora se o usuário ainda não tiver score.
+        """
         try:
-            # Mock data - em produção buscar do banco
-            trade_history = {
-                "total_trades": 347,
-                "completed_trades": 342,
-                "cancelled_trades": 3,
-                "disputed_trades": 2,
-                "total_volume_brl": 2450000.00,
-                "avg_completion_time": 12.5,  # minutos
-                "avg_response_time": 3.2,     # minutos
-                "account_age_days": 456,
-                "last_active": datetime.now() - timedelta(hours=2)
-            }
-            
-            # Calcular score base (0-100)
-            completion_rate = (trade_history["completed_trades"] / trade_history["total_trades"]) * 100
-            dispute_rate = (trade_history["disputed_trades"] / trade_history["total_trades"]) * 100
-            
-            # Fatores de score
-            completion_score = min(completion_rate, 100)
-            dispute_penalty = dispute_rate * 10  # -10 pontos por 1% de disputas
-            volume_bonus = min(trade_history["total_volume_brl"] / 10000, 20)  # Até 20 pontos por volume
-            speed_bonus = max(0, 20 - trade_history["avg_completion_time"])  # Bonus por velocidade
-            
-            base_score = completion_score - dispute_penalty + volume_bonus + speed_bonus
-            reputation_score = max(0, min(100, base_score))
+            score = reputation_scoring.get(db, user_id)
+            trade_history = self._trade_history(score)
+            reputation_score = score.reputation_score if score else 0.0
             
             # Determinar nível de trader
             trader_level = self._determine_trader_level(trade_history["total_trades"])
             
-            # Verificar badges conquistados
-            earned_badges = self._calculate_earned_badges(user_id, trade_history)
+            # Badges conquistados (bitmask calculado pelo pipeline)
+            earned_badges = self._earned_badges(score.badges if score else 0, trade_history)
             
             # Análise de confiabilidade
             trust_analysis = self._analyze_trustworthiness(trade_history, reputation_score)
             
+            avg_completion = trade_history["avg_completion_time"]
             return {
                 "user_id": user_id,
                 "reputation_score": round(reputation_score, 1),
                 "trader_level": trader_level,
                 "total_trades": trade_history["total_trades"],
-                "completion_rate": round(completion_rate, 1),
-                "dispute_rate": round(dispute_rate, 2),
-                "avg_completion_time": f"{trade_history['avg_completion_time']:.1f} min",
-                "avg_response_time": f"{trade_history['avg_response_time']:.1f} min",
+                "completion_rate": round(score.completion_rate if score else 0.0, 1),
+                "dispute_rate": round(score.dispute_rate if score else 0.0, 2),
+                "avg_completion_time": f"{avg_completion:.1f} min" if avg_completion is not None else None,
+                "avg_response_time": None,
                 "total_volume": f"R$ {trade_history['total_volume_brl']:,.2f}",
                 "account_age": f"{trade_history['account_age_days']} dias",
                 "badges": earned_badges,
                 "trust_indicators": trust_analysis,
-                "last_seen": trade_history["last_active"].isoformat()
+                "last_seen": trade_history["last_active"].isoformat() if trade_history["last_active"] else None,
+                "computed_at": score.computed_at.isoformat() if score else None
             }
             
         except Exception as e:
             logger.error(f"Failed to calculate reputation: {e}")
             raise ValidationError(f"Failed to calculate reputation: {str(e)}")
 
+    @staticmethod
+    def _trade_history(score) -> Dict[str, Any]:
+        """Features gravadas em trader_scores (zeradas para quem nunca negociou)"""
+        return {
+            "total_trades": score.total_trades if score else 0,
+            "completed_trades": score.completed_trades if score else 0,
+            "disputed_trades": score.disputed_trades if score else 0,
+            "total_volume_brl": score.total_volume_brl if score else 0.0,
+            "avg_completion_time": score.avg_completion_minutes if score else None,
+            "avg_response_time": None,
+            "account_age_days": score.account_age_days if score else 0,
+            "last_active": score.last_trade_at if score else None
+        }
+
     def _determine_trader_level(self, total_trades: int) -> Dict[str, Any]:
         """Determinar nível do trader baseado em trades"""
         if total_trades >= 5000:
@@ -271,66 +271,24 @@ class ReputationService:
         }
         return icons.get(level, "⭐")
 
-    def _calculate_earned_badges(self, user_id: str, trade_history: Dict) -> List[Dict[str, Any]]:
-        """Calcular badges conquistados pelo usuário"""
-        earned = []
-        
-        # Fast Trader
-        if trade_history["avg_completion_time"] < 10:
-            earned.append({
-                "badge": "fast_trader",
-                "name": self.REPUTATION_BADGES["fast_trader"]["name"],
-                "earned_at": "2024-10-15",
-                "description": "Completa trades em menos de 10 minutos"
-            })
-        
-        # High Volume
-        monthly_volume = trade_history["total_volume_brl"] / 12  # Estimativa mensal
-        if monthly_volume > 100000:
-            earned.append({
-                "badge": "high_volume",
-                "name": self.REPUTATION_BADGES["high_volume"]["name"],
-                "earned_at": "2024-09-22",
-                "description": f"Volume médio mensal: R$ {monthly_volume:,.0f}"
-            })
-        
-        # Trusted Seller
-        completion_rate = (trade_history["completed_trades"] / trade_history["total_trades"]) * 100
-        if trade_history["completed_trades"] >= 100 and completion_rate >= 98:
-            earned.append({
-                "badge": "trusted_seller",
-                "name": self.REPUTATION_BADGES["trusted_seller"]["name"],
-                "earned_at": "2024-08-10",
-                "description": f"{completion_rate:.1f}% taxa de sucesso"
-            })
-        
-        # Verified ID (sempre ativo para demo)
-        earned.append({
-            "badge": "verified_id",
-            "name": self.REPUTATION_BADGES["verified_id"]["name"],
-            "earned_at": "2024-05-01",
-            "description": "Documentos verificados pela HOLD Wallet"
-        })
-        
-        # Long Time User
-        if trade_history["account_age_days"] > 730:  # 2+ anos
-            earned.append({
-                "badge": "long_time_user",
-                "name": self.REPUTATION_BADGES["long_time_user"]["name"],
-                "earned_at": "2024-05-01",
-                "description": f"{trade_history['account_age_days']} dias na plataforma"
-            })
-        
-        # Dispute Free
-        if trade_history["total_trades"] >= 500 and trade_history["disputed_trades"] == 0:
-            earned.append({
-                "badge": "dispute_free",
-                "name": self.REPUTATION_BADGES["dispute_free"]["name"],
-                "earned_at": "2024-11-01",
-                "description": "500+ trades sem nenhuma disputa"
-            })
-        
-        return earned
+    def _earned_badges(self, mask: int, trade_history: Dict) -> List[Dict[str, Any]]:
+        """Badges do bitmask de trader_scores"""
+        descriptions = {
+            "fast_trader": "Completa trades em menos de 10 minutos",
+            "high_volume": f"Volume médio mensal: R$ {trade_history['total_volume_brl'] / 12:,.0f}",
+            "trusted_seller": "100+ trades concluídos com 98%+ de sucesso",
+            "verified_id": "Documentos verificados pela HOLD Wallet",
+            "long_time_user": f"{trade_history['account_age_days']} dias na plataforma",
+            "dispute_free": "500+ trades sem nenhuma disputa"
+        }
+        return [
+            {
+                "badge": badge,
+                "name": self.REPUTATION_BADGES[badge]["name"],
+                "description": descriptions[badge]
+            }
+            for badge in decode_mask(mask, BADGES)
+        ]
 
     def _analyze_trustworthiness(self, trade_history: Dict, reputation_score: float) -> Dict[str, Any]:
         """Analisar indicadores de confiabilidade"""
@@ -371,8 +329,8 @@ class ReputationService:
             })
         
         # Ativo recentemente
-        hours_since_active = (datetime.now() - trade_history["last_active"]).total_seconds() / 3600
-        if hours_since_active < 24:
+        last_active = trade_history["last_active"]
+        if last_active and (datetime.utcnow() - last_active).total_seconds() / 3600 < 24:
             indicators.append({
                 "type": "activity",
                 "icon": "🟢",
@@ -381,7 +339,7 @@ class ReputationService:
             })
         
         # Resposta rápida
-        if trade_history["avg_response_time"] < 5:
+        if trade_history["avg_response_time"] is not None and trade_history["avg_response_time"] < 5:
             indicators.append({
                 "type": "responsiveness",
                 "icon": "⚡",
@@ -480,63 +438,44 @@ class ReputationService:
             }
 
     async def _analyze_user_patterns(self, db: Session, user_id: str) -> Dict[str, Any]:
-        """Analisar padrões comportamentais do usuário"""
+        """Padrões comportamentais do usuário (features pré-calculadas em trader_scores)"""
         indicators = []
-        risk = 0.0
+        score = reputation_scoring.get(db, user_id)
+        if score is None:
+            return {"risk_contribution": 0.0, "indicators": indicators}
         
-        # Mock data - em produção buscar do banco
-        user_data = {
-            "account_age_days": 456,
-            "trades_today": 3,
-            "trades_this_week": 15,
-            "failed_kyc_attempts": 0,
-            "recent_disputes": 1,
-            "ip_country_changes": 0,
-            "device_changes": 1
-        }
+        flags = decode_mask(score.risk_flags, [flag for flag, _ in RISK_FLAGS])
+        points = dict(RISK_FLAGS)
         
         # Conta muito nova
-        if user_data["account_age_days"] < 7:
+        if "new_account" in flags:
             indicators.append({
                 "type": "new_account",
                 "severity": "medium",
-                "message": f"Conta criada há apenas {user_data['account_age_days']} dias",
-                "risk_points": 25
+                "message": f"Conta criada há apenas {score.account_age_days} dias",
+                "risk_points": points["new_account"]
             })
-            risk += 25
         
         # Atividade excessiva
-        if user_data["trades_today"] > 10:
+        if "excessive_activity" in flags:
             indicators.append({
                 "type": "excessive_activity",
                 "severity": "high",
-                "message": f"{user_data['trades_today']} trades hoje (acima do normal)",
-                "risk_points": 30
+                "message": f"{score.trades_today} trades hoje (acima do normal)",
+                "risk_points": points["excessive_activity"]
             })
-            risk += 30
         
         # Disputas recentes
-        if user_data["recent_disputes"] > 0:
+        if "recent_disputes" in flags:
             indicators.append({
                 "type": "recent_disputes",
                 "severity": "medium",
-                "message": f"{user_data['recent_disputes']} disputas recentes",
-                "risk_points": 20
+                "message": f"{score.recent_disputes} disputas recentes",
+                "risk_points": points["recent_disputes"]
             })
-            risk += 20
-        
-        # Mudanças de IP/localização suspeitas
-        if user_data["ip_country_changes"] > 2:
-            indicators.append({
-                "type": "location_anomaly",
-                "severity": "high",
-                "message": "Múltiplas mudanças de país detectadas",
-                "risk_points": 40
-            })
-            risk += 40
         
         return {
-            "risk_contribution": risk,
+            "risk_contribution": score.user_risk_score,
             "indicators": indicators
         }
 
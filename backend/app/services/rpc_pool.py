@@ -0,0 +1,460 @@
+"""
+🛰️ RPC Endpoint Pool
+====================
+
+Pool de endpoints RPC por rede com score de saúde:
+- Latência (janela móvel) e taxa de erro por endpoint
+- Cada requisição vai para o endpoint de melhor score, com failover
+- Hedge opcional para leituras críticas: segunda requisição ao próximo
+  endpoint depois do p95 do primeiro, vence a primeira resposta
+- Endpoints doentes são removidos do rodízio e sondados de novo depois
+  (backoff exponencial) pelo probe periódico (RPCPoolManager.start)
+- Envio de transação (eth_sendRawTransaction) nunca tem failover nem
+  hedge: vai a um endpoint só, e erro ambíguo sobe para quem chamou (o
+  nonce_manager decide), em vez de retransmitir a mesma TX em outro nó
+- Um pool por conjunto de URLs: um rpc_url explícito nunca é misturado ao
+  pool padrão da rede. RPCs públicos só entram com RPC_POOL_PUBLIC_FALLBACKS
+
+Usado tanto pelo web3 síncrono (PooledHTTPProvider) quanto por chamadas
+JSON-RPC assíncronas (RPCEndpointPool.call).
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+from web3 import Web3
+from web3.providers import HTTPProvider
+from web3.providers.base import JSONBaseProvider
+
+from app.core.config import settings
+from app.services.chain_adapters.base import ChainRPCError, http_pool
+
+logger = logging.getLogger(__name__)
+
+
+# RPCs públicos usados como reserva do RPC configurado
+PUBLIC_RPC_FALLBACKS: Dict[str, List[str]] = {
+    "ethereum": ["https://ethereum-rpc.publicnode.com", "https://eth.llamarpc.com"],
+    "polygon": ["https://polygon-bor-rpc.publicnode.com", "https://polygon-rpc.com"],
+    "bsc": ["https://bsc-rpc.publicnode.com", "https://bsc-dataseed1.defibit.io"],
+    "base": ["https://base-rpc.publicnode.com", "https://base.llamarpc.com"],
+    "avalanche": ["https://avalanche-c-chain-rpc.publicnode.com"],
+}
+
+# Métodos que transmitem transação: sem failover/hedge
+SEND_METHODS = frozenset({"eth_sendRawTransaction", "eth_sendTransaction"})
+
+# Erros JSON-RPC que indicam problema do endpoint (não da requisição)
+ENDPOINT_ERROR_CODES = {-32005, -32029, 429}
+ENDPOINT_ERROR_MARKERS = ("rate limit", "too many requests", "header not found", "timeout", "capacity")
+
+
+def _is_endpoint_error(response: Dict[str, Any]) -> bool:
+    error = response.get("error") if isinstance(response, dict) else None
+    if not error:
+        return False
+    if isinstance(error, dict):
+        if error.get("code") in ENDPOINT_ERROR_CODES:
+            return True
+        error = error.get("message", "")
+    return any(marker in str(error).lower() for marker in ENDPOINT_ERROR_MARKERS)
+
+
+@dataclass
+class EndpointHealth:
+    """Estatísticas móveis de um endpoint"""
+    url: str
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    outcomes: Deque[bool] = field(default_factory=lambda: deque(maxlen=50))
+    consecutive_failures: int = 0
+    evicted_until: float = 0.0
+    evictions: int = 0
+    probing: bool = False
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def evicted(self) -> bool:
+        return self.evicted_until > 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "p50": self.latency_percentile(0.5),
+            "p95": self.latency_percentile(0.95),
+            "error_rate": round(self.error_rate, 3),
+            "evicted": self.evicted,
+            "evictions": self.evictions
+        }
+
+
+class RPCEndpointPool:
+    """Endpoints de uma rede ordenados por score (latência x taxa de erro)"""
+
+    DEFAULT_LATENCY = 0.5  # segundos, para endpoints sem amostras
+    ERROR_PENALTY = 4.0
+    EVICT_AFTER_FAILURES = 3
+    EVICT_ERROR_RATE = 0.5
+    MIN_SAMPLES = 10
+    EVICTION_SECONDS = 30
+    MAX_EVICTION_SECONDS = 300
+    HEDGE_MIN_DELAY = 0.05
+    TIMEOUT = 10.0
+
+    def __init__(
+        self,
+        network: str,
+        urls: List[str],
+        hedge: bool = False,
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        if not urls:
+            raise ValueError(f"Nenhum RPC configurado para {network}")
+        self.network = network
+        self.hedge = hedge
+        self.endpoints: Dict[str, EndpointHealth] = {url: EndpointHealth(url) for url in urls}
+        self._client = client
+        self._providers: Dict[str, HTTPProvider] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Score / saúde
+    # ------------------------------------------------------------------
+
+    def score(self, endpoint: EndpointHealth) -> float:
+        latency = endpoint.latency_percentile(0.5) or self.DEFAULT_LATENCY
+        return latency * (1 + self.ERROR_PENALTY * endpoint.error_rate)
+
+    def ranked(self) -> List[EndpointHealth]:
+        """
+        Endpoints disponíveis do melhor para o pior.
+
+        Endpoint com eviction vencida volta "em observação": uma falha o
+        remove de novo. Se todos estiverem fora, usa o que volta primeiro.
+        """
+        now = time.monotonic()
+        with self._lock:
+            available = [e for e in self.endpoints.values() if e.evicted_until <= now]
+            if not available:
+                return sorted(self.endpoints.values(), key=lambda e: e.evicted_until)
+            return sorted(available, key=self.score)
+
+    def record(self, url: str, latency: float, ok: bool):
+        with self._lock:
+            endpoint = self.endpoints[url]
+            endpoint.outcomes.append(ok)
+            if ok:
+                endpoint.latencies.append(latency)
+                endpoint.consecutive_failures = 0
+                if endpoint.evicted:
+                    logger.info(f"✅ RPC {self.network} de volta ao rodízio: {url}")
+                    endpoint.evicted_until = 0.0
+                    endpoint.evictions = 0
+                return
+            endpoint.consecutive_failures += 1
+            unhealthy = (
+                endpoint.consecutive_failures >= self.EVICT_AFTER_FAILURES
+                or (len(endpoint.outcomes) >= self.MIN_SAMPLES and endpoint.error_rate > self.EVICT_ERROR_RATE)
+                or endpoint.evicted  # falhou ainda em observação
+            )
+            if unhealthy:
+                self._evict(endpoint)
+
+    def _evict(self, endpoint: EndpointHealth):
+        backoff = min(self.EVICTION_SECONDS * 2 ** endpoint.evictions, self.MAX_EVICTION_SECONDS)
+        endpoint.evicted_until = time.monotonic() + backoff
+        endpoint.evictions += 1
+        # Estatísticas recomeçam quando voltar ao rodízio
+        endpoint.outcomes.clear()
+        endpoint.latencies.clear()
+        logger.warning(f"⚠️ RPC {self.network} removido por {backoff}s: {endpoint.url}")
+
+    def hedge_delay(self, endpoint: EndpointHealth) -> float:
+        p95 = endpoint.latency_percentile(0.95)
+        return max(p95 if p95 is not None else self.DEFAULT_LATENCY, self.HEDGE_MIN_DELAY)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [e.to_dict() for e in self.endpoints.values()]
+
+    # ------------------------------------------------------------------
+    # Assíncrono (httpx)
+    # ------------------------------------------------------------------
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or http_pool.client()
+
+    async def _send(self, endpoint: EndpointHealth, payload: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.monotonic()
+        try:
+            response = await self.client.post(endpoint.url, json=payload, timeout=self.TIMEOUT)
+            if response.status_code >= 300:
+                raise ChainRPCError(f"{self.network}: HTTP {response.status_code} em {endpoint.url}")
+            data = response.json()
+            if _is_endpoint_error(data):
+                raise ChainRPCError(f"{self.network}: {data['error']} em {endpoint.url}")
+        except asyncio.CancelledError:
+            # Perdedor de um hedge: não conta contra o endpoint
+            raise
+        except (httpx.HTTPError, ValueError, ChainRPCError) as e:
+            self.record(endpoint.url, time.monotonic() - start, ok=False)
+            raise ChainRPCError(str(e)) from e
+        self.record(endpoint.url, time.monotonic() - start, ok=True)
+        return data
+
+    async def _hedged(self, primary: EndpointHealth, backup: EndpointHealth, payload: Dict[str, Any]) -> Dict[str, Any]:
+        tasks = {asyncio.ensure_future(self._send(primary, payload))}
+        done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(primary))
+        if done:
+            task = done.pop()
+            if task.exception() is None:
+                return task.result()
+            tasks = set()
+        tasks.add(asyncio.ensure_future(self._send(backup, payload)))
+
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise error or ChainRPCError(f"{self.network}: hedge sem resposta")
+
+    async def call(self, method: str, params: Optional[list] = None, hedge: Optional[bool] = None) -> Any:
+        """
+        Chamada JSON-RPC com failover (e hedge, se habilitado).
+
+        Raises:
+            ChainRPCError: todos os endpoints falharam ou o RPC retornou erro
+        """
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []}
+        hedge = self.hedge if hedge is None else hedge
+        candidates = self.ranked()
+        last_error: Optional[Exception] = None
+
+        if method in SEND_METHODS:
+            return self._result(method, await self._send(candidates[0], payload))
+
+        if hedge and len(candidates) > 1:
+            try:
+                data = await self._hedged(candidates[0], candidates[1], payload)
+                return self._result(method, data)
+            except ChainRPCError as e:
+                last_error = e
+            candidates = candidates[2:]
+
+        for endpoint in candidates:
+            try:
+                data = await self._send(endpoint, payload)
+            except ChainRPCError as e:
+                last_error = e
+                continue
+            return self._result(method, data)
+        raise ChainRPCError(f"{self.network}: todos os RPCs falharam ({last_error})")
+
+    async def call_batch(self, calls: List[Tuple[str, list]]) -> List[Any]:
+        """
+        Várias chamadas JSON-RPC em uma única requisição HTTP, com failover.
+
+        Returns:
+            Resultados na ordem das chamadas
+
+        Raises:
+            ChainRPCError: todos os endpoints falharam ou alguma chamada retornou erro
+        """
+        if not calls:
+            return []
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        last_error: Optional[Exception] = None
+        candidates = self.ranked()
+        if any(method in SEND_METHODS for method, _ in calls):
+            candidates = candidates[:1]
+        for endpoint in candidates:
+            try:
+                data = await self._send(endpoint, payload)
+            except ChainRPCError as e:
+                last_error = e
+                continue
+            if not isinstance(data, list):
+                # Endpoint sem suporte a batch
+                last_error = ChainRPCError(f"{self.network}: batch recusado por {endpoint.url}")
+                continue
+            by_id = {item.get("id"): item for item in data}
+            return [self._result(method, by_id.get(i, {})) for i, (method, _) in enumerate(calls)]
+        raise ChainRPCError(f"{self.network}: todos os RPCs falharam ({last_error})")
+
+    def _result(self, method: str, data: Dict[str, Any]) -> Any:
+        if data.get("error"):
+            raise ChainRPCError(f"{self.network} {method}: {data['error']}")
+        return data.get("result")
+
+    async def probe(self) -> int:
+        """Sonda endpoints fora do rodízio cuja eviction venceu; retorna quantos voltaram"""
+        now = time.monotonic()
+        due = [e for e in self.endpoints.values() if e.evicted and e.evicted_until <= now]
+        restored = 0
+        for endpoint in due:
+            try:
+                await self._send(endpoint, {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []})
+                restored += 1
+            except ChainRPCError:
+                pass
+        return restored
+
+    # ------------------------------------------------------------------
+    # Síncrono (web3)
+    # ------------------------------------------------------------------
+
+    def _provider(self, url: str) -> HTTPProvider:
+        provider = self._providers.get(url)
+        if provider is None:
+            provider = HTTPProvider(url, request_kwargs={"timeout": self.TIMEOUT})
+            self._providers[url] = provider
+        return provider
+
+    def make_request(self, method: str, params: Any) -> Dict[str, Any]:
+        """Requisição web3 com failover (sem hedge: chamadas síncronas; envio de TX sem failover)"""
+        last_error: Optional[Exception] = None
+        candidates = self.ranked()
+        if method in SEND_METHODS:
+            candidates = candidates[:1]
+        for endpoint in candidates:
+            start = time.monotonic()
+            try:
+                response = self._provider(endpoint.url).make_request(method, params)
+            except Exception as e:
+                self.record(endpoint.url, time.monotonic() - start, ok=False)
+                last_error = e
+                continue
+            if _is_endpoint_error(response):
+                self.record(endpoint.url, time.monotonic() - start, ok=False)
+                last_error = ChainRPCError(str(response.get("error")))
+                continue
+            self.record(endpoint.url, time.monotonic() - start, ok=True)
+            return response
+        raise ChainRPCError(f"{self.network}: todos os RPCs falharam ({last_error})")
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """Provider web3 que delega cada requisição ao pool"""
+
+    def __init__(self, pool: RPCEndpointPool):
+        super().__init__()
+        self.pool = pool
+
+    def make_request(self, method, params):
+        return self.pool.make_request(method, params)
+
+    def __str__(self) -> str:
+        return f"RPC pool {self.pool.network}"
+
+
+class RPCPoolManager:
+    """Um pool (e um Web3) por (rede, conjunto de URLs), montado a partir das settings"""
+
+    def __init__(self):
+        self._pools: Dict[Tuple[str, Tuple[str, ...]], RPCEndpointPool] = {}
+        self._web3: Dict[Tuple[str, Tuple[str, ...]], Web3] = {}
+        self._lock = threading.Lock()
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def urls_for(self, network: str, primary_url: Optional[str] = None) -> List[str]:
+        network = network.lower()
+        primary = primary_url or getattr(settings, f"{network.upper()}_RPC_URL", None)
+        urls = [primary] if primary else []
+        urls += settings.RPC_POOL_URLS.get(network, [])
+        if settings.RPC_POOL_PUBLIC_FALLBACKS:
+            urls += PUBLIC_RPC_FALLBACKS.get(network, [])
+        return list(dict.fromkeys(u for u in urls if u))
+
+    def _key(self, network: str, primary_url: Optional[str]) -> Tuple[str, Tuple[str, ...]]:
+        network = network.lower()
+        return network, tuple(self.urls_for(network, primary_url))
+
+    def pool(self, network: str, primary_url: Optional[str] = None) -> RPCEndpointPool:
+        key = self._key(network, primary_url)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = RPCEndpointPool(key[0], list(key[1]), hedge=settings.RPC_HEDGE_ENABLED)
+                self._pools[key] = pool
+            return pool
+
+    def web3(self, network: str, primary_url: Optional[str] = None) -> Web3:
+        key = self._key(network, primary_url)
+        pool = self.pool(network, primary_url)
+        with self._lock:
+            w3 = self._web3.get(key)
+            if w3 is None:
+                w3 = Web3(PooledHTTPProvider(pool))
+                self._web3[key] = w3
+            return w3
+
+    def stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        stats: Dict[str, List[Dict[str, Any]]] = {}
+        for (network, _), pool in list(self._pools.items()):
+            stats.setdefault(network, []).extend(pool.stats())
+        return stats
+
+    # ------------------------------------------------------------------
+    # Probe periódico dos endpoints fora do rodízio
+    # ------------------------------------------------------------------
+
+    async def probe_all(self) -> int:
+        results = await asyncio.gather(
+            *(pool.probe() for pool in list(self._pools.values())), return_exceptions=True
+        )
+        return sum(r for r in results if isinstance(r, int))
+
+    async def _probe_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                restored = await self.probe_all()
+                if restored:
+                    logger.info(f"🛰️ {restored} RPC(s) de volta após probe")
+            except Exception as e:
+                logger.error(f"❌ Erro no probe dos pools RPC: {e}")
+
+    def start(self, interval: Optional[float] = None):
+        """Inicia o probe periódico (chamado no startup da aplicação)"""
+        if self._probe_task and not self._probe_task.done():
+            return
+        self._probe_task = asyncio.create_task(self._probe_loop(interval or settings.RPC_POOL_PROBE_SECONDS))
+
+    async def stop(self):
+        if self._probe_task:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+            self._probe_task = None
+
+
+# Instância global
+rpc_pools = RPCPoolManager()
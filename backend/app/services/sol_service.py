@@ -16,13 +16,13 @@ Data: Janeiro 2026
 import asyncio
 import base58
 import base64
-import requests
 import logging
 import struct
-from decimal import Decimal
-from typing import Dict, Optional, List
+from typing import Optional
 from dataclasses import dataclass
 
+from app.services.chain_adapters import ChainRPCError, SolanaAdapter
+
 logger = logging.getLogger(__name__)
 
 # ============================================
@@ -65,39 +65,10 @@ class SOLService:
         self.devnet = devnet
         self.rpc_url = SOLANA_RPC_DEVNET if devnet else SOLANA_RPC_MAINNET
         self.explorer_base = f"{SOLANA_EXPLORER}?cluster=devnet" if devnet else SOLANA_EXPLORER
+        # Cliente assíncrono (pool compartilhado) usado nos envios
+        self.adapter = SolanaAdapter(self.rpc_url)
         logger.info(f"☀️ SOLService initialized ({'devnet' if devnet else 'mainnet'})")
     
-    def _rpc_call(self, method: str, params: List = None) -> Optional[Dict]:
-        """Faz uma chamada RPC para o node Solana."""
-        try:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": method,
-                "params": params or []
-            }
-            
-            response = requests.post(
-                self.rpc_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if 'error' in result:
-                    logger.error(f"❌ RPC error: {result['error']}")
-                    return None
-                return result.get('result')
-            
-            logger.error(f"❌ HTTP error: {response.status_code}")
-            return None
-            
-        except Exception as e:
-            logger.error(f"❌ RPC call failed: {e}")
-            return None
-    
     def validate_address(self, address: str) -> bool:
         """Valida um endereço Solana (base58, 32-44 chars)."""
         if not address:
@@ -109,30 +80,6 @@ class SOLService:
         except Exception:
             return False
     
-    def get_balance(self, address: str) -> Optional[Decimal]:
-        """Consulta saldo de um endereço SOL."""
-        try:
-            result = self._rpc_call("getBalance", [address])
-            if result and 'value' in result:
-                lamports = result['value']
-                return Decimal(str(lamports)) / Decimal(str(LAMPORT))
-            return None
-        except Exception as e:
-            logger.error(f"❌ Erro consultando saldo SOL: {e}")
-            return None
-    
-    def get_recent_blockhash(self) -> Optional[str]:
-        """Obtém blockhash recente para transação."""
-        result = self._rpc_call("getLatestBlockhash")
-        if result and 'value' in result:
-            return result['value']['blockhash']
-        return None
-    
-    def get_minimum_rent(self) -> int:
-        """Retorna o mínimo de lamports para rent exemption."""
-        result = self._rpc_call("getMinimumBalanceForRentExemption", [0])
-        return result or 890880  # Default ~0.00089 SOL
-    
     async def send_sol(
         self,
         from_address: str,
@@ -175,7 +122,11 @@ class SOLService:
             keypair = Keypair.from_bytes(secret_key)
             
             # 2. Obter blockhash recente
-            blockhash = self.get_recent_blockhash()
+            try:
+                blockhash = await self.adapter.get_recent_blockhash()
+            except ChainRPCError as e:
+                logger.error(f"❌ RPC call failed: {e}")
+                blockhash = None
             if not blockhash:
                 return SOLTransactionResult(
                     success=False,
@@ -209,10 +160,7 @@ class SOLService:
             tx_bytes = bytes(tx)
             tx_base64 = base64.b64encode(tx_bytes).decode('utf-8')
             
-            result = self._rpc_call("sendTransaction", [
-                tx_base64,
-                {"encoding": "base64", "preflightCommitment": "confirmed"}
-            ])
+            result = await self.adapter.broadcast(tx_base64)
             
             if result:
                 tx_hash = result
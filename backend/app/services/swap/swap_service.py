@@ -25,6 +25,8 @@ from .oneinch_service import oneinch_service, NATIVE_TOKEN_ADDRESS
 from .fee_service import swap_fee_service
 from app.services.blockchain_signer import BlockchainSigner
 from app.services.price_aggregator import price_aggregator
+from app.services.nonce_manager import nonce_manager
+from app.services.gas_oracle_service import gas_oracle_service
 
 logger = logging.getLogger(__name__)
 
@@ -688,29 +690,21 @@ class SwapService:
                 logger.error(f"❌ Não conectado à rede {network}")
                 return None
             
-            # Obter nonce
-            nonce = w3.eth.get_transaction_count(w3.to_checksum_address(from_address))
+            # Fees do gas oracle (fast: swap tem cotação com prazo curto)
+            fee_fields = gas_oracle_service.tx_fee_fields(network, "fast", w3=w3)
             
-            # Obter gas price
-            gas_price = w3.eth.gas_price
-            
-            # Construir transação
+            # Construir transação (nonce alocado pelo nonce_manager)
             transaction = {
-                "nonce": nonce,
                 "to": w3.to_checksum_address(to_address),
                 "value": int(value) if value else 0,
                 "gas": gas,
-                "gasPrice": int(gas_price * 1.1),  # 10% a mais para confirmar rápido
+                **fee_fields,
                 "chainId": chain_id,
                 "data": data,
             }
             
             # Assinar e enviar
-            signed_tx = w3.eth.account.sign_transaction(transaction, private_key)
-            raw_tx = getattr(signed_tx, 'rawTransaction', None) or getattr(signed_tx, 'raw_transaction', None)
-            tx_hash = w3.eth.send_raw_transaction(raw_tx)
-            
-            return tx_hash.hex()
+            return nonce_manager.send_transaction(w3, transaction, private_key, sender=from_address)
             
         except Exception as e:
             logger.error(f"❌ Erro ao enviar transação: {e}")
@@ -25,6 +25,7 @@ from datetime import datetime, timezone
 import hashlib
 
 from app.services.crypto_service import CryptoService
+from app.services.address_index_service import watched_addresses, OwnerType
 from app.models.system_blockchain_wallet import (
     SystemBlockchainWallet,
     SystemBlockchainAddress,
@@ -368,6 +369,8 @@ class SystemBlockchainWalletService:
         
         db.add(address_obj)
         
+        watched_addresses.add(network, address, OwnerType.SYSTEM_WALLET, wallet.id)
+        
         return {
             "address": address,
             "network": network,
@@ -21,6 +21,10 @@ from app.models.system_blockchain_wallet import (
     SystemWalletTransaction
 )
 from app.core.config import settings
+from app.services.balance_cache_service import balance_cache_service
+from app.services.nonce_manager import nonce_manager
+from app.services.rpc_pool import rpc_pools
+from app.services.gas_oracle_service import gas_oracle_service
 
 logger = logging.getLogger(__name__)
 
@@ -317,6 +321,11 @@ class SystemWalletSendService:
                 except Exception as e:
                     logger.error(f"Erro ao registrar transacao: {e}")
                     # Nao falha a operacao, apenas loga
+                
+                await balance_cache_service.mark_dirty_many([
+                    (from_address, network),
+                    (to_address, network),
+                ])
             
             # 7. Adicionar info extra ao resultado
             if result:
@@ -353,7 +362,7 @@ class SystemWalletSendService:
         """Envia token nativo em redes EVM (ETH, MATIC, BNB, etc.)"""
         try:
             rpc_url = self._get_rpc_url(network)
-            w3 = Web3(Web3.HTTPProvider(rpc_url))
+            w3 = rpc_pools.web3(network, rpc_url)
             
             if not w3.is_connected():
                 return {
@@ -369,7 +378,8 @@ class SystemWalletSendService:
             logger.info(f"  Saldo disponivel: {balance}")
             
             # Estimar gas
-            gas_price = w3.eth.gas_price
+            gas_estimate = gas_oracle_service.get_estimate(network, w3)
+            gas_price = gas_estimate.max_fee()  # EIP-1559: saldo precisa cobrir o maxFeePerGas
             gas_limit = 21000  # Transfer simples
             gas_cost_wei = gas_price * gas_limit
             gas_cost = Decimal(str(w3.from_wei(gas_cost_wei, 'ether')))
@@ -383,24 +393,17 @@ class SystemWalletSendService:
                     "message": f"Saldo insuficiente. Disponivel: {balance}, Necessario: {total_needed} (incluindo gas: {gas_cost})"
                 }
             
-            # Construir transacao
-            nonce = w3.eth.get_transaction_count(Web3.to_checksum_address(from_address))
-            
+            # Construir transacao (nonce alocado pelo nonce_manager)
             tx = {
-                'nonce': nonce,
                 'to': Web3.to_checksum_address(to_address),
                 'value': w3.to_wei(amount, 'ether'),
                 'gas': gas_limit,
-                'gasPrice': gas_price,
+                **gas_estimate.tx_fields(),
                 'chainId': self.CHAIN_IDS.get(network, 1)
             }
             
-            # Assinar
-            signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-            
-            # Enviar
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            tx_hash_hex = tx_hash.hex()
+            # Assinar e enviar
+            tx_hash_hex = nonce_manager.send_transaction(w3, tx, private_key, sender=from_address)
             
             logger.info(f"  TX Hash: {tx_hash_hex}")
             
@@ -433,7 +436,7 @@ class SystemWalletSendService:
         """Envia token ERC-20 em redes EVM (USDT, USDC, etc.)"""
         try:
             rpc_url = self._get_rpc_url(network)
-            w3 = Web3(Web3.HTTPProvider(rpc_url))
+            w3 = rpc_pools.web3(network, rpc_url)
             
             if not w3.is_connected():
                 return {
@@ -483,7 +486,8 @@ class SystemWalletSendService:
             native_balance = Decimal(str(w3.from_wei(native_balance_wei, 'ether')))
             
             # Estimar gas para transfer de token
-            gas_price = w3.eth.gas_price
+            gas_estimate = gas_oracle_service.get_estimate(network, w3)
+            gas_price = gas_estimate.max_fee()  # EIP-1559: saldo precisa cobrir o maxFeePerGas
             gas_limit = 100000  # Token transfer precisa de mais gas
             gas_cost_wei = gas_price * gas_limit
             gas_cost = Decimal(str(w3.from_wei(gas_cost_wei, 'ether')))
@@ -499,26 +503,19 @@ class SystemWalletSendService:
             # Converter amount para wei do token
             amount_raw = int(amount * Decimal(10 ** decimals))
             
-            # Construir transacao
-            nonce = w3.eth.get_transaction_count(Web3.to_checksum_address(from_address))
-            
+            # Construir transacao (nonce alocado pelo nonce_manager)
             tx = contract.functions.transfer(
                 Web3.to_checksum_address(to_address),
                 amount_raw
             ).build_transaction({
                 'from': Web3.to_checksum_address(from_address),
-                'nonce': nonce,
                 'gas': gas_limit,
-                'gasPrice': gas_price,
+                **gas_estimate.tx_fields(),
                 'chainId': self.CHAIN_IDS.get(network, 1)
             })
             
-            # Assinar
-            signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-            
-            # Enviar
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            tx_hash_hex = tx_hash.hex()
+            # Assinar e enviar
+            tx_hash_hex = nonce_manager.send_transaction(w3, tx, private_key, sender=from_address)
             
             logger.info(f"  TX Hash: {tx_hash_hex}")
             
@@ -13,7 +13,6 @@ from datetime import datetime
 from uuid import UUID
 
 from app.models.trader_profile import TraderProfile, TraderStats
-from app.models.p2p import P2PMatch
 from app.core.exceptions import ValidationError
 
 
@@ -22,20 +21,25 @@ class TraderProfileService:
     
     @staticmethod
     def calculate_success_rate(trader_id: UUID, db: Session) -> float:
-        """Calculate trader's success rate based on completed trades"""
-        total_trades = db.query(P2PMatch).filter(
-            ((P2PMatch.buyer_id == trader_id) | (P2PMatch.seller_id == trader_id)),
-            P2PMatch.status == "completed"
-        ).count()
+        """
+        Trader's success rate (completed / total trades).
         
-        if total_trades == 0:
-            return 0.0
+        Read from the counters kept incrementally by p2p_stats_service.
+        """
+        profile = db.query(TraderProfile.success_rate).filter(
+            TraderProfile.user_id == trader_id
+        ).first()
         
-        return 100.0  # Will be updated based on reviews/disputes
+        return float(profile.success_rate) if profile else 0.0
     
     @staticmethod
     def update_trader_stats(trader_id: UUID, db: Session) -> TraderProfile:
-        """Update trader's statistics based on completed trades"""
+        """
+        Return trader's statistics.
+        
+        Counters are updated on trade transitions and reconciled
+        periodically (p2p_stats_service); no recount from trade history here.
+        """
         profile = db.query(TraderProfile).filter(
             TraderProfile.id == trader_id
         ).first()
@@ -43,18 +47,6 @@ class TraderProfileService:
         if not profile:
             raise ValidationError("Trader profile not found")
         
-        # Count trades where user is buyer or seller
-        trades = db.query(P2PMatch).filter(
-            ((P2PMatch.buyer_id == profile.user_id) | (P2PMatch.seller_id == profile.user_id)),
-            P2PMatch.status == "completed"
-        ).all()
-        
-        profile.total_trades = len(trades)
-        profile.completed_trades = len([t for t in trades if t.status == "completed"])
-        
-        db.commit()
-        db.refresh(profile)
-        
         return profile
     
     @staticmethod
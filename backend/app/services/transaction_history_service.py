@@ -0,0 +1,523 @@
+"""
+📜 Transaction History Service - Sincronização incremental do histórico
+=======================================================================
+
+Mantém a tabela `address_tx_history` atualizada a partir dos explorers,
+buscando apenas o que é mais novo que o cursor salvo em
+`address_sync_cursors`, e serve o histórico com paginação keyset
+(timestamp DESC, tx_hash DESC) a partir de uma única query indexada.
+
+Fontes:
+- Bitcoin: Blockstream (`/address/{a}/txs` + `/txs/chain/{last_txid}`)
+- Ethereum/Polygon/BSC: APIs compatíveis com Etherscan (`txlist` + `tokentx`)
+  com `startblock` = último bloco sincronizado
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import asyncio
+import base64
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.transaction_history import AddressTransaction, AddressSyncCursor
+
+logger = logging.getLogger(__name__)
+
+
+EVM_NETWORKS = ("ethereum", "polygon", "bsc")
+
+
+def normalize_address(address: str, network: str) -> str:
+    """EVM é case-insensitive: armazenamos sempre em minúsculas"""
+    return address.lower() if network in EVM_NETWORKS else address
+
+
+def encode_cursor(timestamp: datetime, tx_hash: str, log_index: int = -1) -> str:
+    """Cursor opaco para paginação keyset"""
+    raw = f"{timestamp.isoformat()}|{tx_hash}|{log_index}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str, int]:
+    """Decodifica o cursor opaco. Levanta ValueError se inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp, tx_hash, log_index = raw.split("|", 2)
+        return datetime.fromisoformat(timestamp), tx_hash, int(log_index)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+
+class TransactionHistoryService:
+    """Histórico local de transações com sync incremental"""
+
+    # Explorers compatíveis com Etherscan: (url, nome da api key, símbolo nativo)
+    EVM_EXPLORERS = {
+        "ethereum": ("https://api.etherscan.io/api", "ETHERSCAN_API_KEY", "ETH"),
+        "polygon": ("https://api.polygonscan.com/api", "POLYGONSCAN_API_KEY", "MATIC"),
+        "bsc": ("https://api.bscscan.com/api", "BSCSCAN_API_KEY", "BNB"),
+    }
+
+    SUPPORTED_NETWORKS = ("bitcoin",) + EVM_NETWORKS
+
+    # Não re-sincroniza um endereço antes desse intervalo
+    SYNC_INTERVAL_SECONDS = 60
+
+    # Limites por rodada de sync (o restante continua na próxima)
+    EVM_PAGE_SIZE = 500
+    EVM_MAX_PAGES = 4
+    BTC_MAX_PAGES = 8
+
+    HTTP_TIMEOUT = 10.0
+
+    # ===================================
+    # SYNC
+    # ===================================
+
+    async def sync_addresses(
+        self,
+        db: Session,
+        pairs: Sequence[Tuple[str, str]],
+        force: bool = False
+    ) -> int:
+        """
+        Sincroniza vários (endereço, rede) em paralelo.
+
+        Os fetches HTTP rodam concorrentes; a escrita no banco é feita em
+        sequência na mesma sessão. Retorna o número de linhas novas.
+        """
+        cursors = self._get_or_create_cursors(db, pairs)
+        now = datetime.utcnow()
+        min_age = timedelta(seconds=self.SYNC_INTERVAL_SECONDS)
+
+        due = [
+            cursor for cursor in cursors
+            if force or not cursor.last_synced_at or now - cursor.last_synced_at >= min_age
+        ]
+        if not due:
+            return 0
+
+        async with httpx.AsyncClient(timeout=self.HTTP_TIMEOUT) as client:
+            results = await asyncio.gather(
+                *[self._fetch_new(client, cursor) for cursor in due],
+                return_exceptions=True
+            )
+
+        inserted = 0
+        for cursor, result in zip(due, results):
+            cursor.last_synced_at = now
+            if isinstance(result, Exception):
+                cursor.last_error = str(result)[:500]
+                logger.warning(f"⚠️ Sync de histórico falhou para {cursor.address} ({cursor.network}): {result}")
+                continue
+
+            entries, last_block, backfill_cursor = result
+            inserted += self._upsert_entries(db, cursor.address, cursor.network, entries)
+            if last_block is not None:
+                cursor.last_block = max(cursor.last_block or 0, last_block)
+            cursor.backfill_cursor = backfill_cursor
+            cursor.last_error = None
+
+        db.commit()
+
+        if inserted:
+            logger.info(f"📜 Histórico sincronizado: {inserted} novas transações em {len(due)} endereços")
+        return inserted
+
+    def _get_or_create_cursors(
+        self,
+        db: Session,
+        pairs: Sequence[Tuple[str, str]]
+    ) -> List[AddressSyncCursor]:
+        normalized = {
+            (normalize_address(address, network.lower()), network.lower())
+            for address, network in pairs
+            if network and network.lower() in self.SUPPORTED_NETWORKS
+        }
+        if not normalized:
+            return []
+
+        existing = db.query(AddressSyncCursor).filter(
+            or_(*[
+                and_(AddressSyncCursor.address == address, AddressSyncCursor.network == network)
+                for address, network in normalized
+            ])
+        ).all()
+
+        found = {(c.address, c.network) for c in existing}
+        for address, network in normalized - found:
+            cursor = AddressSyncCursor(address=address, network=network)
+            db.add(cursor)
+            existing.append(cursor)
+
+        if len(existing) > len(found):
+            db.flush()
+        return existing
+
+    async def _fetch_new(
+        self,
+        client: httpx.AsyncClient,
+        cursor: AddressSyncCursor
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        if cursor.network == "bitcoin":
+            return await self._fetch_bitcoin(client, cursor)
+        return await self._fetch_evm(client, cursor)
+
+    def _upsert_entries(
+        self,
+        db: Session,
+        address: str,
+        network: str,
+        entries: List[Dict[str, Any]]
+    ) -> int:
+        """Insere entradas novas e atualiza status das já existentes (ex: pending → confirmed)"""
+        if not entries:
+            return 0
+
+        hashes = list({e["tx_hash"] for e in entries})
+        existing: Dict[Tuple[str, int], AddressTransaction] = {}
+        for i in range(0, len(hashes), 500):
+            for row in db.query(AddressTransaction).filter(
+                AddressTransaction.address == address,
+                AddressTransaction.network == network,
+                AddressTransaction.tx_hash.in_(hashes[i:i + 500])
+            ):
+                existing[(row.tx_hash, row.log_index)] = row
+
+        new_rows = []
+        for entry in entries:
+            row = existing.get((entry["tx_hash"], entry["log_index"]))
+            if row is None:
+                row = AddressTransaction(address=address, network=network, **entry)
+                existing[(entry["tx_hash"], entry["log_index"])] = row
+                new_rows.append(row)
+            elif row.status != entry["status"] or row.block_number != entry["block_number"]:
+                row.status = entry["status"]
+                row.block_number = entry["block_number"]
+                row.timestamp = entry["timestamp"]
+
+        db.add_all(new_rows)
+        return len(new_rows)
+
+    # ===================================
+    # EVM (Etherscan-like)
+    # ===================================
+
+    async def _fetch_evm(
+        self,
+        client: httpx.AsyncClient,
+        cursor: AddressSyncCursor
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        base_url, key_name, native_symbol = self.EVM_EXPLORERS[cursor.network]
+        api_key = getattr(settings, key_name, None)
+        start_block = cursor.last_block or 0
+
+        entries: List[Dict[str, Any]] = []
+        covered_until: List[Optional[int]] = []
+
+        for action in ("txlist", "tokentx"):
+            items, exhausted = await self._fetch_evm_action(
+                client, base_url, api_key, action, cursor.address, start_block
+            )
+            if action == "txlist":
+                entries.extend(self._parse_evm_native(items, cursor.address, native_symbol))
+            else:
+                entries.extend(self._parse_evm_tokens(items, cursor.address))
+
+            last_block = int(items[-1]["blockNumber"]) if items else None
+            # Lista completa: coberta até o topo; senão só até o último bloco lido
+            covered_until.append(None if exhausted else last_block)
+
+        max_seen = max((e["block_number"] for e in entries if e["block_number"]), default=None)
+        partial = [block for block in covered_until if block is not None]
+        next_block = min(partial) if partial else max_seen
+
+        return entries, next_block, None
+
+    async def _fetch_evm_action(
+        self,
+        client: httpx.AsyncClient,
+        base_url: str,
+        api_key: Optional[str],
+        action: str,
+        address: str,
+        start_block: int
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Busca páginas em ordem ascendente a partir de start_block"""
+        items: List[Dict[str, Any]] = []
+
+        for page in range(1, self.EVM_MAX_PAGES + 1):
+            params = {
+                "module": "account",
+                "action": action,
+                "address": address,
+                "startblock": start_block,
+                "endblock": 99999999,
+                "page": page,
+                "offset": self.EVM_PAGE_SIZE,
+                "sort": "asc",
+            }
+            if api_key:
+                params["apikey"] = api_key
+
+            response = await client.get(base_url, params=params)
+            response.raise_for_status()
+            data = response.json()
+
+            result = data.get("result")
+            if data.get("status") != "1" or not isinstance(result, list):
+                # "No transactions found" também vem com status 0
+                return items, True
+
+            items.extend(result)
+            if len(result) < self.EVM_PAGE_SIZE:
+                return items, True
+
+        return items, False
+
+    @staticmethod
+    def _direction(address: str, from_address: str, to_address: str) -> str:
+        from_match = (from_address or "").lower() == address
+        to_match = (to_address or "").lower() == address
+        if from_match and to_match:
+            return "self"
+        return "out" if from_match else "in"
+
+    def _parse_evm_native(
+        self,
+        items: List[Dict[str, Any]],
+        address: str,
+        native_symbol: str
+    ) -> List[Dict[str, Any]]:
+        entries = []
+        for tx in items:
+            fee_wei = int(tx.get("gasUsed") or 0) * int(tx.get("gasPrice") or 0)
+            entries.append({
+                "tx_hash": tx["hash"],
+                "log_index": -1,
+                "direction": self._direction(address, tx.get("from"), tx.get("to")),
+                "from_address": tx.get("from"),
+                "to_address": tx.get("to"),
+                "amount": str(Decimal(int(tx.get("value") or 0)) / Decimal(10 ** 18)),
+                "fee": str(Decimal(fee_wei) / Decimal(10 ** 18)),
+                "token_symbol": native_symbol,
+                "token_address": None,
+                "status": "failed" if tx.get("isError") == "1" else "confirmed",
+                "block_number": int(tx["blockNumber"]),
+                "timestamp": datetime.utcfromtimestamp(int(tx.get("timeStamp") or 0)),
+            })
+        return entries
+
+    def _parse_evm_tokens(
+        self,
+        items: List[Dict[str, Any]],
+        address: str
+    ) -> List[Dict[str, Any]]:
+        entries = []
+        seq_by_hash: Dict[str, int] = {}
+        for tx in items:
+            tx_hash = tx["hash"]
+            seq = seq_by_hash.get(tx_hash, 0)
+            seq_by_hash[tx_hash] = seq + 1
+            decimals = int(tx.get("tokenDecimal") or 18)
+            entries.append({
+                "tx_hash": tx_hash,
+                "log_index": int(tx["logIndex"]) if tx.get("logIndex") not in (None, "") else seq,
+                "direction": self._direction(address, tx.get("from"), tx.get("to")),
+                "from_address": tx.get("from"),
+                "to_address": tx.get("to"),
+                "amount": str(Decimal(int(tx.get("value") or 0)) / Decimal(10 ** decimals)),
+                "fee": None,
+                "token_symbol": (tx.get("tokenSymbol") or "")[:20] or None,
+                "token_address": tx.get("contractAddress"),
+                "status": "confirmed",
+                "block_number": int(tx["blockNumber"]),
+                "timestamp": datetime.utcfromtimestamp(int(tx.get("timeStamp") or 0)),
+            })
+        return entries
+
+    # ===================================
+    # BITCOIN (Blockstream)
+    # ===================================
+
+    async def _fetch_bitcoin(
+        self,
+        client: httpx.AsyncClient,
+        cursor: AddressSyncCursor
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        base_url = settings.BTC_API_URL
+        address = cursor.address
+        known_block = cursor.last_block
+
+        entries: List[Dict[str, Any]] = []
+        max_block: Optional[int] = None
+        backfill_cursor = cursor.backfill_cursor
+
+        # 1) Mais novas primeiro, até alcançar o último bloco conhecido
+        url = f"{base_url}/address/{address}/txs"
+        last_txid = None
+        reached_known = False
+        for _ in range(self.BTC_MAX_PAGES):
+            response = await client.get(url)
+            response.raise_for_status()
+            txs = response.json()
+
+            confirmed_count = 0
+            for tx in txs:
+                status = tx.get("status", {})
+                height = status.get("block_height")
+                if status.get("confirmed"):
+                    confirmed_count += 1
+                    last_txid = tx["txid"]
+                    if known_block is not None and height <= known_block:
+                        reached_known = True
+                        continue
+                    max_block = max(max_block or 0, height)
+                entries.append(self._parse_bitcoin_tx(tx, address))
+
+            # Blockstream pagina confirmadas de 25 em 25
+            if reached_known or confirmed_count < 25 or not last_txid:
+                break
+            url = f"{base_url}/address/{address}/txs/chain/{last_txid}"
+        else:
+            # Limite de páginas atingido: o resto (mais antigo) vira backfill
+            backfill_cursor = last_txid
+
+        # 2) Continua backfill de histórico antigo, se houver
+        if backfill_cursor and backfill_cursor != last_txid:
+            for _ in range(self.BTC_MAX_PAGES):
+                response = await client.get(f"{base_url}/address/{address}/txs/chain/{backfill_cursor}")
+                response.raise_for_status()
+                txs = response.json()
+                for tx in txs:
+                    entries.append(self._parse_bitcoin_tx(tx, address))
+                if len(txs) < 25:
+                    backfill_cursor = None
+                    break
+                backfill_cursor = txs[-1]["txid"]
+
+        return entries, max_block, backfill_cursor
+
+    def _parse_bitcoin_tx(self, tx: Dict[str, Any], address: str) -> Dict[str, Any]:
+        received = sum(
+            vout.get("value", 0) for vout in tx.get("vout", [])
+            if vout.get("scriptpubkey_address") == address
+        )
+        spent = sum(
+            (vin.get("prevout") or {}).get("value", 0) for vin in tx.get("vin", [])
+            if (vin.get("prevout") or {}).get("scriptpubkey_address") == address
+        )
+        net = received - spent
+        status = tx.get("status", {})
+        confirmed = status.get("confirmed", False)
+
+        if spent and received and net == 0:
+            direction = "self"
+        else:
+            direction = "in" if net > 0 else "out"
+
+        counterpart_in = next(
+            ((vin.get("prevout") or {}).get("scriptpubkey_address") for vin in tx.get("vin", [])),
+            None
+        )
+        counterpart_out = next(
+            (vout.get("scriptpubkey_address") for vout in tx.get("vout", [])
+             if vout.get("scriptpubkey_address") and vout.get("scriptpubkey_address") != address),
+            None
+        )
+
+        return {
+            "tx_hash": tx["txid"],
+            "log_index": -1,
+            "direction": direction,
+            "from_address": address if direction == "out" else counterpart_in,
+            "to_address": counterpart_out if direction == "out" else address,
+            "amount": str(Decimal(abs(net)) / Decimal(100000000)),
+            "fee": str(Decimal(tx.get("fee", 0)) / Decimal(100000000)),
+            "token_symbol": "BTC",
+            "token_address": None,
+            "status": "confirmed" if confirmed else "pending",
+            "block_number": status.get("block_height") if confirmed else None,
+            "timestamp": datetime.utcfromtimestamp(status["block_time"]) if confirmed else datetime.utcnow(),
+        }
+
+    # ===================================
+    # LEITURA (KEYSET)
+    # ===================================
+
+    def get_history(
+        self,
+        db: Session,
+        pairs: Sequence[Tuple[str, str]],
+        network: Optional[str] = None,
+        token: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[AddressTransaction], Optional[str]]:
+        """
+        Página de histórico por (timestamp DESC, tx_hash DESC), com
+        log_index como desempate entre transferências da mesma transação.
+
+        Returns:
+            (transações, next_cursor) — next_cursor é None na última página
+        """
+        normalized = [
+            (normalize_address(address, net.lower()), net.lower())
+            for address, net in pairs
+            if net and (not network or net.lower() == network.lower())
+        ]
+        if not normalized:
+            return [], None
+
+        query = db.query(AddressTransaction).filter(
+            or_(*[
+                and_(AddressTransaction.address == address, AddressTransaction.network == net)
+                for address, net in normalized
+            ])
+        )
+
+        if token:
+            query = query.filter(AddressTransaction.token_symbol == token.upper())
+
+        if cursor:
+            cursor_ts, cursor_hash, cursor_log = decode_cursor(cursor)
+            query = query.filter(or_(
+                AddressTransaction.timestamp < cursor_ts,
+                and_(
+                    AddressTransaction.timestamp == cursor_ts,
+                    AddressTransaction.tx_hash < cursor_hash
+                ),
+                and_(
+                    AddressTransaction.timestamp == cursor_ts,
+                    AddressTransaction.tx_hash == cursor_hash,
+                    AddressTransaction.log_index < cursor_log
+                )
+            ))
+
+        rows = query.order_by(
+            AddressTransaction.timestamp.desc(),
+            AddressTransaction.tx_hash.desc(),
+            AddressTransaction.log_index.desc()
+        ).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.timestamp, last.tx_hash, last.log_index)
+
+        return rows, next_cursor
+
+
+# Instância global
+transaction_history_service = TransactionHistoryService()
@@ -10,9 +10,10 @@ from datetime import datetime, timezone
 
 from app.core.config import settings
 from app.services.blockchain_service import blockchain_service
-from app.services.cache_service import cache_service
+from app.services.balance_cache_service import balance_cache_service
 from app.services.crypto_service import crypto_service
-from app.models.transaction import Transaction
+from app.services.confirmation_tracker import BLOCK_TIMES, confirmation_tracker
+from app.models.transaction import Transaction, TransactionStatus
 from app.models.address import Address
 from app.models.wallet import Wallet
 from sqlalchemy.orm import Session
@@ -256,8 +257,11 @@ class TransactionService:
                 transaction.status = "pending"
                 transaction.broadcasted_at = datetime.now(timezone.utc)
                 
-                # Invalidar cache de saldo
-                await cache_service.clear_pattern(f"balance:{transaction.network}:{transaction.from_address}")
+                # Marcar saldos como sujos (refresh em background no próximo acesso)
+                await balance_cache_service.mark_dirty_many([
+                    (transaction.from_address, transaction.network),
+                    (transaction.to_address, transaction.network),
+                ])
                 
             else:
                 # Erro no broadcast
@@ -267,6 +271,9 @@ class TransactionService:
             transaction.updated_at = datetime.now(timezone.utc)
             db.commit()
             
+            if transaction.tx_hash and transaction.network.lower() in BLOCK_TIMES:
+                confirmation_tracker.track(transaction.network, transaction.tx_hash)
+            
             return {
                 "transaction_id": transaction.id,
                 "tx_hash": transaction.tx_hash,
@@ -298,15 +305,26 @@ class TransactionService:
                 raise ValueError("Transação não encontrada ou sem hash")
             
             # Verificar status na blockchain
-            if transaction.network.lower() == "bitcoin":
+            if transaction.network.lower() in BLOCK_TIMES:
+                # EVM: receipts buscados em lote pelo confirmation_tracker, que
+                # atualiza a Transaction; aqui só garante que o hash está rastreado
+                if transaction.status == TransactionStatus.pending:
+                    confirmation_tracker.track(transaction.network, transaction.tx_hash)
+                final = transaction.status in (TransactionStatus.confirmed, TransactionStatus.failed)
+                return {
+                    "transaction_id": transaction.id,
+                    "tx_hash": transaction.tx_hash,
+                    "status": transaction.status,
+                    "confirmations": transaction.confirmations,
+                    "network": transaction.network,
+                    "block_number": transaction.block_number,
+                    "gas_used": None,
+                    "final": final
+                }
+            elif transaction.network.lower() == "bitcoin":
                 status_info = await self.bitcoin_tx_service.get_transaction_status(
                     transaction.tx_hash
                 )
-            elif transaction.network.lower() in ["ethereum", "polygon", "bsc"]:
-                service = getattr(self, f"{transaction.network.lower()}_tx_service")
-                status_info = await service.get_transaction_status(
-                    transaction.tx_hash
-                )
             else:
                 status_info = {"status": "unknown", "confirmations": 0}
             
@@ -16,13 +16,13 @@ Data: Janeiro 2026
 import asyncio
 import base58
 import hashlib
-import requests
 import logging
 import time
-from decimal import Decimal
 from typing import Dict, Optional, List
 from dataclasses import dataclass
 
+from app.services.chain_adapters import TronAdapter
+
 logger = logging.getLogger(__name__)
 
 # ============================================
@@ -61,6 +61,8 @@ class TRONService:
     def __init__(self):
         self.api_base = TRONGRID_API
         self.explorer_base = TRONSCAN_EXPLORER
+        # Cliente assíncrono (pool compartilhado) usado nos envios
+        self.adapter = TronAdapter(self.api_base)
         logger.info("🔺 TRONService initialized (mainnet)")
     
     def validate_address(self, address: str) -> bool:
@@ -77,43 +79,6 @@ class TRONService:
         except Exception:
             return False
     
-    def get_balance(self, address: str) -> Optional[Decimal]:
-        """Consulta saldo TRX de um endereço."""
-        try:
-            response = requests.get(
-                f"{self.api_base}/v1/accounts/{address}",
-                timeout=10
-            )
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('success') and data.get('data'):
-                    balance_sun = data['data'][0].get('balance', 0)
-                    return Decimal(str(balance_sun)) / Decimal(str(SUN))
-            return Decimal('0')
-        except Exception as e:
-            logger.error(f"❌ Erro consultando saldo TRX: {e}")
-            return None
-    
-    def get_trc20_balance(self, address: str, contract: str = USDT_TRC20_CONTRACT) -> Optional[Decimal]:
-        """Consulta saldo de token TRC20 (USDT, USDC)."""
-        try:
-            response = requests.get(
-                f"{self.api_base}/v1/accounts/{address}",
-                timeout=10
-            )
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('success') and data.get('data'):
-                    trc20_tokens = data['data'][0].get('trc20', [])
-                    for token in trc20_tokens:
-                        if contract in token:
-                            balance = int(token[contract])
-                            return Decimal(str(balance)) / Decimal('1000000')  # 6 decimals
-            return Decimal('0')
-        except Exception as e:
-            logger.error(f"❌ Erro consultando saldo TRC20: {e}")
-            return None
-    
     def _address_to_hex(self, address: str) -> str:
         """Converte endereço TRON base58 para hex."""
         decoded = base58.b58decode_check(address)
@@ -184,9 +149,9 @@ class TRONService:
                 "visible": False
             }
             
-            response = requests.post(
-                f"{self.api_base}/wallet/createtransaction",
-                json=tx_data,
+            response = await self.adapter.post(
+                "/wallet/createtransaction",
+                tx_data,
                 timeout=30
             )
             
@@ -253,9 +218,9 @@ class TRONService:
             tx['signature'] = [signature_65.hex()]
             
             # 3. Broadcast
-            response = requests.post(
-                f"{self.api_base}/wallet/broadcasttransaction",
-                json=tx,
+            response = await self.adapter.post(
+                "/wallet/broadcasttransaction",
+                tx,
                 timeout=30
             )
             
@@ -340,9 +305,9 @@ class TRONService:
                 "visible": False
             }
             
-            response = requests.post(
-                f"{self.api_base}/wallet/triggersmartcontract",
-                json=trigger_data,
+            response = await self.adapter.post(
+                "/wallet/triggersmartcontract",
+                trigger_data,
                 timeout=30
             )
             
@@ -398,9 +363,9 @@ class TRONService:
             tx['signature'] = [signature_65.hex()]
             
             # 3. Broadcast
-            response = requests.post(
-                f"{self.api_base}/wallet/broadcasttransaction",
-                json=tx,
+            response = await self.adapter.post(
+                "/wallet/broadcasttransaction",
+                tx,
                 timeout=30
             )
             
@@ -24,6 +24,7 @@ from app.config.token_contracts import (
     TRON_TRC20_ABI
 )
 from app.services.crypto_service import crypto_service
+from app.services.gas_oracle_service import gas_oracle_service
 
 logger = logging.getLogger(__name__)
 
@@ -233,9 +234,13 @@ class USDTTransactionService:
                 logger.warning(f"Erro na estimativa de gas, usando padrão: {e}")
                 gas_estimate = self.GAS_LIMITS.get(network, 100000)
             
-            # Obter gas price atual (com fallback)
+            # Fees do gas oracle (EIP-1559, em memória) com fallback
             try:
-                gas_price = w3.eth.gas_price
+                gas_fees = gas_oracle_service.get_estimate(network, w3)
+                speed = fee_level if fee_level in self.GAS_PRICE_MULTIPLIERS else 'standard'
+                fee_fields = gas_fees.tx_fields(speed)
+                adjusted_gas_price = gas_fees.max_fee(speed)
+                expected_gas_price = gas_fees.expected_fee(speed)
             except Exception as e:
                 logger.warning(f"Erro ao obter gas price, usando padrão: {e}")
                 # Valores padrão por rede se não conseguir obter do RPC
@@ -250,13 +255,15 @@ class USDTTransactionService:
                     'fantom': Web3.to_wei(100, 'gwei'),  # 100 Gwei
                 }
                 gas_price = default_gas_prices.get(network.lower(), Web3.to_wei(1, 'gwei'))
+                
+                # Aplicar multiplicador de velocidade
+                multiplier = self.GAS_PRICE_MULTIPLIERS.get(fee_level, 1.2)
+                adjusted_gas_price = int(gas_price * multiplier)
+                expected_gas_price = adjusted_gas_price
+                fee_fields = {'gasPrice': adjusted_gas_price}
             
-            # Aplicar multiplicador de velocidade
-            multiplier = self.GAS_PRICE_MULTIPLIERS.get(fee_level, 1.2)
-            adjusted_gas_price = int(gas_price * multiplier)
-            
-            # Calcular custo total
-            total_gas_cost_wei = gas_estimate * adjusted_gas_price
+            # Calcular custo total (preço efetivo esperado: base fee + gorjeta)
+            total_gas_cost_wei = gas_estimate * expected_gas_price
             
             # Converter para valores legíveis
             native_symbol = self._get_native_symbol(network)
@@ -271,6 +278,7 @@ class USDTTransactionService:
                 'gas': gas_estimate,
                 'gas_price_wei': adjusted_gas_price,
                 'gas_price_gwei': Web3.from_wei(adjusted_gas_price, 'gwei'),
+                'fee_fields': fee_fields,
                 'total_cost_wei': total_gas_cost_wei,
                 'total_cost_native': str(total_gas_cost_native),
                 'total_cost_usd': f"{total_gas_cost_usd:.6f}",
@@ -328,10 +336,11 @@ class USDTTransactionService:
             
             if 'error' in gas_estimate:
                 gas_limit = self.GAS_LIMITS.get(network, 100000)
-                gas_price = w3.eth.gas_price
+                fee_fields = gas_oracle_service.tx_fee_fields(network, fee_level, w3=w3)
             else:
                 gas_limit = gas_estimate['gas']
-                gas_price = int(gas_estimate['gas_price_wei'])
+                fee_fields = gas_estimate['fee_fields']
+            gas_price = fee_fields.get('maxFeePerGas', fee_fields.get('gasPrice'))
             
             # Criar função de transfer
             contract = w3.eth.contract(
@@ -349,7 +358,7 @@ class USDTTransactionService:
                 'from': from_address,
                 'nonce': nonce,
                 'gas': gas_limit,
-                'gasPrice': gas_price,
+                **fee_fields,
                 'chainId': self._get_chain_id(network)
             })
             
@@ -0,0 +1,392 @@
+"""
+🧮 UTXO Service - scriptPubKey local, cache de UTXOs e seleção de moedas
+========================================================================
+
+Ferramentas compartilhadas pelas moedas UTXO (BTC, LTC, DOGE):
+
+- `script_pubkey_for_address`: deriva o scriptPubKey a partir do próprio
+  endereço (P2PKH, P2SH, P2WPKH, P2WSH, P2TR), sem buscar a transação de
+  origem de cada UTXO.
+- `UTXOSetCache`: conjunto de UTXOs por (rede, endereço) atualizado
+  incrementalmente após cada envio (inputs gastos saem, troco entra) e
+  reconciliado com a API quando fica velho.
+- `select_coins`: branch-and-bound (sem troco) com fallback knapsack,
+  minimizando fee e troco em vez de gastar todos os UTXOs.
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# SCRIPTPUBKEY A PARTIR DO ENDEREÇO
+# ============================================
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+BECH32M_CONST = 0x2BC830A3
+
+# Version bytes base58 por rede -> tipo de script
+BASE58_VERSIONS: Dict[str, Dict[int, str]] = {
+    "bitcoin": {0x00: "p2pkh", 0x05: "p2sh"},
+    "testnet": {0x6F: "p2pkh", 0xC4: "p2sh"},
+    "litecoin": {0x30: "p2pkh", 0x32: "p2sh", 0x05: "p2sh"},
+    "dogecoin": {0x1E: "p2pkh", 0x16: "p2sh"},
+}
+
+BECH32_HRPS: Dict[str, str] = {
+    "bitcoin": "bc",
+    "testnet": "tb",
+    "litecoin": "ltc",
+}
+
+
+def _base58check_decode(address: str) -> bytes:
+    number = 0
+    for char in address:
+        number = number * 58 + BASE58_ALPHABET.index(char)
+    payload = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    payload = b"\x00" * (len(address) - len(address.lstrip("1"))) + payload
+    data, checksum = payload[:-4], payload[-4:]
+    if hashlib.sha256(hashlib.sha256(data).digest()).digest()[:4] != checksum:
+        raise ValueError("Checksum base58 inválido")
+    return data
+
+
+def _bech32_polymod(values: Iterable[int]) -> int:
+    generator = [0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3]
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1FFFFFF) << 5 ^ value
+        for i in range(5):
+            chk ^= generator[i] if ((top >> i) & 1) else 0
+    return chk
+
+
+def _bech32_decode(address: str, hrp: str) -> Tuple[int, bytes]:
+    address = address.lower()
+    pos = address.rfind("1")
+    if address[:pos] != hrp:
+        raise ValueError("HRP bech32 inválido")
+    data = [BECH32_CHARSET.index(c) for c in address[pos + 1:]]
+    expanded = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+    const = _bech32_polymod(expanded + data)
+    version = data[0]
+    if (version == 0 and const != 1) or (version > 0 and const != BECH32M_CONST):
+        raise ValueError("Checksum bech32 inválido")
+
+    # Converte de grupos de 5 bits para bytes
+    acc, bits, program = 0, 0, bytearray()
+    for value in data[1:-6]:
+        acc = (acc << 5) | value
+        bits += 5
+        if bits >= 8:
+            bits -= 8
+            program.append((acc >> bits) & 0xFF)
+    return version, bytes(program)
+
+
+def script_pubkey_for_address(address: str, network: str = "bitcoin") -> str:
+    """
+    Deriva o scriptPubKey (hex) de um endereço.
+
+    Raises:
+        ValueError: endereço inválido ou tipo não suportado
+    """
+    hrp = BECH32_HRPS.get(network)
+    if hrp and address.lower().startswith(hrp + "1"):
+        version, program = _bech32_decode(address, hrp)
+        opcode = 0x00 if version == 0 else 0x50 + version
+        return bytes([opcode, len(program)]).hex() + program.hex()
+
+    data = _base58check_decode(address)
+    script_type = BASE58_VERSIONS.get(network, {}).get(data[0])
+    h160 = data[1:].hex()
+    if len(data) != 21 or script_type is None:
+        raise ValueError(f"Endereço não suportado para {network}: {address}")
+    if script_type == "p2pkh":
+        return f"76a914{h160}88ac"
+    return f"a914{h160}87"
+
+
+# ============================================
+# SELEÇÃO DE MOEDAS
+# ============================================
+
+# Tamanhos (vbytes) P2PKH - transações legadas montadas pelo BTCService
+P2PKH_INPUT_VSIZE = 148
+P2PKH_OUTPUT_VSIZE = 34
+TX_OVERHEAD_VSIZE = 10
+
+BNB_MAX_TRIES = 100_000
+KNAPSACK_ITERATIONS = 1000
+
+
+@dataclass
+class CoinSelection:
+    """Resultado da seleção de moedas"""
+    inputs: List
+    fee: int
+    change: int  # 0 = sem troco (sobra vai para a fee)
+    algorithm: str
+
+    @property
+    def input_value(self) -> int:
+        return sum(u.value for u in self.inputs)
+
+
+class InsufficientFundsError(ValueError):
+    pass
+
+
+def select_coins(
+    utxos: Sequence,
+    target: int,
+    fee_rate: int,
+    n_outputs: int = 1,
+    input_vsize: int = P2PKH_INPUT_VSIZE,
+    output_vsize: int = P2PKH_OUTPUT_VSIZE,
+    overhead_vsize: int = TX_OVERHEAD_VSIZE,
+    dust_limit: int = 546,
+    min_fee: int = 0,
+    seed: Optional[int] = None
+) -> CoinSelection:
+    """
+    Escolhe os UTXOs que pagam `target` (soma das saídas) + fee.
+
+    1. Branch-and-bound: procura um subconjunto cujo valor efetivo cai
+       entre o alvo e alvo + custo do troco -> transação sem troco.
+    2. Knapsack (aproximação estocástica do Bitcoin Core): menor excesso
+       acima de alvo + troco.
+
+    `utxos` podem ser quaisquer objetos com `.value` (satoshis).
+
+    Raises:
+        InsufficientFundsError: saldo efetivo insuficiente
+    """
+    input_fee = fee_rate * input_vsize
+    base_fee = max(fee_rate * (overhead_vsize + n_outputs * output_vsize), 0)
+    change_output_fee = fee_rate * output_vsize
+    # Custo do troco: criar a saída agora + gastá-la depois
+    cost_of_change = change_output_fee + input_fee
+
+    candidates = [u for u in utxos if u.value - input_fee > 0]
+    candidates.sort(key=lambda u: u.value, reverse=True)
+    effective = [u.value - input_fee for u in candidates]
+
+    if sum(effective) < target + base_fee:
+        raise InsufficientFundsError(
+            f"Saldo insuficiente: disponível {sum(u.value for u in utxos)}, necessário {target + base_fee}"
+        )
+
+    # 1. Branch-and-bound (sem troco)
+    selected = _branch_and_bound(effective, target + base_fee, cost_of_change)
+    if selected is not None:
+        inputs = [candidates[i] for i in selected]
+        fee = sum(u.value for u in inputs) - target
+        if fee >= min_fee:
+            return CoinSelection(inputs, fee, 0, "bnb")
+
+    # 2. Knapsack (com troco)
+    selected = _knapsack(effective, target + base_fee + cost_of_change, seed)
+    if selected is None:
+        # Não cobre o troco: gasta tudo e a sobra vai para a fee
+        selected = list(range(len(candidates)))
+    inputs = [candidates[i] for i in selected]
+    total = sum(u.value for u in inputs)
+    fee_without_change = max(base_fee + len(inputs) * input_fee, min_fee)
+    change = total - target - fee_without_change - change_output_fee
+    if change > dust_limit:
+        return CoinSelection(inputs, fee_without_change + change_output_fee, change, "knapsack")
+    if total - target < fee_without_change:
+        raise InsufficientFundsError(
+            f"Saldo insuficiente: disponível {total}, necessário {target + fee_without_change}"
+        )
+    return CoinSelection(inputs, total - target, 0, "knapsack")
+
+
+def _branch_and_bound(values: List[int], target: int, cost_of_change: int) -> Optional[List[int]]:
+    """Busca em profundidade (valores em ordem decrescente) pelo menor desperdício"""
+    n = len(values)
+    suffix = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + values[i]
+    if suffix[0] < target:
+        return None
+
+    best: Optional[List[int]] = None
+    best_waste: Optional[int] = None
+    # (próximo índice, soma atual, índices incluídos) - incluir é explorado antes de excluir
+    stack: List[Tuple[int, int, Tuple[int, ...]]] = [(0, 0, ())]
+    tries = 0
+
+    while stack and tries < BNB_MAX_TRIES:
+        tries += 1
+        index, current, selection = stack.pop()
+
+        if current > target + cost_of_change:
+            continue
+        if current >= target:
+            waste = current - target
+            if best_waste is None or waste < best_waste:
+                best, best_waste = list(selection), waste
+                if waste == 0:
+                    break
+            continue
+        if index >= n or current + suffix[index] < target:
+            continue
+
+        stack.append((index + 1, current, selection))
+        stack.append((index + 1, current + values[index], selection + (index,)))
+
+    return best
+
+
+def _knapsack(values: List[int], target: int, seed: Optional[int]) -> Optional[List[int]]:
+    """Menor subconjunto com soma >= target (maior UTXO único ou aproximação aleatória)"""
+    if sum(values) < target:
+        return None
+
+    # Menor UTXO que sozinho cobre o alvo
+    single = [i for i, v in enumerate(values) if v >= target]
+    best = [single[-1]] if single else list(range(len(values)))
+    best_total = sum(values[i] for i in best)
+
+    rng = random.Random(seed)
+    n = len(values)
+    for _ in range(KNAPSACK_ITERATIONS):
+        included = [False] * n
+        total = 0
+        reached = False
+        for pass_number in range(2):
+            if reached:
+                break
+            for i in range(n):
+                take = rng.random() < 0.5 if pass_number == 0 else not included[i]
+                if not take:
+                    continue
+                total += values[i]
+                included[i] = True
+                if total >= target:
+                    reached = True
+                    if total < best_total:
+                        best_total = total
+                        best = [j for j in range(n) if included[j]]
+                    total -= values[i]
+                    included[i] = False
+        if best_total == target:
+            break
+
+    return best
+
+
+# ============================================
+# CACHE DO CONJUNTO DE UTXOs
+# ============================================
+
+@dataclass
+class _AddressUTXOs:
+    utxos: Dict[Tuple[str, int], object] = field(default_factory=dict)
+    # Gastos localmente ainda não refletidos pela API
+    spent: Dict[Tuple[str, int], float] = field(default_factory=dict)
+    refreshed_at: float = 0.0
+
+
+class UTXOSetCache:
+    """UTXOs por (rede, endereço), atualizados incrementalmente"""
+
+    MAX_AGE = 60  # segundos até reconciliar com a API
+    SPENT_TTL = 3600  # por quanto tempo um outpoint gasto localmente é ignorado
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], _AddressUTXOs] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, network: str, address: str) -> _AddressUTXOs:
+        return self._entries.setdefault((network, address), _AddressUTXOs())
+
+    def get(
+        self,
+        network: str,
+        address: str,
+        fetcher: Callable[[], List],
+        max_age: Optional[int] = None
+    ) -> List:
+        """UTXOs do endereço; chama `fetcher` só quando o cache está velho"""
+        max_age = self.MAX_AGE if max_age is None else max_age
+        with self._lock:
+            entry = self._entry(network, address)
+            fresh = time.time() - entry.refreshed_at < max_age
+            if fresh:
+                return list(entry.utxos.values())
+
+        fetched = fetcher()
+
+        with self._lock:
+            entry = self._entry(network, address)
+            now = time.time()
+            entry.spent = {k: t for k, t in entry.spent.items() if now - t < self.SPENT_TTL}
+            fetched_keys = {(u.txid, u.vout) for u in fetched}
+            # Gastos locais somem da API quando o índice alcança a transação
+            entry.spent = {k: t for k, t in entry.spent.items() if k in fetched_keys}
+            # Troco próprio ainda não confirmado continua disponível
+            local_only = {
+                k: u for k, u in entry.utxos.items()
+                if k not in fetched_keys and not getattr(u, "confirmed", True)
+            }
+            entry.utxos = {
+                (u.txid, u.vout): u for u in fetched if (u.txid, u.vout) not in entry.spent
+            }
+            entry.utxos.update(local_only)
+            entry.refreshed_at = now
+            return list(entry.utxos.values())
+
+    def apply_spend(
+        self,
+        network: str,
+        address: str,
+        spent: Iterable,
+        new_utxos: Iterable = ()
+    ):
+        """Após um envio: remove os inputs gastos e adiciona o troco"""
+        with self._lock:
+            entry = self._entry(network, address)
+            now = time.time()
+            for utxo in spent:
+                key = (utxo.txid, utxo.vout)
+                entry.utxos.pop(key, None)
+                entry.spent[key] = now
+            for utxo in new_utxos:
+                entry.utxos[(utxo.txid, utxo.vout)] = utxo
+
+    def apply_receive(self, network: str, address: str, utxo):
+        """Depósito detectado: adiciona sem esperar a próxima reconciliação"""
+        with self._lock:
+            entry = self._entry(network, address)
+            key = (utxo.txid, utxo.vout)
+            if key not in entry.spent:
+                entry.utxos[key] = utxo
+
+    def invalidate(self, network: str, address: str):
+        """Descarta o estado local (ex: broadcast rejeitado) e força nova consulta"""
+        with self._lock:
+            self._entries.pop((network, address), None)
+
+    def outpoints(self, network: str, address: str) -> Set[Tuple[str, int]]:
+        with self._lock:
+            return set(self._entry(network, address).utxos)
+
+
+# Instância global
+utxo_cache = UTXOSetCache()
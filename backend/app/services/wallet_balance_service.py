@@ -3,18 +3,19 @@
 ========================================================
 
 Handles all balance operations: get, freeze, unfreeze, transfer, and history tracking.
-All operations include audit logging via BalanceHistory.
+Balance changes go through the balance ledger (one conditional UPDATE per leg);
+all operations include audit logging via BalanceHistory.
 
 Author: HOLD Wallet Team
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from datetime import datetime, timezone
 from typing import Dict, Optional, List, Union
 import uuid
 
-from app.models.balance import WalletBalance, BalanceHistory
+from app.models.balance import WalletBalance
+from app.services.balance_ledger import balance_ledger, Leg
+from app.services.balance_journal import balance_journal
 
 
 class WalletBalanceService:
@@ -89,62 +90,16 @@ class WalletBalanceService:
         """
         Freeze (lock) a portion of user's available balance.
         
+        Single conditional UPDATE (available >= amount) via the balance ledger.
+        
         Raises:
             ValueError: If insufficient available balance
         """
-        user_id = str(user_id)
-        cryptocurrency = cryptocurrency.upper()
-        
-        # Get or create balance
-        balance = db.query(WalletBalance).filter(
-            WalletBalance.user_id == user_id,
-            WalletBalance.cryptocurrency == cryptocurrency
-        ).first()
-        
-        if not balance:
-            balance = WalletBalanceService._create_balance(db, user_id, cryptocurrency)
-        
-        # Get balance object from dict
-        if isinstance(balance, dict):
-            raise ValueError(f"Cannot freeze on newly created balance")
-        
-        # Check if enough available balance
-        if balance.available_balance < amount:
-            raise ValueError(
-                f"Insufficient balance. Available: {balance.available_balance}, "
-                f"Requested: {amount} {cryptocurrency}"
-            )
-        
-        # Record old state
-        old_available = balance.available_balance
-        old_locked = balance.locked_balance
-        
-        # Update balance
-        balance.available_balance -= amount
-        balance.locked_balance += amount
-        balance.last_updated_reason = f"Frozen: {reason}"
-        balance.updated_at = datetime.now(timezone.utc)
-        
-        # Record history
-        WalletBalanceService._record_history(
-            db,
-            user_id,
-            cryptocurrency,
-            "freeze",
-            amount,
-            old_available,
-            balance.available_balance,
-            old_locked,
-            balance.locked_balance,
-            reference_id,
-            reason
+        row = balance_ledger.freeze(
+            db, str(user_id), cryptocurrency.upper(), amount,
+            reason=f"Frozen: {reason}", reference_id=reference_id
         )
-        
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
-        
-        return balance.to_dict()
+        return WalletBalanceService._row_to_dict(row)
     
     @staticmethod
     def unfreeze_balance(
@@ -161,55 +116,11 @@ class WalletBalanceService:
         Raises:
             ValueError: If insufficient locked balance
         """
-        user_id = str(user_id)
-        cryptocurrency = cryptocurrency.upper()
-        
-        # Get balance
-        balance = db.query(WalletBalance).filter(
-            WalletBalance.user_id == user_id,
-            WalletBalance.cryptocurrency == cryptocurrency
-        ).first()
-        
-        if not balance:
-            raise ValueError(f"No balance found for {user_id} in {cryptocurrency}")
-        
-        # Check if enough locked balance
-        if balance.locked_balance < amount:
-            raise ValueError(
-                f"Insufficient locked balance. Locked: {balance.locked_balance}, "
-                f"Requested: {amount} {cryptocurrency}"
-            )
-        
-        # Record old state
-        old_available = balance.available_balance
-        old_locked = balance.locked_balance
-        
-        # Update balance
-        balance.available_balance += amount
-        balance.locked_balance -= amount
-        balance.last_updated_reason = f"Unfrozen: {reason}"
-        balance.updated_at = datetime.now(timezone.utc)
-        
-        # Record history
-        WalletBalanceService._record_history(
-            db,
-            user_id,
-            cryptocurrency,
-            "unfreeze",
-            amount,
-            old_available,
-            balance.available_balance,
-            old_locked,
-            balance.locked_balance,
-            reference_id,
-            reason
+        row = balance_ledger.unfreeze(
+            db, str(user_id), cryptocurrency.upper(), amount,
+            reason=f"Unfrozen: {reason}", reference_id=reference_id
         )
-        
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
-        
-        return balance.to_dict()
+        return WalletBalanceService._row_to_dict(row)
     
     @staticmethod
     def transfer_balance(
@@ -224,98 +135,23 @@ class WalletBalanceService:
         """
         Transfer balance from one user to another (e.g., releasing escrow).
         
+        Sender's locked balance → recipient's available balance, both legs in
+        one transaction.
+        
         Raises:
             ValueError: If insufficient locked balance on sender
         """
-        from_user_id = str(from_user_id)
-        to_user_id = str(to_user_id)
         cryptocurrency = cryptocurrency.upper()
-        
-        # Get sender balance
-        from_balance = db.query(WalletBalance).filter(
-            WalletBalance.user_id == from_user_id,
-            WalletBalance.cryptocurrency == cryptocurrency
-        ).first()
-        
-        if not from_balance:
-            raise ValueError(f"No balance found for sender {from_user_id} in {cryptocurrency}")
-        
-        # Check if enough locked balance (transfers come from locked balance)
-        if from_balance.locked_balance < amount:
-            raise ValueError(
-                f"Insufficient locked balance. Locked: {from_balance.locked_balance}, "
-                f"Requested: {amount} {cryptocurrency}"
-            )
-        
-        # Get or create recipient balance
-        to_balance = db.query(WalletBalance).filter(
-            WalletBalance.user_id == to_user_id,
-            WalletBalance.cryptocurrency == cryptocurrency
-        ).first()
-        
-        if not to_balance:
-            to_balance = WalletBalance(
-                user_id=to_user_id,
-                cryptocurrency=cryptocurrency,
-                available_balance=0.0,
-                locked_balance=0.0,
-                total_balance=0.0
-            )
-            db.add(to_balance)
-        
-        # Record old states
-        from_available_before = from_balance.available_balance
-        from_locked_before = from_balance.locked_balance
-        to_available_before = to_balance.available_balance
-        to_locked_before = to_balance.locked_balance
-        
-        # Update sender (removes from locked)
-        from_balance.locked_balance -= amount
-        from_balance.last_updated_reason = f"Transferred out: {reason}"
-        from_balance.updated_at = datetime.now(timezone.utc)
-        
-        # Update recipient (adds to available)
-        to_balance.available_balance += amount
-        to_balance.total_balance += amount
-        to_balance.last_updated_reason = f"Transferred in: {reason}"
-        to_balance.updated_at = datetime.now(timezone.utc)
-        
-        # Record history for both
-        WalletBalanceService._record_history(
-            db,
-            from_user_id,
-            cryptocurrency,
-            "transfer_out",
-            amount,
-            from_available_before,
-            from_balance.available_balance,
-            from_locked_before,
-            from_balance.locked_balance,
-            reference_id,
-            f"Transfer out: {reason}"
-        )
-        
-        WalletBalanceService._record_history(
-            db,
-            to_user_id,
-            cryptocurrency,
-            "transfer_in",
-            amount,
-            to_available_before,
-            to_balance.available_balance,
-            to_locked_before,
-            to_balance.locked_balance,
-            reference_id,
-            f"Transfer in: {reason}"
-        )
-        
-        db.add(from_balance)
-        db.add(to_balance)
-        db.commit()
+        from_row, to_row = balance_ledger.apply(db, [
+            Leg("debit_locked", str(from_user_id), cryptocurrency, amount,
+                f"Transferred out: {reason}", reference_id, history_type="transfer_out"),
+            Leg("credit", str(to_user_id), cryptocurrency, amount,
+                f"Transferred in: {reason}", reference_id, history_type="transfer_in"),
+        ])
         
         return {
-            'from': from_balance.to_dict(),
-            'to': to_balance.to_dict()
+            'from': WalletBalanceService._row_to_dict(from_row),
+            'to': WalletBalanceService._row_to_dict(to_row)
         }
     
     @staticmethod
@@ -330,7 +166,6 @@ class WalletBalanceService:
     ) -> Dict:
         """Add balance to user (e.g., after blockchain confirmation)"""
         user_id = str(user_id)
-        cryptocurrency = cryptocurrency.upper()
         
         # VERIFICAR RESTRIÇÃO DE DEPÓSITOS
         if not bypass_restriction:
@@ -338,52 +173,11 @@ class WalletBalanceService:
             if not WalletRestrictionService.can_credit_deposit(db, user_id):
                 raise ValueError("Depósitos estão temporariamente suspensos para esta conta. Entre em contato com o suporte.")
         
-        # Get or create balance
-        balance = db.query(WalletBalance).filter(
-            WalletBalance.user_id == user_id,
-            WalletBalance.cryptocurrency == cryptocurrency
-        ).first()
-        
-        if not balance:
-            balance = WalletBalance(
-                user_id=user_id,
-                cryptocurrency=cryptocurrency,
-                available_balance=0.0,
-                locked_balance=0.0,
-                total_balance=0.0
-            )
-            db.add(balance)
-        
-        # Record old state
-        old_available = balance.available_balance
-        old_locked = balance.locked_balance
-        
-        # Update balance
-        balance.available_balance += amount
-        balance.total_balance += amount
-        balance.last_updated_reason = f"Deposited: {reason}"
-        balance.updated_at = datetime.now(timezone.utc)
-        
-        # Record history
-        WalletBalanceService._record_history(
-            db,
-            user_id,
-            cryptocurrency,
-            "deposit",
-            amount,
-            old_available,
-            balance.available_balance,
-            old_locked,
-            balance.locked_balance,
-            reference_id,
-            reason
+        row = balance_ledger.credit(
+            db, user_id, cryptocurrency.upper(), amount,
+            reason=f"Deposited: {reason}", reference_id=reference_id, history_type="deposit"
         )
-        
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
-        
-        return balance.to_dict()
+        return WalletBalanceService._row_to_dict(row)
     
     @staticmethod
     def get_history(
@@ -392,21 +186,18 @@ class WalletBalanceService:
         cryptocurrency: Optional[str] = None,
         operation_type: Optional[str] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> List[Dict]:
-        """Get balance change history for a user"""
-        query = db.query(BalanceHistory).filter(
-            BalanceHistory.user_id == str(user_id)
-        )
-        
-        if cryptocurrency:
-            query = query.filter(BalanceHistory.cryptocurrency == cryptocurrency.upper())
-        
-        if operation_type:
-            query = query.filter(BalanceHistory.operation_type == operation_type)
-        
-        history = query.order_by(BalanceHistory.created_at.desc()).limit(limit).offset(offset).all()
+        """
+        Get balance change history for a user (newest first).
         
+        Index range scan on (user_id, created_at); pass `cursor` (see
+        balance_journal.page) instead of `offset` for deep pages.
+        """
+        history, _ = balance_journal.page(
+            db, user_id, cryptocurrency, operation_type, limit=limit, cursor=cursor, offset=offset
+        )
         return [h.to_dict() for h in history]
     
     @staticmethod
@@ -428,55 +219,11 @@ class WalletBalanceService:
         Raises:
             ValueError: If insufficient locked balance
         """
-        user_id = str(user_id)
-        cryptocurrency = cryptocurrency.upper()
-        
-        # Get balance
-        balance = db.query(WalletBalance).filter(
-            WalletBalance.user_id == user_id,
-            WalletBalance.cryptocurrency == cryptocurrency
-        ).first()
-        
-        if not balance:
-            raise ValueError(f"No balance found for {user_id} in {cryptocurrency}")
-        
-        # Check if enough locked balance
-        if balance.locked_balance < amount:
-            raise ValueError(
-                f"Insufficient locked balance. Locked: {balance.locked_balance}, "
-                f"Requested: {amount} {cryptocurrency}"
-            )
-        
-        # Record old state
-        old_available = balance.available_balance
-        old_locked = balance.locked_balance
-        
-        # Debit from locked balance (removes from total too)
-        balance.locked_balance -= amount
-        balance.total_balance -= amount  # Also reduce total since crypto is leaving the wallet
-        balance.last_updated_reason = f"Debited: {reason}"
-        balance.updated_at = datetime.now(timezone.utc)
-        
-        # Record history
-        WalletBalanceService._record_history(
-            db,
-            user_id,
-            cryptocurrency,
-            "debit",
-            amount,
-            old_available,
-            balance.available_balance,
-            old_locked,
-            balance.locked_balance,
-            reference_id,
-            reason
+        row = balance_ledger.debit_locked(
+            db, str(user_id), cryptocurrency.upper(), amount,
+            reason=f"Debited: {reason}", reference_id=reference_id
         )
-        
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
-        
-        return balance.to_dict()
+        return WalletBalanceService._row_to_dict(row)
     
     @staticmethod
     def debit_available_balance(
@@ -499,56 +246,11 @@ class WalletBalanceService:
         Raises:
             ValueError: If insufficient available balance
         """
-        from sqlalchemy import func
-        
-        user_id = str(user_id)
-        
-        # Get balance (case-insensitive)
-        balance = db.query(WalletBalance).filter(
-            WalletBalance.user_id == user_id,
-            func.lower(WalletBalance.cryptocurrency) == cryptocurrency.lower()
-        ).first()
-        
-        if not balance:
-            raise ValueError(f"No balance found for {user_id} in {cryptocurrency}")
-        
-        # Check if enough available balance
-        if balance.available_balance < amount:
-            raise ValueError(
-                f"Insufficient available balance. Available: {balance.available_balance}, "
-                f"Requested: {amount} {cryptocurrency}"
-            )
-        
-        # Record old state
-        old_available = balance.available_balance
-        old_locked = balance.locked_balance
-        
-        # Debit from available balance (removes from total too)
-        balance.available_balance -= amount
-        balance.total_balance -= amount
-        balance.last_updated_reason = f"Debited: {reason}"
-        balance.updated_at = datetime.now(timezone.utc)
-        
-        # Record history
-        WalletBalanceService._record_history(
-            db,
-            user_id,
-            cryptocurrency,
-            "debit",
-            amount,
-            old_available,
-            balance.available_balance,
-            old_locked,
-            balance.locked_balance,
-            reference_id,
-            reason
+        row = balance_ledger.debit_available(
+            db, str(user_id), cryptocurrency, amount,
+            reason=f"Debited: {reason}", reference_id=reference_id
         )
-        
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
-        
-        return balance.to_dict()
+        return WalletBalanceService._row_to_dict(row)
     
     @staticmethod
     def credit_balance(
@@ -570,7 +272,6 @@ class WalletBalanceService:
         Creates balance if doesn't exist.
         """
         user_id = str(user_id)
-        cryptocurrency = cryptocurrency.upper()
         
         # VERIFICAR RESTRIÇÃO DE DEPÓSITOS (credit é como um depósito)
         if not bypass_restriction:
@@ -578,55 +279,28 @@ class WalletBalanceService:
             if not WalletRestrictionService.can_credit_deposit(db, user_id):
                 raise ValueError("Depósitos estão temporariamente suspensos para esta conta. Entre em contato com o suporte.")
         
-        # Get or create balance
-        balance = db.query(WalletBalance).filter(
-            WalletBalance.user_id == user_id,
-            WalletBalance.cryptocurrency == cryptocurrency
-        ).first()
-        
-        if not balance:
-            balance = WalletBalance(
-                user_id=user_id,
-                cryptocurrency=cryptocurrency,
-                available_balance=0.0,
-                locked_balance=0.0,
-                total_balance=0.0
-            )
-            db.add(balance)
-        
-        # Record old state
-        old_available = balance.available_balance
-        old_locked = balance.locked_balance
-        
-        # Credit to available balance
-        balance.available_balance += amount
-        balance.total_balance += amount
-        balance.last_updated_reason = f"Credited: {reason}"
-        balance.updated_at = datetime.now(timezone.utc)
-        
-        # Record history
-        WalletBalanceService._record_history(
-            db,
-            user_id,
-            cryptocurrency,
-            "credit",
-            amount,
-            old_available,
-            balance.available_balance,
-            old_locked,
-            balance.locked_balance,
-            reference_id,
-            reason
+        row = balance_ledger.credit(
+            db, user_id, cryptocurrency.upper(), amount,
+            reason=f"Credited: {reason}", reference_id=reference_id
         )
-        
-        db.add(balance)
-        db.commit()
-        db.refresh(balance)
-        
-        return balance.to_dict()
+        return WalletBalanceService._row_to_dict(row)
     
     # ============ Private Helper Methods ============
     
+    @staticmethod
+    def _row_to_dict(row: Dict) -> Dict:
+        """Same shape as WalletBalance.to_dict() from a ledger RETURNING row"""
+        return {
+            'id': str(row['id']),
+            'user_id': str(row['user_id']),
+            'cryptocurrency': row['cryptocurrency'],
+            'available_balance': float(row['available_balance']),
+            'locked_balance': float(row['locked_balance']),
+            'total_balance': float(row['total_balance']),
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None,
+        }
+    
     # Tokens que SEMPRE precisam de rede (não podem ter saldo genérico)
     TOKENS_REQUIRING_NETWORK = {'USDT', 'USDC', 'DAI', 'BUSD', 'TUSD', 'USDP'}
     
@@ -722,19 +396,16 @@ class WalletBalanceService:
         reference_id: Optional[str] = None,
         reason: Optional[str] = None
     ) -> None:
-        """Record a balance change in history"""
-        history = BalanceHistory(
-            user_id=user_id,
-            cryptocurrency=cryptocurrency,
-            operation_type=operation_type,
-            amount=amount,
-            balance_before=balance_before,
-            balance_after=balance_after,
-            locked_before=locked_before,
-            locked_after=locked_after,
-            reference_id=reference_id,
-            reason=reason
-        )
-        
-        db.add(history)
-        db.commit()
+        """Record a balance change in history (written on the session's next commit)"""
+        balance_journal.append(db, [{
+            'user_id': user_id,
+            'cryptocurrency': cryptocurrency,
+            'operation_type': operation_type,
+            'amount': amount,
+            'balance_before': balance_before,
+            'balance_after': balance_after,
+            'locked_before': locked_before,
+            'locked_after': locked_after,
+            'reference_id': reference_id,
+            'reason': reason
+        }])
@@ -8,6 +8,8 @@ import hashlib
 from app.models.wallet import Wallet
 from app.models.address import Address
 from app.services.crypto_service import CryptoService
+from app.services.address_index_service import watched_addresses, OwnerType
+from app.services.bulk_address_service import bulk_address_service
 from app.core.exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
@@ -128,17 +130,17 @@ class WalletService:
                 logger.info(f"Generating addresses for all networks in multi-chain wallet {wallet.id}")
                 supported_networks = ["bitcoin", "ethereum", "polygon", "bsc"]
                 
-                for net in supported_networks:
-                    try:
-                        # Gerar endereço específico para esta rede
-                        await self._generate_network_address(
-                            db=db,
-                            wallet=wallet,
-                            network=net,
-                            wallet_data=wallet_data
-                        )
-                    except Exception as e:
-                        logger.warning(f"Failed to generate {net} address for wallet {wallet.id}: {e}")
+                # Todas as redes de uma vez: seed já calculada, um path walk por coin type
+                derived = self.crypto_service.derive_network_addresses(
+                    bip32=wallet_data["master_keys"]["bip32"],
+                    networks=supported_networks,
+                    seed=wallet_data.get("seed")
+                )
+                for net in set(supported_networks) - set(derived):
+                    logger.warning(f"Failed to generate {net} address for wallet {wallet.id}")
+                bulk_address_service.insert_addresses(
+                    db, {wallet.id: derived}, owners={wallet.id: wallet.user_id}
+                )
 
             logger.info(f"Created wallet {wallet.id} with address {receiving_address.address}")
 
@@ -314,6 +316,8 @@ class WalletService:
             db.commit()
             db.refresh(address)
             
+            watched_addresses.add(network_name, address.address, OwnerType.USER_WALLET, wallet.id, wallet.user_id)
+            
             logger.info(f"Generated {address_type} address {address.address} for wallet {wallet.id} on {network_name}")
             
             return address
@@ -390,6 +394,8 @@ class WalletService:
             db.commit()
             db.refresh(address)
             
+            watched_addresses.add(network, address.address, OwnerType.USER_WALLET, wallet.id, wallet.user_id)
+            
             logger.info(f"Generated {network} address {address.address} for wallet {wallet.id}")
             
             return address
@@ -15,13 +15,13 @@ Data: Janeiro 2026
 
 import asyncio
 import hashlib
-import requests
 import logging
 import json
-from decimal import Decimal
-from typing import Dict, Optional
+from typing import Optional
 from dataclasses import dataclass
 
+from app.services.chain_adapters import XRPAdapter
+
 logger = logging.getLogger(__name__)
 
 # ============================================
@@ -58,36 +58,10 @@ class XRPService:
         self.testnet = testnet
         self.rpc_url = XRPL_TESTNET if testnet else XRPL_MAINNET
         self.explorer_base = XRPSCAN_EXPLORER
+        # Cliente assíncrono (pool compartilhado) usado nos envios
+        self.adapter = XRPAdapter(self.rpc_url)
         logger.info(f"💎 XRPService initialized ({'testnet' if testnet else 'mainnet'})")
     
-    def _rpc_call(self, method: str, params: Dict = None) -> Optional[Dict]:
-        """Faz uma chamada RPC para o node XRPL."""
-        try:
-            payload = {
-                "method": method,
-                "params": [params or {}]
-            }
-            
-            response = requests.post(
-                self.rpc_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('result', {}).get('status') == 'error':
-                    logger.error(f"❌ RPC error: {result['result'].get('error_message')}")
-                    return None
-                return result.get('result')
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"❌ RPC call failed: {e}")
-            return None
-    
     def validate_address(self, address: str) -> bool:
         """Valida um endereço XRP (começa com r, 25-35 chars)."""
         if not address:
@@ -100,40 +74,6 @@ class XRPService:
         valid_chars = set('123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz')
         return all(c in valid_chars for c in address)
     
-    def get_balance(self, address: str) -> Optional[Decimal]:
-        """Consulta saldo de um endereço XRP."""
-        try:
-            result = self._rpc_call("account_info", {
-                "account": address,
-                "ledger_index": "validated"
-            })
-            
-            if result and 'account_data' in result:
-                balance_drops = int(result['account_data'].get('Balance', 0))
-                return Decimal(str(balance_drops)) / Decimal(str(DROPS))
-            return None
-        except Exception as e:
-            logger.error(f"❌ Erro consultando saldo XRP: {e}")
-            return None
-    
-    def get_account_sequence(self, address: str) -> Optional[int]:
-        """Obtém o sequence number da conta."""
-        result = self._rpc_call("account_info", {
-            "account": address,
-            "ledger_index": "current"
-        })
-        
-        if result and 'account_data' in result:
-            return result['account_data'].get('Sequence')
-        return None
-    
-    def get_current_fee(self) -> int:
-        """Retorna fee atual em drops."""
-        result = self._rpc_call("fee")
-        if result and 'drops' in result:
-            return int(result['drops'].get('base_fee', 10))
-        return 12  # Default 12 drops
-    
     async def send_xrp(
         self,
         from_address: str,
@@ -184,8 +124,8 @@ class XRPService:
                 if destination_tag:
                     payment.destination_tag = destination_tag
                 
-                # Assinar e enviar
-                response = submit_and_wait(payment, client, wallet)
+                # Assinar e enviar (cliente síncrono do xrpl-py: fora do event loop)
+                response = await asyncio.to_thread(submit_and_wait, payment, client, wallet)
                 
                 if response.is_successful():
                     tx_hash = response.result.get('hash')
@@ -208,7 +148,7 @@ class XRPService:
                 logger.warning("⚠️ xrpl-py não instalado, usando API manual...")
                 
                 # 1. Obter sequence
-                sequence = self.get_account_sequence(from_address)
+                sequence = await self.adapter.get_account_sequence(from_address)
                 if not sequence:
                     return XRPTransactionResult(
                         success=False,
@@ -216,7 +156,7 @@ class XRPService:
                     )
                 
                 # 2. Obter fee
-                fee = self.get_current_fee()
+                fee = (await self.adapter.estimate_fee())["base_fee"]
                 
                 # 3. Criar transação
                 amount_drops = str(int(amount_xrp * DROPS))
@@ -0,0 +1,32 @@
+"""
+🔖 Keyset Cursors
+=================
+
+Cursor opaco (created_at, id) para paginação keyset, compartilhado pelas
+listagens que ordenam por data de criação e desempatam pelo id
+(histórico de saldo, chat).
+
+Author: HOLD Wallet Team
+Date: February 2026
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Tuple
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    payload = json.dumps([created_at.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Raises ValueError em cursor inválido"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
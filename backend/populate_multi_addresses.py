@@ -1,17 +1,27 @@
 """
 Script para gerar endereços de todas as redes para carteiras multi existentes
+
+Uso:
+    python populate_multi_addresses.py [--workers N] [--batch 500]
+
+As carteiras são derivadas num pool de processos (seed calculada uma vez
+por carteira) e os endereços gravados com um bulk insert por lote.
 """
-import asyncio
+import argparse
 from sqlalchemy.orm import Session
 from app.core.db import SessionLocal, init_db
 from app.models.wallet import Wallet
-from app.services.wallet_service import WalletService
+from app.services.bulk_address_service import bulk_address_service
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def populate_multi_wallet_addresses():
+# Redes suportadas (agora com Tron e Base)
+SUPPORTED_NETWORKS = ["bitcoin", "ethereum", "polygon", "bsc", "tron", "base"]
+
+
+def populate_multi_wallet_addresses(workers: int = None, batch_size: int = 500):
     """Gerar endereços para todas as redes em carteiras multi existentes"""
     logger.info("Iniciando população de endereços para carteiras multi...")
     
@@ -28,50 +38,18 @@ async def populate_multi_wallet_addresses():
         
         logger.info(f"Encontradas {len(multi_wallets)} carteiras multi")
         
-        wallet_service = WalletService()
-        
-        for wallet in multi_wallets:
-            logger.info(f"\nProcessando carteira {wallet.id} ({wallet.name})")
-            
-            # Descriptografar seed
+        created = 0
+        for start in range(0, len(multi_wallets), batch_size):
+            batch = multi_wallets[start:start + batch_size]
             try:
-                decrypted_mnemonic = wallet_service.crypto_service.decrypt_data(str(wallet.encrypted_seed))
-                seed = wallet_service.crypto_service.mnemonic_to_seed(decrypted_mnemonic)
-                master_keys = wallet_service.crypto_service.derive_master_keys(seed)
-                wallet_data = {"master_keys": master_keys}
-                
-                # Redes suportadas (agora com Tron e Base)
-                supported_networks = ["bitcoin", "ethereum", "polygon", "bsc", "tron", "base"]
-                
-                for network in supported_networks:
-                    # Verificar se já existe endereço para esta rede
-                    from app.models.address import Address
-                    existing = db.query(Address).filter(
-                        Address.wallet_id == wallet.id,
-                        Address.network == network
-                    ).first()
-                    
-                    if existing:
-                        logger.info(f"  ✓ {network}: {existing.address} (já existe)")
-                        continue
-                    
-                    # Gerar novo endereço
-                    try:
-                        address = await wallet_service._generate_network_address(
-                            db=db,
-                            wallet=wallet,
-                            network=network,
-                            wallet_data=wallet_data
-                        )
-                        logger.info(f"  ✅ {network}: {address.address} (criado)")
-                    except Exception as e:
-                        logger.error(f"  ❌ {network}: Erro - {e}")
-                
+                created += bulk_address_service.backfill(
+                    db, batch, networks=SUPPORTED_NETWORKS, workers=workers
+                )
             except Exception as e:
-                logger.error(f"Erro ao processar carteira {wallet.id}: {e}")
-                continue
+                logger.error(f"Erro ao processar lote {start}-{start + len(batch)}: {e}")
+            logger.info(f"  {min(start + batch_size, len(multi_wallets))}/{len(multi_wallets)} carteiras")
         
-        logger.info("\n✅ População de endereços concluída!")
+        logger.info(f"\n✅ População de endereços concluída! {created} endereços criados")
         
     except Exception as e:
         logger.error(f"Erro geral: {e}")
@@ -79,4 +57,8 @@ async def populate_multi_wallet_addresses():
         db.close()
 
 if __name__ == "__main__":
-    asyncio.run(populate_multi_wallet_addresses())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    populate_multi_wallet_addresses(workers=args.workers, batch_size=args.batch)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark da derivação de endereços em lote
+
+Uso:
+    cd backend && python scripts/benchmark_bulk_address_derivation.py [--wallets 10000] [--workers N]
+
+Deriva todas as redes (ALL_NETWORKS) para N carteiras e compara:
+- legado: mnemonic_to_seed + derive_master_keys + derive_network_address por
+  rede (medido numa amostra e extrapolado para N)
+- lote sequencial: seed uma vez por carteira, um path walk por coin type
+- lote com pool de processos (BulkAddressService.derive_many)
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.bulk_address_service import (  # noqa: E402
+    ALL_NETWORKS,
+    BulkAddressService,
+    derive_wallet_addresses,
+)
+from app.services.crypto_service import crypto_service  # noqa: E402
+
+
+def legacy_derive(encrypted_seed, networks):
+    for network in networks:
+        mnemonic = crypto_service.decrypt_data(encrypted_seed)
+        seed = crypto_service.mnemonic_to_seed(mnemonic)
+        master_keys = crypto_service.derive_master_keys(seed)
+        crypto_service.derive_network_address(master_keys["bip32"], network, seed=seed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wallets", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sample", type=int, default=100, help="carteiras medidas nos modos sequenciais")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    print("=" * 60)
+    print("⏱️  BENCHMARK - BULK ADDRESS DERIVATION")
+    print("=" * 60)
+
+    seeds = [crypto_service.encrypt_data(crypto_service.generate_mnemonic()) for _ in range(args.wallets)]
+    sample = seeds[:min(args.sample, args.wallets)]
+    networks = ALL_NETWORKS
+    print(f"📦 Carteiras: {args.wallets:,} × {len(networks)} redes = {args.wallets * len(networks):,} endereços")
+
+    # Aquecimento (imports preguiçosos de bitcoinlib/solders)
+    derive_wallet_addresses(seeds[0], networks)
+
+    start = time.perf_counter()
+    for encrypted in sample:
+        legacy_derive(encrypted, networks)
+    legacy = (time.perf_counter() - start) / len(sample)
+    print(f"🐢 Legado:            {legacy * 1000:7.1f} ms/carteira  (~{legacy * args.wallets:,.0f}s para {args.wallets:,})")
+
+    start = time.perf_counter()
+    for encrypted in sample:
+        derive_wallet_addresses(encrypted, networks)
+    bulk = (time.perf_counter() - start) / len(sample)
+    print(f"🏭 Lote sequencial:   {bulk * 1000:7.1f} ms/carteira  (~{bulk * args.wallets:,.0f}s, {legacy / bulk:.1f}x)")
+
+    jobs = [(i, encrypted, networks) for i, encrypted in enumerate(seeds)]
+    start = time.perf_counter()
+    derived = BulkAddressService().derive_many(jobs, workers=args.workers)
+    parallel = time.perf_counter() - start
+    addresses = sum(len(a) for a in derived.values())
+    print(f"🚀 Pool ({args.workers} procs):    {parallel:7.1f} s total  "
+          f"({addresses:,} endereços, {legacy * args.wallets / parallel:.1f}x vs legado)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark do matching engine P2P
+
+Uso:
+    cd backend && python scripts/benchmark_p2p_matching.py [--orders 10000] [--requests 10000]
+
+Monta um book USDT/BRL de venda em memória com N ordens (preços, limites e
+métodos de pagamento variados) e mede o tempo por casamento de pedidos de
+takers com fill único e dividido.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.p2p_matching_engine import P2PMatchingEngine, TakerRequest  # noqa: E402
+from app.services.p2p_order_book_service import P2POrderBookService  # noqa: E402
+
+METHODS = ['["pix"]', '["ted"]', '["pix", "ted"]', '["mercado_pago"]']
+
+
+def make_rows(count):
+    rng = random.Random(42)
+    base = datetime(2026, 2, 1)
+    for i in range(count):
+        yield SimpleNamespace(
+            id=uuid.UUID(int=i + 1), user_id=uuid.UUID(int=rng.randrange(1, count // 5 + 2)),
+            order_type="sell", cryptocurrency="USDT", fiat_currency="BRL",
+            price=round(rng.uniform(5.0, 5.6), 2), available_amount=rng.uniform(10, 5000),
+            min_order_limit=rng.choice([10, 50, 100, 500]), max_order_limit=rng.choice([1000, 5000, 20000]),
+            payment_methods=rng.choice(METHODS), status="active", created_at=base + timedelta(seconds=i)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️  BENCHMARK - P2P MATCHING ENGINE")
+    print("=" * 60)
+
+    book = P2POrderBookService()
+    start = time.perf_counter()
+    book.rebuild(make_rows(args.orders))
+    print(f"📗 Book: {args.orders:,} ordens em {len(book.books[('USDT', 'BRL', 'sell')].levels)} níveis "
+          f"(rebuild {time.perf_counter() - start:.2f}s)")
+
+    engine = P2PMatchingEngine(book)
+    engine.reputation = {str(uuid.UUID(int=i)): float(i % 100) for i in range(args.orders // 5 + 2)}
+    rng = random.Random(7)
+    scenarios = {
+        "fill único": dict(allow_split=False),
+        "fill dividido": dict(allow_split=True),
+        "PIX + reputação ≥ 80": dict(payment_methods=["pix"], min_reputation=80),
+    }
+    for name, options in scenarios.items():
+        amounts = [rng.choice([100, 1000, 25_000]) for _ in range(args.requests)]
+        start = time.perf_counter()
+        for amount in amounts:
+            engine.match(TakerRequest("USDT", "BRL", "buy", amount, **options))
+        elapsed = (time.perf_counter() - start) / args.requests
+        print(f"⚡ {name:22s} {elapsed * 1e6:8.1f} µs/casamento")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
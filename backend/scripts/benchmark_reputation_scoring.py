@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark do pipeline de reputação
+
+Uso:
+    cd backend && python scripts/benchmark_reputation_scoring.py [--traders 100000] [--trades 300000]
+
+Mede o score vetorizado (numpy) sobre N traders sintéticos e a execução
+completa em sqlite em memória: carga das features de p2p_trades (um
+GROUP BY), score e upsert em trader_scores.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.reputation import TraderScore, UserReputation  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.reputation_scoring import ReputationScoringPipeline, score_batch  # noqa: E402
+
+NOW = datetime(2026, 2, 20, 12, 0, 0)
+STATUSES = ["completed"] * 8 + ["cancelled", "disputed"]
+
+
+def synthetic_features(count):
+    rng = np.random.default_rng(42)
+    total = rng.integers(0, 2000, count)
+    completed = (total * rng.uniform(0.7, 1.0, count)).astype(int)
+    return {
+        "total_trades": total,
+        "completed_trades": completed,
+        "disputed_trades": (total * rng.uniform(0, 0.05, count)).astype(int),
+        "recent_disputes": rng.integers(0, 3, count),
+        "trades_today": rng.integers(0, 15, count),
+        "total_volume_brl": rng.uniform(0, 2_000_000, count),
+        "avg_completion_minutes": np.where(completed > 0, rng.uniform(2, 60, count), np.nan),
+        "account_age_days": rng.integers(0, 1500, count),
+        "kyc_verified": rng.random(count) < 0.6,
+    }
+
+
+def populate(db, traders, trades):
+    rng = random.Random(7)
+    ids = [uuid.UUID(int=i + 1) for i in range(traders)]
+    db.execute(insert(User), [
+        {"id": user_id, "username": f"u{i}", "email": f"u{i}@x.io", "password_hash": "x",
+         "created_at": NOW - timedelta(days=rng.randrange(1, 1500))}
+        for i, user_id in enumerate(ids)
+    ])
+    db.execute(insert(UserReputation), [{"user_id": user_id, "kyc_verified": rng.random() < 0.6} for user_id in ids])
+    rows = []
+    for _ in range(trades):
+        created = NOW - timedelta(minutes=rng.randrange(0, 80 * 24 * 60))
+        buyer, seller = rng.sample(ids, 2)
+        rows.append({
+            "b": str(buyer), "s": str(seller), "status": rng.choice(STATUSES),
+            "total": rng.uniform(50, 20_000), "created": created,
+            "done": created + timedelta(minutes=rng.randrange(1, 90))
+        })
+    db.execute(text("""
+        INSERT INTO p2p_trades (buyer_id, seller_id, status, total_fiat, created_at, completed_at, updated_at)
+        VALUES (:b, :s, :status, :total, :created, :done, :done)
+    """), rows)
+    db.commit()
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--traders", type=int, default=100_000)
+    parser.add_argument("--trades", type=int, default=300_000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️  BENCHMARK - REPUTATION SCORING")
+    print("=" * 60)
+
+    features = synthetic_features(args.traders)
+    start = time.perf_counter()
+    score_batch(features)
+    print(f"🧮 score_batch:      {args.traders:,} traders em {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    engine = create_engine("sqlite://")
+    for model in (User, UserReputation, TraderScore):
+        model.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(text("""
+        CREATE TABLE p2p_trades (
+            id INTEGER PRIMARY KEY, buyer_id TEXT, seller_id TEXT, status TEXT, total_fiat NUMERIC,
+            created_at DATETIME, completed_at DATETIME, updated_at DATETIME
+        )
+    """))
+    start = time.perf_counter()
+    ids = populate(db, args.traders, args.trades)
+    print(f"📗 Base:             {args.trades:,} trades (carga {time.perf_counter() - start:.1f}s)")
+
+    pipeline = ReputationScoringPipeline()
+    start = time.perf_counter()
+    scored = pipeline.run(db, now=NOW)
+    print(f"⚡ Execução completa: {scored:,} traders em {time.perf_counter() - start:8.2f} s")
+
+    start = time.perf_counter()
+    scored = pipeline.run(db, ids[:500], now=NOW)
+    print(f"⚡ Lote dirty:       {scored:,} traders em {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    for user_id in ids[:10_000]:
+        pipeline.get(db, user_id, compute=False)
+    print(f"🔎 Leitura por PK:   {(time.perf_counter() - start) / 10_000 * 1e6:8.1f} µs/usuário")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
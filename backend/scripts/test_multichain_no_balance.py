@@ -101,7 +101,7 @@ async def test_tron():
     print_header("🔺 TRON (TRX)")
     
     try:
-        from app.services.tron_service import tron_service
+        from app.services.tron_service import tron_service, USDT_TRC20_CONTRACT
         
         # 1. Validar endereço
         valid = tron_service.validate_address(TEST_ADDRESSES['tron']['valid'])
@@ -111,14 +111,16 @@ async def test_tron():
         
         # 2. Consultar saldo TRX
         try:
-            balance = tron_service.get_balance(TEST_ADDRESSES['tron']['valid'])
+            balance = await tron_service.adapter.get_balance(TEST_ADDRESSES['tron']['valid'])
             print_result("Consulta saldo TRX", True, f"{balance or 0} TRX")
         except Exception as e:
             print_result("Consulta saldo TRX", False, str(e))
         
         # 3. Consultar saldo USDT-TRC20
         try:
-            usdt_balance = tron_service.get_trc20_balance(TEST_ADDRESSES['tron']['valid'])
+            usdt_balance = await tron_service.adapter.get_token_balance(
+                TEST_ADDRESSES['tron']['valid'], USDT_TRC20_CONTRACT
+            )
             print_result("Consulta saldo USDT-TRC20", True, f"{usdt_balance or 0} USDT")
         except Exception as e:
             print_result("Consulta saldo USDT-TRC20", False, str(e))
@@ -155,14 +157,14 @@ async def test_solana():
         
         # 3. Consultar saldo
         try:
-            balance = sol_service.get_balance(TEST_ADDRESSES['solana']['valid'])
+            balance = await sol_service.adapter.get_balance(TEST_ADDRESSES['solana']['valid'])
             print_result("Consulta de saldo", True, f"{balance or 0} SOL")
         except Exception as e:
             print_result("Consulta de saldo", False, str(e))
         
         # 4. Obter blockhash recente
         try:
-            blockhash = sol_service.get_recent_blockhash()
+            blockhash = await sol_service.adapter.get_recent_blockhash()
             print_result("Blockhash recente", blockhash is not None, 
                         f"{blockhash[:20]}..." if blockhash else "Falhou")
         except Exception as e:
@@ -188,14 +190,14 @@ async def test_xrp():
         
         # 2. Consultar saldo
         try:
-            balance = xrp_service.get_balance(TEST_ADDRESSES['xrp']['valid'])
+            balance = await xrp_service.adapter.get_balance(TEST_ADDRESSES['xrp']['valid'])
             print_result("Consulta de saldo", True, f"{balance or 0} XRP")
         except Exception as e:
             print_result("Consulta de saldo", False, str(e))
         
         # 3. Consultar fee atual
         try:
-            fee = xrp_service.get_current_fee()
+            fee = (await xrp_service.adapter.estimate_fee())['open_ledger_fee']
             print_result("Fee atual", True, f"{fee} drops")
         except Exception as e:
             print_result("Fee atual", False, str(e))
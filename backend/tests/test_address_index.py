@@ -0,0 +1,138 @@
+"""
+Watched Address Index Tests
+===========================
+
+Unit tests for the compact in-memory watched-address index and its
+Bloom filter front end.
+"""
+
+import os
+import threading
+
+import pytest
+
+from app.services.address_index_service import (
+    AddressBloomFilter,
+    AddressOwner,
+    OwnerType,
+    WatchedAddressIndex,
+    WatchedAddressRegistry,
+    address_to_key,
+    topic_to_key,
+)
+
+
+def random_evm_address() -> str:
+    return "0x" + os.urandom(20).hex()
+
+
+@pytest.fixture
+def registry():
+    return WatchedAddressRegistry()
+
+
+class TestAddressKeys:
+    def test_evm_key_is_case_insensitive(self):
+        address = "0xc3F6487656E9D7BD1148D997A9EeDD703435A1B7"
+        assert address_to_key(address) == address_to_key(address.lower())
+        assert len(address_to_key(address)) == 20
+
+    def test_topic_key_matches_address_key(self):
+        address = random_evm_address()
+        topic = "0x" + "00" * 12 + address[2:]
+        assert topic_to_key(topic) == address_to_key(address)
+
+    def test_non_evm_keys_are_fixed_width(self):
+        assert len(address_to_key("1JnwPXAtGHDJxNbd3QwrhSCqWYpqq4Lmcb")) == 20
+        assert address_to_key("BC1QXY2KGDYGJRSQTZQ2N0YRF2493P83KKFJHX0WLH") == \
+            address_to_key("bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh")
+
+
+class TestWatchedAddressIndex:
+    def test_add_lookup_and_match(self, registry):
+        addresses = [random_evm_address() for _ in range(5000)]
+        for i, address in enumerate(addresses):
+            registry.add("polygon", address, OwnerType.USER_WALLET, f"wallet-{i}", f"user-{i}")
+
+        index = registry.index("polygon")
+        assert len(index) == 5000
+        assert registry.lookup("polygon", addresses[42].upper().replace("0X", "0x")) == \
+            AddressOwner(OwnerType.USER_WALLET, "wallet-42", "user-42")
+        assert registry.lookup("polygon", random_evm_address()) is None
+        assert registry.lookup("ethereum", addresses[0]) is None
+
+        logs = addresses[:10] + [random_evm_address() for _ in range(100)]
+        assert set(registry.match("polygon", logs)) == set(addresses[:10])
+
+    def test_update_and_remove(self, registry):
+        address = random_evm_address()
+        assert registry.add("bsc", address, OwnerType.GATEWAY_PAYMENT, "pay-1") is True
+        assert registry.add("bsc", address, OwnerType.GATEWAY_PAYMENT, "pay-2") is False
+        assert registry.lookup("bsc", address).owner_id == "pay-2"
+
+        assert registry.remove("bsc", address) is True
+        assert registry.lookup("bsc", address) is None
+        assert registry.remove("bsc", address) is False
+        assert len(registry.index("bsc")) == 0
+
+    def test_tombstones_do_not_break_probing(self, registry):
+        index = WatchedAddressIndex("ethereum", registry._owners, initial_capacity=16)
+        owner = AddressOwner(OwnerType.SYSTEM_WALLET, "sys")
+        keys = [os.urandom(20) for _ in range(200)]
+        for key in keys:
+            index.add_key(key, owner)
+        for key in keys[::2]:
+            index.remove_key(key)
+        for key in keys[1::2]:
+            assert index.get_key(key) == owner
+        for key in keys[::2]:
+            assert index.get_key(key) is None
+        assert len(index) == 100
+
+    def test_owners_are_shared_across_networks(self, registry):
+        address = random_evm_address()
+        for network in ("ethereum", "polygon", "bsc", "base"):
+            registry.add(network, address, OwnerType.USER_WALLET, "wallet-1", "user-1")
+        assert registry.stats()["owners"] == 1
+
+    def test_owner_is_freed_with_its_last_address(self, registry):
+        address = random_evm_address()
+        for network in ("ethereum", "polygon"):
+            registry.add(network, address, OwnerType.GATEWAY_PAYMENT, "pay-1")
+        registry.add("polygon", address, OwnerType.GATEWAY_PAYMENT, "pay-2")  # troca de dono
+        assert registry.stats()["owners"] == 2
+
+        registry.remove("ethereum", address)
+        assert registry.stats()["owners"] == 1
+        registry.remove("polygon", address)
+        assert registry.stats()["owners"] == 0
+
+    def test_concurrent_interning_across_networks(self, registry):
+        owners = [f"wallet-{i}" for i in range(500)]
+
+        def load(network):
+            for owner_id in owners:
+                registry.add(network, random_evm_address(), OwnerType.USER_WALLET, owner_id)
+
+        threads = [threading.Thread(target=load, args=(network,)) for network in ("ethereum", "polygon", "bsc", "base")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert registry.stats()["owners"] == len(owners)
+        assert len(set(registry._owners._refs.values())) == len(owners)  # uma referência por dono
+
+
+class TestAddressBloomFilter:
+    def test_no_false_negatives_and_roundtrip(self):
+        addresses = [random_evm_address() for _ in range(2000)]
+        bloom = AddressBloomFilter(len(addresses), 0.01)
+        for address in addresses:
+            bloom.add(address)
+
+        restored = AddressBloomFilter.from_dict(bloom.to_dict())
+        assert all(restored.might_contain(a) for a in addresses)
+
+        false_positives = sum(restored.might_contain(random_evm_address()) for _ in range(2000))
+        assert false_positives < 100
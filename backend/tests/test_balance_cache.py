@@ -0,0 +1,157 @@
+"""
+Testes do cache de saldos orientado a eventos (stale-while-revalidate)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services import balance_cache_service as module
+from app.services.balance_cache_service import BalanceCacheService
+
+
+class FakeCache:
+    """cache_service em memória (ignora TTL)"""
+
+    def __init__(self):
+        self.store = {}
+
+    def is_connected(self):
+        return True
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def get_many(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    async def set(self, key, value, ttl=None):
+        self.store[key] = value
+        return True
+
+    async def delete(self, key):
+        return self.store.pop(key, None) is not None
+
+
+class CountingFetcher:
+    def __init__(self, balance="1.0"):
+        self.balance = balance
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return {"native_balance": self.balance, "token_balances": None}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fake = FakeCache()
+    monkeypatch.setattr(module, "cache_service", fake)
+    return fake
+
+
+async def _drain(service):
+    while service._tasks:
+        await asyncio.gather(*list(service._tasks))
+
+
+@pytest.mark.asyncio
+async def test_miss_fetches_then_hit_serves_cached(cache):
+    service = BalanceCacheService()
+    fetcher = CountingFetcher()
+
+    first = await service.get_balance("0xABC", "polygon", fetcher)
+    second = await service.get_balance("0xabc", "polygon", fetcher)
+
+    assert first["native_balance"] == "1.0"
+    assert second["native_balance"] == "1.0"
+    assert second["is_stale"] is False
+    assert fetcher.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_dirty_serves_stale_and_refreshes_in_background(cache):
+    service = BalanceCacheService()
+    fetcher = CountingFetcher("1.0")
+    await service.get_balance("0xabc", "polygon", fetcher)
+
+    # Envio: saldo muda on-chain e o endereço é marcado como sujo
+    key = service._entry_key("0xabc", "polygon")
+    cache.store[key]["fetched_at"] -= service.DIRTY_REFRESH_INTERVAL
+    await service.mark_dirty("0xABC", "polygon")
+    fetcher.balance = "0.5"
+
+    stale = await service.get_balance("0xabc", "polygon", fetcher)
+    assert stale["native_balance"] == "1.0"
+    assert stale["is_stale"] is True
+
+    await _drain(service)
+    assert fetcher.calls == 2
+    assert cache.store[key]["data"]["native_balance"] == "0.5"
+    # Mudança observada => marcador limpo
+    assert service._dirty_key("0xabc", "polygon") not in cache.store
+
+
+@pytest.mark.asyncio
+async def test_dirty_mark_kept_until_balance_changes(cache):
+    service = BalanceCacheService()
+    fetcher = CountingFetcher("1.0")
+    await service.get_balance("0xabc", "polygon", fetcher)
+
+    key = service._entry_key("0xabc", "polygon")
+    cache.store[key]["fetched_at"] -= service.DIRTY_REFRESH_INTERVAL
+    await service.mark_dirty("0xabc", "polygon")
+
+    # Transação ainda não confirmou: saldo igual, continua sujo
+    await service.get_balance("0xabc", "polygon", fetcher)
+    await _drain(service)
+    assert service._dirty_key("0xabc", "polygon") in cache.store
+
+
+@pytest.mark.asyncio
+async def test_quiet_address_uses_longer_ttl(cache, monkeypatch):
+    monkeypatch.setattr(module.settings, "CACHE_TTL_BALANCE", 30)
+    monkeypatch.setattr(module.settings, "CACHE_TTL_BALANCE_QUIET", 300)
+    service = BalanceCacheService()
+    fetcher = CountingFetcher()
+    await service.get_balance("bc1qxyz", "bitcoin", fetcher)
+
+    key = service._entry_key("bc1qxyz", "bitcoin")
+    now = time.time()
+    cache.store[key]["fetched_at"] = now - 60
+    cache.store[key]["changed_at"] = now - 2 * service.QUIET_AFTER_SECONDS
+
+    result = await service.get_balance("bc1qxyz", "bitcoin", fetcher)
+    await _drain(service)
+    assert result["is_stale"] is False
+    assert fetcher.calls == 1
+
+    # Endereço ativo com a mesma idade => refresh
+    cache.store[key]["changed_at"] = now - 60
+    result = await service.get_balance("bc1qxyz", "bitcoin", fetcher)
+    await _drain(service)
+    assert result["is_stale"] is True
+    assert fetcher.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_native_refresh_keeps_tokens_entry_dirty(cache):
+    service = BalanceCacheService()
+    native, tokens = CountingFetcher("1.0"), CountingFetcher("1.0")
+    await service.get_balance("0xabc", "polygon", native)
+    await service.get_balance("0xabc", "polygon", tokens, include_tokens=True)
+    for include_tokens in (False, True):
+        cache.store[service._entry_key("0xabc", "polygon", include_tokens)]["fetched_at"] -= service.DIRTY_REFRESH_INTERVAL
+
+    await service.mark_dirty("0xabc", "polygon")
+    native.balance = tokens.balance = "0.5"
+    await service.get_balance("0xabc", "polygon", native)
+    await _drain(service)
+
+    # Só a entrada nativa viu a mudança: a de tokens continua suja e é atualizada
+    assert service._dirty_key("0xabc", "polygon") not in cache.store
+    assert service._dirty_key("0xabc", "polygon", include_tokens=True) in cache.store
+    stale = await service.get_balance("0xabc", "polygon", tokens, include_tokens=True)
+    await _drain(service)
+    assert stale["is_stale"] is True and tokens.calls == 2
@@ -0,0 +1,104 @@
+"""
+Balance Journal Tests
+=====================
+
+History rows are buffered per session and written in one batch at commit
+(dropped on rollback, or only the savepoint's rows on a savepoint rollback), pages use a keyset cursor and "balance at T" is
+answered from the latest snapshot plus the last history row before T.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.balance import BalanceHistory, BalanceSnapshot, WalletBalance
+from app.services.balance_journal import BalanceJournal
+from app.services.balance_ledger import BalanceLedger
+
+ALICE = str(uuid.UUID(int=1))
+T0 = datetime(2026, 2, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (WalletBalance, BalanceHistory, BalanceSnapshot):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def history_row(minutes, available, locked=0.0):
+    return {
+        "user_id": ALICE, "cryptocurrency": "BTC", "operation_type": "deposit",
+        "amount": 1.0, "balance_before": available - 1.0, "balance_after": available,
+        "locked_before": locked, "locked_after": locked, "created_at": T0 + timedelta(minutes=minutes)
+    }
+
+
+def test_buffer_written_at_commit_and_dropped_on_rollback(db):
+    ledger = BalanceLedger()
+    ledger.credit(db, ALICE, "BTC", 1, commit=False)
+    ledger.credit(db, ALICE, "BTC", 2, commit=False)
+    assert db.query(BalanceHistory).count() == 0  # ainda no buffer
+
+    db.commit()
+    assert db.query(BalanceHistory).count() == 2
+
+    ledger.credit(db, ALICE, "BTC", 3, commit=False)
+    db.rollback()
+    db.commit()
+    assert db.query(BalanceHistory).count() == 2
+
+
+def test_savepoint_rollback_keeps_outer_history(db):
+    ledger = BalanceLedger()
+    ledger.credit(db, ALICE, "BTC", 5, commit=False)
+    with pytest.raises(RuntimeError):
+        with db.begin_nested():  # ex.: safe_record_transition depois das pernas
+            ledger.credit(db, ALICE, "BTC", 7, commit=False)
+            raise RuntimeError("stats failed")
+    db.commit()
+
+    history = db.query(BalanceHistory).all()
+    assert [(h.amount, h.balance_after) for h in history] == [(5.0, 5.0)]
+    assert db.query(WalletBalance).one().available_balance == 5.0
+
+
+def test_keyset_pages_cover_history_once(db):
+    journal = BalanceJournal()
+    journal.append(db, [history_row(i, float(i + 1)) for i in range(7)])
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = journal.page(db, ALICE, "btc", limit=3, cursor=cursor)
+        seen.extend(r.balance_after for r in rows)
+        if cursor is None:
+            break
+    assert seen == [7.0, 6.0, 5.0, 4.0, 3.0, 2.0, 1.0]
+
+
+def test_balance_at_uses_snapshot_and_later_history(db):
+    journal = BalanceJournal()
+    db.add(WalletBalance(
+        user_id=uuid.UUID(ALICE), cryptocurrency="BTC", available_balance=5.0,
+        locked_balance=0.0, total_balance=5.0, updated_at=T0
+    ))
+    db.commit()
+    assert journal.take_snapshots(db, now=T0 + timedelta(minutes=1)) == 1
+    assert journal.take_snapshots(db, now=T0 + timedelta(minutes=2)) == 0  # nada mudou
+
+    journal.append(db, [history_row(10, 6.0), history_row(20, 7.0, locked=1.0)])
+    db.commit()
+
+    assert journal.balance_at(db, ALICE, "BTC", T0) is None
+    assert journal.balance_at(db, ALICE, "BTC", T0 + timedelta(minutes=5))["available_balance"] == 5.0
+    at_15 = journal.balance_at(db, ALICE, "BTC", T0 + timedelta(minutes=15))
+    assert (at_15["available_balance"], at_15["total_balance"]) == (6.0, 6.0)
+    at_30 = journal.balance_at(db, ALICE, "BTC", T0 + timedelta(minutes=30))
+    assert (at_30["locked_balance"], at_30["total_balance"]) == (1.0, 8.0)
@@ -0,0 +1,103 @@
+"""
+Balance Ledger Tests
+====================
+
+Every leg is one conditional UPDATE ... RETURNING: a failed guard leaves
+nothing applied, multi-leg settlements are all-or-nothing, credits upsert
+missing rows and history rows come from the returned state.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.balance import BalanceHistory, WalletBalance
+from app.services.balance_ledger import BalanceLedger, InsufficientBalance, Leg
+from app.services.wallet_balance_service import WalletBalanceService
+
+ALICE = str(uuid.UUID(int=1))
+BOB = str(uuid.UUID(int=2))
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (WalletBalance, BalanceHistory):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(WalletBalance(
+        user_id=uuid.UUID(ALICE), cryptocurrency="USDT",
+        available_balance=100.0, locked_balance=0.0, total_balance=100.0
+    ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def balance(db, user_id, asset):
+    db.expire_all()
+    return db.query(WalletBalance).filter(
+        WalletBalance.user_id == uuid.UUID(user_id), WalletBalance.cryptocurrency == asset
+    ).first()
+
+
+def test_guard_failure_applies_nothing(db):
+    ledger = BalanceLedger()
+    with pytest.raises(InsufficientBalance):
+        ledger.apply(db, [
+            Leg("freeze", ALICE, "USDT", 60),
+            Leg("freeze", ALICE, "USDT", 60),  # segunda perna estoura o disponível
+        ])
+
+    row = balance(db, ALICE, "USDT")
+    assert (row.available_balance, row.locked_balance) == (100.0, 0.0)
+    assert db.query(BalanceHistory).count() == 0
+
+
+def test_settlement_is_atomic_and_writes_history(db):
+    ledger = BalanceLedger()
+    for _ in range(4):
+        ledger.freeze(db, ALICE, "USDT", 0.25)
+
+    ledger.apply(db, [
+        Leg("credit", BOB, "USDT", 1.0, "Trade completed", "42"),
+        Leg("debit_locked", ALICE, "usdt", 1.0, "Trade completed", "42"),
+    ])
+
+    alice, bob = balance(db, ALICE, "USDT"), balance(db, BOB, "USDT")
+    assert (alice.available_balance, alice.locked_balance, alice.total_balance) == (99.0, 0.0, 99.0)
+    assert (bob.available_balance, bob.total_balance) == (1.0, 1.0)
+
+    history = db.query(BalanceHistory).filter(BalanceHistory.reference_id == "42").all()
+    assert sorted(h.operation_type for h in history) == ["credit", "debit"]
+
+
+def test_service_transfer_reduces_sender_total(db):
+    WalletBalanceService.freeze_balance(db, ALICE, "USDT", 30)
+    result = WalletBalanceService.transfer_balance(db, ALICE, BOB, "USDT", 30, reference_id="7")
+
+    assert result["from"]["locked_balance"] == 0.0
+    assert result["from"]["total_balance"] == 70.0
+    assert result["to"]["available_balance"] == 30.0
+
+    with pytest.raises(ValueError):
+        WalletBalanceService.unfreeze_balance(db, ALICE, "USDT", 1)
+
+
+def test_legacy_case_variants_move_only_one_row(db):
+    for asset, amount in (("polygon_usdt", 10.0), ("POLYGON_USDT", 5.0)):
+        db.add(WalletBalance(
+            user_id=uuid.UUID(BOB), cryptocurrency=asset,
+            available_balance=amount, locked_balance=0.0, total_balance=amount
+        ))
+    db.commit()
+
+    BalanceLedger().credit(db, BOB, "POLYGON_USDT", 1)
+    BalanceLedger().freeze(db, BOB, "Polygon_Usdt", 2)  # sem grafia exata: usa a normalizada
+
+    assert balance(db, BOB, "POLYGON_USDT").available_balance == 6.0
+    lower = balance(db, BOB, "polygon_usdt")
+    assert (lower.available_balance, lower.locked_balance) == (8.0, 2.0)
+    assert db.query(BalanceHistory).count() == 2
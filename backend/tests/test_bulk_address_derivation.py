@@ -0,0 +1,97 @@
+"""
+Bulk Address Derivation Tests
+=============================
+
+Deriving every network in one pass (one path walk per coin type) yields
+exactly the addresses of the per-network derivation, and backfills write
+only the missing (wallet, network) pairs with a single bulk insert.
+"""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip("bip32")
+pytest.importorskip("coincurve")
+
+from app.models.address import Address
+from app.services.bulk_address_service import ALL_NETWORKS, BulkAddressService
+from app.services.crypto_service import crypto_service
+
+MNEMONIC = "abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about"
+
+# Solana depende de solders/nacl; as demais redes só de bip32/coincurve
+NETWORKS = [n for n in ALL_NETWORKS if n != "solana"] + ["multi"]
+
+
+@pytest.fixture(scope="module")
+def master():
+    seed = crypto_service.mnemonic_to_seed(MNEMONIC)
+    return seed, crypto_service.derive_master_keys(seed)["bip32"]
+
+
+def test_bulk_derivation_matches_per_network_derivation(master):
+    seed, bip32 = master
+    bulk = crypto_service.derive_network_addresses(bip32, NETWORKS, address_index=3, seed=seed)
+
+    assert set(bulk) == set(NETWORKS)
+    for network in NETWORKS:
+        single = crypto_service.derive_network_address(bip32, network, address_index=3, seed=seed)
+        data = bulk[network]
+        assert (data["address"], data["derivation_path"], data["public_key"]) == (
+            single["address"], single["derivation_path"], single["public_key"]
+        )
+        assert crypto_service.decrypt_data(data["private_key_encrypted"]) == \
+            crypto_service.decrypt_data(single["private_key_encrypted"])
+
+    # Redes EVM compartilham m/44'/60'/... e portanto o endereço
+    assert bulk["ethereum"]["address"] == bulk["polygon"]["address"] == bulk["multi"]["address"]
+
+
+def test_public_key_matches_bip32_path_walk(master):
+    _, bip32 = master
+    path = "m/44'/195'/0'/0/7"
+    keys = crypto_service.derive_address_keys(bip32, path)
+    assert keys["public_key"] == bip32.get_pubkey_from_path(path).hex()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Address.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_backfill_inserts_only_missing_networks(db, master, monkeypatch):
+    from app.services import bulk_address_service as module
+
+    watched = []
+    monkeypatch.setattr(module.watched_addresses, "add", lambda *args: watched.append(args))
+
+    encrypted = crypto_service.encrypt_data(MNEMONIC)
+    wallets = [SimpleNamespace(id=uuid.uuid4(), user_id=f"user-{i}", encrypted_seed=encrypted) for i in range(2)]
+
+    # Primeira carteira já tem o endereço ethereum
+    db.add(Address(wallet_id=wallets[0].id, address="0xexisting", network="ethereum", derivation_index=0))
+    db.commit()
+
+    service = BulkAddressService()
+    created = service.backfill(db, wallets, networks=["bitcoin", "ethereum", "tron"], workers=1)
+
+    assert created == 5
+    rows = db.query(Address).all()
+    assert len(rows) == 6
+    assert {(r.wallet_id, r.network) for r in rows} == {
+        (w.id, n) for w in wallets for n in ["bitcoin", "ethereum", "tron"]
+    }
+    expected_tron = crypto_service.derive_network_address(master[1], "tron")["address"]
+    assert {r.address for r in rows if r.network == "tron"} == {expected_tron}
+    assert len(watched) == 5
+
+    # Segunda execução não tem nada a fazer
+    assert service.backfill(db, wallets, networks=["bitcoin", "ethereum", "tron"], workers=1) == 0
@@ -0,0 +1,188 @@
+"""
+Chain Adapter Tests
+===================
+
+Each non-EVM adapter runs against a fake RPC/API served through
+httpx.MockTransport: balances (single and batched), token balances,
+history, fee estimate and broadcast, plus BlockchainService routing.
+"""
+
+import json
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app.services.chain_adapters import (
+    BlockcypherAdapter,
+    ChainRPCError,
+    PolkadotAdapter,
+    SolanaAdapter,
+    TronAdapter,
+    XRPAdapter,
+)
+
+
+class FakeRPC:
+    """Routes requests to handlers and records every call"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else None
+        self.calls.append((request.method, request.url.path, body))
+        if isinstance(body, list):  # JSON-RPC batch
+            return httpx.Response(200, json=[self._json_rpc(item) for item in body])
+        if isinstance(body, dict) and "method" in body:
+            if "jsonrpc" in body:
+                return httpx.Response(200, json=self._json_rpc(body))
+            return httpx.Response(200, json={"result": self.routes[body["method"]](body["params"][0])})
+        handler = self.routes[request.url.path]
+        return httpx.Response(200, json=handler(request, body))
+
+    def _json_rpc(self, item):
+        return {"jsonrpc": "2.0", "id": item["id"], "result": self.routes[item["method"]](item["params"])}
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self), base_url="http://fake")
+
+
+@pytest.mark.asyncio
+async def test_solana_batches_balances_with_get_multiple_accounts():
+    lamports = {"A1": 2_500_000_000, "A2": 0}
+    rpc = FakeRPC({
+        "getBalance": lambda params: {"value": lamports[params[0]]},
+        "getMultipleAccounts": lambda params: {
+            "value": [{"lamports": lamports[a]} if a in lamports else None for a in params[0]]
+        },
+        "getTokenAccountsByOwner": lambda params: {"value": [
+            {"account": {"data": {"parsed": {"info": {"tokenAmount": {"amount": "1500000", "decimals": 6}}}}}}
+        ]},
+        "getRecentPrioritizationFees": lambda params: [{"prioritizationFee": 10}, {"prioritizationFee": 30}],
+        "sendTransaction": lambda params: "5igSig",
+    })
+    adapter = SolanaAdapter("http://fake", client=rpc.client())
+    addresses = ["A1", "A2"] + [f"X{i}" for i in range(150)]
+
+    balances = await adapter.get_balances(addresses)
+
+    assert balances["A1"] == Decimal("2.5")
+    assert balances["X0"] == 0
+    assert [c[2]["method"] for c in rpc.calls] == ["getMultipleAccounts"] * 2  # 152 contas em 2 chamadas
+    payload = await adapter.balance_payload("A1", include_tokens=True)
+    assert payload["native_balance"] == "2.5"
+    assert payload["token_balances"] == {
+        "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": {"symbol": "USDT", "balance": "1.5", "decimals": 6},
+        "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": {"symbol": "USDC", "balance": "1.5", "decimals": 6},
+    }
+    assert (await adapter.estimate_fee())["priority_fee"] == 20
+    assert await adapter.broadcast("AAAA") == "5igSig"
+
+
+@pytest.mark.asyncio
+async def test_tron_native_and_tokens_share_one_account_query():
+    account = {
+        "balance": 12_000_000,
+        "trc20": [{"TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t": "2500000"}],
+    }
+    rpc = FakeRPC({
+        "/v1/accounts/TAddr": lambda request, body: {"success": True, "data": [account]},
+        "/v1/accounts/TNew": lambda request, body: {"success": True, "data": []},
+        "/wallet/broadcasthex": lambda request, body: {"result": True, "txid": "ab" * 32},
+    })
+    adapter = TronAdapter("http://fake", client=rpc.client())
+
+    payload = await adapter.balance_payload("TAddr", include_tokens=True)
+    balances = await adapter.get_account_balances(["TAddr", "TNew"])
+
+    assert payload["native_balance"] == "12"
+    assert payload["token_balances"]["TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"] == {
+        "symbol": "USDT", "balance": "2.5", "decimals": 6
+    }
+    assert balances["TNew"] == {"TRX": 0, "USDT": 0, "USDC": 0}
+    assert [path for _, path, _ in rpc.calls] == ["/v1/accounts/TAddr", "/v1/accounts/TNew"]
+    assert await adapter.broadcast("0a02") == "ab" * 32
+
+
+@pytest.mark.asyncio
+async def test_tron_account_cache_is_bounded():
+    rpc = FakeRPC({
+        f"/v1/accounts/T{i}": lambda request, body: {"success": True, "data": [{"balance": 1}]}
+        for i in range(5)
+    })
+    adapter = TronAdapter("http://fake", client=rpc.client())
+    adapter.MAX_CACHED_ACCOUNTS = 3
+
+    for i in range(5):
+        await adapter.get_balance(f"T{i}")
+    assert list(adapter._accounts) == ["T2", "T3", "T4"]
+
+    adapter.ACCOUNT_TTL = 0  # tudo expirado: a próxima gravação limpa o resto
+    await adapter.get_balance("T0")
+    assert list(adapter._accounts) == ["T0"]
+
+
+@pytest.mark.asyncio
+async def test_xrp_unfunded_account_and_failed_submit():
+    def account_info(params):
+        if params["account"] == "rMissing":
+            return {"status": "error", "error": "actNotFound"}
+        return {"status": "success", "account_data": {"Balance": "25000000", "Sequence": 7}}
+
+    rpc = FakeRPC({
+        "account_info": account_info,
+        "fee": lambda params: {"drops": {"base_fee": "10", "open_ledger_fee": "12"}},
+        "submit": lambda params: {"engine_result": "tecUNFUNDED_PAYMENT", "engine_result_message": "no"},
+    })
+    adapter = XRPAdapter("http://fake", client=rpc.client())
+
+    assert await adapter.get_balance("rFunded") == Decimal(25)
+    assert await adapter.get_balance("rMissing") == 0
+    assert await adapter.get_account_sequence("rFunded") == 7
+    assert (await adapter.estimate_fee())["open_ledger_fee"] == 12
+    with pytest.raises(ChainRPCError, match="tecUNFUNDED_PAYMENT"):
+        await adapter.broadcast("1200")
+
+
+@pytest.mark.asyncio
+async def test_litecoin_batches_balances_in_one_request():
+    def balances(request, body):
+        addresses = request.url.path.split("/")[2].split(";")
+        return [{"address": a, "final_balance": 100_000_000 * (i + 1)} for i, a in enumerate(addresses)]
+
+    rpc = FakeRPC({"/addrs/LA;LB/balance": balances})
+    adapter = BlockcypherAdapter("litecoin", "LTC", "http://fake", client=rpc.client())
+
+    result = await adapter.get_balances(["LA", "LB"])
+
+    assert result == {"LA": Decimal(1), "LB": Decimal(2)}
+    assert len(rpc.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_polkadot_balance_and_broadcast():
+    rpc = FakeRPC({
+        "/api/v2/scan/account": lambda request, body: {"code": 0, "data": {"account": {"balance": "3.25"}}},
+        "author_submitExtrinsic": lambda params: "0xhash",
+    })
+    adapter = PolkadotAdapter("http://fake", subscan_url="http://fake", client=rpc.client())
+
+    assert await adapter.get_balance("1Addr") == Decimal("3.25")
+    assert await adapter.broadcast("0x45") == "0xhash"
+
+
+@pytest.mark.asyncio
+async def test_blockchain_service_routes_through_adapters():
+    from app.services.blockchain_service import BlockchainService
+
+    rpc = FakeRPC({"getBalance": lambda params: {"value": 1_000_000_000}})
+    service = BlockchainService()
+    service.adapters["solana"] = SolanaAdapter("http://fake", client=rpc.client())
+
+    payload = await service._fetch_address_balance("SoL", "Solana")
+
+    assert payload == {"native_balance": "1", "network": "solana"}
+    with pytest.raises(ValueError):
+        await service._fetch_address_balance("x", "unknown")
@@ -0,0 +1,80 @@
+"""
+Chat Fan-out Tests
+==================
+
+Broadcasts reach every local socket of the room through per-socket queues
+(a slow socket never delays the others), slow consumers are disconnected,
+and messages coming from Redis are delivered unless they are our own echo.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.chat_fanout import ChatFanout, room_channel
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+
+    async def send_json(self, payload):
+        await asyncio.sleep(self.delay)
+        self.sent.append(payload)
+
+    async def close(self, code=1000, reason=None):
+        self.closed_with = code
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_room_sockets_without_waiting_for_slow_ones():
+    fanout = ChatFanout()
+    fast, slow, other_room = FakeWebSocket(), FakeWebSocket(delay=0.5), FakeWebSocket()
+    await fanout.register("s1", fast, "buyer", "room-1")
+    await fanout.register("s2", slow, "seller", "room-1")
+    await fanout.register("s3", other_room, "buyer", "room-2")
+
+    await asyncio.wait_for(fanout.publish("room-1", {"type": "message", "data": 1}), 0.1)
+    await asyncio.sleep(0.05)
+
+    assert fast.sent == [{"type": "message", "data": 1}]
+    assert slow.sent == [] and other_room.sent == []  # lento ainda enviando; outra sala não recebe
+    await fanout.stop()
+
+
+@pytest.mark.asyncio
+async def test_slow_consumers_are_evicted():
+    fanout = ChatFanout()
+    fanout.QUEUE_SIZE, fanout.SEND_TIMEOUT = 2, 0.05
+    stuck, slow = FakeWebSocket(delay=10), FakeWebSocket(delay=1)
+    await fanout.register("stuck", stuck, "buyer", "room-1")
+    await fanout.register("slow", slow, "seller", "room-2")
+
+    for i in range(5):
+        fanout.deliver_local("room-1", {"n": i})  # fila cheia -> desconecta
+    fanout.deliver_local("room-2", {"n": 0})  # envio acima do timeout -> desconecta
+    await asyncio.sleep(0.2)
+
+    assert stuck.closed_with == slow.closed_with == ChatFanout.SLOW_CONSUMER_CLOSE_CODE
+    assert fanout.connections == {} and fanout.rooms == {}
+    await fanout.stop()
+
+
+@pytest.mark.asyncio
+async def test_redis_messages_are_delivered_except_own_echo():
+    fanout = ChatFanout()
+    socket = FakeWebSocket()
+    await fanout.register("s1", socket, "buyer", "room-1")
+
+    own = json.dumps({"origin": fanout.worker_id, "payload": {"n": 1}})
+    remote = json.dumps({"origin": "other-worker", "payload": {"n": 2}})
+    assert fanout.dispatch(room_channel("room-1"), own) == 0
+    assert fanout.dispatch(room_channel("room-1"), remote) == 1
+    assert fanout.dispatch(room_channel("room-9"), remote) == 0
+    await asyncio.sleep(0.01)
+
+    assert socket.sent == [{"n": 2}]
+    await fanout.stop()
@@ -0,0 +1,95 @@
+"""
+Chat History Tests
+==================
+
+Room history pages by keyset on (chat_room_id, created_at, id), search
+goes through the SQLite FTS5 index (kept in sync by triggers) with ranked
+results, and sender names are loaded in one query.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.chat import ChatMessage, MessageType
+from app.models.user import User
+from app.services.chat_history import ChatHistory, fts5_query
+
+ROOM = uuid.UUID(int=10)
+OTHER_ROOM = uuid.UUID(int=11)
+BUYER = uuid.UUID(int=1)
+T0 = datetime(2026, 2, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    ChatMessage.__table__.create(engine)  # cria também a tabela FTS5 e os triggers
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=BUYER, username="alice", email="alice@x.io", password_hash="x"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def add_message(db, content, minutes, room=ROOM):
+    message = ChatMessage(
+        chat_room_id=room, sender_id=BUYER, message_type=MessageType.TEXT,
+        content=content, created_at=T0 + timedelta(minutes=minutes)
+    )
+    db.add(message)
+    return message
+
+
+def test_keyset_pages_load_older_messages_once(db):
+    history = ChatHistory()
+    for i in range(7):
+        add_message(db, f"msg {i}", i // 2)  # timestamps repetidos: desempate pelo id
+    add_message(db, "outra sala", 1, room=OTHER_ROOM)
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = history.page(db, ROOM, limit=3, cursor=cursor)
+        seen.extend(row.content for row in rows)
+        if cursor is None:
+            break
+    assert sorted(seen) == [f"msg {i}" for i in range(7)]
+    assert len(seen) == 7
+
+
+def test_search_uses_fts_index_and_ranks_matches(db):
+    history = ChatHistory()
+    add_message(db, "Enviei o comprovante do pix", 1)
+    add_message(db, "comprovante comprovante: pix feito, confere o comprovante", 2)
+    add_message(db, "bom dia", 3)
+    add_message(db, "comprovante de outra sala", 4, room=OTHER_ROOM)
+    edited = add_message(db, "aguardando", 5)
+    db.commit()
+
+    edited.content = "comprovante reenviado"  # trigger de UPDATE mantém o índice
+    db.commit()
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    results = history.search(db, ROOM, "comprovante")
+    assert any("MATCH" in sql for sql in statements)
+    assert len(results) == 3
+    assert results[0][0].content.startswith("comprovante comprovante")
+    assert results[0][1] >= results[-1][1]
+    assert [m.content for m, _ in history.search(db, ROOM, "compro")] != []  # prefixo no último termo
+    assert history.search(db, ROOM, '"; DROP TABLE x') == []
+
+
+def test_sender_names_single_query_and_fts_query_escaping(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    names = ChatHistory.sender_names(db, [BUYER, BUYER, str(BUYER), None])
+    assert names == {str(BUYER): "alice"}
+    assert len(statements) == 1
+
+    assert fts5_query('pix "feito') == '"pix" """feito"*'
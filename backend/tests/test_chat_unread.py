@@ -0,0 +1,144 @@
+"""
+Chat Unread Counter Tests
+=========================
+
+Unread badges come from a per-user Redis hash: seeded from one grouped
+query on first access, incremented on send and cleared when messages are
+read. Presence is a per-user sorted set of session expirations.
+"""
+
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.chat import ChatMessage, ChatRoom, MessageType
+from app.services.chat_presence import ChatPresence
+from app.services.chat_unread import ChatUnreadCounters
+
+BUYER = uuid.UUID(int=1)
+SELLER = uuid.UUID(int=2)
+ROOM = uuid.UUID(int=10)
+CLOSED_ROOM = uuid.UUID(int=11)
+
+
+class FakeRedis:
+    """Subconjunto de hash/sorted set do Redis usado pelos serviços"""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = 0
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def hgetall(self, key):
+        self.calls += 1
+        return {k: str(v) for k, v in self.data.get(key, {}).items()}
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def hincrby(self, key, field, amount):
+        bucket = self.data.setdefault(key, {})
+        bucket[field] = int(bucket.get(field, 0)) + amount
+
+    def hdel(self, key, field):
+        self.data.get(key, {}).pop(field, None)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        self.data.get(key, {}).pop(member, None)
+
+    def zremrangebyscore(self, key, low, high):
+        bucket = self.data.get(key, {})
+        for member in [m for m, score in bucket.items() if score <= high]:
+            del bucket[member]
+
+    def zcount(self, key, low, high):
+        return sum(1 for score in self.data.get(key, {}).values() if score >= low)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis, self.ops = redis, []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.ops.append((name, args, kwargs))
+
+    def execute(self):
+        self.redis.calls += 1
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.ops]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (ChatRoom, ChatMessage):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    for room_id, active in ((ROOM, True), (CLOSED_ROOM, False)):
+        session.add(ChatRoom(
+            id=room_id, match_id=uuid.uuid4(), buyer_id=BUYER, seller_id=SELLER, is_active=active
+        ))
+    for sender, room, is_read in ((SELLER, ROOM, False), (SELLER, ROOM, False), (SELLER, ROOM, True),
+                                  (BUYER, ROOM, False), (SELLER, CLOSED_ROOM, False)):
+        session.add(ChatMessage(
+            chat_room_id=room, sender_id=sender, message_type=MessageType.TEXT,
+            content="oi", is_read=is_read, created_at=datetime(2026, 2, 1)
+        ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_db_counts_use_one_grouped_query(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    assert ChatUnreadCounters.db_counts(db, BUYER) == {str(ROOM): 2}  # sala fechada e mensagens próprias fora
+    assert ChatUnreadCounters.db_counts(db, SELLER) == {str(ROOM): 1}
+    assert len(statements) == 2
+
+
+def test_counters_seed_once_then_track_send_and_read(db, monkeypatch):
+    counters, redis = ChatUnreadCounters(), FakeRedis()
+    monkeypatch.setattr(counters, "_redis", lambda: redis)
+
+    assert counters.counts(db, BUYER) == {str(ROOM): 2}  # seed do banco
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    counters.increment(BUYER, ROOM)
+    assert counters.counts(db, BUYER) == {str(ROOM): 3}
+    counters.reset([BUYER], ROOM)
+    assert counters.counts(db, BUYER) == {}
+    assert statements == []  # depois do seed, nenhuma query no banco
+
+
+def test_presence_shared_across_workers_and_expires(monkeypatch):
+    redis = FakeRedis()
+    worker_a, worker_b = ChatPresence(), ChatPresence()
+    for presence in (worker_a, worker_b):
+        monkeypatch.setattr(presence, "_redis", lambda: redis)
+
+    worker_a.touch(BUYER, "session-a")
+    assert worker_b.online_users([BUYER, SELLER]) == {str(BUYER): True, str(SELLER): False}
+
+    worker_a.leave(BUYER, "session-a")
+    assert not worker_b.is_online(BUYER)
+
+    worker_a.touch(BUYER, "session-b")
+    redis.data[ChatPresence._key(BUYER)]["session-b"] = time.time() - 1  # worker parou de renovar
+    assert not worker_b.is_online(BUYER)
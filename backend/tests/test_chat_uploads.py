@@ -0,0 +1,79 @@
+"""
+Chat Upload Tests
+=================
+
+Uploads are copied to disk in fixed-size chunks while hashing, identical
+files share one content-addressed blob, the size limit holds while
+streaming and image thumbnails are produced off the event loop.
+"""
+
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+
+from app.core.exceptions import ValidationError
+from app.services.chat_uploads import ChatUploadStore
+
+
+class CountingFile(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.reads.append(len(chunk))
+        return chunk
+
+
+def upload(data, name="comprovante.pdf"):
+    return UploadFile(file=CountingFile(data), filename=name)
+
+
+@pytest.mark.asyncio
+async def test_streams_in_chunks_and_dedupes_identical_files(tmp_path):
+    store = ChatUploadStore(tmp_path)
+    store.CHUNK_SIZE = 1024
+    data = b"x" * 5000
+
+    first_upload = upload(data)
+    first = await store.save(first_upload, ".pdf", max_size=10_000)
+    second = await store.save(upload(data), ".pdf", max_size=10_000)
+
+    assert max(first_upload.file.reads) <= 1024  # nunca o arquivo inteiro de uma vez
+    assert first.sha256 == hashlib.sha256(data).hexdigest() and first.size == 5000
+    assert (first.deduplicated, second.deduplicated) == (False, True)
+    assert first.path == second.path and first.path.read_bytes() == data
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_size_limit_enforced_while_streaming(tmp_path):
+    store = ChatUploadStore(tmp_path)
+    store.CHUNK_SIZE = 1024
+    too_big = upload(b"y" * 4096)
+
+    with pytest.raises(ValidationError):
+        await store.save(too_big, ".pdf", max_size=2048)
+
+    assert sum(too_big.file.reads) <= 3072  # parou assim que passou do limite
+    assert list((tmp_path / "tmp").iterdir()) == []
+    assert not (tmp_path / "blobs").exists()
+
+
+@pytest.mark.asyncio
+async def test_image_thumbnail_generated_in_background(tmp_path):
+    store = ChatUploadStore(tmp_path)
+    buffer = io.BytesIO()
+    Image.new("RGB", (1200, 800), "green").save(buffer, "PNG")
+
+    stored = await store.save(upload(buffer.getvalue(), "proof.png"), ".png", max_size=10_000_000)
+    assert store.schedule_preview(stored, ".pdf") is None
+    await store.schedule_preview(stored, ".png")
+
+    with Image.open(store.thumbnail_path(stored.sha256)) as thumb:
+        assert thumb.size == (320, 213)
+    assert store.schedule_preview(stored, ".png") is None  # já existe
@@ -0,0 +1,143 @@
+"""
+Confirmation Tracker Tests
+==========================
+
+Batched receipt polling per block, future/callback resolution, required
+confirmations, bulk Transaction status updates and the dedicated poller
+thread used by blocking callers.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.core.db as core_db
+from app.models.transaction import Transaction, TransactionStatus
+from app.services import confirmation_tracker as module
+from app.services.confirmation_tracker import ConfirmationTimeout, ConfirmationTracker
+
+
+class FakePool:
+    """Chain head + receipts served like RPCEndpointPool.call/call_batch"""
+
+    def __init__(self, head=100):
+        self.head = head
+        self.receipts = {}
+        self.batches = []
+
+    async def call(self, method, params=None):
+        assert method == "eth_blockNumber"
+        return hex(self.head)
+
+    async def call_batch(self, calls):
+        self.batches.append(len(calls))
+        return [self.receipts.get(params[0]) for _, params in calls]
+
+    def mine(self, tx_hash, status=1):
+        self.receipts[tx_hash] = {"blockNumber": hex(self.head), "status": hex(status), "gasUsed": hex(21000)}
+
+
+def tx_hash(i):
+    return "0x" + f"{i:064x}"
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Transaction.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(core_db, "SessionLocal", factory)
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_thousand_pending_cost_one_batch_round_per_block(session_factory):
+    pool = FakePool()
+    tracker = ConfirmationTracker(pool_factory=lambda network: pool)
+    futures = [tracker.track("polygon", tx_hash(i), start=False) for i in range(1000)]
+
+    assert await tracker.poll_once("polygon") == []
+    assert sum(pool.batches) == 1000
+    assert len(pool.batches) == 1000 // module.RECEIPT_BATCH_SIZE
+
+    # Mesmo bloco: nenhuma requisição de receipts
+    pool.batches.clear()
+    await tracker.poll_once("polygon")
+    assert pool.batches == []
+
+    pool.head += 1
+    pool.mine(tx_hash(1))
+    pool.mine(tx_hash(2), status=0)
+    resolved = await tracker.poll_once("polygon")
+
+    assert {c.tx_hash: c.success for c in resolved} == {tx_hash(1): True, tx_hash(2): False}
+    assert futures[1].result(0).block_number == 101
+    assert futures[2].result(0).status == "failed"
+    assert tracker.pending_count("polygon") == 998
+
+
+@pytest.mark.asyncio
+async def test_callbacks_confirmations_and_bulk_status_update(session_factory):
+    db = session_factory()
+    for i in (1, 2):
+        db.add(Transaction(
+            user_id=1, tx_hash=tx_hash(i), from_address="0xa", to_address="0xb",
+            amount="1", network="polygon", status=TransactionStatus.pending
+        ))
+    db.commit()
+
+    pool = FakePool()
+    tracker = ConfirmationTracker(pool_factory=lambda network: pool)
+    seen = []
+
+    async def on_confirmed(confirmation):
+        seen.append(confirmation.tx_hash)
+
+    tracker.track("polygon", tx_hash(1), callback=on_confirmed, confirmations=3, start=False)
+    tracker.track("polygon", tx_hash(2), start=False)
+    pool.mine(tx_hash(1))
+    pool.mine(tx_hash(2), status=0)
+
+    await tracker.poll_once("polygon")
+    assert seen == []  # 1 de 3 confirmações
+
+    pool.head += 2
+    await tracker.poll_once("polygon")
+    assert seen == [tx_hash(1)]
+
+    db.expire_all()
+    rows = {t.tx_hash: t for t in db.query(Transaction).all()}
+    assert rows[tx_hash(1)].status == TransactionStatus.confirmed
+    assert rows[tx_hash(1)].confirmations == 3
+    assert rows[tx_hash(1)].block_number == 100
+    assert rows[tx_hash(2)].status == TransactionStatus.failed
+
+
+@pytest.mark.asyncio
+async def test_expired_hashes_fail_the_future(session_factory):
+    tracker = ConfirmationTracker(pool_factory=lambda network: FakePool())
+    future = tracker.track("polygon", tx_hash(7), timeout=-1, start=False)
+
+    await tracker.poll_once("polygon")
+
+    assert isinstance(future.exception(0), ConfirmationTimeout)
+    assert tracker.pending_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_blocking_and_async_waiters_share_the_background_poller(session_factory, monkeypatch):
+    monkeypatch.setitem(module.BLOCK_TIMES, "polygon", 0.01)
+    pool = FakePool()
+    pool.mine(tx_hash(9))
+    tracker = ConfirmationTracker(pool_factory=lambda network: pool)
+    try:
+        blocking = await asyncio.to_thread(tracker.wait_sync, "polygon", tx_hash(9), 5)
+        awaited = await tracker.wait("polygon", tx_hash(9), timeout=5)
+        assert blocking.success and awaited.success
+    finally:
+        await tracker.stop()
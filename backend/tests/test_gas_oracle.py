@@ -0,0 +1,87 @@
+"""
+Gas Oracle Tests
+================
+
+EIP-1559 fee estimation from eth_feeHistory percentiles, the legacy
+gasPrice fallback, spike detection on the history ring buffer and the
+transaction fee fields handed to senders.
+"""
+
+from app.services.gas_oracle_service import GWEI, GasOracle, GasOracleService
+
+
+class FakeEth:
+    def __init__(self, base_fees=None, rewards=None, gas_price=20 * GWEI):
+        self.base_fees = base_fees
+        self.rewards = rewards
+        self.gas_price = gas_price
+        self.fee_history_calls = 0
+
+    def fee_history(self, block_count, newest_block, percentiles):
+        self.fee_history_calls += 1
+        if self.base_fees is None:
+            raise ValueError("the method eth_feeHistory does not exist")
+        return {
+            "oldestBlock": 100,
+            "baseFeePerGas": self.base_fees,
+            "reward": self.rewards,
+        }
+
+
+class FakeWeb3:
+    def __init__(self, eth):
+        self.eth = eth
+
+
+def test_fee_history_percentiles_drive_speeds():
+    rewards = [[1 * GWEI, 2 * GWEI, 5 * GWEI], [1 * GWEI, 3 * GWEI, 9 * GWEI], [2 * GWEI, 2 * GWEI, 4 * GWEI]]
+    eth = FakeEth(base_fees=[30 * GWEI, 31 * GWEI, 32 * GWEI, 40 * GWEI], rewards=rewards)
+    estimate = GasOracle("polygon", FakeWeb3(eth)).refresh()
+
+    assert estimate.eip1559
+    assert estimate.base_fee == 40 * GWEI  # base fee do próximo bloco
+    assert estimate.priority_fees == {"slow": 1 * GWEI, "standard": 2 * GWEI, "fast": 5 * GWEI}
+    assert estimate.max_fee("standard") == int(40 * GWEI * 1.25) + 2 * GWEI
+    assert estimate.max_fee("slow") < estimate.max_fee("standard") < estimate.max_fee("fast")
+    assert estimate.expected_fee("fast") == 45 * GWEI
+    assert estimate.tx_fields("fast") == {
+        "maxFeePerGas": estimate.max_fee("fast"),
+        "maxPriorityFeePerGas": 5 * GWEI,
+    }
+    assert estimate.block_number == 102
+
+
+def test_legacy_network_falls_back_to_gas_price():
+    estimate = GasOracle("bsc", FakeWeb3(FakeEth(gas_price=5 * GWEI))).refresh()
+
+    assert not estimate.eip1559
+    assert estimate.tx_fields() == {"gasPrice": 5 * GWEI}
+    assert estimate.tx_fields("fast") == {"gasPrice": int(5 * GWEI * 1.25)}
+
+
+def test_estimates_are_served_from_memory_until_stale():
+    eth = FakeEth(base_fees=[10 * GWEI, 10 * GWEI], rewards=[[GWEI, GWEI, GWEI]])
+    service = GasOracleService()
+    w3 = FakeWeb3(eth)
+
+    first = service.tx_fee_fields("ethereum", w3=w3)
+    for _ in range(50):
+        assert service.tx_fee_fields("ethereum", w3=w3) == first
+    assert eth.fee_history_calls == 1
+
+    service.oracle("ethereum").estimate.updated_at -= GasOracle.MAX_AGE + 1
+    service.get_estimate("ethereum")
+    assert eth.fee_history_calls == 2
+
+
+def test_spike_detection_against_history_median():
+    eth = FakeEth(base_fees=[10 * GWEI, 10 * GWEI], rewards=[[GWEI, GWEI, GWEI]])
+    oracle = GasOracle("ethereum", FakeWeb3(eth))
+    for _ in range(GasOracle.SPIKE_MIN_SAMPLES):
+        oracle.refresh()
+    assert not oracle.is_spike()
+
+    eth.base_fees = [10 * GWEI, 25 * GWEI]
+    oracle.refresh()
+    assert oracle.is_spike()
+    assert oracle.recent(2)[-1]["base_fee_gwei"] == 25
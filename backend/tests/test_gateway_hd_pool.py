@@ -0,0 +1,77 @@
+"""
+Gateway HD Address Tests
+========================
+
+Payment addresses derived from the cached merchant xpub match the full
+hardened-path derivation, and the pre-derived address pool serves
+checkouts without deriving on the request path.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("bip32")
+pytest.importorskip("coincurve")
+
+from app.services.gateway import hd_wallet_service
+from app.services.gateway.address_pool import GatewayAddressPool
+from app.services.gateway.hd_wallet_service import GatewayHDWalletService
+
+MNEMONIC = "abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about"
+
+
+@pytest.fixture
+def hd_wallet(monkeypatch):
+    wallet = GatewayHDWalletService()
+    assert wallet.initialize(MNEMONIC)
+    monkeypatch.setattr(hd_wallet_service, "_gateway_hd_wallet", wallet)
+    return wallet
+
+
+@pytest.mark.parametrize("currency,network", [("USDT", "polygon"), ("BTC", "bitcoin"), ("TRX", "tron")])
+def test_xpub_derivation_matches_full_path(hd_wallet, currency, network):
+    for merchant_index, payment_index in [(0, 0), (3, 7), (12, 1500)]:
+        path = hd_wallet.build_derivation_path(currency, merchant_index, payment_index)
+        keys = hd_wallet.derive_keys(path)
+        expected = hd_wallet._public_key_to_address(keys["public_key"], network)
+
+        address, derived_path = hd_wallet.derive_address(currency, network, merchant_index, payment_index)
+
+        assert (address, derived_path) == (expected, path)
+
+
+def test_known_first_ethereum_gateway_address_is_stable(hd_wallet):
+    address, _ = hd_wallet.derive_address("ETH", "ethereum", 0, 0)
+    keys = hd_wallet.derive_keys("m/44'/60'/1000'/0/0")
+    assert address == hd_wallet._derive_evm_address(bytes.fromhex(keys["public_key"]))
+    assert hd_wallet._merchant_nodes  # nó do merchant ficou em cache
+
+
+@pytest.mark.asyncio
+async def test_pool_serves_checkouts_and_refills_in_background(hd_wallet, monkeypatch):
+    pool = GatewayAddressPool(size=8)
+    assert pool.fill(5, "USDT", "polygon", start_index=0) == 8
+
+    calls = []
+    original = hd_wallet.derive_addresses
+    monkeypatch.setattr(hd_wallet, "derive_addresses", lambda *args: calls.append(args) or original(*args))
+
+    # Índice 0 e 1 consumidos por outros pagamentos (ex: PIX): descartados
+    address = pool.take(5, "USDT", "polygon", payment_index=2)
+    assert address == hd_wallet.derive_address("USDT", "polygon", 5, 2)[0]
+    assert pool.stats()["hits"] == 1
+    assert calls == []  # nada derivado no caminho da requisição
+
+    for index in range(3, 8):
+        assert pool.take(5, "USDT", "polygon", index)
+    await asyncio.sleep(0.2)  # refill em background
+
+    assert calls
+    assert pool.take(5, "USDT", "polygon", 8) == hd_wallet.derive_address("USDT", "polygon", 5, 8)[0]
+
+
+def test_pool_miss_returns_none(hd_wallet):
+    pool = GatewayAddressPool(size=4)
+    assert pool.take(1, "BTC", "bitcoin", 0) is None
+    assert pool.stats()["misses"] == 1
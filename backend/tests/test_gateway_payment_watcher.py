@@ -0,0 +1,290 @@
+"""
+Gateway Payment Watcher Tests
+=============================
+
+Pending gateway payments are matched against each new block's native
+transfers and token Transfer logs (one batched request per poll), amounts
+accumulate with tolerance, and payments are confirmed in bulk once the
+required confirmations are reached and the receipts check out. After a
+restart the scan resumes from the oldest open payment's creation block.
+Status changes are claimed with conditional UPDATEs, so when several
+workers see the same transfer only one of them fires the webhooks.
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.models.gateway import GatewayAuditLog, GatewayPayment, GatewayPaymentMethod, GatewayPaymentStatus
+from app.services.gateway.payment_service import GatewayPaymentService
+from app.services.gateway.payment_watcher import TRANSFER_TOPIC, GatewayPaymentWatcher
+
+USDT_POLYGON = "0xc2132d05d31c914a87c6611c10748aeb04b58e8f"
+
+
+def address(i):
+    return "0x" + f"{i:040x}"
+
+
+def tx_hash(i):
+    return "0x" + f"{i:064x}"
+
+
+class FakeChain:
+    """Blocks, Transfer logs and receipts served like RPCEndpointPool.call/call_batch"""
+
+    def __init__(self, head=1000):
+        self.head = head
+        self.blocks = {}
+        self.logs = []
+        self.receipts = {}
+        self.batches = []
+
+    async def call(self, method, params=None):
+        assert method == "eth_blockNumber"
+        return hex(self.head)
+
+    async def call_batch(self, calls):
+        self.batches.append([method for method, _ in calls])
+        results = []
+        for method, params in calls:
+            if method == "eth_getBlockByNumber":
+                number = int(params[0], 16)
+                results.append({"number": params[0], "transactions": self.blocks.get(number, [])})
+            elif method == "eth_getLogs":
+                start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+                results.append([l for l in self.logs if start <= int(l["blockNumber"], 16) <= end])
+            else:
+                results.append(self.receipts.get(params[0]))
+        return results
+
+    def send_native(self, i, to, wei):
+        self.head += 1
+        self.blocks[self.head] = [{"hash": tx_hash(i), "to": to, "value": hex(wei)}]
+        self.receipts[tx_hash(i)] = {"blockNumber": hex(self.head), "status": "0x1"}
+
+    def send_token(self, i, contract, to, units):
+        self.head += 1
+        self.logs.append({
+            "address": contract,
+            "topics": [TRANSFER_TOPIC, "0x" + "0" * 64, "0x" + "0" * 24 + to[2:]],
+            "data": hex(units),
+            "blockNumber": hex(self.head),
+            "transactionHash": tx_hash(i),
+            "logIndex": "0x0"
+        })
+        self.receipts[tx_hash(i)] = {"blockNumber": hex(self.head), "status": "0x1"}
+
+
+def payment(i, currency="USDT", amount="10", confirmations=3, network="polygon", created_at=None):
+    return SimpleNamespace(
+        created_at=created_at,
+        payment_id=f"WKPAY-{i}",
+        crypto_network=network,
+        crypto_address=address(i),
+        crypto_currency=currency,
+        crypto_amount=Decimal(amount),
+        crypto_required_confirmations=confirmations,
+        expires_at=datetime.now(timezone.utc) + timedelta(minutes=30)
+    )
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    chain = FakeChain()
+    watcher = GatewayPaymentWatcher(pool_factory=lambda network: chain)
+    persisted = []
+
+    async def persist(network, stage, detections):
+        persisted.append((stage, [d["payment_id"] for d in detections]))
+
+    monkeypatch.setattr(watcher, "_persist", persist)
+    return watcher, chain, persisted
+
+
+@pytest.mark.asyncio
+async def test_token_and_native_payments_detected_and_confirmed_in_bulk(watcher):
+    watcher, chain, persisted = watcher
+    for i in range(500):
+        assert watcher.watch(payment(i, confirmations=5))
+    assert watcher.watch(payment(900, currency="MATIC", amount="2", confirmations=1))
+
+    await watcher.poll_once("polygon")  # primeiro polling: só posiciona no topo
+    chain.batches.clear()
+
+    chain.send_token(1, USDT_POLYGON, address(7), 9_950_000)  # 9.95 USDT (dentro da tolerância de 1%)
+    chain.send_token(2, USDT_POLYGON, address(8), 5_000_000)  # parcial
+    chain.send_native(3, address(900), 2 * 10 ** 18)
+
+    detected, confirmed = await watcher.poll_once("polygon")
+
+    # Uma requisição em lote (3 blocos + logs), independente de 501 pagamentos abertos
+    assert chain.batches[0] == ["eth_getBlockByNumber"] * 3 + ["eth_getLogs"]
+    assert {p.payment_id for p in detected} == {"WKPAY-7", "WKPAY-900"}
+    assert [p.payment_id for p in confirmed] == ["WKPAY-900"]
+    assert watcher.get("polygon", address(8)).received == Decimal("5")
+
+    chain.head += 2
+    _, confirmed = await watcher.poll_once("polygon")
+    assert [p.payment_id for p in confirmed] == ["WKPAY-7"]
+    assert watcher.get("polygon", address(7)) is None
+
+    assert persisted == [
+        ("detected", ["WKPAY-900", "WKPAY-7"]),  # blocos primeiro, depois logs
+        ("confirmed", ["WKPAY-900"]),
+        ("confirmed", ["WKPAY-7"]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reverted_transfer_is_not_confirmed(watcher):
+    watcher, chain, persisted = watcher
+    watcher.watch(payment(1, currency="MATIC", amount="1", confirmations=1))
+    await watcher.poll_once("polygon")
+
+    chain.send_native(5, address(1), 10 ** 18)
+    chain.receipts[tx_hash(5)]["status"] = "0x0"
+
+    detected, confirmed = await watcher.poll_once("polygon")
+    assert [p.payment_id for p in detected] == ["WKPAY-1"]
+    assert confirmed == []
+    item = watcher.get("polygon", address(1))
+    assert item.detected_block is None and item.received == 0
+
+
+@pytest.mark.asyncio
+async def test_restart_rescans_from_oldest_open_payment(watcher):
+    watcher, chain, persisted = watcher
+    created = datetime.now(timezone.utc) - timedelta(minutes=10)  # ~300 blocos de 2s na polygon
+    # Transferência feita com o worker parado, 200 blocos antes do topo
+    chain.head = 800
+    chain.send_token(1, USDT_POLYGON, address(3), 10_000_000)
+    chain.head = 1000
+    watcher.watch(payment(3, confirmations=1, created_at=created))
+
+    detected = []
+    for _ in range(40):
+        found, _ = await watcher.poll_once("polygon")
+        detected += found
+        if not watcher.is_behind("polygon"):
+            break
+
+    assert [p.payment_id for p in detected] == ["WKPAY-3"]
+    assert ("confirmed", ["WKPAY-3"]) in persisted
+
+
+def test_unsupported_payments_are_not_watched():
+    watcher = GatewayPaymentWatcher()
+    assert not watcher.watch(payment(1, network="bitcoin", currency="BTC"))
+    assert not watcher.watch(payment(2, currency="XYZ"))
+    assert watcher.pending_count() == 0
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    GatewayPayment.__table__.create(engine)
+    GatewayAuditLog.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_payment(db, i, status=GatewayPaymentStatus.PENDING, expires_in=30):
+    row = GatewayPayment(
+        payment_id=f"WKPAY-{i}",
+        merchant_id="m1",
+        payment_method=GatewayPaymentMethod.CRYPTO,
+        amount_requested=Decimal("50"),
+        currency_requested="BRL",
+        fee_percent=Decimal("2.5"),
+        crypto_currency="USDT",
+        crypto_network="polygon",
+        crypto_address=address(i),
+        crypto_amount=Decimal("10"),
+        usd_rate=Decimal("1"),
+        brl_rate=Decimal("5"),
+        checkout_token=f"tok-{i}",
+        expires_at=datetime.now(timezone.utc) + timedelta(minutes=expires_in),
+        status=status
+    )
+    db.add(row)
+    return row
+
+
+@pytest.mark.asyncio
+async def test_service_bulk_confirm_and_expire(db, monkeypatch):
+    events = []
+
+    async def trigger(self, payment, event):
+        events.append((payment.payment_id, event))
+
+    monkeypatch.setattr(GatewayPaymentService, "_trigger_webhook", trigger)
+    for i in range(3):
+        add_payment(db, i)
+    add_payment(db, 9, expires_in=-5)
+    db.commit()
+
+    service = GatewayPaymentService(db)
+    confirmed = await service.confirm_crypto_payments([
+        {"payment_id": "WKPAY-0", "amount": Decimal("9.95"), "tx_hash": tx_hash(1), "confirmations": 30},
+        {"payment_id": "WKPAY-1", "amount": Decimal("5"), "tx_hash": tx_hash(2), "confirmations": 30},
+    ])
+
+    assert [p.payment_id for p in confirmed] == ["WKPAY-0"]
+    rows = {p.payment_id: p for p in db.query(GatewayPayment).all()}
+    assert rows["WKPAY-0"].status == GatewayPaymentStatus.COMPLETED
+    assert rows["WKPAY-0"].amount_received == Decimal("49.75")
+    assert rows["WKPAY-1"].status == GatewayPaymentStatus.PROCESSING
+
+    assert await service.expire_pending_payments() == 1
+    db.expire_all()
+    assert db.query(GatewayPayment).filter_by(payment_id="WKPAY-9").one().status == GatewayPaymentStatus.EXPIRED
+    assert events == [
+        ("WKPAY-0", "payment.confirmed"),
+        ("WKPAY-0", "payment.completed"),
+        ("WKPAY-9", "payment.expired"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_only_the_worker_that_claims_the_row_fires_webhooks(db, monkeypatch):
+    events = []
+
+    async def trigger(self, payment, event):
+        events.append((payment.payment_id, event))
+
+    claim = GatewayPaymentService._claim
+
+    def claim_after_other_worker(self, payment_ids, from_statuses, status, **values):
+        # Outro worker confirmou WKPAY-0 entre a leitura e o UPDATE deste
+        self.db.execute(
+            update(GatewayPayment)
+            .where(GatewayPayment.payment_id == "WKPAY-0")
+            .values(status=GatewayPaymentStatus.COMPLETED)
+        )
+        return claim(self, payment_ids, from_statuses, status, **values)
+
+    monkeypatch.setattr(GatewayPaymentService, "_trigger_webhook", trigger)
+    add_payment(db, 0)
+    add_payment(db, 1)
+    add_payment(db, 2, status=GatewayPaymentStatus.PROCESSING, expires_in=-5)
+    db.commit()
+    service = GatewayPaymentService(db)
+    detection = {"amount": Decimal("10"), "tx_hash": tx_hash(1), "confirmations": 30}
+
+    monkeypatch.setattr(GatewayPaymentService, "_claim", claim_after_other_worker)
+    confirmed = await service.confirm_crypto_payments([
+        dict(detection, payment_id="WKPAY-0"), dict(detection, payment_id="WKPAY-1")
+    ])
+    monkeypatch.setattr(GatewayPaymentService, "_claim", claim)
+
+    assert [p.payment_id for p in confirmed] == ["WKPAY-1"]
+    assert db.query(GatewayAuditLog).count() == 1
+    assert await service.mark_crypto_payments_detected([dict(detection, payment_id="WKPAY-1")]) == 0
+    assert await service.expire_pending_payments() == 0  # WKPAY-2 já foi detectado
+    assert events == [("WKPAY-1", "payment.confirmed"), ("WKPAY-1", "payment.completed")]
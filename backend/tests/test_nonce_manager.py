@@ -0,0 +1,142 @@
+"""
+Testes do gerenciador de nonces para envios EVM concorrentes
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import rlp
+from eth_account import Account
+
+from app.services.nonce_manager import BroadcastUncertain, NonceManager, TransactionRejected
+
+
+PRIVATE_KEY = "0x" + "11" * 32
+SENDER = Account.from_key(PRIVATE_KEY).address
+RECIPIENT = "0x" + "22" * 20
+
+
+class FakeEth:
+    """Nó EVM mínimo: mempool por nonce, erros injetáveis"""
+
+    def __init__(self, start_nonce=5):
+        self.mined_nonce = start_nonce
+        self.mempool = {}
+        self.count_calls = 0
+        self.fail_next = None
+        self.gas_price = 30_000_000_000
+        self.chain_id = 137
+        self.account = Account
+
+    def get_transaction_count(self, address, block="latest"):
+        self.count_calls += 1
+        if block == "pending":
+            return max([self.mined_nonce] + [n + 1 for n in self.mempool])
+        return self.mined_nonce
+
+    def send_raw_transaction(self, raw_tx):
+        if self.fail_next:
+            error, self.fail_next = self.fail_next, None
+            raise ValueError(error)
+        assert Account.recover_transaction(raw_tx) == SENDER  # valida assinatura
+        decoded = _decode_nonce(raw_tx)
+        if decoded < self.mined_nonce:
+            raise ValueError("nonce too low")
+        self.mempool[decoded] = raw_tx
+        return b"\x00" * 32
+
+
+class FakeWeb3:
+    def __init__(self, eth):
+        self.eth = eth
+
+
+def _decode_nonce(raw_tx):
+    # Transações legadas: rlp([nonce, gasPrice, gas, to, value, data, v, r, s])
+    return int.from_bytes(rlp.decode(bytes(raw_tx))[0], "big")
+
+
+def _tx(value=1):
+    return {"to": RECIPIENT, "value": value, "gas": 21000, "gasPrice": 30_000_000_000, "chainId": 137}
+
+
+@pytest.fixture
+def node():
+    return FakeEth()
+
+
+def test_concurrent_sends_get_sequential_nonces(node):
+    manager = NonceManager(use_redis=False)
+    w3 = FakeWeb3(node)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        hashes = list(pool.map(lambda i: manager.send_transaction(w3, _tx(i), PRIVATE_KEY), range(20)))
+
+    assert len(set(hashes)) == 20
+    assert sorted(node.mempool) == list(range(5, 25))
+    # Uma única leitura de nonce na RPC para 20 envios
+    assert node.count_calls == 1
+
+
+def test_failed_send_releases_nonce(node):
+    manager = NonceManager(use_redis=False)
+    w3 = FakeWeb3(node)
+
+    manager.send_transaction(w3, _tx(), PRIVATE_KEY)
+    node.fail_next = "insufficient funds for gas * price + value"
+    with pytest.raises(TransactionRejected):
+        manager.send_transaction(w3, _tx(), PRIVATE_KEY)
+    manager.send_transaction(w3, _tx(), PRIVATE_KEY)
+
+    # Sem buraco: o nonce 6 foi reaproveitado
+    assert sorted(node.mempool) == [5, 6]
+
+
+def test_nonce_error_resyncs_and_retries(node):
+    manager = NonceManager(use_redis=False)
+    w3 = FakeWeb3(node)
+    manager.send_transaction(w3, _tx(), PRIVATE_KEY)
+
+    # Outro processo usou nonces fora do gerenciador
+    node.mined_nonce = 10
+    node.mempool.clear()
+    manager.send_transaction(w3, _tx(), PRIVATE_KEY)
+
+    assert list(node.mempool) == [10]
+
+
+def test_replace_by_fee_bumps_gas_and_keeps_nonce(node):
+    manager = NonceManager(use_redis=False)
+    w3 = FakeWeb3(node)
+    original = manager.send_transaction(w3, _tx(), PRIVATE_KEY)
+
+    stuck = manager.stuck_transactions(w3, 137, SENDER, older_than=0)
+    assert [p.tx_hash for p in stuck] == [original]
+
+    replaced = manager.bump_stuck(w3, 137, SENDER, PRIVATE_KEY, older_than=0)
+    pending = manager.pending_transactions(137, SENDER)
+
+    assert list(replaced) == [5]
+    assert replaced[5] != original
+    assert pending[0].nonce == 5
+    assert pending[0].tx["gasPrice"] > _tx()["gasPrice"] * 1.1
+    assert pending[0].replacements == 1
+
+    # Minerada: sai do registro
+    node.mined_nonce = 6
+    assert manager.stuck_transactions(w3, 137, SENDER, older_than=0) == []
+
+
+def test_ambiguous_send_error_keeps_nonce_pending(node):
+    manager = NonceManager(use_redis=False)
+    w3 = FakeWeb3(node)
+
+    node.fail_next = "504 Gateway Timeout"
+    with pytest.raises(BroadcastUncertain) as error:
+        manager.send_transaction(w3, _tx(), PRIVATE_KEY)
+    manager.send_transaction(w3, _tx(), PRIVATE_KEY)
+
+    # O nonce 5 não é reutilizado: fica pendente para bump_stuck/resync
+    assert list(node.mempool) == [6]
+    pending = manager.pending_transactions(137, SENDER)
+    assert [(p.nonce, p.tx_hash) for p in pending] == [(5, error.value.tx_hash), (6, pending[1].tx_hash)]
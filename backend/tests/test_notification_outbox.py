@@ -0,0 +1,156 @@
+"""
+Notification Outbox Tests
+=========================
+
+Producers only insert rows into notification_outbox, through the worker's
+own session so the caller's transaction is never committed or rolled back;
+the worker claims due rows, sends them through the provider's batch API with
+bounded concurrency, retries failures with backoff and gives up after
+MAX_ATTEMPTS. Without a provider rows stay pending. Recipient language and
+preferences are loaded with a single query per session.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+from app.models.user import User
+from app.models.user_profile import NotificationSettings
+from app.models.user_settings import UserSettings
+from app.services.notifications.notification_service import NotificationService
+from app.services.notifications import outbox as outbox_module
+from app.services.notifications.outbox import FakeEmailProvider, NotificationOutboxWorker
+
+USER_ID = uuid.UUID(int=7)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (User, UserSettings, NotificationSettings, NotificationOutbox):
+        model.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(User(id=USER_ID, username="ana", email="ana@x.io", password_hash="x"))
+    db.add(UserSettings(user_id=str(USER_ID), language="es"))
+    db.add(NotificationSettings(user_id=USER_ID, trade_alerts=False))
+    db.commit()
+    db.close()
+    return factory
+
+
+def outbox_rows(factory):
+    db = factory()
+    try:
+        return db.query(NotificationOutbox).order_by(NotificationOutbox.to_email).all()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def global_outbox(session_factory, monkeypatch):
+    monkeypatch.setattr(outbox_module.notification_outbox, "_session_factory", session_factory)
+    return outbox_module.notification_outbox
+
+
+@pytest.mark.asyncio
+async def test_producers_enqueue_and_worker_sends_in_concurrent_batches(session_factory, global_outbox):
+    db = session_factory()
+    result = await NotificationService().send_kyc_rejected(db, str(USER_ID), "ana@x.io", "ana", "blurry photo")
+    worker = NotificationOutboxWorker(provider=FakeEmailProvider(), session_factory=session_factory)
+    for i in range(249):
+        worker.enqueue(db, to_email=f"user{i:03d}@x.io", subject="hi", html="<p>hi</p>", from_email="a@x.io")
+    db.commit()
+    db.close()
+
+    assert result["queued"] and worker.provider.calls == 0  # nada enviado pelo produtor
+
+    assert await worker.run_once(concurrency=2) == 200
+    assert await worker.run_once(concurrency=2) == 50
+    assert await worker.run_once(concurrency=2) == 0
+
+    rows = outbox_rows(session_factory)
+    assert {row.status for row in rows} == {OutboxStatus.SENT.value}
+    assert all(row.provider_message_id == f"fake-{row.id}" for row in rows)
+    assert worker.provider.calls == 3 and len(worker.provider.sent) == 250
+    metrics = worker.metrics()
+    assert metrics["sent"] == 250 and metrics["batches"] == 3 and metrics["emails_per_second"] > 0
+
+
+@pytest.mark.asyncio
+async def test_failures_back_off_and_give_up_after_max_attempts(session_factory):
+    worker = NotificationOutboxWorker(
+        provider=FakeEmailProvider(fail_batches=1, reject={"bad@x.io"}), session_factory=session_factory
+    )
+    worker.MAX_ATTEMPTS = 2
+    for email in ("bad@x.io", "good@x.io"):
+        worker.enqueue(to_email=email, subject="s", html="h", from_email="a@x.io")
+
+    assert await worker.run_once() == 2  # lote inteiro falha (provedor fora)
+    bad, good = outbox_rows(session_factory)
+    assert bad.status == good.status == OutboxStatus.PENDING.value
+    assert good.attempts == 1 and good.next_attempt_at > datetime.utcnow() + timedelta(seconds=20)
+    assert await worker.run_once() == 0  # backoff: ainda não venceu
+
+    db = session_factory()
+    db.query(NotificationOutbox).update({NotificationOutbox.next_attempt_at: datetime.utcnow()})
+    db.commit()
+    db.close()
+
+    assert await worker.run_once() == 2
+    bad, good = outbox_rows(session_factory)
+    assert good.status == OutboxStatus.SENT.value
+    assert bad.status == OutboxStatus.FAILED.value and bad.attempts == 2 and "rejected" in bad.last_error
+    metrics = worker.metrics()
+    assert (metrics["sent"], metrics["retried"], metrics["failed"], metrics["provider_errors"]) == (1, 2, 1, 1)
+
+
+def test_stale_claims_are_reclaimed_and_preferences_load_in_one_query(session_factory):
+    worker = NotificationOutboxWorker(provider=FakeEmailProvider(), session_factory=session_factory)
+    db = session_factory()
+    worker.enqueue(db, to_email="ana@x.io", subject="s", html="h", from_email="a@x.io")
+    now = datetime.utcnow()
+    assert len(worker.claim(db, 10, now=now)) == 1
+    assert worker.claim(db, 10, now=now + timedelta(seconds=10)) == []  # em envio por outro worker
+    assert len(worker.claim(db, 10, now=now + timedelta(seconds=worker.LOCK_TIMEOUT + 1))) == 1
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    service = NotificationService()
+    for _ in range(3):
+        assert service._get_user_language(db, str(USER_ID)) == "es"
+        assert service._check_notification_enabled(db, str(USER_ID), "trade") is False
+        assert service._check_notification_enabled(db, str(USER_ID), "security") is True
+    assert len(statements) == 1
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_producer_never_commits_or_rolls_back_the_callers_session(session_factory, global_outbox):
+    db = session_factory()
+    touched = []
+    event.listen(db, "after_commit", lambda session: touched.append("commit"))
+    event.listen(db, "after_soft_rollback", lambda session, previous: touched.append("rollback"))
+
+    result = await NotificationService().send_kyc_rejected(db, str(USER_ID), "ana@x.io", "ana", "blurry photo")
+
+    assert result["queued"] and len(outbox_rows(session_factory)) == 1
+    assert touched == []  # a transação do handler continua intacta
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_without_provider_rows_stay_pending(session_factory, monkeypatch, caplog):
+    monkeypatch.delenv("RESEND_API_KEY", raising=False)
+    worker = NotificationOutboxWorker(session_factory=session_factory)
+    worker.enqueue(to_email="ana@x.io", subject="s", html="h", from_email="a@x.io")
+
+    assert await worker.run_once() == 0
+    row, = outbox_rows(session_factory)
+    assert row.status == OutboxStatus.PENDING.value and row.attempts == 0
+    assert any(record.levelname == "ERROR" for record in caplog.records)
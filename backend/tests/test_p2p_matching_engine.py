@@ -0,0 +1,137 @@
+"""
+P2P Matching Engine Tests
+=========================
+
+Taker requests are matched against the in-memory book (best price first,
+maker limits, payment methods, reputation) and maker liquidity is reserved
+with a conditional UPDATE so concurrent takers cannot double-fill.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.p2p import P2POrder
+from app.services.p2p_matching_engine import (
+    LiquidityConflict,
+    P2PMatchingEngine,
+    TakerRequest,
+)
+from app.services.p2p_order_book_service import P2POrderBookService
+
+BASE_TIME = datetime(2026, 2, 1, 12, 0, 0)
+
+
+def row(i, price, amount, min_limit=10.0, max_limit=10_000.0, methods='["pix"]', user=None, order_type="sell"):
+    return SimpleNamespace(
+        id=uuid.UUID(int=i), user_id=uuid.UUID(int=user or 1000 + i), order_type=order_type,
+        cryptocurrency="USDT", fiat_currency="BRL", price=price, available_amount=amount,
+        total_amount=amount, min_order_limit=min_limit, max_order_limit=max_limit,
+        payment_methods=methods, status="active", created_at=BASE_TIME + timedelta(minutes=i)
+    )
+
+
+def oid(i):
+    return str(uuid.UUID(int=i))
+
+
+def taker(amount, **kwargs):
+    return TakerRequest(cryptocurrency="USDT", fiat_currency="BRL", side="buy", fiat_amount=amount, **kwargs)
+
+
+@pytest.fixture
+def engine():
+    book = P2POrderBookService()
+    book.rebuild([
+        row(1, 5.00, 60.0, min_limit=200.0),      # melhor preço, mas mínimo alto
+        row(2, 5.10, 100.0, max_limit=300.0),
+        row(3, 5.10, 50.0, methods='["ted"]'),
+        row(4, 5.20, 1000.0),
+        row(5, 4.90, 10.0, user=7),               # ordem do próprio taker
+    ])
+    engine = P2PMatchingEngine(book)
+    engine.reputation = {str(uuid.UUID(int=1000 + i)): 90.0 for i in (1, 2, 3)}
+    return engine
+
+
+def test_split_fill_walks_best_prices_within_limits(engine):
+    result = engine.match(taker(700.0, payment_methods=["pix"], taker_id=str(uuid.UUID(int=7))))
+
+    assert [(f.order_id, f.fiat_amount) for f in result.fills] == [
+        (oid(1), 300.0),   # 60 USDT × 5.00 (saldo da ordem)
+        (oid(2), 300.0),   # limitado pelo max_order_limit
+        (oid(4), 100.0),   # ordem 3 não aceita PIX
+    ]
+    assert result.fills[0].crypto_amount == 60.0
+    assert result.filled_fiat == 700.0
+    assert result.average_price == pytest.approx(700.0 / (60 + 300 / 5.1 + 100 / 5.2))
+
+    # Restante abaixo do mínimo da ordem 1 (R$ 200): ela é pulada
+    result = engine.match(taker(150.0, taker_id=str(uuid.UUID(int=7))))
+    assert [f.order_id for f in result.fills] == [oid(2)]
+
+
+def test_single_fill_and_reputation_filter(engine):
+    single = engine.match(taker(400.0, allow_split=False, taker_id=str(uuid.UUID(int=7))))
+    assert [(f.order_id, f.fiat_amount) for f in single.fills] == [(oid(4), 400.0)]
+
+    # Ordem 4 sem reputação: fill parcial com o que sobra
+    trusted = engine.match(taker(900.0, min_reputation=80, taker_id=str(uuid.UUID(int=7))))
+    assert [f.order_id for f in trusted.fills] == [oid(1), oid(2), oid(3)]
+    assert trusted.filled_fiat == pytest.approx(300.0 + 300.0 + 50 * 5.1)
+    assert trusted.to_dict()["remaining_fiat"] == pytest.approx(900.0 - 855.0)
+
+    assert engine.match(TakerRequest("BTC", "BRL", "buy", 100.0)).fills == []
+
+
+@pytest.fixture
+def db():
+    sql = create_engine("sqlite://")
+    P2POrder.__table__.create(sql)
+    session = sessionmaker(bind=sql)()
+    for r in (row(1, 5.00, 20.0), row(2, 5.10, 100.0)):
+        values = vars(r)
+        db_row = P2POrder(**values)
+        session.add(db_row)
+    session.commit()
+    yield session
+    session.close()
+
+
+def available(db, i):
+    db.expire_all()
+    return db.query(P2POrder).filter(P2POrder.id == uuid.UUID(int=i)).one().available_amount
+
+
+def test_reservation_is_atomic_and_rematches_on_conflict(db):
+    book = P2POrderBookService()
+    book.load_from_db(db)
+    engine = P2PMatchingEngine(book)
+
+    stale = engine.match(taker(100.0))
+    assert [f.order_id for f in stale.fills] == [oid(1)]
+
+    # Outro worker consome a ordem 1 entre o casamento e a reserva
+    assert engine.reserve_order(db, oid(1), 15.0)
+    db.commit()
+    assert not engine.reserve_order(db, oid(1), 20.0)
+    db.rollback()
+
+    with pytest.raises(LiquidityConflict):
+        engine.reserve(db, stale)
+    assert available(db, 1) == 5.0
+    assert book.books[("USDT", "BRL", "sell")].orders[oid(1)].available_amount == 5.0
+
+    result = engine.match_and_reserve(db, taker(100.0))
+    assert [(f.order_id, f.crypto_amount) for f in result.fills] == [(oid(1), 5.0), (oid(2), pytest.approx(75 / 5.1))]
+    assert available(db, 1) == 0.0
+    assert available(db, 2) == pytest.approx(100 - 75 / 5.1)
+    assert oid(1) not in book.books[("USDT", "BRL", "sell")].orders  # esgotada sai do book
+
+    engine.release_order(db, oid(1), 5.0)
+    db.commit()
+    assert available(db, 1) == 5.0
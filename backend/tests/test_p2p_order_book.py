@@ -0,0 +1,137 @@
+"""
+P2P Order Book Tests
+====================
+
+In-memory books keep price levels sorted (best price first, time priority
+inside a level), publish numbered deltas to subscribers, rebuild from
+p2p_orders and detect/repair drift against the database.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.p2p import P2POrder
+from app.services.p2p_order_book_service import P2POrderBookService
+
+BASE_TIME = datetime(2026, 2, 1, 12, 0, 0)
+
+
+def row(i, price, amount=100.0, order_type="sell", status="active", coin="USDT"):
+    return SimpleNamespace(
+        id=uuid.UUID(int=i), user_id=uuid.UUID(int=1000 + i), order_type=order_type,
+        cryptocurrency=coin, fiat_currency="BRL", price=price, available_amount=amount,
+        min_order_limit=50.0, max_order_limit=500.0, payment_methods='["pix"]',
+        status=status, created_at=BASE_TIME + timedelta(minutes=i)
+    )
+
+
+def oid(i):
+    return str(uuid.UUID(int=i))
+
+
+@pytest.mark.asyncio
+async def test_levels_sorted_and_deltas_published():
+    service = P2POrderBookService()
+    service.rebuild([])
+    feed = service.subscribe("usdt", "brl", "sell")
+
+    for i, price in enumerate([5.30, 5.10, 5.20, 5.10], start=1):
+        service.apply(row(i, price))
+    service.apply(row(10, 5.60, order_type="buy"))
+    service.apply(row(11, 5.70, order_type="buy"))
+
+    assert service.best_price("USDT", "BRL", "sell") == 5.10
+    assert service.best_price("USDT", "BRL", "buy") == 5.70
+    assert [o["id"] for o in service.top("USDT", "BRL", "sell", 3)] == [oid(2), oid(4), oid(3)]
+
+    snapshot = service.snapshot("USDT", "BRL", "sell", depth=2)
+    assert snapshot["seq"] == 4
+    assert snapshot["levels"] == [
+        {"price": 5.10, "amount": 200.0, "orders": 2},
+        {"price": 5.20, "amount": 100.0, "orders": 1},
+    ]
+
+    service.apply(row(2, 5.10, amount=40.0))  # execução parcial: mantém a prioridade
+    assert service.top("USDT", "BRL", "sell", 1)[0]["availableAmount"] == 40.0
+    service.apply(row(4, 5.25))  # mudou de preço: sai do nível 5.10
+    service.apply(row(2, 5.10, status="paused"))
+
+    deltas = [feed.queue.get_nowait() for _ in range(feed.queue.qsize())]
+    assert [d["seq"] for d in deltas] == [1, 2, 3, 4, 5, 6, 7]
+    assert deltas[5]["levels"] == [
+        {"price": 5.10, "amount": 40.0, "orders": 1},
+        {"price": 5.25, "amount": 100.0, "orders": 1},
+    ]
+    assert deltas[6]["removed"] == oid(2)
+    assert deltas[6]["levels"] == [{"price": 5.10, "amount": 0.0, "orders": 0}]
+    assert service.best_price("USDT", "BRL", "sell") == 5.20
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_resync():
+    service = P2POrderBookService()
+    service.SUBSCRIBER_QUEUE_SIZE = 3
+    service.rebuild([])
+    feed = service.subscribe("USDT", "BRL", "sell")
+    for i in range(1, 6):
+        service.apply(row(i, 5.0 + i / 100))
+
+    messages = [feed.queue.get_nowait() for _ in range(feed.queue.qsize())]
+    assert messages[0]["type"] == "resync"
+    assert [m["seq"] for m in messages[1:]] == [5]  # o delta 4 vem no snapshot do resync
+
+    service.unsubscribe(feed)
+    service.apply(row(9, 5.0))
+    assert feed.queue.qsize() == 0
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    P2POrder.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_order(db, i, price, **kwargs):
+    values = vars(row(i, price, **kwargs))
+    values["total_amount"] = values["available_amount"]
+    db.add(P2POrder(**values))
+
+
+def test_rebuild_refresh_and_consistency_check(db):
+    for i, price in enumerate([5.3, 5.1, 5.2], start=1):
+        add_order(db, i, price)
+    add_order(db, 4, 5.0, status="cancelled")
+    add_order(db, 5, 4.9, amount=0.0)
+    db.commit()
+
+    service = P2POrderBookService()
+    assert service.load_from_db(db) == 3
+    assert service.best_price("USDT", "BRL", "sell") == 5.1
+    assert service.check_db(db) == {"missing": [], "stale": [], "mismatched": []}
+
+    # Evento do router: relê a ordem após o commit
+    db.query(P2POrder).filter(P2POrder.id == uuid.UUID(int=2)).update({"status": "cancelled"})
+    db.commit()
+    service.refresh_order(db, oid(2))
+    assert service.best_price("USDT", "BRL", "sell") == 5.2
+
+    # Escritas que não passaram pelo book (outro worker, SQL manual)
+    db.query(P2POrder).filter(P2POrder.id == uuid.UUID(int=1)).update({"price": 4.8})
+    db.query(P2POrder).filter(P2POrder.id == uuid.UUID(int=3)).update({"status": "completed"})
+    add_order(db, 6, 5.5)
+    db.commit()
+
+    report = service.check_db(db)
+    assert report == {"missing": [oid(6)], "stale": [oid(3)], "mismatched": [oid(1)]}
+
+    service.reconcile(P2POrderBookService._active_rows(db))
+    assert service.check_db(db) == {"missing": [], "stale": [], "mismatched": []}
+    assert [o["id"] for o in service.top("USDT", "BRL", "sell")] == [oid(1), oid(6)]
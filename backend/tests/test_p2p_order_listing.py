@@ -0,0 +1,149 @@
+"""
+P2P Order Listing Tests
+=======================
+
+The public order listing loads trader profiles in the same query, pages
+with an opaque keyset cursor (no duplicates or gaps across pages, stable
+under inserts) and serves the total from a short-lived count cache.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.p2p import P2POrder
+from app.models.trader_profile import TraderProfile
+from app.models.user import User
+from app.services.p2p_order_listing_service import (
+    P2POrderListingService,
+    decode_cursor,
+    encode_cursor,
+)
+
+BASE_TIME = datetime(2026, 2, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (User, TraderProfile, P2POrder):
+        model.__table__.create(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session = sessionmaker(bind=engine)()
+    session.statements = statements
+    yield session
+    session.close()
+
+
+def add_trader(db, i, verified=True):
+    user = User(id=uuid.uuid4(), username=f"trader{i}", email=f"trader{i}@hold.io", password_hash="x")
+    db.add(user)
+    db.add(TraderProfile(
+        user_id=user.id, display_name=f"Trader {i}", is_verified=verified,
+        success_rate=0.97, average_rating=4.9, total_trades=10, completed_trades=9
+    ))
+    return user
+
+
+def add_order(db, user_id, minutes, price=5.0, order_type="sell", coin="USDT", status="active"):
+    order = P2POrder(
+        user_id=user_id, order_type=order_type, cryptocurrency=coin, fiat_currency="BRL",
+        price=price, total_amount=100, available_amount=100, min_order_limit=50,
+        max_order_limit=500, payment_methods='["pix"]', status=status,
+        created_at=BASE_TIME + timedelta(minutes=minutes)
+    )
+    db.add(order)
+    return order
+
+
+def collect(service, db, **kwargs):
+    seen, cursor = [], None
+    while True:
+        page, cursor = service.list_orders(db, cursor=cursor, **kwargs)
+        seen.extend(page)
+        if cursor is None:
+            return seen
+
+
+def test_pages_are_keyset_and_trader_is_joined(db):
+    traders = [add_trader(db, i) for i in range(3)]
+    anonymous = uuid.uuid4()  # ordem sem perfil de trader → fallback
+    for i in range(25):
+        add_order(db, traders[i % 3].id, minutes=i // 2)  # timestamps repetidos: desempate por id
+    add_order(db, anonymous, minutes=100)
+    add_order(db, traders[0].id, minutes=200, status="paused")
+    add_order(db, traders[0].id, minutes=300, coin="BTC")
+    db.commit()
+
+    service = P2POrderListingService()
+    db.statements.clear()
+    page, cursor = service.list_orders(db, coin="usdt", limit=10)
+
+    assert len(db.statements) == 1  # perfil + usuário vêm no mesmo SELECT
+    assert len(page) == 10 and cursor
+    assert page[0]["userId"] == str(anonymous) and page[0]["user"]["success_rate"] == 98.5
+    assert page[1]["user"]["username"].startswith("trader")
+    assert page[1]["user"]["success_rate"] == pytest.approx(97)
+    assert page[1]["paymentMethods"] == ["pix"]
+
+    orders = collect(service, db, coin="USDT", limit=7)
+    created = [o["createdAt"] for o in orders]
+    assert len(orders) == 26 and len({o["id"] for o in orders}) == 26
+    assert created == sorted(created, reverse=True)
+
+    # Nova ordem no topo não desloca a página seguinte (ao contrário de OFFSET)
+    first, cursor = service.list_orders(db, coin="USDT", limit=5)
+    add_order(db, traders[1].id, minutes=500)
+    db.commit()
+    second, _ = service.list_orders(db, coin="USDT", limit=5, cursor=cursor)
+    assert not {o["id"] for o in first} & {o["id"] for o in second}
+    assert second[0]["id"] == orders[5]["id"]
+
+
+def test_price_sort_direction_follows_order_type(db):
+    trader = add_trader(db, 1)
+    for i, price in enumerate([5.3, 5.1, 5.2, 5.1, 5.4]):
+        add_order(db, trader.id, minutes=i, price=price, order_type="sell")
+        add_order(db, trader.id, minutes=i, price=price, order_type="buy")
+    db.commit()
+
+    service = P2POrderListingService()
+    sells = collect(service, db, order_type="sell", sort="price", limit=2)
+    buys = collect(service, db, order_type="buy", sort="price", limit=2)
+
+    assert [float(o["price"]) for o in sells] == [5.1, 5.1, 5.2, 5.3, 5.4]
+    assert [float(o["price"]) for o in buys] == [5.4, 5.3, 5.2, 5.1, 5.1]
+    assert len({o["id"] for o in sells}) == 5
+
+
+def test_invalid_or_foreign_cursor_is_rejected(db):
+    service = P2POrderListingService()
+    with pytest.raises(ValueError):
+        service.list_orders(db, cursor="!!not-base64!!")
+    with pytest.raises(ValueError):
+        service.list_orders(db, sort="newest", cursor=encode_cursor("price", 5.1, uuid.uuid4()))
+    assert decode_cursor(encode_cursor("price", 5.1, "abc"), "price") == ("5.1", "abc")
+    with pytest.raises(ValueError):
+        service.list_orders(db, sort="price", cursor=encode_cursor("price", "nan?", uuid.uuid4()))
+
+
+@pytest.mark.asyncio
+async def test_total_count_is_cached(db):
+    trader = add_trader(db, 1)
+    for i in range(3):
+        add_order(db, trader.id, minutes=i)
+    db.commit()
+
+    service = P2POrderListingService()
+    assert await service.count(db, coin="USDT") == 3
+    add_order(db, trader.id, minutes=10)
+    db.commit()
+    db.statements.clear()
+
+    assert await service.count(db, coin="USDT") == 3  # servido do cache
+    assert db.statements == []
+    assert await service.count(db, coin="USDT", order_type="sell") == 4
@@ -0,0 +1,113 @@
+"""
+P2P Stats Tests
+===============
+
+Trader counters move with trade transitions (one arithmetic UPDATE per
+table), the reconciliation job recounts them and the orders' available
+liquidity from p2p_trades, and market stats are served from a short-TTL
+in-memory snapshot.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.reputation import UserReputation
+from app.models.trader_profile import TraderProfile
+from app.services.p2p_stats_service import P2PStatsService
+
+BUYER = uuid.UUID(int=1)
+SELLER = uuid.UUID(int=2)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (TraderProfile, UserReputation):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.execute(text("CREATE TABLE p2p_trades (id INTEGER PRIMARY KEY, order_id INTEGER, buyer_id TEXT, seller_id TEXT, amount REAL, status TEXT)"))
+    session.execute(text("CREATE TABLE p2p_orders (id INTEGER PRIMARY KEY, cryptocurrency TEXT, order_type TEXT, status TEXT, total_amount REAL, available_amount REAL, updated_at TIMESTAMP)"))
+    for user_id in (BUYER, SELLER):
+        session.add(TraderProfile(user_id=user_id, display_name=str(user_id)[-4:]))
+        session.add(UserReputation(user_id=user_id))
+    session.commit()
+    yield session
+    session.close()
+
+
+def profile(db, user_id):
+    db.expire_all()
+    return db.query(TraderProfile).filter(TraderProfile.user_id == user_id).one()
+
+
+def test_transitions_update_counters_and_rates(db):
+    stats = P2PStatsService()
+    stats.record_transition(db, "created", [BUYER, SELLER])
+    stats.record_transition(db, "created", [BUYER, SELLER])
+    stats.record_transition(db, "completed", [BUYER, SELLER])
+    stats.record_transition(db, "disputed", [BUYER])
+    db.commit()
+
+    seller = profile(db, SELLER)
+    assert (seller.total_trades, seller.completed_trades, seller.success_rate) == (2, 1, 50.0)
+
+    reputation = db.query(UserReputation).filter(UserReputation.user_id == BUYER).one()
+    assert (reputation.disputed_trades, reputation.dispute_rate, reputation.completion_rate) == (1, 50.0, 50.0)
+
+    with pytest.raises(ValueError):
+        stats.record_transition(db, "exploded", [BUYER])
+
+
+def test_reconcile_fixes_drifted_counters(db):
+    stats = P2PStatsService()
+    for status in ("completed", "completed", "cancelled", "pending"):
+        db.execute(
+            text("INSERT INTO p2p_trades (buyer_id, seller_id, status) VALUES (:b, :s, :status)"),
+            {"b": str(BUYER), "s": str(SELLER), "status": status}
+        )
+    stats.record_transition(db, "created", [SELLER])  # contador fora de sincronia
+    db.commit()
+
+    assert stats.reconcile(db) == {"trader_profiles": 2, "user_reputations": 2, "p2p_orders": 0}
+    seller = profile(db, SELLER)
+    assert (seller.total_trades, seller.completed_trades, seller.success_rate) == (4, 2, 50.0)
+    assert stats.reconcile(db) == {"trader_profiles": 0, "user_reputations": 0, "p2p_orders": 0}
+
+
+def test_reconcile_returns_liquidity_of_cancelled_trades(db):
+    db.execute(text(
+        "INSERT INTO p2p_orders (id, cryptocurrency, order_type, status, total_amount, available_amount) "
+        "VALUES (1, 'USDT', 'sell', 'active', 10, 3)"
+    ))
+    for amount, status in ((2, "completed"), (1, "pending"), (4, "cancelled")):
+        db.execute(
+            text("INSERT INTO p2p_trades (order_id, buyer_id, seller_id, amount, status) VALUES (1, :b, :s, :amount, :status)"),
+            {"b": str(BUYER), "s": str(SELLER), "amount": amount, "status": status}
+        )
+    db.commit()
+
+    assert P2PStatsService().reconcile(db)["p2p_orders"] == 1
+    # 10 - (completed 2 + pending 1); o cancelado devolveu 4
+    assert db.execute(text("SELECT available_amount FROM p2p_orders WHERE id = 1")).scalar() == 7
+    assert P2PStatsService().reconcile(db)["p2p_orders"] == 0
+
+
+def test_market_stats_snapshot_is_cached(db):
+    stats = P2PStatsService()
+    insert = text("INSERT INTO p2p_orders (cryptocurrency, order_type, status) VALUES (:c, :t, 'active')")
+    db.execute(insert, {"c": "USDT", "t": "buy"})
+    db.execute(insert, {"c": "BTC", "t": "sell"})
+    db.commit()
+
+    assert stats.market_stats(db)["total_active_orders"] == 2
+    assert stats.market_stats(db, "usdt")["total_buy_orders"] == 1
+
+    db.execute(insert, {"c": "USDT", "t": "sell"})
+    db.commit()
+    assert stats.market_stats(db, "USDT")["total_active_orders"] == 1  # snapshot ainda válido
+
+    stats._market_at -= stats.MARKET_STATS_TTL
+    assert stats.market_stats(db, "USDT")["total_active_orders"] == 2
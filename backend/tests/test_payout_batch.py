@@ -0,0 +1,280 @@
+"""
+Payout Batch Tests
+==================
+
+Collection window, batched send with per-payout status tracking, the
+single-send fallback (only when the batch provably never left), settlement
+after the on-chain receipt (handler follow-ups go back to the main loop),
+idempotent submit, atomic batch claims shared by several workers and
+lease-aware recovery of the payout queue, plus the multi-output Bitcoin
+transaction builder.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.core.db as core_db
+from app.models.payout import PayoutRequest, PayoutStatus
+from app.services.payout_batch_service import BatchSendError, PayoutBatchService
+from app.services import payout_batch_service as module
+
+
+class FakePayoutService(PayoutBatchService):
+    """Records batch/single sends instead of touching a chain"""
+
+    def __init__(self, fail_batch=False, fail_addresses=(), uncertain_batch=False, receipt=True):
+        super().__init__()
+        self.fail_batch = fail_batch
+        self.fail_addresses = set(fail_addresses)
+        self.uncertain_batch = uncertain_batch
+        self.receipt = receipt
+        self.batches = []
+        self.singles = []
+        self.confirmed = []
+
+    async def _send_batch(self, db, network, asset, payouts):
+        self.batches.append([p.to_address for p in payouts])
+        if self.fail_batch:
+            raise BatchSendError("gas estimation failed")
+        if self.uncertain_batch:
+            raise TimeoutError("node did not answer eth_sendRawTransaction")
+        return f"0xbatch{len(self.batches)}"
+
+    async def _confirm(self, network, tx_hash):
+        self.confirmed.append(tx_hash)
+        return self.receipt
+
+    async def _send_single(self, db, payout):
+        self.singles.append(payout.to_address)
+        if payout.to_address in self.fail_addresses:
+            raise BatchSendError("insufficient funds")
+        return f"0xsingle{len(self.singles)}"
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    PayoutRequest.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(core_db, "SessionLocal", factory)
+    monkeypatch.setattr(module.settings, "PAYOUT_BATCH_WINDOW_SECONDS", 0.05)
+    monkeypatch.setattr(module.settings, "PAYOUT_BATCH_MAX_SIZE", 100)
+    return factory
+
+
+async def submit_many(service, db, addresses, asset="USDT", prefix="trade"):
+    payouts = []
+    for i, address in enumerate(addresses):
+        payouts.append(await service.submit(
+            db,
+            network="polygon",
+            asset=asset,
+            to_address=address,
+            amount=Decimal("1.5"),
+            reference_type="instant_trade",
+            reference_id=f"{prefix}-{i}",
+        ))
+    return payouts
+
+
+@pytest.mark.asyncio
+async def test_payouts_in_window_share_one_transaction(session_factory):
+    service = FakePayoutService()
+    handled = []
+    service.register_handler("instant_trade", lambda db, payout: handled.append(payout.reference_id))
+    db = session_factory()
+
+    payouts = await submit_many(service, db, ["0xa", "0xb", "0xc"])
+    results = await asyncio.gather(*(service.wait(p.id, timeout=2) for p in payouts))
+
+    assert [sorted(batch) for batch in service.batches] == [["0xa", "0xb", "0xc"]]
+    assert service.singles == []
+    assert {r["tx_hash"] for r in results} == {"0xbatch1"}
+    assert all(r["status"] == PayoutStatus.CONFIRMED.value and r["batch_size"] == 3 for r in results)
+    assert service.confirmed == ["0xbatch1"]  # um receipt por transação
+    assert sorted(handled) == ["trade-0", "trade-1", "trade-2"]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_to_single_sends(session_factory):
+    service = FakePayoutService(fail_batch=True, fail_addresses={"0xb"})
+    db = session_factory()
+
+    payouts = await submit_many(service, db, ["0xa", "0xb"])
+    results = {r["to_address"]: r for r in await asyncio.gather(*(service.wait(p.id, timeout=2) for p in payouts))}
+
+    assert sorted(service.singles) == ["0xa", "0xb"]
+    assert results["0xa"]["status"] == PayoutStatus.CONFIRMED.value
+    assert results["0xa"]["tx_hash"].startswith("0xsingle")
+    assert results["0xb"]["status"] == PayoutStatus.FAILED.value
+    assert "insufficient funds" in results["0xb"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_queues_are_per_network_and_asset(session_factory):
+    service = FakePayoutService()
+    db = session_factory()
+
+    usdt = await submit_many(service, db, ["0xa", "0xb"], asset="USDT")
+    matic = await submit_many(service, db, ["0xc", "0xd"], asset="MATIC", prefix="matic")
+    await asyncio.gather(*(service.wait(p.id, timeout=2) for p in usdt + matic))
+
+    assert sorted(sorted(batch) for batch in service.batches) == [["0xa", "0xb"], ["0xc", "0xd"]]
+
+
+@pytest.mark.asyncio
+async def test_uncertain_batch_goes_to_review_without_resending(session_factory):
+    service = FakePayoutService(uncertain_batch=True)
+    handled = []
+    service.register_handler("instant_trade", lambda db, payout: handled.append(payout.reference_id))
+    db = session_factory()
+
+    payouts = await submit_many(service, db, ["0xa", "0xb"])
+    results = await asyncio.gather(*(service.wait(p.id, timeout=2) for p in payouts))
+
+    assert service.singles == []  # o lote pode estar na rede: nada de reenvio
+    assert all(r["status"] == PayoutStatus.NEEDS_REVIEW.value for r in results)
+    assert handled == []
+
+
+@pytest.mark.asyncio
+async def test_reverted_receipt_fails_payout_and_skips_handler(session_factory):
+    service = FakePayoutService(receipt=False)
+    handled = []
+    service.register_handler("instant_trade", lambda db, payout: handled.append(payout.reference_id))
+    db = session_factory()
+
+    payouts = await submit_many(service, db, ["0xa", "0xb"])
+    results = await asyncio.gather(*(service.wait(p.id, timeout=2) for p in payouts))
+
+    assert all(r["status"] == PayoutStatus.FAILED.value and "revertida" in r["error"] for r in results)
+    assert handled == []
+
+
+@pytest.mark.asyncio
+async def test_submit_is_idempotent_per_reference(session_factory):
+    service = FakePayoutService()
+    db = session_factory()
+
+    first, = await submit_many(service, db, ["0xa"])
+    await service.wait(first.id, timeout=2)
+    retry, = await submit_many(service, db, ["0xa"])
+
+    assert retry.id == first.id
+    assert db.query(PayoutRequest).count() == 1
+    assert (await service.wait(retry.id))["status"] == PayoutStatus.CONFIRMED.value
+    assert service.singles == ["0xa"]  # pago uma vez só
+
+
+@pytest.mark.asyncio
+async def test_recover_requeues_and_flags_only_abandoned_payouts(session_factory):
+    db = session_factory()
+    old = datetime.utcnow() - timedelta(hours=1)
+    now = datetime.utcnow()
+    rows = [
+        ("trade-0", PayoutStatus.QUEUED, old, None),
+        ("trade-1", PayoutStatus.PROCESSING, old, old),  # lease expirado
+        ("trade-2", PayoutStatus.SUBMITTED, old, None),
+        ("trade-3", PayoutStatus.PROCESSING, now, now),  # outro worker enviando agora
+        ("trade-4", PayoutStatus.SUBMITTED, now, now),  # outro worker aguardando o receipt
+    ]
+    for i, (reference_id, status, created_at, stamp) in enumerate(rows):
+        db.add(PayoutRequest(
+            reference_type="instant_trade", reference_id=reference_id, network="polygon", asset="USDT",
+            to_address=f"0x{i}", amount=Decimal("1"), status=status.value, created_at=created_at,
+            claimed_at=stamp if status == PayoutStatus.PROCESSING else None,
+            submitted_at=stamp if status == PayoutStatus.SUBMITTED else None,
+            tx_hash=f"0xold{i}" if status == PayoutStatus.SUBMITTED else None,
+        ))
+    db.commit()
+
+    service = FakePayoutService()
+    counts = await service.recover()
+    await asyncio.sleep(0.2)
+
+    assert counts == {"queued": 1, "awaiting_receipt": 1, "needs_review": 1}
+    by_ref = {p.reference_id: p for p in session_factory().query(PayoutRequest).all()}
+    assert by_ref["trade-0"].status == PayoutStatus.CONFIRMED.value and service.singles == ["0x0"]
+    assert by_ref["trade-1"].status == PayoutStatus.NEEDS_REVIEW.value
+    assert by_ref["trade-2"].status == PayoutStatus.CONFIRMED.value and "0xold2" in service.confirmed
+    assert by_ref["trade-3"].status == PayoutStatus.PROCESSING.value
+    assert by_ref["trade-4"].status == PayoutStatus.SUBMITTED.value and "0xold4" not in service.confirmed
+
+
+@pytest.mark.asyncio
+async def test_two_workers_never_send_the_same_payouts(session_factory):
+    db = session_factory()
+    for i in range(3):
+        db.add(PayoutRequest(
+            reference_type="instant_trade", reference_id=f"trade-{i}", network="polygon", asset="USDT",
+            to_address=f"0x{i}", amount=Decimal("1"), status=PayoutStatus.QUEUED.value,
+        ))
+    db.commit()
+    payout_ids = [p.id for p in db.query(PayoutRequest).all()]
+    handled = []
+    workers = [FakePayoutService(), FakePayoutService()]
+    for worker in workers:
+        worker.register_handler("instant_trade", lambda db, payout: handled.append(payout.reference_id))
+
+    await asyncio.gather(*(worker.process_batch(("polygon", "USDT"), payout_ids) for worker in workers))
+
+    assert sum(len(worker.batches) for worker in workers) == 1
+    assert sorted(handled) == ["trade-0", "trade-1", "trade-2"]
+    assert {p.claimed_by for p in session_factory().query(PayoutRequest).all()} == {module.WORKER_ID}
+
+
+@pytest.mark.asyncio
+async def test_handler_follow_up_runs_on_the_main_loop_after_commit(session_factory):
+    service = FakePayoutService()
+    threads = []
+
+    async def notify(reference_id):
+        threads.append((reference_id, threading.get_ident()))
+
+    def handler(db, payout):
+        threads.append(("handler", threading.get_ident()))
+        return notify(payout.reference_id)
+
+    service.register_handler("instant_trade", handler)
+    db = session_factory()
+    payout, = await submit_many(service, db, ["0xa"])
+    await service.wait(payout.id, timeout=2)
+    await asyncio.sleep(0.05)
+
+    main = threading.get_ident()
+    assert threads[0][0] == "handler" and threads[0][1] != main  # handler na worker thread
+    assert threads[1] == ("trade-0", main)  # notificação no loop principal
+
+
+def test_multi_output_bitcoin_transaction():
+    pytest.importorskip("bitcoinlib")
+    from bitcoinlib.keys import Key
+    from bitcoinlib.transactions import Transaction
+
+    from app.services.btc_service import BTCService, UTXO
+
+    key = Key(network="bitcoin")
+    script = "76a914" + key.hash160.hex() + "88ac"
+    service = BTCService()
+    recipients = [Key(network="bitcoin").address() for _ in range(3)]
+
+    raw_tx = service._create_and_sign_transaction(
+        from_address=key.address(),
+        outputs=[(address, 10_000) for address in recipients],
+        private_key_wif=key.wif(),
+        utxos=[UTXO(txid="ab" * 32, vout=0, value=100_000, script_pubkey=script)],
+        fee_satoshis=2_000,
+    )
+
+    tx = Transaction.parse_hex(raw_tx, network="bitcoin")
+    amounts = sorted(output.value for output in tx.outputs)
+    assert amounts == [10_000, 10_000, 10_000, 68_000]  # 3 destinos + troco
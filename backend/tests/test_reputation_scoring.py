@@ -0,0 +1,112 @@
+"""
+Reputation Scoring Tests
+========================
+
+Reputation, badges and user fraud-risk features are computed for many
+traders at once (numpy), stored in trader_scores and read by primary key.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.reputation import TraderScore, UserReputation
+from app.models.user import User
+from app.services.reputation_scoring import BADGES, ReputationScoringPipeline, decode_mask, score_batch
+
+NOW = datetime(2026, 2, 20, 12, 0, 0)
+VETERAN = uuid.UUID(int=1)
+NEWBIE = uuid.UUID(int=2)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (User, UserReputation, TraderScore):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.execute(text("""
+        CREATE TABLE p2p_trades (
+            id INTEGER PRIMARY KEY, buyer_id TEXT, seller_id TEXT, status TEXT, total_fiat NUMERIC,
+            created_at DATETIME, completed_at DATETIME, updated_at DATETIME
+        )
+    """))
+    for user_id, age in ((VETERAN, 800), (NEWBIE, 2)):
+        session.add(User(
+            id=user_id, username=str(user_id)[-4:], email=f"{str(user_id)[-4:]}@x.io",
+            password_hash="x", created_at=NOW - timedelta(days=age)
+        ))
+    session.add(UserReputation(user_id=VETERAN, kyc_verified=True))
+    session.commit()
+    yield session
+    session.close()
+
+
+def add_trade(db, buyer, seller, status, minutes=5, days_ago=3, total=1000):
+    created = NOW - timedelta(days=days_ago)
+    db.execute(text("""
+        INSERT INTO p2p_trades (buyer_id, seller_id, status, total_fiat, created_at, completed_at, updated_at)
+        VALUES (:b, :s, :status, :total, :created, :done, :done)
+    """), {
+        "b": str(buyer), "s": str(seller), "status": status, "total": total,
+        "created": created, "done": created + timedelta(minutes=minutes)
+    })
+
+
+def test_score_batch_matches_service_rules():
+    features = {
+        "total_trades": np.array([0, 347, 12]),
+        "completed_trades": np.array([0, 342, 12]),
+        "disputed_trades": np.array([0, 2, 0]),
+        "recent_disputes": np.array([0, 1, 0]),
+        "trades_today": np.array([0, 3, 11]),
+        "total_volume_brl": np.array([0.0, 2_450_000.0, 5_000.0]),
+        "avg_completion_minutes": np.array([np.nan, 12.5, 4.0]),
+        "account_age_days": np.array([1, 456, 30]),
+        "kyc_verified": np.array([False, True, False]),
+    }
+    scores = score_batch(features)
+
+    # 98.56 - 5.76 + 20 + 7.5, limitado a 100
+    assert scores["reputation_score"].tolist() == [0.0, 100.0, 100.0]
+    assert scores["level_index"].tolist() == [0, 3, 1]  # newcomer, gold, bronze
+    assert decode_mask(int(scores["badges"][1]), BADGES) == ["high_volume", "trusted_seller", "verified_id"]
+    assert decode_mask(int(scores["badges"][2]), BADGES) == ["fast_trader"]
+    assert scores["user_risk_score"].tolist() == [25.0, 20.0, 30.0]
+
+
+def test_pipeline_stores_scores_and_rescores_dirty_users(db):
+    pipeline = ReputationScoringPipeline()
+    for _ in range(3):
+        add_trade(db, NEWBIE, VETERAN, "completed", minutes=6)
+    add_trade(db, NEWBIE, VETERAN, "disputed", days_ago=1)
+    add_trade(db, NEWBIE, VETERAN, "completed", days_ago=200)  # histórico antigo conta nas features
+    db.commit()
+
+    assert pipeline.run(db, now=NOW) == 2
+    veteran = db.get(TraderScore, VETERAN)
+    assert (veteran.total_trades, veteran.completed_trades, veteran.disputed_trades) == (5, 4, 1)
+    assert veteran.avg_completion_minutes == pytest.approx(5.75, abs=1e-3)
+    assert decode_mask(veteran.badges, BADGES) == ["fast_trader", "verified_id", "long_time_user"]
+    newbie = db.get(TraderScore, NEWBIE)
+    assert newbie.trader_level == "newcomer" and newbie.user_risk_score == 45.0  # conta nova + disputa recente
+
+    add_trade(db, NEWBIE, VETERAN, "completed", days_ago=0)
+    db.commit()
+    assert pipeline.run(db, [VETERAN], now=NOW) == 1
+    db.expire_all()
+    assert db.get(TraderScore, VETERAN).total_trades == 6
+    assert db.get(TraderScore, NEWBIE).total_trades == 5
+
+
+def test_get_computes_missing_score_once(db):
+    pipeline = ReputationScoringPipeline()
+    add_trade(db, NEWBIE, VETERAN, "completed")
+    db.commit()
+
+    assert pipeline.get(db, str(NEWBIE)).completed_trades == 1
+    assert pipeline.get(db, uuid.UUID(int=99)) is None  # sem trades: sem score
@@ -0,0 +1,183 @@
+"""
+RPC Pool Simulator Tests
+========================
+
+Local fake JSON-RPC endpoints (slow, failing, healthy) exercise score-based
+routing, failover, eviction with later re-probing and hedged reads, both
+through the async pool and through web3 via PooledHTTPProvider.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from web3 import Web3
+
+from app.services.rpc_pool import PooledHTTPProvider, RPCEndpointPool
+
+
+class FakeEndpoint:
+    """Async fake endpoint: fixed delay, optional failure"""
+
+    def __init__(self, delay=0.0, fail=False, block=100):
+        self.delay = delay
+        self.fail = fail
+        self.block = block
+        self.requests = 0
+
+
+def async_client(endpoints):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        endpoint = endpoints[str(request.url)]
+        endpoint.requests += 1
+        await asyncio.sleep(endpoint.delay)
+        if endpoint.fail:
+            return httpx.Response(503, text="unavailable")
+        body = json.loads(request.content)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": hex(endpoint.block)})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def local_servers():
+    """Real HTTP servers for the synchronous web3 path"""
+    servers = []
+
+    def start(fail=False, block=1):
+        state = {"requests": 0}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                state["requests"] += 1
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if fail:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                payload = json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": hex(block)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}", state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_web3_fails_over_and_demotes_failing_endpoint(local_servers):
+    bad_url, bad = local_servers(fail=True)
+    good_url, good = local_servers(block=42)
+    pool = RPCEndpointPool("polygon", [bad_url, good_url])
+    pool.endpoints[good_url].latencies.append(1.0)  # o ruim começa como preferido
+    w3 = Web3(PooledHTTPProvider(pool))
+
+    results = [w3.eth.block_number for _ in range(6)]
+
+    assert results == [42] * 6
+    # Uma falha basta para o score mandar o tráfego para o endpoint saudável
+    assert bad["requests"] == 1
+    assert good["requests"] == 6
+    assert pool.ranked()[0].url == good_url
+
+
+@pytest.mark.asyncio
+async def test_routes_to_best_scoring_endpoint():
+    endpoints = {"http://slow/": FakeEndpoint(delay=0.05, block=1), "http://fast/": FakeEndpoint(block=2)}
+    pool = RPCEndpointPool("ethereum", list(endpoints), client=async_client(endpoints))
+
+    for _ in range(2):
+        for endpoint in pool.endpoints.values():
+            await pool._send(endpoint, {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []})
+    before = endpoints["http://slow/"].requests
+    results = [await pool.call("eth_blockNumber") for _ in range(5)]
+
+    assert results == ["0x2"] * 5
+    assert endpoints["http://slow/"].requests == before
+    assert pool.ranked()[0].url == "http://fast/"
+
+
+@pytest.mark.asyncio
+async def test_hedged_read_returns_backup_answer_after_p95_delay():
+    endpoints = {"http://primary/": FakeEndpoint(delay=1.0, block=1), "http://backup/": FakeEndpoint(delay=0.01, block=2)}
+    pool = RPCEndpointPool("base", list(endpoints), hedge=True, client=async_client(endpoints))
+    pool.endpoints["http://primary/"].latencies.extend([0.02] * 20)  # p95 = 20ms
+    pool.endpoints["http://backup/"].latencies.extend([0.05] * 20)
+
+    start = time.monotonic()
+    result = await pool.call("eth_blockNumber")
+
+    assert result == "0x2"
+    assert time.monotonic() - start < 0.5
+    assert endpoints["http://primary/"].requests == 1
+    # O perdedor cancelado não é penalizado
+    assert pool.endpoints["http://primary/"].error_rate == 0
+
+
+@pytest.mark.asyncio
+async def test_evicted_endpoint_is_probed_and_restored():
+    endpoints = {"http://flaky/": FakeEndpoint(fail=True), "http://ok/": FakeEndpoint()}
+    pool = RPCEndpointPool("bsc", list(endpoints), client=async_client(endpoints))
+    flaky = pool.endpoints["http://flaky/"]
+
+    for _ in range(pool.EVICT_AFTER_FAILURES):
+        with pytest.raises(Exception):
+            await pool._send(flaky, {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []})
+    assert flaky.evicted
+    assert [e.url for e in pool.ranked()] == ["http://ok/"]
+
+    # Ainda doente quando a eviction vence: volta com backoff maior
+    flaky.evicted_until = time.monotonic() - 1
+    assert await pool.probe() == 0
+    assert flaky.evictions == 2
+
+    endpoints["http://flaky/"].fail = False
+    flaky.evicted_until = time.monotonic() - 1
+    assert await pool.probe() == 1
+    assert not flaky.evicted
+    assert {e.url for e in pool.ranked()} == {"http://flaky/", "http://ok/"}
+
+
+def test_send_raw_transaction_is_never_failed_over(local_servers):
+    bad_url, bad = local_servers(fail=True)
+    good_url, good = local_servers()
+    pool = RPCEndpointPool("polygon", [bad_url, good_url])
+    pool.endpoints[good_url].latencies.append(1.0)  # o ruim é o preferido
+
+    with pytest.raises(Exception):
+        pool.make_request("eth_sendRawTransaction", ["0xdead"])
+
+    # A TX pode ter chegado ao primeiro nó: não é retransmitida em outro
+    assert bad["requests"] == 1
+    assert good["requests"] == 0
+
+
+def test_pools_are_keyed_by_url_set(monkeypatch):
+    from app.services.rpc_pool import RPCPoolManager, settings
+
+    monkeypatch.setattr(settings, "RPC_POOL_PUBLIC_FALLBACKS", False)
+    monkeypatch.setattr(settings, "RPC_POOL_URLS", {})
+    manager = RPCPoolManager()
+
+    default = manager.pool("polygon")
+    custom = manager.pool("polygon", "http://custom/")
+
+    assert custom is not default
+    assert "http://custom/" not in default.endpoints
+    assert list(custom.endpoints) == ["http://custom/"]
+    assert manager.pool("polygon", "http://custom/") is custom
@@ -0,0 +1,131 @@
+"""
+Transaction History Tests
+=========================
+
+Incremental sync cursors and keyset pagination for the local
+per-address transaction history.
+"""
+
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.transaction_history import AddressTransaction, AddressSyncCursor
+from app.services.transaction_history_service import (
+    TransactionHistoryService,
+    decode_cursor,
+    encode_cursor,
+)
+
+ADDRESS = "0xAbC0000000000000000000000000000000000001"
+OTHER = "0x9990000000000000000000000000000000000002"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    AddressTransaction.__table__.create(engine)
+    AddressSyncCursor.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def make_native(block: int, ts: int, tx_hash: str, incoming: bool = True) -> dict:
+    return {
+        "hash": tx_hash,
+        "blockNumber": str(block),
+        "timeStamp": str(ts),
+        "from": OTHER if incoming else ADDRESS.lower(),
+        "to": ADDRESS.lower() if incoming else OTHER,
+        "value": str(10 ** 18),
+        "gasUsed": "21000",
+        "gasPrice": "1000000000",
+        "isError": "0",
+    }
+
+
+class FakeExplorer:
+    """Etherscan-like fake that honours startblock and records requests"""
+
+    def __init__(self, txs):
+        self.txs = txs
+        self.start_blocks = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        if params["action"] == "tokentx":
+            return httpx.Response(200, json={"status": "0", "message": "No transactions found", "result": []})
+        start = int(params["startblock"])
+        self.start_blocks.append(start)
+        result = [tx for tx in self.txs if int(tx["blockNumber"]) >= start]
+        return httpx.Response(200, json={"status": "1" if result else "0", "result": result})
+
+
+@pytest.fixture
+def explorer(monkeypatch):
+    fake = FakeExplorer([make_native(100 + i, 1_700_000_000 + i * 60, f"0x{i:064x}") for i in range(30)])
+    real_client = httpx.AsyncClient
+
+    def client_factory(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(fake.handler)
+        return real_client(*args, **kwargs)
+
+    monkeypatch.setattr("app.services.transaction_history_service.httpx.AsyncClient", client_factory)
+    return fake
+
+
+def test_cursor_roundtrip():
+    ts = datetime(2026, 1, 2, 3, 4, 5)
+    assert decode_cursor(encode_cursor(ts, "0xabc", 3)) == (ts, "0xabc", 3)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_only_fetches_new_blocks(db, explorer):
+    service = TransactionHistoryService()
+
+    inserted = await service.sync_addresses(db, [(ADDRESS, "polygon")])
+    assert inserted == 30
+    cursor = db.query(AddressSyncCursor).one()
+    assert cursor.address == ADDRESS.lower()
+    assert cursor.last_block == 129
+
+    # Nova transação num bloco mais novo
+    explorer.txs.append(make_native(200, 1_800_000_000, "0x" + "f" * 64, incoming=False))
+    inserted = await service.sync_addresses(db, [(ADDRESS, "polygon")], force=True)
+    assert inserted == 1
+    assert explorer.start_blocks[-1] == 129
+    assert db.query(AddressSyncCursor).one().last_block == 200
+
+    # Dentro do intervalo mínimo não sincroniza de novo
+    assert await service.sync_addresses(db, [(ADDRESS, "polygon")]) == 0
+
+
+@pytest.mark.asyncio
+async def test_keyset_pagination_and_filters(db, explorer):
+    service = TransactionHistoryService()
+    await service.sync_addresses(db, [(ADDRESS, "polygon")])
+
+    seen = []
+    cursor = None
+    while True:
+        rows, cursor = service.get_history(db, [(ADDRESS, "polygon")], cursor=cursor, limit=7)
+        seen.extend(row.tx_hash for row in rows)
+        if not cursor:
+            break
+
+    assert len(seen) == 30
+    assert len(set(seen)) == 30
+    assert seen[0] == f"0x{29:064x}"
+
+    rows, _ = service.get_history(db, [(ADDRESS, "polygon")], token="matic", limit=5)
+    assert len(rows) == 5
+    rows, _ = service.get_history(db, [(ADDRESS, "polygon")], token="USDT")
+    assert rows == []
+    rows, _ = service.get_history(db, [(ADDRESS, "polygon")], network="bsc")
+    assert rows == []
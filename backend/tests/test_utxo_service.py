@@ -0,0 +1,98 @@
+"""
+UTXO Service Tests
+==================
+
+Local scriptPubKey derivation, branch-and-bound / knapsack coin selection
+and incremental reconciliation of the per-address UTXO cache.
+"""
+
+import pytest
+
+from app.services.btc_service import UTXO
+from app.services.utxo_service import (
+    InsufficientFundsError,
+    UTXOSetCache,
+    script_pubkey_for_address,
+    select_coins,
+)
+
+
+def utxo(value, txid="aa", vout=0, confirmed=True):
+    return UTXO(txid=txid * 32 if len(txid) == 2 else txid, vout=vout, value=value, confirmed=confirmed)
+
+
+def test_script_pubkey_matches_bitcoinlib():
+    pytest.importorskip("bitcoinlib")
+    from bitcoinlib.keys import Key
+
+    key = Key(network="bitcoin")
+    assert script_pubkey_for_address(key.address()) == "76a914" + key.hash160.hex() + "88ac"
+
+    segwit = key.address(encoding="bech32")
+    assert script_pubkey_for_address(segwit) == "0014" + key.hash160.hex()
+
+    ltc = Key(network="litecoin")
+    assert script_pubkey_for_address(ltc.address(), "litecoin") == "76a914" + ltc.hash160.hex() + "88ac"
+
+
+def test_script_pubkey_rejects_bad_checksum():
+    with pytest.raises(ValueError):
+        script_pubkey_for_address("1BoatSLRHtKNngkdXEeobR76b53LETtpyX")
+
+
+def test_branch_and_bound_finds_changeless_match():
+    fee_rate = 1
+    input_fee = 148
+    base_fee = 10 + 34
+    # 30_000 + 20_000 cobrem exatamente alvo + fees -> sem troco
+    target = 50_000 - 2 * input_fee - base_fee
+    utxos = [utxo(70_000, "01"), utxo(30_000, "02"), utxo(20_000, "03"), utxo(5_000, "04")]
+
+    selection = select_coins(utxos, target, fee_rate)
+
+    assert selection.algorithm == "bnb"
+    assert selection.change == 0
+    assert sorted(u.value for u in selection.inputs) == [20_000, 30_000]
+    assert selection.input_value == target + selection.fee
+
+
+def test_knapsack_uses_few_inputs_and_returns_change():
+    utxos = [utxo(10_000, txid=f"{i:02x}") for i in range(20)] + [utxo(500_000, "ff")]
+
+    selection = select_coins(utxos, 300_000, fee_rate=5, seed=1)
+
+    assert selection.algorithm == "knapsack"
+    assert [u.value for u in selection.inputs] == [500_000]
+    assert selection.change == 500_000 - 300_000 - selection.fee
+    assert selection.fee == 5 * (10 + 148 + 2 * 34)
+
+
+def test_insufficient_funds():
+    with pytest.raises(InsufficientFundsError):
+        select_coins([utxo(1_000, "01"), utxo(2_000, "02")], 5_000, fee_rate=2)
+
+
+def test_cache_applies_spends_until_api_catches_up():
+    cache = UTXOSetCache()
+    a, b = utxo(10_000, "01"), utxo(20_000, "02")
+    api = [a, b]
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return list(api)
+
+    assert len(cache.get("bitcoin", "addr", fetch)) == 2
+    assert len(cache.get("bitcoin", "addr", fetch)) == 2
+    assert len(calls) == 1  # segundo acesso servido do cache
+
+    change = utxo(5_000, "03", confirmed=False)
+    cache.apply_spend("bitcoin", "addr", [a], [change])
+    assert cache.outpoints("bitcoin", "addr") == {(b.txid, 0), (change.txid, 0)}
+
+    # API atrasada ainda lista o input gasto; troco ainda não confirmado
+    refreshed = cache.get("bitcoin", "addr", fetch, max_age=0)
+    assert {u.txid for u in refreshed} == {b.txid, change.txid}
+
+    cache.invalidate("bitcoin", "addr")
+    assert {u.txid for u in cache.get("bitcoin", "addr", fetch)} == {a.txid, b.txid}
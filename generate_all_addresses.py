@@ -11,8 +11,7 @@ from sqlalchemy.orm import sessionmaker
 sys.path.insert(0, '/Users/josecarlosmartins/Documents/HOLDWallet/backend')
 
 from app.models import Wallet, User, Address
-from app.services.wallet_service import WalletService
-from app.services.crypto_service import CryptoService
+from app.services.bulk_address_service import ALL_NETWORKS, bulk_address_service
 
 # Database
 DATABASE_URL = "sqlite:////Users/josecarlosmartins/Documents/HOLDWallet/backend/holdwallet.db"
@@ -20,13 +19,6 @@ engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
 db = SessionLocal()
 
-# All 15 networks
-ALL_NETWORKS = [
-    "bitcoin", "ethereum", "polygon", "bsc", "base",
-    "tron", "solana", "litecoin", "dogecoin", "cardano",
-    "avalanche", "polkadot", "chainlink", "shiba", "xrp"
-]
-
 async def generate_addresses():
     """Generate addresses for all networks."""
     try:
@@ -40,10 +32,6 @@ async def generate_addresses():
         
         print(f"✅ Found wallet: {wallet.name} (type: {wallet.wallet_type})")
         
-        # Initialize services
-        crypto_service = CryptoService()
-        wallet_service = WalletService(crypto_service=crypto_service)
-        
         # Get existing addresses
         existing_addresses = db.query(Address).filter(
             Address.wallet_id == wallet_id
@@ -53,23 +41,9 @@ async def generate_addresses():
         print(f"\n📊 Existing addresses: {existing_networks}")
         print(f"📊 Missing networks: {set(ALL_NETWORKS) - existing_networks}\n")
         
-        # Generate missing addresses
-        for network in ALL_NETWORKS:
-            if network not in existing_networks:
-                try:
-                    print(f"🔨 Generating {network} address...", end=" ")
-                    
-                    address = await wallet_service.generate_address(
-                        db=db,
-                        wallet=wallet,
-                        address_type="receiving",
-                        network=network
-                    )
-                    
-                    print(f"✅ {address.address}")
-                    
-                except Exception as e:
-                    print(f"❌ Error: {str(e)}")
+        # Generate missing addresses (seed derived once, single bulk insert)
+        created = bulk_address_service.backfill(db, [wallet], networks=ALL_NETWORKS, workers=1)
+        print(f"🔨 Generated {created} addresses")
         
         # Show final status
         final_addresses = db.query(Address).filter(